@@ -0,0 +1,62 @@
+"""add_user_contact_trigram_search
+
+Revision ID: 7c1e2f4a9b10
+Revises: 2477df9859e9
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e2f4a9b10'
+down_revision: Union[str, None] = '2477df9859e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Stored generated column so searches can be indexed instead of concatenating per row
+    op.execute("""
+        ALTER TABLE user_contacts
+        ADD COLUMN IF NOT EXISTS full_name VARCHAR(511)
+        GENERATED ALWAYS AS (first_name || ' ' || last_name) STORED
+    """)
+
+    # Trigram indexes serve substring (ILIKE '%q%') and similarity (%) searches
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_contacts_full_name_trgm
+        ON user_contacts USING gin (full_name gin_trgm_ops)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_contacts_email_trgm
+        ON user_contacts USING gin (email gin_trgm_ops)
+    """)
+
+    # Btree indexes serve per-owner prefix (LIKE 'q%') autocomplete
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_contacts_owner_full_name_prefix
+        ON user_contacts (owner_user_id, lower(full_name) text_pattern_ops)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_contacts_owner_last_name_prefix
+        ON user_contacts (owner_user_id, lower(last_name) text_pattern_ops)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_contacts_owner_email_prefix
+        ON user_contacts (owner_user_id, lower(email) text_pattern_ops)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_user_contacts_owner_email_prefix")
+    op.execute("DROP INDEX IF EXISTS idx_user_contacts_owner_last_name_prefix")
+    op.execute("DROP INDEX IF EXISTS idx_user_contacts_owner_full_name_prefix")
+    op.execute("DROP INDEX IF EXISTS idx_user_contacts_email_trgm")
+    op.execute("DROP INDEX IF EXISTS idx_user_contacts_full_name_trgm")
+    op.execute("ALTER TABLE user_contacts DROP COLUMN IF EXISTS full_name")
@@ -0,0 +1,50 @@
+"""add_dignitary_visibility
+
+Revision ID: 9d4b6a2c8e31
+Revises: 7c1e2f4a9b10
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4b6a2c8e31'
+down_revision: Union[str, None] = '7c1e2f4a9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'dignitary_visibility',
+        sa.Column('dignitary_id', sa.Integer(), sa.ForeignKey('dignitaries.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('location_id', sa.Integer(), sa.ForeignKey('locations.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('country_code', sa.String(), nullable=False),
+        sa.Column('last_appointment_date', sa.Date(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('idx_dignitary_visibility_country_date', 'dignitary_visibility', ['country_code', 'last_appointment_date'])
+    op.create_index('idx_dignitary_visibility_location_date', 'dignitary_visibility', ['location_id', 'last_appointment_date'])
+
+    # Backfill from existing appointments; the application keeps it current afterwards
+    op.execute("""
+        INSERT INTO dignitary_visibility (dignitary_id, location_id, country_code, last_appointment_date, updated_at)
+        SELECT ad.dignitary_id, l.id, l.country_code,
+               MAX(GREATEST(a.preferred_date, a.appointment_date, ce.start_date)),
+               NOW() AT TIME ZONE 'utc'
+        FROM appointment_dignitaries ad
+        JOIN appointments a ON ad.appointment_id = a.id
+        JOIN locations l ON a.location_id = l.id
+        LEFT JOIN calendar_events ce ON a.calendar_event_id = ce.id
+        GROUP BY ad.dignitary_id, l.id, l.country_code
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_dignitary_visibility_location_date', table_name='dignitary_visibility')
+    op.drop_index('idx_dignitary_visibility_country_date', table_name='dignitary_visibility')
+    op.drop_table('dignitary_visibility')
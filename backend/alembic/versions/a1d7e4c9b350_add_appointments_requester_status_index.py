@@ -0,0 +1,26 @@
+"""add_appointments_requester_status_index
+
+Revision ID: a1d7e4c9b350
+Revises: f4b8d1c6a937
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1d7e4c9b350'
+down_revision: Union[str, None] = 'f4b8d1c6a937'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_appointments_requester_status', 'appointments', ['requester_id', 'status'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_appointments_requester_status', table_name='appointments')
@@ -0,0 +1,59 @@
+"""add_dignitary_search_vector
+
+Revision ID: b3f8e1d5c7a2
+Revises: 9d4b6a2c8e31
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f8e1d5c7a2'
+down_revision: Union[str, None] = '9d4b6a2c8e31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('dignitaries', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    # A trigger rather than a generated column: casting the primary_domain enum to text is not immutable
+    op.execute("""
+        CREATE OR REPLACE FUNCTION dignitaries_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('simple', coalesce(NEW.first_name, '') || ' ' || coalesce(NEW.last_name, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(NEW.organization, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(NEW.title_in_organization, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(NEW.primary_domain::text, '') || ' ' || coalesce(NEW.primary_domain_other, '')), 'C');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER dignitaries_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF first_name, last_name, organization, title_in_organization, primary_domain, primary_domain_other
+        ON dignitaries
+        FOR EACH ROW EXECUTE FUNCTION dignitaries_search_vector_update()
+    """)
+
+    # Backfill existing rows through the trigger
+    op.execute("UPDATE dignitaries SET first_name = first_name")
+
+    op.execute("CREATE INDEX IF NOT EXISTS idx_dignitaries_search_vector ON dignitaries USING gin (search_vector)")
+    op.create_index('idx_dignitaries_country_code', 'dignitaries', ['country_code'])
+    op.create_index('idx_dignitaries_name', 'dignitaries', ['last_name', 'first_name'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_dignitaries_name', table_name='dignitaries')
+    op.drop_index('idx_dignitaries_country_code', table_name='dignitaries')
+    op.execute("DROP INDEX IF EXISTS idx_dignitaries_search_vector")
+    op.execute("DROP TRIGGER IF EXISTS dignitaries_search_vector_trigger ON dignitaries")
+    op.execute("DROP FUNCTION IF EXISTS dignitaries_search_vector_update()")
+    op.drop_column('dignitaries', 'search_vector')
@@ -0,0 +1,56 @@
+"""add_appointment_hot_path_indexes
+
+Revision ID: b6e2f9a8d413
+Revises: a1d7e4c9b350
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2f9a8d413'
+down_revision: Union[str, None] = 'a1d7e4c9b350'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TERMINAL_STATUSES = "'CANCELLED', 'REJECTED', 'COMPLETED'"
+
+# (name, CREATE INDEX body), created without locking the tables against writes
+INDEXES = [
+    ("idx_calendar_events_start_date_time", "ON calendar_events (start_date, start_time)"),
+    ("idx_appointments_status_sub_status", "ON appointments (status, sub_status)"),
+    (
+        "idx_appointments_upcoming_preferred_date",
+        f"ON appointments (preferred_date) WHERE calendar_event_id IS NULL AND status NOT IN ({TERMINAL_STATUSES})",
+    ),
+    (
+        "idx_appointments_upcoming_preferred_end_date",
+        "ON appointments (preferred_end_date) WHERE calendar_event_id IS NULL AND preferred_start_date IS NOT NULL "
+        f"AND status NOT IN ({TERMINAL_STATUSES})",
+    ),
+    # Older databases already have this one from add_appointment_dignitary_table
+    ("ix_appointment_dignitaries_appointment_id", "ON appointment_dignitaries (appointment_id)"),
+    ("idx_appointment_dignitaries_dignitary_appointment", "ON appointment_dignitaries (dignitary_id, appointment_id)"),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, body in INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {body}")
+        # Covered by the (dignitary_id, appointment_id) index
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_appointment_dignitaries_dignitary_id")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_appointment_dignitaries_dignitary_id ON appointment_dignitaries (dignitary_id)")
+        for name, _ in reversed(INDEXES):
+            if name == "ix_appointment_dignitaries_appointment_id":
+                continue  # may predate this revision
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
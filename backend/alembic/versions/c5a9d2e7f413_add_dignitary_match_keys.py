@@ -0,0 +1,93 @@
+"""add_dignitary_match_keys
+
+Revision ID: c5a9d2e7f413
+Revises: b3f8e1d5c7a2
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Optional, Sequence, Union
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a9d2e7f413'
+down_revision: Union[str, None] = 'b3f8e1d5c7a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copy of the match key normalization in utils/dignitary_matching.py as of this revision,
+# so the backfill does not change when the application code does
+_HONORIFICS = {
+    "mr", "mrs", "ms", "miss", "dr", "prof", "sir", "hon", "honorable", "honourable",
+    "shri", "smt", "sri", "hh", "his", "her", "excellency", "rev", "jr", "sr",
+}
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+
+
+def _normalize_name(first_name: Optional[str], last_name: Optional[str]) -> Optional[str]:
+    raw = unicodedata.normalize("NFKD", f"{first_name or ''} {last_name or ''}")
+    raw = "".join(ch for ch in raw if not unicodedata.combining(ch)).lower()
+    words = [word for word in _NON_ALNUM.sub(" ", raw).split() if word not in _HONORIFICS]
+    return " ".join(words) or None
+
+
+def _normalize_email(email: Optional[str]) -> Optional[str]:
+    if not email or "@" not in email:
+        return None
+    local, _, domain = email.strip().lower().rpartition("@")
+    local = local.split("+", 1)[0]
+    if domain in ("gmail.com", "googlemail.com"):
+        local = local.replace(".", "")
+        domain = "gmail.com"
+    return f"{local}@{domain}" if local else None
+
+
+def _normalize_phone(phone: Optional[str]) -> Optional[str]:
+    if not phone:
+        return None
+    digits = re.sub(r"\D", "", phone)
+    if len(digits) < 7:
+        return None
+    return digits[-10:]
+
+
+def upgrade() -> None:
+    op.add_column('dignitaries', sa.Column('name_key', sa.String(), nullable=True))
+    op.add_column('dignitaries', sa.Column('email_key', sa.String(), nullable=True))
+    op.add_column('dignitaries', sa.Column('phone_key', sa.String(), nullable=True))
+
+    # Backfill; the application maintains the keys on insert/update from here on
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT id, first_name, last_name, email, phone FROM dignitaries")).fetchall()
+    updates = [
+        {
+            "id": row.id,
+            "name_key": _normalize_name(row.first_name, row.last_name),
+            "email_key": _normalize_email(row.email),
+            "phone_key": _normalize_phone(row.phone),
+        }
+        for row in rows
+    ]
+    for start in range(0, len(updates), 1000):
+        connection.execute(
+            sa.text("UPDATE dignitaries SET name_key = :name_key, email_key = :email_key, phone_key = :phone_key WHERE id = :id"),
+            updates[start:start + 1000],
+        )
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_dignitaries_name_key_trgm ON dignitaries USING gin (name_key gin_trgm_ops)")
+    op.create_index('ix_dignitaries_email_key', 'dignitaries', ['email_key'])
+    op.create_index('ix_dignitaries_phone_key', 'dignitaries', ['phone_key'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_dignitaries_phone_key', table_name='dignitaries')
+    op.drop_index('ix_dignitaries_email_key', table_name='dignitaries')
+    op.execute("DROP INDEX IF EXISTS idx_dignitaries_name_key_trgm")
+    op.drop_column('dignitaries', 'phone_key')
+    op.drop_column('dignitaries', 'email_key')
+    op.drop_column('dignitaries', 'name_key')
@@ -0,0 +1,119 @@
+"""add_audit_log_partitioning
+
+Revision ID: c8f3a6d1e592
+Revises: b6e2f9a8d413
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f3a6d1e592'
+down_revision: Union[str, None] = 'b6e2f9a8d413'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created ahead of time; the app's audit log writer keeps extending them (AUDIT_LOG_PARTITIONS_AHEAD)
+PARTITIONS_AHEAD = 2
+
+COLUMNS = "user_id, entity_type, entity_id, action, previous_state, new_state, client_ip, user_agent, notes, created_at"
+
+
+def _month_start(day: date, months_ahead: int = 0) -> date:
+    month_index = day.year * 12 + day.month - 1 + months_ahead
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    # Databases created before migrations managed this table may not have it
+    has_legacy = sa.inspect(conn).has_table('audit_logs')
+    if has_legacy:
+        op.rename_table('audit_logs', 'audit_logs_legacy')
+        op.execute("ALTER INDEX IF EXISTS audit_logs_pkey RENAME TO audit_logs_legacy_pkey")
+        op.execute("DROP INDEX IF EXISTS ix_audit_logs_id")
+        op.execute("DROP INDEX IF EXISTS ix_audit_logs_user_id")
+        op.execute("ALTER SEQUENCE IF EXISTS audit_logs_id_seq RENAME TO audit_logs_legacy_id_seq")
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id BIGSERIAL NOT NULL,
+            user_id INTEGER,
+            entity_type VARCHAR NOT NULL,
+            entity_id INTEGER NOT NULL,
+            action VARCHAR NOT NULL,
+            previous_state JSON,
+            new_state JSON,
+            client_ip VARCHAR,
+            user_agent VARCHAR,
+            notes TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+
+    first_month = _month_start(datetime.utcnow().date())
+    if has_legacy:
+        oldest = conn.execute(sa.text("SELECT min(created_at) FROM audit_logs_legacy")).scalar()
+        if oldest:
+            first_month = min(first_month, _month_start(oldest.date()))
+    last_month = _month_start(datetime.utcnow().date(), PARTITIONS_AHEAD)
+
+    month = first_month
+    while month <= last_month:
+        op.execute(
+            f"CREATE TABLE audit_logs_y{month.year}m{month.month:02d} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_month_start(month, 1).isoformat()}')"
+        )
+        month = _month_start(month, 1)
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    # Indexes on the parent are created on every partition, present and future
+    op.execute("CREATE INDEX ix_audit_logs_created_at_brin ON audit_logs USING brin (created_at)")
+    op.create_index('ix_audit_logs_entity', 'audit_logs', ['entity_type', 'entity_id'])
+    op.create_index('ix_audit_logs_user_id', 'audit_logs', ['user_id'])
+
+    if has_legacy:
+        op.execute(f"""
+            INSERT INTO audit_logs ({COLUMNS})
+            SELECT user_id, entity_type, entity_id, action, previous_state, new_state, client_ip, user_agent, notes,
+                   COALESCE(created_at, now() AT TIME ZONE 'utc')
+            FROM audit_logs_legacy
+            ORDER BY id
+        """)
+        op.drop_table('audit_logs_legacy')
+
+
+def downgrade() -> None:
+    op.create_table(
+        'audit_logs_unpartitioned',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('entity_type', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('previous_state', sa.JSON(), nullable=True),
+        sa.Column('new_state', sa.JSON(), nullable=True),
+        sa.Column('client_ip', sa.String(), nullable=True),
+        sa.Column('user_agent', sa.String(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    # Entries without a user (captured outside a request) cannot be kept in the old table
+    op.execute(f"""
+        INSERT INTO audit_logs_unpartitioned ({COLUMNS})
+        SELECT {COLUMNS} FROM audit_logs
+        WHERE user_id IN (SELECT id FROM users)
+        ORDER BY created_at, id
+    """)
+    op.drop_table('audit_logs')
+    op.rename_table('audit_logs_unpartitioned', 'audit_logs')
+    op.execute("ALTER INDEX audit_logs_unpartitioned_pkey RENAME TO audit_logs_pkey")
+    op.execute("ALTER SEQUENCE audit_logs_unpartitioned_id_seq RENAME TO audit_logs_id_seq")
+    op.create_index('ix_audit_logs_id', 'audit_logs', ['id'])
+    op.create_index('ix_audit_logs_user_id', 'audit_logs', ['user_id'])
@@ -0,0 +1,45 @@
+"""add_notification_digest_entries
+
+Revision ID: f4b8d1c6a937
+Revises: e7c3a1f9b264
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b8d1c6a937'
+down_revision: Union[str, None] = 'e7c3a1f9b264'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'notification_digest_entries',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('appointment_id', sa.Integer(), sa.ForeignKey('appointments.id', ondelete='CASCADE'), nullable=True),
+        sa.Column('trigger_type', sa.String(), nullable=False),
+        sa.Column('subject', sa.String(), nullable=False),
+        sa.Column('details', postgresql.JSONB(), nullable=False, server_default='{}'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_notification_digest_entries_id', 'notification_digest_entries', ['id'])
+    # Only unsent entries are ever looked up, per user
+    op.create_index(
+        'idx_notification_digest_entries_pending', 'notification_digest_entries', ['user_id', 'created_at'],
+        postgresql_where=sa.text("sent_at IS NULL")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_notification_digest_entries_pending', table_name='notification_digest_entries')
+    op.drop_index('ix_notification_digest_entries_id', table_name='notification_digest_entries')
+    op.drop_table('notification_digest_entries')
@@ -6,17 +6,16 @@ from sqlalchemy.orm import Session
 from typing import Optional, List, Callable
 from datetime import datetime, timedelta, date
 import jwt
-from google.oauth2 import id_token
-from google.auth.transport import requests
 import os
+import asyncio
 from jwt.exceptions import InvalidTokenError
 from functools import wraps
 import json
 from config import environment  # Import the centralized environment module
-from database import WriteSessionLocal, ReadSessionLocal, write_engine, read_engine
+from database import WriteSessionLocal, ReadSessionLocal, write_engine, read_engine, check_database_connection, create_tables_if_missing, DB_STARTUP_CHECK_TIMEOUT_SECONDS, CREATE_TABLES_ON_STARTUP
 import models
 import schemas
-from utils.email_notifications import notify_appointment_creation, notify_appointment_update
+from utils.email_notifications import notify_appointment_creation, notify_appointment_update, precompile_email_templates
 from utils.s3 import upload_file, get_file, BUCKET_NAME
 import io
 import tempfile
@@ -31,6 +30,9 @@ from logging.handlers import RotatingFileHandler
 import os.path
 import contextvars
 from utils.calendar_sync import check_and_sync_appointment, check_and_sync_updated_appointment
+from utils.jobs import RUN_JOBS_IN_PROCESS, start_job_worker, stop_job_worker
+from utils.audit_log import start_audit_log_writer, stop_audit_log_writer
+from utils.metadata_cache import precompute_static_responses
 import base64
 
 # Import our new dependencies
@@ -47,6 +49,8 @@ from dependencies.auth import (
     GOOGLE_CLIENT_ID
 )
 from middleware.logging import create_logging_middleware, RequestIdFilter, request_id_var
+from middleware.read_your_writes import create_read_your_writes_middleware
+from middleware.audit_context import create_audit_context_middleware
 from dependencies.access_control import (
     admin_check_access_to_country,
     admin_check_access_to_location,
@@ -64,13 +68,14 @@ from routers.admin import stats as admin_stats
 from routers.admin import users as admin_users
 from routers.admin import locations as admin_locations
 from routers.admin import calendar_events as admin_calendar_events
+from routers.admin import jobs as admin_jobs
 from routers.user import appointments as user_appointments
 from routers.user import dignitaries as user_dignitaries
 from routers.user import profile as user_profile
 from routers.user import locations as user_locations
 from routers.user import attachments as user_attachments
 from routers.user import contacts as user_contacts
-from routers import auth, usher, enums, metadata
+from routers import auth, usher, usher_sync, enums, metadata
 
 
 # Configure logging
@@ -126,9 +131,6 @@ if log_file_enabled:
 
 
 
-# MOVED: Database table creation to the startup event
-# models.Base.metadata.create_all(bind=write_engine)
-
 app = FastAPI(
     title="AOLF GSEC API",
     description="API for AOLF GSEC Application",
@@ -173,6 +175,12 @@ app.add_middleware(
 # Add request logging middleware
 app.middleware("http")(create_logging_middleware())
 
+# Tell clients when they wrote, so their next reads do not hit a lagging replica
+app.middleware("http")(create_read_your_writes_middleware())
+
+# Record the client of each request on the audit log entries of its changes
+app.middleware("http")(create_audit_context_middleware())
+
 # Include routers
 app.include_router(admin_appointments.router, prefix="/admin/appointments", tags=["admin"])
 app.include_router(admin_dignitaries.router, prefix="/admin/dignitaries", tags=["admin"])
@@ -180,6 +188,7 @@ app.include_router(admin_stats.router, prefix="/admin/stats", tags=["admin"])
 app.include_router(admin_users.router, prefix="/admin/users", tags=["admin"])
 app.include_router(admin_locations.router, prefix="/admin/locations", tags=["admin"])
 app.include_router(admin_calendar_events.router, prefix="/admin/calendar-events", tags=["admin"])
+app.include_router(admin_jobs.router, prefix="/admin/jobs", tags=["admin"])
 app.include_router(user_appointments.router, tags=["user"])
 app.include_router(user_dignitaries.router, tags=["user"])
 app.include_router(user_profile.router, tags=["user"])
@@ -188,6 +197,7 @@ app.include_router(user_attachments.router, tags=["user"])
 app.include_router(user_contacts.router, tags=["user"])
 app.include_router(auth.router, tags=["auth"])
 app.include_router(usher.router, prefix="/usher", tags=["usher"])
+app.include_router(usher_sync.router, prefix="/usher/sync", tags=["usher"])
 app.include_router(enums.router, tags=["enums"])
 app.include_router(metadata.router, tags=["metadata"])
 
@@ -246,23 +256,40 @@ async def startup_event():
     # Log important configuration information
     logger.info(f"Environment: {os.getenv('ENVIRONMENT', 'dev')}")
     
-    # Create database tables on startup
+    # Check the database connection without letting a slow or unreachable database stall the start;
+    # the pools reconnect on first use anyway
     try:
-        logger.info("Creating database tables if they don't exist")
-        models.Base.metadata.create_all(bind=write_engine)
-        logger.info("Database tables created successfully")
-    except Exception as e:
-        logger.error(f"Failed to create database tables: {str(e)}")
-    
-    # Check database connection on startup using a raw connection
-    # instead of a session to avoid concurrent operations
-    try:
-        with write_engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-            logger.info("Database connection successful")
-    except Exception as e:
-        logger.error(f"Database connection failed on startup: {str(e)}")
+        connected = await asyncio.wait_for(
+            asyncio.to_thread(check_database_connection), timeout=DB_STARTUP_CHECK_TIMEOUT_SECONDS
+        )
+        if not connected:
+            logger.error("Database connection failed on startup")
+    except asyncio.TimeoutError:
+        connected = False
+        logger.error(f"Database connection check did not finish within {DB_STARTUP_CHECK_TIMEOUT_SECONDS}s")
+
+    # An empty database gets its tables from the models; existing ones are upgraded with `alembic upgrade head`
+    if connected and CREATE_TABLES_ON_STARTUP:
+        try:
+            await asyncio.to_thread(create_tables_if_missing)
+        except Exception as e:
+            logger.error(f"Failed to create database tables: {str(e)}")
+
+    # Compile email templates now rather than on the first notification
+    precompile_email_templates()
+
+    # Serialize the enum and configuration responses once instead of on every request
+    await precompute_static_responses(app.routes)
+
+    # Background jobs normally run in `python -m worker`; RUN_JOBS_IN_PROCESS runs them here instead
+    if RUN_JOBS_IN_PROCESS:
+        start_job_worker()
+
+    # Write audit log entries in batches off the request path
+    start_audit_log_writer()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutting down")
+    stop_job_worker()
+    stop_audit_log_writer()
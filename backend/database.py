@@ -8,7 +8,9 @@ from config import environment  # Import the centralized environment module
 from sqlalchemy.sql import text
 from contextlib import contextmanager
 from typing import Optional
-from sqlalchemy import event
+from sqlalchemy import event, inspect
+from utils.db_pool import PGBOUNCER, PoolSettings, instrument_engine, pool_stats
+from utils.utils import str_to_bool
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -37,13 +39,20 @@ else:
 # Log the schema configuration
 logger.info(f"Using database schema: {POSTGRES_SCHEMA}")
 
-# Connection parameters with increased timeout for cross-region/cross-VPC connections
-CONNECT_TIMEOUT = 120  # Increased to 2 minutes for cross-VPC connections
-MAX_RETRIES = 20  # Doubled number of retries
-RETRY_INTERVAL = 15  # Increased interval between retries
+# Startup connectivity check: a few quick attempts, within DB_STARTUP_CHECK_TIMEOUT_SECONDS overall (app.py)
+DB_STARTUP_CHECK_ATTEMPTS = int(os.getenv("DB_STARTUP_CHECK_ATTEMPTS", 3))
+DB_STARTUP_RETRY_SECONDS = float(os.getenv("DB_STARTUP_RETRY_SECONDS", 2))
+DB_STARTUP_CHECK_TIMEOUT_SECONDS = float(os.getenv("DB_STARTUP_CHECK_TIMEOUT_SECONDS", 15))
 
-# Command timeout for operations
-COMMAND_TIMEOUT = 120  # Increased timeout for database operations
+# The migrations start from an existing schema, so an empty database gets its tables from the
+# models at startup (see create_tables_if_missing); other databases are only changed by Alembic
+CREATE_TABLES_ON_STARTUP = str_to_bool(os.getenv("CREATE_TABLES_ON_STARTUP", "true"))
+
+# Pool sizes and timeouts per engine, from DB_* / DB_READ_* / DB_WRITE_* (see utils/db_pool.py)
+WRITE_POOL_SETTINGS = PoolSettings.from_env("write")
+READ_POOL_SETTINGS = PoolSettings.from_env("read")
+if PGBOUNCER:
+    logger.info("PgBouncer mode: session settings are applied per transaction")
 
 # Function to check/create schema - centralized implementation
 def ensure_schema_exists(conn, schema_name, user_name):
@@ -94,6 +103,8 @@ def get_db_engine(db_url: str, for_writes: bool = False):
     """
     Create a database engine with the specified URL and connection parameters.
     
+    No connection is opened here; see check_database_connection.
+    
     Args:
         db_url: The database URL to connect to
         for_writes: Whether this engine will be used for write operations
@@ -101,132 +112,167 @@ def get_db_engine(db_url: str, for_writes: bool = False):
     Returns:
         SQLAlchemy engine
     """
-    try:
-        # Log the database host we're connecting to (without credentials)
-        host_part = db_url.split('@')[1].split('/')[0] if '@' in db_url else 'unknown'
-        logger.info(f"Creating database engine for {'write' if for_writes else 'read'} operations on host: {host_part}")
-        
-        # Create engine with schema configuration
-        engine = create_engine(
-            db_url,
-            connect_args={
-                "connect_timeout": CONNECT_TIMEOUT,
-                "options": f"-c statement_timeout={COMMAND_TIMEOUT*1000}"
-            },
-            pool_recycle=1800,  # Reduced from 3600 to recycle connections more frequently
-            pool_pre_ping=True,
-            pool_size=5,  # Set explicit pool size
-            max_overflow=10  # Allow up to 10 connections beyond pool_size
-        )
-        
-        # Set up the schema if needed - only for write engines
-        if for_writes and POSTGRES_SCHEMA != "public":
-            retries = 0
-            last_error = None
-            
-            while retries < MAX_RETRIES:
-                try:
-                    with engine.connect() as conn:
-                        success = ensure_schema_exists(conn, POSTGRES_SCHEMA, POSTGRES_USER)
-                        if success:
-                            break
-                except Exception as conn_err:
-                    last_error = conn_err
-                    logger.warning(f"Failed to connect on attempt {retries+1}/{MAX_RETRIES}: {str(conn_err)}")
-                
-                # Wait before retrying
-                retries += 1
-                if retries < MAX_RETRIES:
-                    logger.info(f"Waiting {RETRY_INTERVAL}s before retry {retries+1}...")
-                    time.sleep(RETRY_INTERVAL)
-            
-            if retries == MAX_RETRIES and last_error:
-                logger.error(f"Failed to set up schema after {MAX_RETRIES} attempts")
-                # Continue anyway - the app might still work if schema is set up elsewhere
-                
-        return engine
-    except Exception as e:
-        # If there's an error, check if it's because the database doesn't exist
-        if for_writes and "database" in str(e).lower() and "not exist" in str(e).lower():
-            # Connect to the 'postgres' database instead
-            postgres_url = get_database_url(host=POSTGRES_WRITE_HOST or POSTGRES_HOST, database="postgres")
-            postgres_engine = create_engine(
-                postgres_url,
-                connect_args={
-                    "connect_timeout": CONNECT_TIMEOUT,
-                    "options": f"-c statement_timeout={COMMAND_TIMEOUT*1000}"
-                },
-                pool_recycle=1800
-            )
-            
-            # Create the database
-            with postgres_engine.connect() as conn:
-                conn.execute(text("COMMIT"))  # Required to run CREATE DATABASE
-                conn.execute(text(f"CREATE DATABASE {POSTGRES_DB}"))
-            
-            # Now connect to the newly created database
-            engine = create_engine(
-                db_url,
-                connect_args={
-                    "connect_timeout": CONNECT_TIMEOUT,
-                    "options": f"-c statement_timeout={COMMAND_TIMEOUT*1000}"
-                },
-                pool_recycle=1800,
-                pool_pre_ping=True,
-                pool_size=5,
-                max_overflow=10
-            )
-            
-            # Set up the schema if needed - reusing our function
-            if POSTGRES_SCHEMA != "public":
-                with engine.connect() as conn:
-                    ensure_schema_exists(conn, POSTGRES_SCHEMA, POSTGRES_USER)
-            
-            return engine
-        else:
-            # Re-raise the exception if it's not about the database not existing
-            raise
+    role = "write" if for_writes else "read"
+    settings = WRITE_POOL_SETTINGS if for_writes else READ_POOL_SETTINGS
+
+    # Log the database host we're connecting to (without credentials)
+    host_part = db_url.split('@')[1].split('/')[0] if '@' in db_url else 'unknown'
+    logger.info(f"Creating database engine for {role} operations on host: {host_part}")
+    logger.info(
+        f"Pool settings for {role}: size {settings.pool_size}, max overflow {settings.max_overflow}, "
+        f"timeout {settings.pool_timeout}s, statement timeout {settings.statement_timeout_seconds}s"
+    )
+    
+    engine = create_engine(db_url, **settings.engine_kwargs(role))
+    instrument_engine(engine, settings, role, POSTGRES_SCHEMA)
+    return engine
 
-# Create engines for read and write operations
-for retry in range(MAX_RETRIES):
+def create_database_if_missing() -> None:
+    """Create POSTGRES_DB through the 'postgres' database (local and first-time setups)."""
+    postgres_url = get_database_url(host=POSTGRES_WRITE_HOST or POSTGRES_HOST, database="postgres")
+    postgres_engine = create_engine(
+        postgres_url,
+        connect_args={"connect_timeout": WRITE_POOL_SETTINGS.connect_timeout},
+        pool_recycle=WRITE_POOL_SETTINGS.pool_recycle
+    )
     try:
-        logger.info(f"Attempting to connect to write database (attempt {retry + 1}/{MAX_RETRIES})...")
-        write_engine = get_db_engine(WRITE_DB_URL, for_writes=True)
-        
-        # Test the write connection
-        with write_engine.connect() as connection:
+        with postgres_engine.connect() as conn:
+            conn.execute(text("COMMIT"))  # Required to run CREATE DATABASE
+            conn.execute(text(f"CREATE DATABASE {POSTGRES_DB}"))
+        logger.info(f"Created database {POSTGRES_DB}")
+    finally:
+        postgres_engine.dispose()
+
+def check_database_connection() -> bool:
+    """
+    Connect to the write (and read) database once, creating the database and
+    schema if they are missing. Blocking; the app runs it at startup with a
+    time limit, and a failure is only logged since the pools reconnect on use.
+    """
+    ok = True
+    for attempt in range(DB_STARTUP_CHECK_ATTEMPTS):
+        try:
+            with write_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                if POSTGRES_SCHEMA != "public":
+                    ensure_schema_exists(conn, POSTGRES_SCHEMA, POSTGRES_USER)
             logger.info("Successfully connected to the write database")
-        
-        # If we're using Aurora with separate endpoints, create read engine
-        if use_aurora_endpoints:
-            logger.info(f"Attempting to connect to read database (attempt {retry + 1}/{MAX_RETRIES})...")
-            read_engine = get_db_engine(READ_DB_URL)
-            
-            # Test the read connection
-            with read_engine.connect() as connection:
-                logger.info("Successfully connected to the read database")
-        else:
-            # If single endpoint, use the same engine for reads
-            read_engine = write_engine
-            logger.info("Using the same database for reads and writes")
-        
-        break
-    except Exception as e:
-        logger.error(f"Error connecting to database(s) (attempt {retry + 1}/{MAX_RETRIES}): {str(e)}")
-        if retry < MAX_RETRIES - 1:
-            logger.info(f"Retrying in {RETRY_INTERVAL} seconds...")
-            time.sleep(RETRY_INTERVAL)
-        else:
-            logger.error("Maximum retry attempts reached. Could not connect to the database(s).")
-            raise
+            break
+        except Exception as e:
+            # If there's an error, check if it's because the database doesn't exist
+            if attempt == 0 and "database" in str(e).lower() and "not exist" in str(e).lower():
+                create_database_if_missing()
+                continue
+            logger.error(f"Error connecting to the write database (attempt {attempt + 1}/{DB_STARTUP_CHECK_ATTEMPTS}): {str(e)}")
+            if attempt + 1 == DB_STARTUP_CHECK_ATTEMPTS:
+                ok = False
+            else:
+                time.sleep(DB_STARTUP_RETRY_SECONDS)
+
+    if read_engine is not write_engine:
+        try:
+            with read_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            logger.info("Successfully connected to the read database")
+        except Exception as e:
+            logger.error(f"Error connecting to the read database: {str(e)}")
+            ok = False
+    return ok
+
+# Objects the migrations create that Base.metadata.create_all does not; keep in step with
+# migrations b3f8e1d5c7a2, 7c1e2f4a9b10, c5a9d2e7f413 and c8f3a6d1e592
+FRESH_DATABASE_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION dignitaries_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.first_name, '') || ' ' || coalesce(NEW.last_name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.organization, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.title_in_organization, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.primary_domain::text, '') || ' ' || coalesce(NEW.primary_domain_other, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER dignitaries_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF first_name, last_name, organization, title_in_organization, primary_domain, primary_domain_other
+    ON dignitaries
+    FOR EACH ROW EXECUTE FUNCTION dignitaries_search_vector_update()
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_dignitaries_search_vector ON dignitaries USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS idx_dignitaries_country_code ON dignitaries (country_code)",
+    "CREATE INDEX IF NOT EXISTS idx_dignitaries_name ON dignitaries (last_name, first_name)",
+    "CREATE INDEX IF NOT EXISTS idx_dignitaries_name_key_trgm ON dignitaries USING gin (name_key gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_user_contacts_full_name_trgm ON user_contacts USING gin (full_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_user_contacts_email_trgm ON user_contacts USING gin (email gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_user_contacts_owner_full_name_prefix ON user_contacts (owner_user_id, lower(full_name) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_user_contacts_owner_last_name_prefix ON user_contacts (owner_user_id, lower(last_name) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_user_contacts_owner_email_prefix ON user_contacts (owner_user_id, lower(email) text_pattern_ops)",
+    # The audit log writer creates the monthly partitions; rows outside them land here
+    "CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT",
+]
+
+# Any constant will do, as long as nothing else takes this advisory lock
+SCHEMA_BOOTSTRAP_LOCK_ID = 7302
+
+def create_tables_if_missing() -> bool:
+    """
+    Create the schema of an empty database from the models and stamp it with
+    the Alembic head, so `alembic upgrade head` only applies later migrations.
+    Databases that already have tables are left to Alembic.
+
+    Returns:
+        bool: Whether the tables were created
+    """
+    # Imported here so the models are registered on Base and alembic is only loaded when needed
+    import models  # noqa: F401
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    with write_engine.begin() as conn:
+        is_postgres = conn.dialect.name == "postgresql"
+        if is_postgres:
+            # Several app workers start at once; the others wait here and then find the tables
+            conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": SCHEMA_BOOTSTRAP_LOCK_ID})
+
+        schema = POSTGRES_SCHEMA if is_postgres and POSTGRES_SCHEMA != "public" else None
+        existing = inspect(conn).get_table_names(schema=schema)
+        if "users" in existing or "alembic_version" in existing:
+            logger.info("Database tables exist; the schema is managed by Alembic migrations")
+            return False
+
+        logger.info("Empty database: creating tables from the models")
+        Base.metadata.create_all(bind=conn)
+        if is_postgres:
+            for statement in FRESH_DATABASE_POSTGRES_DDL:
+                conn.execute(text(statement))
+
+        script = ScriptDirectory(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic"))
+        MigrationContext.configure(conn).stamp(script, "head")
+        logger.info(f"Database tables created and stamped at Alembic revision {script.get_current_head()}")
+    return True
+
+# Create engines for read and write operations. Connections are opened on first use,
+# so importing the app never waits for the database.
+write_engine = get_db_engine(WRITE_DB_URL, for_writes=True)
+
+# If we're using Aurora with separate endpoints, create read engine
+if use_aurora_endpoints:
+    read_engine = get_db_engine(READ_DB_URL)
+else:
+    # If single endpoint, use the same engine for reads
+    read_engine = write_engine
+    logger.info("Using the same database for reads and writes")
 
 # Create session classes for read and write operations with schema configuration
 def session_factory(engine):
     session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     
     # Set the schema at the connection level instead of the session level
-    # to avoid concurrent operation errors
-    if POSTGRES_SCHEMA != "public":
+    # to avoid concurrent operation errors (behind PgBouncer it is set per transaction instead)
+    if POSTGRES_SCHEMA != "public" and not PGBOUNCER:
         @event.listens_for(engine, "connect")
         def set_schema_on_connect(dbapi_connection, connection_record):
             cursor = dbapi_connection.cursor()
@@ -263,21 +309,6 @@ if POSTGRES_SCHEMA != "public":
     
     # Log the schema configuration
     logger.info(f"Set Base.__table_args__ schema to {POSTGRES_SCHEMA}")
-    
-    # NOTE: We don't need to re-check/create schema here since the write_engine
-    # has already been initialized above and would have created the schema.
-    # This also avoids race conditions if multiple application instances start simultaneously.
-    
-    # Verify the schema exists (log-only, don't create again)
-    try:
-        with write_engine.connect() as conn:
-            # Check if schema exists without creating
-            result = conn.execute(text(f"SELECT EXISTS(SELECT 1 FROM pg_namespace WHERE nspname = '{POSTGRES_SCHEMA}')"))
-            schema_exists = result.scalar()
-            logger.info(f"Schema '{POSTGRES_SCHEMA}' exists check (post-model configuration): {schema_exists}")
-    except Exception as e:
-        logger.error(f"Error verifying schema existence: {str(e)}")
-        logger.warning("Will attempt to proceed anyway")
 
 # Context managers for database sessions
 @contextmanager
@@ -300,4 +331,9 @@ def get_read_db():
 
 def get_db_for_operation(for_read_only: bool = False):
     """Return the appropriate context manager based on the operation type."""
-    return get_read_db() if for_read_only else get_db() 
+    return get_read_db() if for_read_only else get_db()
+
+def get_pool_stats():
+    """Checkout latency, overflow and invalidation metrics of the write and read pools."""
+    return pool_stats({"write": write_engine, "read": read_engine})
+
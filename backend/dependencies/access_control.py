@@ -1,14 +1,20 @@
 from fastapi import HTTPException
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, and_, exists, true, false
 from datetime import datetime, timedelta
-from typing import Set
+from typing import List, NamedTuple, Optional, Set, Tuple
 import logging
 
 import models
+from utils.dignitary_visibility import visible_dignitary_filter
+from utils.loader_options import eager_load
 
 logger = logging.getLogger(__name__)
 
+# (country_code, location_id) pairs a user can access, location_id None meaning the whole
+# country; None means everything (ADMIN)
+AccessScope = Optional[List[Tuple[str, Optional[int]]]]
+
 def admin_check_access_to_country(current_user: models.User, db: Session, country_code: str, required_access_level: models.AccessLevel=models.AccessLevel.ADMIN):
     """Check if the current user has access to a specific country"""
     # Fail fast if user is not an admin
@@ -107,11 +113,11 @@ def admin_get_appointment(current_user: models.User, db: Session, appointment_id
     appointment = (
         db.query(models.Appointment)
         .filter(models.Appointment.id == appointment_id)
-        .options(
-            joinedload(models.Appointment.appointment_dignitaries).joinedload(models.AppointmentDignitary.dignitary),
-            joinedload(models.Appointment.requester),
-            joinedload(models.Appointment.location)
-        )
+        .options(*eager_load(
+            (models.Appointment.appointment_dignitaries, models.AppointmentDignitary.dignitary),
+            models.Appointment.requester,
+            models.Appointment.location,
+        ))
         .first()
     )
     
@@ -156,19 +162,90 @@ def admin_get_appointment(current_user: models.User, db: Session, appointment_id
     return appointment
 
 
+class AppointmentAccess(NamedTuple):
+    """Verdict for one user and appointment, without loading the appointment"""
+    is_requester: bool
+    has_admin_access: bool
+
+
+def appointment_access_exists(current_user: models.User, required_access_level: models.AccessLevel=models.AccessLevel.READ):
+    """
+    EXISTS clause that is true when the user holds an active appointment access record at the
+    required level covering the appointment's location. Correlates with Appointment and Location.
+    """
+    if current_user.role == models.UserRole.ADMIN:
+        return true()
+
+    return exists().where(
+        models.UserAccess.user_id == current_user.id,
+        models.UserAccess.is_active == True,
+        # Only consider records that grant access to appointments
+        or_(
+            models.UserAccess.entity_type == models.EntityType.APPOINTMENT,
+            models.UserAccess.entity_type == models.EntityType.APPOINTMENT_AND_DIGNITARY
+        ),
+        models.UserAccess.access_level.in_(required_access_level.get_higher_or_equal_access_levels()),
+        models.UserAccess.country_code == models.Location.country_code,
+        # If location_id is specified in the access record, it must match
+        or_(
+            models.UserAccess.location_id == None,
+            models.UserAccess.location_id == models.Appointment.location_id
+        )
+    )
+
+
+def get_appointment_access(current_user: models.User, db: Session, appointment_id: int, required_access_level: models.AccessLevel=models.AccessLevel.READ) -> Optional[AppointmentAccess]:
+    """
+    Answer whether the user requested the appointment and whether they have admin access to it
+    at the required level, with a single query. Returns None if the appointment does not exist.
+    """
+    if current_user.role.is_general_role_type():
+        row = db.query(models.Appointment.requester_id).filter(models.Appointment.id == appointment_id).first()
+        if row is None:
+            return None
+        return AppointmentAccess(is_requester=row.requester_id == current_user.id, has_admin_access=False)
+
+    row = db.query(
+        models.Appointment.requester_id,
+        appointment_access_exists(current_user, required_access_level).label("has_admin_access")
+    ).outerjoin(
+        models.Location, models.Appointment.location_id == models.Location.id
+    ).filter(
+        models.Appointment.id == appointment_id
+    ).first()
+
+    if row is None:
+        return None
+    return AppointmentAccess(
+        is_requester=row.requester_id == current_user.id,
+        has_admin_access=bool(row.has_admin_access)
+    )
+
+
+def require_appointment_access(current_user: models.User, db: Session, appointment_id: int, required_access_level: models.AccessLevel=models.AccessLevel.READ, allow_requester: bool=True, detail: str="You don't have access to this appointment") -> AppointmentAccess:
+    """Raise 404 if the appointment does not exist and 403 if the user may not act on it"""
+    access = get_appointment_access(current_user, db, appointment_id, required_access_level)
+    if access is None:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    if not access.has_admin_access and not (allow_requester and access.is_requester):
+        raise HTTPException(status_code=403, detail=detail)
+    return access
+
+
 def admin_check_appointment_for_access_level(current_user: models.User, db: Session, appointment_id: int, required_access_level: models.AccessLevel=models.AccessLevel.READ):
     """Check if the current user has access to a specific appointment"""
     # Fail fast if user is not an admin
     if current_user.role.is_general_role_type():
         raise HTTPException(status_code=403, detail="You don't have access to this appointment")
 
-    appointment = admin_get_appointment(
+    require_appointment_access(
         current_user=current_user,
         db=db,
         appointment_id=appointment_id,
-        required_access_level=required_access_level
+        required_access_level=required_access_level,
+        allow_requester=False
     )
-    return appointment is not None
+    return True
 
 
 def admin_get_dignitary(current_user: models.User, db: Session, dignitary_id: int, required_access_level: models.AccessLevel=models.AccessLevel.READ):
@@ -226,38 +303,13 @@ def admin_get_dignitary(current_user: models.User, db: Session, dignitary_id: in
         # Calculate date threshold for recent appointments (e.g., last 90 days)
         recent_appointment_threshold = datetime.now().date() - timedelta(days=90)
         
-        # Create location filters based on user's access permissions (including country-level)
-        location_filters = []
-        for access in user_access_records:
-            if access.location_id is not None:
-                # Specific location access
-                location_filters.append(models.Appointment.location_id == access.location_id)
-            else:
-                # Country-level access (applies to all locations in that country)
-                # Ensure we only add country filters if the user has APPOINTMENT access for it
-                if access.entity_type in [models.EntityType.APPOINTMENT, models.EntityType.APPOINTMENT_AND_DIGNITARY]:
-                    location_filters.append(models.Location.country_code == access.country_code)
-        
-        has_appointment_access = False
-        if location_filters: # Only query if there are potential locations the user can access
-            appointment_check_query = db.query(models.AppointmentDignitary.dignitary_id)\
-                .join(models.Appointment, models.AppointmentDignitary.appointment_id == models.Appointment.id)\
-                .join(models.Location, models.Appointment.location_id == models.Location.id)\
-                .filter(
-                    models.AppointmentDignitary.dignitary_id == dignitary_id,
-                    # Check if appointment is recent
-                    or_(
-                        models.Appointment.preferred_date >= recent_appointment_threshold,
-                        models.Appointment.appointment_date >= recent_appointment_threshold
-                    ),
-                    # Check if user has access to the appointment's location
-                    or_(*location_filters)
-                ).limit(1) # We only need to know if at least one exists
-            
-            has_appointment_access = appointment_check_query.first() is not None
-            logger.debug(f"Appointment access check: {has_appointment_access} (based on {len(location_filters)} location filters)")
-        else:
-            logger.debug("Skipping appointment access check as no relevant location filters were found.")
+        # Single indexed lookup in the maintained dignitary_visibility table
+        has_appointment_access = db.query(
+            visible_dignitary_filter(user_access_records, since=recent_appointment_threshold)
+        ).select_from(models.Dignitary).filter(
+            models.Dignitary.id == dignitary_id
+        ).scalar() or False
+        logger.debug(f"Appointment access check: {has_appointment_access}")
 
     # Grant access if either condition is met
     if has_country_access or has_appointment_access:
@@ -291,4 +343,67 @@ def admin_check_dignitary_for_access_level(current_user: models.User, db: Sessio
     except Exception as e:
         # Log unexpected errors during the check
         logger.error(f"Unexpected error during access check for user {current_user.email} on dignitary {dignitary_id}: {str(e)}", exc_info=True)
-        return False 
\ No newline at end of file
+        return False
+
+
+def get_appointment_access_scope(
+    db: Session,
+    current_user: models.User,
+    required_access_level: models.AccessLevel = models.AccessLevel.READ,
+) -> AccessScope:
+    """
+    Return the (country_code, location_id) pairs where the user may access appointments at
+    the required level, or None for ADMIN users who can access everything.
+    """
+    if current_user.role == models.UserRole.ADMIN:
+        return None
+
+    user_access = db.query(
+        models.UserAccess.country_code,
+        models.UserAccess.location_id,
+    ).filter(
+        models.UserAccess.user_id == current_user.id,
+        models.UserAccess.is_active == True,
+        # Only consider records that grant access to appointments
+        or_(
+            models.UserAccess.entity_type == models.EntityType.APPOINTMENT,
+            models.UserAccess.entity_type == models.EntityType.APPOINTMENT_AND_DIGNITARY
+        ),
+        models.UserAccess.access_level.in_(required_access_level.get_higher_or_equal_access_levels())
+    ).all()
+
+    return sorted(set((access.country_code, access.location_id) for access in user_access), key=str)
+
+
+def scope_allows(scope: AccessScope, country_code: Optional[str], location_id: Optional[int]) -> bool:
+    """Check whether an appointment at the given location falls inside an access scope."""
+    if scope is None:
+        return True
+    return any(
+        access_country_code == country_code
+        and (access_location_id is None or access_location_id == location_id)
+        for access_country_code, access_location_id in scope
+    )
+
+
+def apply_appointment_access_scope(query, scope: AccessScope):
+    """Restrict an appointment query to the given access scope (joins locations)."""
+    if scope is None:
+        return query
+
+    # Start with a "false" condition
+    access_filters = [false()]
+    for country_code, location_id in scope:
+        if location_id:
+            access_filters.append(
+                and_(
+                    models.Appointment.location_id == location_id,
+                    models.Location.country_code == country_code
+                )
+            )
+        else:
+            # Access to all locations in the country
+            access_filters.append(models.Location.country_code == country_code)
+
+    query = query.join(models.Location, models.Appointment.location_id == models.Location.id)
+    return query.filter(or_(*access_filters))
@@ -11,6 +11,7 @@ from functools import wraps
 import inspect
 
 from dependencies.database import get_read_db, get_db
+from utils.audit_log import set_audit_user
 import models
 
 logger = logging.getLogger(__name__)
@@ -156,6 +157,7 @@ async def get_current_user(
             raise credentials_exception
             
         logger.debug(f"User {email} authenticated successfully")
+        set_audit_user(user.id)
         return user
     except Exception as e:
         logger.error(f"Database error during user authentication: {str(e)}")
@@ -218,6 +220,7 @@ async def get_current_user_for_write(
             raise credentials_exception
             
         logger.debug(f"User {email} authenticated successfully")
+        set_audit_user(user.id)
         return user
     except Exception as e:
         logger.error(f"Database error during user authentication: {str(e)}")
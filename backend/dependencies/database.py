@@ -1,4 +1,13 @@
-from database import WriteSessionLocal, ReadSessionLocal
+from fastapi import Request
+
+from database import WriteSessionLocal, ReadSessionLocal, read_engine, write_engine
+from utils.db_pool import (
+    BATCH_STATEMENT_TIMEOUT_SECONDS,
+    READ_STATEMENT_TIMEOUT_SECONDS,
+    WRITE_STATEMENT_TIMEOUT_SECONDS,
+    set_statement_timeout,
+)
+from utils.read_routing import READ_AFTER_HEADER, parse_read_after, track_writes, use_reader
 import logging
 
 logger = logging.getLogger(__name__)
@@ -6,6 +15,8 @@ logger = logging.getLogger(__name__)
 # Dependency to get database session for write operations
 def get_db():
     db = WriteSessionLocal()
+    set_statement_timeout(db, WRITE_STATEMENT_TIMEOUT_SECONDS)
+    track_writes(db)
     try:
         logger.debug("Write database session created")
         yield db
@@ -13,9 +24,16 @@ def get_db():
         logger.debug("Write database session closed")
         db.close()
 
-# Dependency to get database session for read-only operations
-def get_read_db():
-    db = ReadSessionLocal()
+# Dependency to get database session for read-only operations.
+# Requests that wrote recently (X-Read-After) read from the writer until the reader has caught up.
+def get_read_db(request: Request):
+    if read_engine is write_engine or use_reader(
+        read_engine, parse_read_after(request.headers.get(READ_AFTER_HEADER))
+    ):
+        db = ReadSessionLocal()
+    else:
+        db = WriteSessionLocal()
+    set_statement_timeout(db, READ_STATEMENT_TIMEOUT_SECONDS)
     try:
         logger.debug("Read database session created")
         yield db
@@ -23,5 +41,17 @@ def get_read_db():
         logger.debug("Read database session closed")
         db.close()
 
+# Dependency to get a write session for bulk operations, with the longer batch statement timeout
+def get_batch_db():
+    db = WriteSessionLocal()
+    set_statement_timeout(db, BATCH_STATEMENT_TIMEOUT_SECONDS)
+    track_writes(db)
+    try:
+        logger.debug("Batch database session created")
+        yield db
+    finally:
+        logger.debug("Batch database session closed")
+        db.close()
+
 # For compatibility with existing code
-SessionLocal = WriteSessionLocal 
\ No newline at end of file
+SessionLocal = WriteSessionLocal
@@ -0,0 +1,106 @@
+"""
+Bulk loading of generated rows with COPY.
+
+A TableLoader hands out primary keys itself (continuing after the table's
+current maximum), so rows that reference each other can be generated in one
+pass and streamed to the database without RETURNING round trips. Rows are
+buffered until flush(), which the caller invokes every batch in foreign key
+order (parents before children), and written with COPY ... FROM STDIN in CSV
+format on Postgres (multi-row INSERT on other databases). Values go through the
+column types' bind processors, so enums, JSON and dates are written the way the
+ORM writes them.
+
+COPY does not run Python-side column defaults, so the loader fills them in for
+columns a row leaves out. Call finish() after the last flush to move the id
+sequence past the loaded rows.
+"""
+from typing import Any, Callable, Dict, List, Optional
+import csv
+import io
+
+from sqlalchemy import func, insert, select, text
+
+NULL = r"\N"
+
+
+class TableLoader:
+    def __init__(self, conn, model):
+        self.conn = conn
+        self.table = model.__table__
+        self.is_postgres = conn.dialect.name == "postgresql"
+        self.next_id = (conn.execute(select(func.max(self.table.c.id))).scalar() or 0) + 1
+        self.rows: List[Dict[str, Any]] = []
+        self.loaded = 0
+        self._columns: Optional[List[str]] = None
+        self._processors: Dict[str, Optional[Callable]] = {}
+        self._defaults: Dict[str, Any] = {}
+
+    def add(self, row: Dict[str, Any]) -> int:
+        """Queue a row and return its id. Every row of a table must have the same keys."""
+        row_id = self.next_id
+        self.next_id += 1
+        row["id"] = row_id
+        self.rows.append(row)
+        return row_id
+
+    def _prepare(self, row: Dict[str, Any]) -> None:
+        # The columns of the first row, plus those with a Python-side default
+        dialect = self.conn.dialect
+        columns = list(row)
+        for column in self.table.columns:
+            if column.name in row or column.default is None:
+                continue
+            if column.default.is_scalar:
+                self._defaults[column.name] = column.default.arg
+            elif column.default.is_callable:
+                self._defaults[column.name] = column.default.arg(None)
+            else:
+                continue
+            columns.append(column.name)
+        self._columns = columns
+        self._processors = {name: self.table.c[name].type.bind_processor(dialect) for name in columns}
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        if self._columns is None:
+            self._prepare(self.rows[0])
+        rows = [{**self._defaults, **row} for row in self.rows]
+        if self.is_postgres:
+            self._copy(rows)
+        else:
+            self.conn.execute(insert(self.table), rows)
+        self.loaded += len(rows)
+        self.rows = []
+
+    def _copy(self, rows: List[Dict[str, Any]]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        processors = [(name, self._processors[name]) for name in self._columns]
+        for row in rows:
+            values = []
+            for name, process in processors:
+                value = row.get(name)
+                if value is not None and process is not None:
+                    value = process(value)
+                values.append(NULL if value is None else value)
+            writer.writerow(values)
+        buffer.seek(0)
+
+        columns = ", ".join(f'"{name}"' for name in self._columns)
+        cursor = self.conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {self.table.name} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')", buffer
+            )
+        finally:
+            cursor.close()
+
+    def finish(self) -> None:
+        """Write the remaining rows and move the id sequence past them."""
+        self.flush()
+        if self.is_postgres and self.loaded:
+            self.conn.execute(
+                text("SELECT setval(pg_get_serial_sequence(:table, 'id'), :last_id)"),
+                {"table": self.table.name, "last_id": self.next_id - 1},
+            )
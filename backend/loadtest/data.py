@@ -0,0 +1,341 @@
+"""
+Synthetic data for load tests and profiling, written to the configured database
+(the same POSTGRES_* settings as the app, migrated with `alembic upgrade head`).
+
+Creates users of every role under an email prefix, UserAccess grants for
+secretariat and ushers, locations with meeting places in the countries of
+geo_countries, dignitaries with their points of contact, contacts per requester
+and appointments shaped like production:
+
+- a few requesters file most requests (Pareto-distributed activity)
+- mostly history, with a busy few weeks ahead
+- darshan requests bring families, favour weekends and share darshan sessions
+  of limited capacity; other approved requests get their own calendar event
+
+Generation is deterministic for a given seed and size. Rows are streamed to the
+database in batches with COPY (loadtest/copy_loader.py), so memory stays flat
+and a million appointments load in minutes.
+"""
+from bisect import bisect
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from itertools import accumulate
+from typing import Dict, List, Optional
+import logging
+import random
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+import models
+from loadtest.copy_loader import TableLoader
+from loadtest.manifest import Manifest, Requester
+from utils.dignitary_matching import normalize_name
+from utils.dignitary_visibility import rebuild_dignitary_visibility
+
+logger = logging.getLogger(__name__)
+
+# Used when geo_countries is empty
+DEFAULT_COUNTRIES = ["US", "IN", "CA", "GB", "DE"]
+# Share of locations and requesters; other countries in geo_countries get 1 each
+COUNTRY_WEIGHTS = {"US": 40, "IN": 30, "CA": 6, "GB": 5, "DE": 4, "AU": 3}
+DARSHAN_SESSION_CAPACITY = 60
+DARSHAN_SESSION_TIMES = [time(10, 0), time(14, 0), time(17, 0)]
+
+
+@dataclass
+class DatasetSize:
+    requesters: int = 2000
+    secretariat: int = 10
+    ushers: int = 30
+    admins: int = 2
+    locations: int = 20
+    appointments: int = 30000
+
+
+def _appointment_day(rng: random.Random, today: date) -> date:
+    # A quarter is ahead, most of it within the next two weeks
+    if rng.random() < 0.25:
+        return today + timedelta(days=min(int(rng.expovariate(1 / 7)), 60))
+    return today - timedelta(days=min(int(rng.expovariate(1 / 300)), 1500) + 1)
+
+
+def _darshan_day(rng: random.Random, today: date) -> date:
+    # Darshan is mostly on weekends
+    day = _appointment_day(rng, today)
+    if day.weekday() < 5 and rng.random() < 0.6:
+        day += timedelta(days=5 - day.weekday())
+    return day
+
+
+def _appointment_status(rng: random.Random, day: date, today: date):
+    roll = rng.random()
+    if day >= today:
+        if roll < 0.4:
+            return models.AppointmentStatus.PENDING, models.AppointmentSubStatus.NOT_REVIEWED
+        if roll < 0.5:
+            return models.AppointmentStatus.NEED_MORE_INFO, models.AppointmentSubStatus.NEED_MORE_INFO
+        if roll < 0.9:
+            return models.AppointmentStatus.APPROVED, models.AppointmentSubStatus.SCHEDULED
+        return models.AppointmentStatus.CANCELLED, models.AppointmentSubStatus.CANCELLED
+    if roll < 0.6:
+        return models.AppointmentStatus.COMPLETED, models.AppointmentSubStatus.NO_FURTHER_ACTION
+    if roll < 0.75:
+        return models.AppointmentStatus.CANCELLED, models.AppointmentSubStatus.CANCELLED
+    if roll < 0.95:
+        return models.AppointmentStatus.REJECTED, models.AppointmentSubStatus.LOW_PRIORITY
+    return models.AppointmentStatus.PENDING, models.AppointmentSubStatus.NOT_REVIEWED
+
+
+def _request_type(rng: random.Random):
+    roll = rng.random()
+    if roll < 0.55:
+        return models.RequestType.DARSHAN
+    if roll < 0.85:
+        return models.RequestType.DIGNITARY
+    if roll < 0.95:
+        return models.RequestType.PROJECT_TEAM_MEETING
+    return models.RequestType.OTHER
+
+
+def _attendance(rng: random.Random, status, day: date, today: date):
+    # Attendees of past appointments were mostly checked in
+    if status != models.AppointmentStatus.COMPLETED or day >= today:
+        return models.AttendanceStatus.PENDING, None
+    if rng.random() < 0.9:
+        return models.AttendanceStatus.CHECKED_IN, datetime.combine(day, time(9, 45))
+    return models.AttendanceStatus.NO_SHOW, None
+
+
+class _WeightedChoice:
+    """rng.choices for many draws from the same population, without rebuilding the weights."""
+
+    def __init__(self, population: list, weights: List[float]):
+        self.population = population
+        self.cum_weights = list(accumulate(weights))
+        self.total = self.cum_weights[-1]
+
+    def pick(self, rng: random.Random):
+        return self.population[bisect(self.cum_weights, rng.random() * self.total)]
+
+
+def _countries(db: Session) -> List[str]:
+    countries = db.scalars(select(models.GeoCountry.iso2_code).order_by(models.GeoCountry.iso2_code)).all()
+    return list(countries) or DEFAULT_COUNTRIES
+
+
+def generate(db: Session, size: DatasetSize, prefix: str = "loadtest", seed: int = 42,
+             batch_size: int = 50000) -> Manifest:
+    """Load the dataset in the session's transaction and return its manifest. The caller commits."""
+    if db.scalar(select(func.count()).select_from(models.User).where(models.User.email.like(f"{prefix}-%"))):
+        raise ValueError(f"Users with the prefix '{prefix}' exist already; use another prefix or remove them first")
+
+    rng = random.Random(seed)
+    today = date.today()
+    now = datetime.utcnow()
+    conn = db.connection()
+    loaders = {
+        model: TableLoader(conn, model)
+        for model in (
+            models.User, models.Location, models.MeetingPlace, models.UserAccess, models.Dignitary,
+            models.DignitaryPointOfContact, models.UserContact, models.CalendarEvent, models.Appointment,
+            models.AppointmentDignitary, models.AppointmentContact,
+        )
+    }
+
+    def flush(*tables) -> None:
+        for model in tables:
+            loaders[model].flush()
+
+    countries = _countries(db)
+    country_choice = _WeightedChoice(countries, [COUNTRY_WEIGHTS.get(country, 1) for country in countries])
+
+    # Users
+    emails: Dict[str, List[str]] = {}
+
+    def users(role, count: int, creator_id: Optional[int]) -> List[int]:
+        label = role.value.lower()
+        ids = []
+        for i in range(count):
+            if i and i % batch_size == 0:
+                flush(models.User)
+            email = f"{prefix}-{label}-{i}@example.org"
+            emails.setdefault(label, []).append(email)
+            ids.append(loaders[models.User].add({
+                "email": email, "first_name": f"{role.value.title()}{i}", "last_name": "Loadtest", "role": role,
+                "country_code": country_choice.pick(rng), "email_notification_preferences": {},
+                "created_by": creator_id, "created_at": now,
+            }))
+        return ids
+
+    admin_ids = users(models.UserRole.ADMIN, max(1, size.admins), None)
+    creator = admin_ids[0]
+    secretariat_ids = users(models.UserRole.SECRETARIAT, size.secretariat, creator)
+    usher_ids = users(models.UserRole.USHER, size.ushers, creator)
+    requester_ids = users(models.UserRole.GENERAL, size.requesters, creator)
+    flush(models.User)
+
+    # Locations with meeting places
+    location_countries: Dict[int, str] = {}
+    for i in range(size.locations):
+        country = country_choice.pick(rng)
+        location_id = loaders[models.Location].add({
+            "name": f"{prefix} {country} center {i}", "street_address": f"{i + 1} Main St", "city": f"City {i}",
+            "state": "State", "country": country, "country_code": country, "zip_code": "00000",
+            "timezone": "UTC", "is_active": True, "created_by": creator, "created_at": now,
+        })
+        location_countries[location_id] = country
+        for place in range(rng.randint(1, 4)):
+            loaders[models.MeetingPlace].add({
+                "location_id": location_id, "name": "Main hall" if place == 0 else f"Meeting room {place}",
+                "is_default": place == 0, "is_active": True, "created_by": creator, "created_at": now,
+            })
+    location_ids = list(location_countries)
+    location_choice = _WeightedChoice(location_ids, [rng.paretovariate(1.5) for _ in location_ids])
+    flush(models.Location, models.MeetingPlace)
+
+    # Secretariat see whole countries, ushers one or two locations
+    location_country_list = sorted(set(location_countries.values()))
+    grants = 0
+    for user_id in secretariat_ids:
+        for country in rng.sample(location_country_list, min(len(location_country_list), rng.randint(1, 3))):
+            grants += 1
+            loaders[models.UserAccess].add({
+                "user_id": user_id, "country_code": country, "location_id": None,
+                "access_level": models.AccessLevel.ADMIN, "entity_type": models.EntityType.APPOINTMENT_AND_DIGNITARY,
+                "reason": "Load test", "is_active": True, "created_by": creator,
+            })
+    for user_id in usher_ids:
+        for location_id in rng.sample(location_ids, min(len(location_ids), rng.randint(1, 2))):
+            grants += 1
+            loaders[models.UserAccess].add({
+                "user_id": user_id, "country_code": location_countries[location_id], "location_id": location_id,
+                "access_level": models.AccessLevel.READ, "entity_type": models.EntityType.APPOINTMENT,
+                "reason": "Load test", "is_active": True, "created_by": creator,
+            })
+    flush(models.UserAccess)
+
+    # Dignitaries (most requesters bring none, a few many) and contacts (families)
+    requester_dignitaries: Dict[int, List[int]] = {}
+    requester_contacts: Dict[int, List[int]] = {}
+    for number, requester_id in enumerate(requester_ids, 1):
+        for _ in range(min(int(rng.expovariate(1 / 1.5)), 25)):
+            number = loaders[models.Dignitary].next_id
+            dignitary_id = loaders[models.Dignitary].add({
+                "first_name": f"Dignitary{number}", "last_name": "Loadtest",
+                "name_key": normalize_name(f"Dignitary{number}", "Loadtest"),
+                "country_code": country_choice.pick(rng), "created_by": requester_id, "created_at": now,
+            })
+            requester_dignitaries.setdefault(requester_id, []).append(dignitary_id)
+            loaders[models.DignitaryPointOfContact].add({
+                "dignitary_id": dignitary_id, "poc_id": requester_id,
+                "relationship_type": models.RelationshipType.DIRECT, "created_by": requester_id,
+            })
+        for i in range(rng.randint(0, 15)):
+            requester_contacts.setdefault(requester_id, []).append(loaders[models.UserContact].add({
+                "owner_user_id": requester_id, "first_name": f"Contact{i}", "last_name": "Loadtest",
+                "created_by": requester_id, "created_at": now,
+            }))
+        if number % batch_size == 0:
+            flush(models.Dignitary, models.DignitaryPointOfContact, models.UserContact)
+    flush(models.Dignitary, models.DignitaryPointOfContact, models.UserContact)
+
+    # Appointments, with their calendar events and attendees, streamed in batches
+    requester_choice = _WeightedChoice(requester_ids, [rng.paretovariate(1.2) for _ in requester_ids])
+    darshan_sessions: Dict[tuple, List[int]] = {}  # (location, day, slot) -> [event id, booked]
+    for number in range(size.appointments):
+        request_type = _request_type(rng)
+        requester_id = requester_choice.pick(rng)
+        if request_type == models.RequestType.DIGNITARY and not requester_dignitaries.get(requester_id):
+            request_type = models.RequestType.DARSHAN
+        day = _darshan_day(rng, today) if request_type == models.RequestType.DARSHAN else _appointment_day(rng, today)
+        status, sub_status = _appointment_status(rng, day, today)
+        location_id = location_choice.pick(rng)
+        created_at = datetime.combine(day - timedelta(days=int(rng.expovariate(1 / 20)) + 1), time(12, 0))
+
+        calendar_event_id = None
+        if status in (models.AppointmentStatus.APPROVED, models.AppointmentStatus.COMPLETED):
+            event_status = models.EventStatus.COMPLETED if day < today else models.EventStatus.CONFIRMED
+            if request_type == models.RequestType.DARSHAN:
+                # Darshan requests fill the day's sessions at the location in turn
+                for slot, start_time in enumerate(DARSHAN_SESSION_TIMES):
+                    session = darshan_sessions.get((location_id, day, slot))
+                    if session is None:
+                        session = darshan_sessions[(location_id, day, slot)] = [loaders[models.CalendarEvent].add({
+                            "event_type": models.EventType.DARSHAN, "title": "Darshan",
+                            "start_datetime": datetime.combine(day, start_time), "start_date": day,
+                            "start_time": start_time.strftime("%H:%M"), "duration": 60, "location_id": location_id,
+                            "max_capacity": DARSHAN_SESSION_CAPACITY, "is_open_for_booking": True,
+                            "status": event_status, "created_by": creator, "created_at": created_at,
+                        }), 0]
+                    if session[1] < DARSHAN_SESSION_CAPACITY or slot == len(DARSHAN_SESSION_TIMES) - 1:
+                        session[1] += 1
+                        calendar_event_id = session[0]
+                        break
+            else:
+                start_time = time(rng.randint(8, 18), rng.choice([0, 15, 30, 45]))
+                calendar_event_id = loaders[models.CalendarEvent].add({
+                    "event_type": models.EventType.DIGNITARY_APPOINTMENT, "title": "Appointment",
+                    "start_datetime": datetime.combine(day, start_time), "start_date": day,
+                    "start_time": start_time.strftime("%H:%M"), "duration": 15, "location_id": location_id,
+                    "max_capacity": 1, "is_open_for_booking": False, "status": event_status,
+                    "created_by": creator, "created_at": created_at,
+                })
+
+        dignitary = request_type == models.RequestType.DIGNITARY
+        dignitary_ids = []
+        if dignitary:
+            own_dignitaries = requester_dignitaries[requester_id]
+            dignitary_ids = rng.sample(own_dignitaries, min(rng.randint(1, 3), len(own_dignitaries)))
+        own_contacts = requester_contacts.get(requester_id, [])
+        count = rng.randint(2, 8) if request_type == models.RequestType.DARSHAN else rng.randint(0, 2)
+        contact_ids = rng.sample(own_contacts, min(count, len(own_contacts)))
+
+        appointment_id = loaders[models.Appointment].add({
+            "requester_id": requester_id, "location_id": location_id, "status": status, "sub_status": sub_status,
+            "request_type": request_type, "purpose": "Load test appointment", "created_by": requester_id,
+            "created_at": created_at, "calendar_event_id": calendar_event_id,
+            "number_of_attendees": max(1, len(dignitary_ids) + len(contact_ids)),
+            "preferred_date": day if dignitary else None,
+            "preferred_start_date": None if dignitary else day,
+            "preferred_end_date": None if dignitary else day + timedelta(days=rng.randint(0, 7)),
+        })
+        for model, column, attendee_ids in (
+            (models.AppointmentDignitary, "dignitary_id", dignitary_ids),
+            (models.AppointmentContact, "contact_id", contact_ids),
+        ):
+            for attendee_id in attendee_ids:
+                attendance_status, checked_in_at = _attendance(rng, status, day, today)
+                loaders[model].add({
+                    "appointment_id": appointment_id, column: attendee_id, "created_by": requester_id,
+                    "attendance_status": attendance_status, "checked_in_at": checked_in_at, "created_at": created_at,
+                })
+
+        # Parents before children, so the foreign keys hold
+        if (number + 1) % batch_size == 0:
+            flush(models.CalendarEvent, models.Appointment, models.AppointmentDignitary, models.AppointmentContact)
+            logger.info(f"Loaded {number + 1} of {size.appointments} appointments")
+
+    for loader in loaders.values():
+        loader.finish()
+
+    # Rows loaded in bulk bypass the flush hook that maintains dignitary visibility
+    rebuild_dignitary_visibility(db)
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ANALYZE"))
+
+    logger.info(", ".join(f"{loader.loaded} {loader.table.name}" for loader in loaders.values()) + f" ({grants} grants)")
+
+    return Manifest(
+        prefix=prefix,
+        generated_at=now.isoformat(),
+        location_ids=location_ids,
+        requesters=[
+            Requester(email=email, contact_ids=requester_contacts.get(requester_id, []),
+                      dignitary_ids=requester_dignitaries.get(requester_id, []))
+            for requester_id, email in zip(requester_ids, emails.get("general", []))
+        ],
+        secretariat=emails.get("secretariat", []),
+        ushers=emails.get("usher", []),
+        admins=emails.get("admin", []),
+    )
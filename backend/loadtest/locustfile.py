@@ -0,0 +1,146 @@
+"""
+Load test scenarios, modeled on traffic during darshan registration peaks.
+
+- Requesters (most users) list their appointments and submit new requests,
+  darshan with family members or dignitary meetings.
+- Secretariat page through the upcoming inbox and open the schedule.
+- Ushers poll their day sheet with If-None-Match, like the usher screen does.
+
+Virtual users are the users of the generated dataset (python -m loadtest.seed);
+their tokens are minted with JWT_SECRET_KEY, which must match the app's.
+
+Usage (from backend/, with the app running, e.g. python -m loadtest.serve):
+    locust -f loadtest/locustfile.py --host http://127.0.0.1:8001 \\
+        --headless -u 300 -r 20 -t 10m --csv loadtest/results/peak
+    python -m loadtest.report loadtest/results/peak_stats.csv
+"""
+from datetime import date, timedelta
+from itertools import cycle
+from pathlib import Path
+import os
+import random
+import sys
+import time
+
+from locust import HttpUser, between, task
+
+# Add the backend directory to sys.path to import the loadtest package
+sys.path.append(str(Path(__file__).parent.parent))
+
+from loadtest.manifest import Manifest
+from loadtest.tokens import auth_headers
+
+MANIFEST = Manifest.load(os.getenv("LOADTEST_MANIFEST", "loadtest/manifest.json"))
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "loadtest")
+READ_AFTER_HEADER = "X-Read-After"
+# The frontend echoes X-Read-After this long after a write (utils/read_routing.py)
+READ_AFTER_SECONDS = 30
+
+_requesters = cycle(MANIFEST.requesters)
+_secretariat = cycle(MANIFEST.secretariat)
+_ushers = cycle(MANIFEST.ushers)
+
+
+class AppUser(HttpUser):
+    abstract = True
+
+    def login(self, email: str) -> None:
+        self.email = email
+        self.client.headers.update(auth_headers(email, JWT_SECRET_KEY))
+        self.read_after = None
+
+    def get(self, path: str, name: str = None, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if self.read_after and time.time() < self.read_after[1]:
+            headers[READ_AFTER_HEADER] = self.read_after[0]
+        return self.client.get(path, name=name or path, headers=headers, **kwargs)
+
+    def post(self, path: str, name: str = None, **kwargs):
+        response = self.client.post(path, name=name or path, **kwargs)
+        if response.headers.get(READ_AFTER_HEADER):
+            self.read_after = (response.headers[READ_AFTER_HEADER], time.time() + READ_AFTER_SECONDS)
+        return response
+
+
+class Requester(AppUser):
+    weight = 20
+    wait_time = between(3, 15)
+
+    def on_start(self):
+        self.requester = next(_requesters)
+        self.login(self.requester.email)
+
+    @task(6)
+    def my_appointments(self):
+        self.get("/appointments/my")
+
+    @task(2)
+    def appointments_summary(self):
+        self.get("/appointments/summary")
+
+    @task(1)
+    def request_darshan(self):
+        start = date.today() + timedelta(days=random.randint(1, 21))
+        appointment = {
+            "purpose": "Darshan",
+            "request_type": "Personal",
+            "location_id": random.choice(MANIFEST.location_ids),
+            "preferred_start_date": start.isoformat(),
+            "preferred_end_date": (start + timedelta(days=random.randint(0, 3))).isoformat(),
+        }
+        contact_ids = self.requester.contact_ids
+        if contact_ids:
+            appointment["contact_ids"] = random.sample(contact_ids, min(len(contact_ids), random.randint(1, 6)))
+        self.post("/appointments/new", json=appointment, name="/appointments/new [darshan]")
+
+    @task(1)
+    def request_dignitary_meeting(self):
+        if not self.requester.dignitary_ids:
+            return
+        dignitary_ids = self.requester.dignitary_ids
+        self.post("/appointments/new", name="/appointments/new [dignitary]", json={
+            "purpose": "Meeting with dignitaries",
+            "request_type": "Dignitary",
+            "location_id": random.choice(MANIFEST.location_ids),
+            "preferred_date": (date.today() + timedelta(days=random.randint(1, 30))).isoformat(),
+            "dignitary_ids": random.sample(dignitary_ids, min(len(dignitary_ids), random.randint(1, 3))),
+        })
+
+
+class Secretariat(AppUser):
+    weight = 2
+    wait_time = between(5, 20)
+
+    def on_start(self):
+        self.login(next(_secretariat))
+
+    @task(4)
+    def upcoming_inbox(self):
+        response = self.get("/admin/appointments/upcoming", params={"limit": 100}, name="/admin/appointments/upcoming")
+        # Half the time, scroll to the second page
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor and random.random() < 0.5:
+            self.get("/admin/appointments/upcoming", params={"limit": 100, "cursor": cursor},
+                     name="/admin/appointments/upcoming [next page]")
+
+    @task(2)
+    def schedule(self):
+        start = date.today() + timedelta(days=random.randint(0, 6))
+        self.get("/admin/calendar-events/schedule", name="/admin/calendar-events/schedule",
+                 params={"start_date": start.isoformat(), "end_date": (start + timedelta(days=2)).isoformat()})
+
+
+class Usher(AppUser):
+    weight = 5
+    # The usher screen refreshes every few seconds
+    wait_time = between(5, 10)
+
+    def on_start(self):
+        self.login(next(_ushers))
+        self.etag = None
+
+    @task
+    def day_sheet(self):
+        headers = {"If-None-Match": self.etag} if self.etag else {}
+        response = self.get("/usher/appointments", headers=headers)
+        self.etag = response.headers.get("ETag", self.etag)
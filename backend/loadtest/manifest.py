@@ -0,0 +1,37 @@
+"""
+The manifest of a generated dataset: its users by role and the ids virtual users
+need to build valid requests. Kept free of app imports for the locust process.
+"""
+from dataclasses import asdict, dataclass, field
+from typing import List
+import json
+
+
+@dataclass
+class Requester:
+    email: str
+    contact_ids: List[int] = field(default_factory=list)
+    dignitary_ids: List[int] = field(default_factory=list)
+
+
+@dataclass
+class Manifest:
+    """What the load test needs to know about the generated data."""
+    prefix: str
+    generated_at: str
+    location_ids: List[int]
+    requesters: List[Requester]
+    secretariat: List[str]
+    ushers: List[str]
+    admins: List[str]
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(asdict(self), f)
+
+    @classmethod
+    def load(cls, path: str) -> "Manifest":
+        with open(path) as f:
+            data = json.load(f)
+        data["requesters"] = [Requester(**requester) for requester in data["requesters"]]
+        return cls(**data)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Per-endpoint latency report of a locust run (its --csv <prefix>_stats.csv).
+
+Prints requests, failures and p50/p95/p99 for every endpoint and fails when an
+endpoint's p95 exceeds its budget (--budget NAME=MS, repeatable; NAME as in the
+report, or "*" for every endpoint) or its failure rate exceeds --max-failure-rate.
+
+Usage (from backend/):
+    python -m loadtest.report loadtest/results/peak_stats.csv [--budget "*=1000"] [--budget /usher/appointments=300]
+
+Exits with status 1 if a budget is exceeded, so it can gate CI.
+"""
+import argparse
+import csv
+import sys
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+@dataclass
+class EndpointStats:
+    name: str
+    requests: int
+    failures: int
+    p50: float
+    p95: float
+    p99: float
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.requests if self.requests else 0.0
+
+
+def read_stats(path: str) -> List[EndpointStats]:
+    stats = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            if not row["Request Count"] or row["Request Count"] == "0":
+                continue
+            name = row["Name"] if row["Name"] == "Aggregated" else f"{row['Type']} {row['Name']}"
+            stats.append(EndpointStats(
+                name=name,
+                requests=int(row["Request Count"]),
+                failures=int(row["Failure Count"]),
+                p50=float(row["50%"]),
+                p95=float(row["95%"]),
+                p99=float(row["99%"]),
+            ))
+    return stats
+
+
+def parse_budgets(values: List[str]) -> Dict[str, float]:
+    budgets = {}
+    for value in values:
+        name, _, ms = value.rpartition("=")
+        if not name:
+            raise SystemExit(f"Invalid budget '{value}', expected NAME=MS")
+        budgets[name] = float(ms)
+    return budgets
+
+
+def budget_for(budgets: Dict[str, float], name: str):
+    # "GET /usher/appointments" matches a budget for "/usher/appointments" too
+    path = name.split(" ", 1)[-1]
+    return budgets.get(name, budgets.get(path, budgets.get("*")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("stats_csv", help="The <prefix>_stats.csv file written by locust --csv <prefix>")
+    parser.add_argument("--budget", action="append", default=[], help="p95 budget as NAME=MS")
+    parser.add_argument("--max-failure-rate", type=float, default=0.01, help="Maximum failure rate per endpoint")
+    args = parser.parse_args()
+
+    stats = read_stats(args.stats_csv)
+    budgets = parse_budgets(args.budget)
+
+    width = max(len(endpoint.name) for endpoint in stats) if stats else 10
+    print(f"{'Endpoint':<{width}}  {'Requests':>9}  {'Failures':>8}  {'p50 ms':>7}  {'p95 ms':>7}  {'p99 ms':>7}")
+    failures = []
+    for endpoint in stats:
+        print(
+            f"{endpoint.name:<{width}}  {endpoint.requests:>9}  {endpoint.failures:>8}  "
+            f"{endpoint.p50:>7.0f}  {endpoint.p95:>7.0f}  {endpoint.p99:>7.0f}"
+        )
+        if endpoint.name == "Aggregated":
+            continue
+        budget = budget_for(budgets, endpoint.name)
+        if budget is not None and endpoint.p95 > budget:
+            failures.append(f"{endpoint.name}: p95 {endpoint.p95:.0f} ms exceeds the {budget:.0f} ms budget")
+        if endpoint.failure_rate > args.max_failure_rate:
+            failures.append(f"{endpoint.name}: {endpoint.failure_rate:.1%} of requests failed")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL {failure}")
+        sys.exit(1)
+    print("ok   all endpoints within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic dataset in the configured database and write its manifest.
+
+The same --seed and sizes give the same data. Rows are loaded with COPY in
+batches, so large datasets for profiling are practical, e.g. a million
+appointments:
+
+    python -m loadtest.seed --appointments 1000000 --requesters 100000 --locations 200 --prefix profiling
+
+Usage (from backend/):
+    python -m loadtest.seed [--appointments 30000] [--requesters 2000] [--locations 20] [--prefix loadtest]
+                            [--seed 42] [--batch-size 50000] [--manifest loadtest/manifest.json]
+"""
+import argparse
+import logging
+import sys
+import time
+
+from database import WriteSessionLocal
+from loadtest.data import DatasetSize, generate
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger("loadtest.seed")
+
+
+def main():
+    defaults = DatasetSize()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--appointments", type=int, default=defaults.appointments)
+    parser.add_argument("--requesters", type=int, default=defaults.requesters)
+    parser.add_argument("--secretariat", type=int, default=defaults.secretariat)
+    parser.add_argument("--ushers", type=int, default=defaults.ushers)
+    parser.add_argument("--admins", type=int, default=defaults.admins)
+    parser.add_argument("--locations", type=int, default=defaults.locations)
+    parser.add_argument("--prefix", default="loadtest", help="Email prefix of the generated users")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed, for reproducible datasets")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Appointments (and requesters) per COPY batch")
+    parser.add_argument("--manifest", default="loadtest/manifest.json", help="Where to write the manifest")
+    args = parser.parse_args()
+
+    size = DatasetSize(
+        requesters=args.requesters,
+        secretariat=args.secretariat,
+        ushers=args.ushers,
+        admins=args.admins,
+        locations=args.locations,
+        appointments=args.appointments,
+    )
+    started = time.perf_counter()
+    db = WriteSessionLocal()
+    try:
+        manifest = generate(db, size, prefix=args.prefix, seed=args.seed, batch_size=args.batch_size)
+        db.commit()
+    except ValueError as e:
+        db.rollback()
+        logger.error(str(e))
+        sys.exit(1)
+    finally:
+        db.close()
+
+    logger.info(f"Dataset generated in {time.perf_counter() - started:.0f}s")
+    manifest.save(args.manifest)
+    logger.info(f"Manifest written to {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Run the app for a load test: real database, stubbed external services.
+
+Installs the SDK stubs (loadtest/stubs.py), turns on email and calendar sync so
+their code paths run against the stubs, and serves the app with gunicorn and
+uvicorn workers like the Procfile does. Settings already in the environment win
+over these defaults; the database settings come from the environment or the
+.env.<ENVIRONMENT> file as usual.
+
+Usage (from backend/):
+    python -m loadtest.serve [--workers 2] [--port 8001]
+"""
+import argparse
+import os
+import tempfile
+
+from loadtest.stubs import install_stubs
+
+STUBBED_SERVICES_ENV = {
+    "JWT_SECRET_KEY": "loadtest",
+    "GOOGLE_CLIENT_ID": "loadtest",
+    "GOOGLE_CALENDAR_ID": "loadtest",
+    "ENABLE_CALENDAR_SYNC": "true",
+    "ENABLE_EMAIL": "true",
+    "SENDGRID_API_KEY": "loadtest",
+    "S3_BUCKET_NAME": "loadtest",
+    "OPENAI_API_KEY": "loadtest",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def configure_environment() -> None:
+    for name, value in STUBBED_SERVICES_ENV.items():
+        os.environ.setdefault(name, value)
+    if "GOOGLE_CREDENTIALS_FILE" not in os.environ:
+        # Calendar sync only checks that the file exists; the stubbed client never reads it
+        credentials = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        credentials.write("{}")
+        credentials.close()
+        os.environ["GOOGLE_CREDENTIALS_FILE"] = credentials.name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args()
+
+    configure_environment()
+    # Workers are forked from this process, so they inherit the stubbed modules
+    install_stubs()
+
+    from gunicorn.app.base import BaseApplication
+
+    class LoadTestApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", args.workers)
+            self.cfg.set("worker_class", "uvicorn.workers.UvicornWorker")
+            self.cfg.set("timeout", 120)
+
+        def load(self):
+            from app import app
+            return app
+
+    LoadTestApplication().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+In-process stand-ins for the external services the app calls: SendGrid, Google
+(Calendar and sign-in), S3 and OpenAI.
+
+install_stubs() registers fake SDK modules in sys.modules before the app imports
+them (it imports every SDK on first use), so the app's own code paths run
+unchanged (email rendering, calendar payloads, thumbnails) and only the network
+call is replaced. Each call sleeps for LOADTEST_STUB_LATENCY_MS to account for
+the real service's round trip, and is counted in STUB_CALLS.
+"""
+from collections import Counter
+import json
+import os
+import sys
+import threading
+import time
+import types
+import uuid
+
+STUB_LATENCY_SECONDS = float(os.getenv("LOADTEST_STUB_LATENCY_MS", 50)) / 1000
+
+STUB_CALLS: Counter = Counter()
+_calls_lock = threading.Lock()
+
+
+def _call(name: str) -> None:
+    with _calls_lock:
+        STUB_CALLS[name] += 1
+    if STUB_LATENCY_SECONDS:
+        time.sleep(STUB_LATENCY_SECONDS)
+
+
+def _module(name: str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    parent, _, child = name.rpartition(".")
+    if parent in sys.modules:
+        setattr(sys.modules[parent], child, module)
+    return module
+
+
+# --- SendGrid ---------------------------------------------------------------
+
+class _Mail:
+    def __init__(self, from_email=None, to_emails=None, subject=None, html_content=None):
+        self.to_emails = to_emails
+        self.subject = subject
+        self.bcc = []
+
+    def add_bcc(self, bcc):
+        self.bcc.append(bcc)
+
+
+class _Bcc:
+    def __init__(self, email):
+        self.email = email
+
+
+class _SendGridResponse:
+    status_code = 202
+    body = b""
+    headers = {}
+
+
+class _SendGridAPIClient:
+    def __init__(self, api_key=None):
+        pass
+
+    def send(self, message):
+        _call("sendgrid.send")
+        return _SendGridResponse()
+
+
+# --- Google -----------------------------------------------------------------
+
+class _HttpError(Exception):
+    def __init__(self, resp=None, content=b"", uri=None):
+        super().__init__(content)
+        self.resp = resp or types.SimpleNamespace(status=500)
+        self.content = content
+
+
+class _Request:
+    def __init__(self, name: str, result):
+        """result is returned by execute(), or raised if it is an exception."""
+        self.name = name
+        self.result = result
+
+    def execute(self):
+        _call(f"google.calendar.{self.name}")
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+class _Events:
+    """Remembers the events it created, so syncing an event again updates it like Google would."""
+
+    def __init__(self):
+        self.ids = set()
+        self.lock = threading.Lock()
+
+    def get(self, calendarId=None, eventId=None):
+        with self.lock:
+            if eventId not in self.ids:
+                return _Request("events.get", _HttpError(types.SimpleNamespace(status=404), b"Not Found"))
+        return _Request("events.get", {"id": eventId, "status": "confirmed"})
+
+    def insert(self, calendarId=None, body=None, **kwargs):
+        event_id = (body or {}).get("id") or uuid.uuid4().hex
+        with self.lock:
+            self.ids.add(event_id)
+        return _Request("events.insert", {**(body or {}), "id": event_id, "htmlLink": f"https://calendar.invalid/{event_id}"})
+
+    def update(self, calendarId=None, eventId=None, body=None, **kwargs):
+        return _Request("events.update", {**(body or {}), "id": eventId, "htmlLink": f"https://calendar.invalid/{eventId}"})
+
+    def delete(self, calendarId=None, eventId=None, **kwargs):
+        with self.lock:
+            if eventId not in self.ids:
+                return _Request("events.delete", _HttpError(types.SimpleNamespace(status=404), b"Not Found"))
+            self.ids.discard(eventId)
+        return _Request("events.delete", {})
+
+
+_events = _Events()
+
+
+class _Calendars:
+    def get(self, calendarId=None):
+        return _Request("calendars.get", {"id": calendarId, "summary": "Load test calendar"})
+
+
+class _CalendarService:
+    def events(self):
+        return _events
+
+    def calendars(self):
+        return _Calendars()
+
+
+class _Credentials:
+    @classmethod
+    def from_service_account_file(cls, filename, scopes=None):
+        return cls()
+
+
+def _verify_oauth2_token(token, request, audience=None, **kwargs):
+    # Sign-in is skipped in load tests (tokens are minted), but accept any token as its own email
+    _call("google.id_token.verify")
+    return {"email": token, "given_name": "Load", "family_name": "Test", "picture": None}
+
+
+# --- S3 ---------------------------------------------------------------------
+
+class _ClientError(Exception):
+    def __init__(self, error_response=None, operation_name=None):
+        super().__init__(operation_name)
+        self.response = error_response or {"Error": {"Code": "NoSuchKey"}}
+
+
+class _S3Client:
+    """Keeps uploaded objects in memory, so uploads can be downloaded again."""
+
+    def __init__(self):
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def put_object(self, Bucket=None, Key=None, Body=b"", ContentType=None, **kwargs):
+        _call("s3.put_object")
+        body = Body.read() if hasattr(Body, "read") else Body
+        with self.lock:
+            self.objects[(Bucket, Key)] = (body, ContentType)
+        return {"ETag": uuid.uuid4().hex}
+
+    def get_object(self, Bucket=None, Key=None, **kwargs):
+        _call("s3.get_object")
+        with self.lock:
+            stored = self.objects.get((Bucket, Key))
+        if stored is None:
+            raise _ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        body, content_type = stored
+        return {"Body": types.SimpleNamespace(read=lambda: body), "ContentType": content_type}
+
+
+_s3_client = _S3Client()
+
+
+# --- OpenAI -----------------------------------------------------------------
+
+class _Completions:
+    def create(self, model=None, messages=None, **kwargs):
+        _call("openai.chat.completions")
+        content = json.dumps({"first_name": "Load", "last_name": "Test", "company": "Synthetic Co."})
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=content))])
+
+
+class _OpenAI:
+    def __init__(self, api_key=None, **kwargs):
+        self.chat = types.SimpleNamespace(completions=_Completions())
+
+
+def install_stubs() -> None:
+    """Register the fake SDK modules; call before the app is imported."""
+    import google  # the real namespace package, so other google.* packages keep working
+
+    _module("sendgrid", SendGridAPIClient=_SendGridAPIClient)
+    _module("sendgrid.helpers")
+    _module("sendgrid.helpers.mail", Mail=_Mail, Bcc=_Bcc)
+
+    _module("google.oauth2")
+    _module("google.oauth2.service_account", Credentials=_Credentials)
+    _module("google.oauth2.id_token", verify_oauth2_token=_verify_oauth2_token)
+    _module("google.auth")
+    _module("google.auth.transport")
+    _module("google.auth.transport.requests", Request=lambda *args, **kwargs: None)
+    _module("googleapiclient")
+    _module("googleapiclient.discovery", build=lambda *args, **kwargs: _CalendarService())
+    _module("googleapiclient.errors", HttpError=_HttpError)
+
+    _module("boto3", client=lambda *args, **kwargs: _s3_client)
+    _module("botocore")
+    _module("botocore.exceptions", ClientError=_ClientError)
+
+    _module("openai", OpenAI=_OpenAI)
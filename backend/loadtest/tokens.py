@@ -0,0 +1,25 @@
+"""
+JWTs for load-test users, so virtual users skip Google sign-in.
+
+Tokens are signed like dependencies.auth.create_access_token does, with the
+JWT_SECRET_KEY of the app under test, and carry the user's email as subject.
+"""
+from datetime import datetime, timedelta
+import os
+
+import jwt
+
+# Must match dependencies/auth.py
+ALGORITHM = "HS256"
+
+
+def mint_token(email: str, secret_key: str = None, lifetime: timedelta = timedelta(hours=12)) -> str:
+    """An access token for the user with this email."""
+    secret_key = secret_key or os.getenv("JWT_SECRET_KEY")
+    if not secret_key:
+        raise ValueError("JWT_SECRET_KEY is not set")
+    return jwt.encode({"sub": email, "exp": datetime.utcnow() + lifetime}, secret_key, algorithm=ALGORITHM)
+
+
+def auth_headers(email: str, secret_key: str = None) -> dict:
+    return {"Authorization": f"Bearer {mint_token(email, secret_key)}"}
@@ -0,0 +1,23 @@
+from fastapi import Request
+
+from utils.audit_log import AuditContext, audit_context_var
+
+
+def create_audit_context_middleware():
+    """
+    Create the middleware that records who makes the changes of a request, so the
+    audit log entries of its transactions carry the client (see utils/audit_log.py).
+    The auth dependencies add the user once the token is verified.
+    """
+    async def audit_context(request: Request, call_next):
+        context = AuditContext(
+            client_ip=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+        )
+        token = audit_context_var.set(context)
+        try:
+            return await call_next(request)
+        finally:
+            audit_context_var.reset(token)
+
+    return audit_context
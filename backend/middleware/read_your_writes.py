@@ -0,0 +1,22 @@
+from fastapi import Request
+
+from utils.read_routing import READ_AFTER_HEADER, RequestWrites, format_read_after, request_writes_var
+
+
+def create_read_your_writes_middleware():
+    """
+    Create the middleware that tells clients when their request committed a write,
+    so their next reads can wait for the replica (see utils/read_routing.py).
+    """
+    async def read_your_writes(request: Request, call_next):
+        writes = RequestWrites()
+        token = request_writes_var.set(writes)
+        try:
+            response = await call_next(request)
+        finally:
+            request_writes_var.reset(token)
+        if writes.committed_at is not None:
+            response.headers[READ_AFTER_HEADER] = format_read_after(writes.committed_at)
+        return response
+
+    return read_your_writes
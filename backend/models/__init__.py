@@ -12,6 +12,9 @@ from .geoCountry import GeoCountry
 from .geoSubdivision import GeoSubdivision
 from .calendarEvent import CalendarEvent
 from .userContact import UserContact
+from .dignitaryVisibility import DignitaryVisibility
+from .backgroundJob import BackgroundJob
+from .notificationDigestEntry import NotificationDigestEntry
 from database import Base
 
 # Import all enums from the shared enums file
@@ -102,6 +105,9 @@ __all__ = [
     'CalendarCreationContext',
     'AppointmentContact',
     'UserContact',
+    'DignitaryVisibility',
+    'BackgroundJob',
+    'NotificationDigestEntry',
     'AOLTeacherStatus',
     'AOLProgramType',
     'AOLAffiliation',
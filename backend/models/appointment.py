@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Date
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Date, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -110,3 +110,22 @@ class Appointment(Base):
     # New relationships for calendar management
     calendar_event = relationship("CalendarEvent", back_populates="appointments")
     appointment_contacts = relationship("AppointmentContact", back_populates="appointment", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # A requester's open appointments (dashboard summary, request form checks)
+        Index("idx_appointments_requester_status", "requester_id", "status"),
+        # Status + sub-status filters (usher day-sheet, stats)
+        Index("idx_appointments_status_sub_status", "status", "sub_status"),
+        # Upcoming requests not on the calendar yet, by single preferred date or by date range
+        Index(
+            "idx_appointments_upcoming_preferred_date", "preferred_date",
+            postgresql_where=text("calendar_event_id IS NULL AND status NOT IN ('CANCELLED', 'REJECTED', 'COMPLETED')"),
+        ),
+        Index(
+            "idx_appointments_upcoming_preferred_end_date", "preferred_end_date",
+            postgresql_where=text(
+                "calendar_event_id IS NULL AND preferred_start_date IS NOT NULL "
+                "AND status NOT IN ('CANCELLED', 'REJECTED', 'COMPLETED')"
+            ),
+        ),
+    )
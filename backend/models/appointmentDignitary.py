@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
-from datetime import datetime, UTC
+from datetime import datetime
 from database import Base
 from .enums import AttendanceStatus
 import os
@@ -12,7 +12,7 @@ class AppointmentDignitary(Base):
     __tablename__ = "appointment_dignitaries"
 
     id = Column(Integer, primary_key=True, index=True)
-    appointment_id = Column(Integer, ForeignKey(f"{schema_prefix}appointments.id", ondelete="CASCADE"), nullable=False)
+    appointment_id = Column(Integer, ForeignKey(f"{schema_prefix}appointments.id", ondelete="CASCADE"), nullable=False, index=True)
     dignitary_id = Column(Integer, ForeignKey(f"{schema_prefix}dignitaries.id", ondelete="CASCADE"), nullable=False)
 
     # check in status
@@ -21,13 +21,17 @@ class AppointmentDignitary(Base):
     checked_in_by = Column(Integer, ForeignKey(f"{schema_prefix}users.id"), nullable=True)
 
     # Audit fields
-    created_at = Column(DateTime, default=datetime.now(UTC))
+    created_at = Column(DateTime, default=datetime.utcnow)
     created_by = Column(Integer, ForeignKey(f"{schema_prefix}users.id"))
 
-    updated_at = Column(DateTime, default=datetime.now(UTC), onupdate=datetime.now(UTC))
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     updated_by = Column(Integer, ForeignKey(f"{schema_prefix}users.id"))
 
     # Relationships
     appointment = relationship("Appointment", back_populates="appointment_dignitaries")
-    dignitary = relationship("Dignitary", back_populates="appointment_dignitaries") 
+    dignitary = relationship("Dignitary", back_populates="appointment_dignitaries")
 
+    __table_args__ = (
+        # A dignitary's appointments (history, visibility, my/{dignitary_id}); covers dignitary_id lookups
+        Index("idx_appointment_dignitaries_dignitary_appointment", "dignitary_id", "appointment_id"),
+    )
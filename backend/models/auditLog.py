@@ -1,36 +1,43 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
-import os
-
-schema = os.getenv('POSTGRES_SCHEMA', 'public')
-schema_prefix = f"{schema}." if schema != 'public' else ''
 
 class AuditLog(Base):
+    """
+    Written in batches by utils/audit_log.py; add entries with audit() rather than db.add().
+    The table is range-partitioned by month on created_at (see the add_audit_log_partitioning migration).
+    """
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Rows arrive in created_at order, so a BRIN index stays tiny however large the log grows
+        Index("ix_audit_logs_created_at_brin", "created_at", postgresql_using="brin"),
+        Index("ix_audit_logs_entity", "entity_type", "entity_id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    # The partition key must be part of the primary key
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    # Who performed the action; not a foreign key, so writes and dropping old partitions need no lookups
+    user_id = Column(Integer, nullable=True, index=True)
 
-    id = Column(Integer, primary_key=True, index=True)
-    
-    # Who performed the action
-    user_id = Column(Integer, ForeignKey(f"{schema_prefix}users.id"), nullable=False, index=True)
-    
     # What was changed
     entity_type = Column(String, nullable=False)  # e.g., 'appointment', 'dignitary', 'user_access', etc.
     entity_id = Column(Integer, nullable=False)
-    action = Column(String, nullable=False)  # e.g., 'create', 'update', 'delete', 'grant_access', etc.
-    
+    action = Column(String, nullable=False)  # e.g., 'create', 'update', 'delete', 'check_in', 'grant_access', etc.
+
     # Details of the change
     previous_state = Column(JSON, nullable=True)  # Store previous values of modified fields
     new_state = Column(JSON, nullable=True)  # Store new values of modified fields
-    
+
     # Additional context
     client_ip = Column(String, nullable=True)
     user_agent = Column(String, nullable=True)
     notes = Column(Text, nullable=True)
-    
+
     # When the action occurred
-    created_at = Column(DateTime, default=datetime.utcnow)
-    
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
+
     # Relationships
-    user = relationship("User", foreign_keys=[user_id]) 
\ No newline at end of file
+    user = relationship("User", primaryjoin="foreign(AuditLog.user_id) == User.id", viewonly=True)
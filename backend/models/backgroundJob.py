@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+from database import Base
+import os
+
+schema = os.getenv('POSTGRES_SCHEMA', 'public')
+schema_prefix = f"{schema}." if schema != 'public' else ''
+
+class BackgroundJob(Base):
+    """
+    A unit of background work (email, calendar sync, appointment side effects, ...)
+    run by utils/jobs.py. Rows that exhaust their attempts stay in the table with
+    status 'dead' so they can be inspected and retried from the admin endpoints.
+    """
+    __tablename__ = "background_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    queue = Column(String, nullable=False, index=True)
+    task = Column(String, nullable=False, index=True)
+    payload = Column(JSONB, nullable=False, default=dict)
+
+    # 'pending', 'running', 'done' or 'dead'
+    status = Column(String, nullable=False, default="pending", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)
+    locked_by = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Workers only ever scan runnable jobs of one queue, oldest run_at first
+        Index(
+            "idx_background_jobs_runnable",
+            "queue", "run_at",
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
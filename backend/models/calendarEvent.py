@@ -70,4 +70,6 @@ class CalendarEvent(Base):
         Index('idx_calendar_events_datetime_type', 'start_datetime', 'event_type'),
         Index('idx_calendar_events_status_booking', 'status', 'is_open_for_booking'),
         Index('idx_calendar_events_creation_context', 'creation_context', 'creation_context_id'),
+        # Day ranges (usher day-sheet, stats, upcoming), already in display order
+        Index('idx_calendar_events_start_date_time', 'start_date', 'start_time'),
     )
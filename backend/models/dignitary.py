@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Date
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from database import Base
 from sqlalchemy import Enum
@@ -60,6 +60,15 @@ class Dignitary(Base):
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Full-text search document over name, organization, title and domain.
+    # Maintained by the dignitaries_search_vector_update trigger (migration b3f8e1d5c7a2)
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+
+    # Normalized keys for duplicate detection, maintained by utils.dignitary_matching
+    name_key = Column(String, nullable=True)
+    email_key = Column(String, nullable=True, index=True)
+    phone_key = Column(String, nullable=True, index=True)
+
     # Relationships
     creator = relationship("User", foreign_keys=[created_by])
     appointments = relationship("Appointment", back_populates="dignitary", foreign_keys="Appointment.dignitary_id")
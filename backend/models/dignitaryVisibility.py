@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index
+from datetime import datetime
+from database import Base
+import os
+
+schema = os.getenv('POSTGRES_SCHEMA', 'public')
+schema_prefix = f"{schema}." if schema != 'public' else ''
+
+class DignitaryVisibility(Base):
+    """
+    Where and when each dignitary last had an appointment, one row per (dignitary, location).
+    Maintained by utils/dignitary_visibility.py on every appointment write; used to answer
+    "which dignitaries can this user see through recent appointments" with an indexed join.
+    """
+    __tablename__ = "dignitary_visibility"
+
+    dignitary_id = Column(Integer, ForeignKey(f"{schema_prefix}dignitaries.id", ondelete="CASCADE"), primary_key=True)
+    location_id = Column(Integer, ForeignKey(f"{schema_prefix}locations.id", ondelete="CASCADE"), primary_key=True)
+    country_code = Column(String, nullable=False)
+    # Latest of preferred date, appointment date and calendar event date across the appointments
+    last_appointment_date = Column(Date, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_dignitary_visibility_country_date', 'country_code', 'last_appointment_date'),
+        Index('idx_dignitary_visibility_location_date', 'location_id', 'last_appointment_date'),
+    )
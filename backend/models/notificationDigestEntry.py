@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+from database import Base
+import os
+
+schema = os.getenv('POSTGRES_SCHEMA', 'public')
+schema_prefix = f"{schema}." if schema != 'public' else ''
+
+class NotificationDigestEntry(Base):
+    """
+    A notification email held back for a secretariat user in digest mode.
+    Entries accumulate until utils/notification_digest.py sends them as one
+    summary email and sets sent_at.
+    """
+    __tablename__ = "notification_digest_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey(f"{schema_prefix}users.id", ondelete="CASCADE"), nullable=False)
+    appointment_id = Column(Integer, ForeignKey(f"{schema_prefix}appointments.id", ondelete="CASCADE"), nullable=True)
+    trigger_type = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    # Appointment summary shown in the digest, captured when the event happened
+    details = Column(JSONB, nullable=False, default=dict)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Only unsent entries are ever looked up, per user
+        Index(
+            "idx_notification_digest_entries_pending",
+            "user_id", "created_at",
+            postgresql_where=text("sent_at IS NULL"),
+        ),
+    )
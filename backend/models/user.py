@@ -15,6 +15,7 @@ DEFAULT_EMAIL_NOTIFICATION_PREFERENCES = {
     "appointment_updated": True,  # When an appointment's status/details are updated
     "new_appointment_request": False,  # For secretariat - when new appointments are created
     "bcc_on_all_emails": False,  # For secretariat - to receive BCCs of all appointment-related emails
+    "notification_digest": False,  # For secretariat - to get the above as a periodic digest instead of one email each
 }
 
 class User(Base):
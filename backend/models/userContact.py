@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Enum, Index, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Enum, Index, UniqueConstraint, Computed
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -18,6 +18,8 @@ class UserContact(Base):
     # Contact information as entered by owner
     first_name = Column(String(255), nullable=False)
     last_name = Column(String(255), nullable=False)
+    # Generated by the database; trigram and prefix indexes on it are created by migration 7c1e2f4a9b10
+    full_name = Column(String(511), Computed("first_name || ' ' || last_name", persisted=True))
     email = Column(String(255), nullable=True)
     phone = Column(String(50), nullable=True)
     
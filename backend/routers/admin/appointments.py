@@ -1,18 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, false, func
 from datetime import datetime, date, timedelta, time
 from typing import Optional, List
+import json
 import logging
 
 import models
 import schemas
-from dependencies.database import get_db, get_read_db
+from dependencies.database import get_db, get_read_db, get_batch_db
 from dependencies.auth import get_current_user_for_write, get_current_user, requires_any_role
-from dependencies.access_control import admin_get_appointment
-from utils.email_notifications import notify_appointment_creation, notify_appointment_update
-from utils.calendar_sync import check_and_sync_appointment, check_and_sync_updated_appointment
+from dependencies.access_control import admin_get_appointment, get_appointment_access_scope
+from utils.appointment_side_effects import record_appointment_change, AppointmentChangeType, AppointmentSideEffect
 from utils.utils import convert_to_datetime_with_tz
+from utils.upcoming_appointments import get_upcoming_appointments as fetch_upcoming_appointments
+from utils.qr_codes import create_checkin_qr_code, get_checkin_qr_expiry
+from utils.loader_options import appointment_list_options
 from models.enums import RequestType, EVENT_TYPE_TO_REQUEST_TYPE_EXPLICIT
 
 logger = logging.getLogger(__name__)
@@ -275,20 +278,12 @@ async def create_appointment(
                 )
                 db.add(appointment_contact)
         
+        # Email notifications and calendar sync run in the background after commit
+        record_appointment_change(
+            db, db_appointment.id, AppointmentChangeType.CREATED, created_by=current_user.id
+        )
         db.commit()
         db.refresh(db_appointment)
-        
-        # Send email notifications
-        try:
-            notify_appointment_creation(db, db_appointment)
-        except Exception as e:
-            logger.error(f"Error sending email notifications: {str(e)}", exc_info=True)
-
-        # Sync appointment to Google Calendar if it meets criteria
-        try:
-            await check_and_sync_appointment(db_appointment, db)
-        except Exception as e:
-            logger.error(f"Error processing appointment for Google Calendar sync: {str(e)}", exc_info=True)
 
         # Calculate total operation time
         total_time = (datetime.utcnow() - start_time).total_seconds() * 1000
@@ -306,17 +301,13 @@ def prepare_enhanced_admin_appointment_response(appointment: models.Appointment,
     
     # Load related data
     appointment = db.query(models.Appointment).options(
-        joinedload(models.Appointment.requester),
-        joinedload(models.Appointment.calendar_event),
-        joinedload(models.Appointment.location),
-        joinedload(models.Appointment.meeting_place),
-        joinedload(models.Appointment.created_by_user),
-        joinedload(models.Appointment.last_updated_by_user),
-        joinedload(models.Appointment.approved_by_user),
-        joinedload(models.Appointment.appointment_dignitaries).joinedload(
-            models.AppointmentDignitary.dignitary
-        ),
-        joinedload(models.Appointment.appointment_contacts).joinedload(models.AppointmentContact.contact)
+        *appointment_list_options(
+            models.Appointment.location,
+            models.Appointment.meeting_place,
+            models.Appointment.created_by_user,
+            models.Appointment.last_updated_by_user,
+            models.Appointment.approved_by_user,
+        )
     ).filter(models.Appointment.id == appointment.id).first()
     
     # Prepare calendar event basic info
@@ -424,9 +415,6 @@ async def update_appointment(
             calendar_event_updated = True
             logger.info(f"Created calendar event {calendar_event.id} for approved appointment {appointment.id}")
     
-    db.commit()
-    db.refresh(appointment)
-
     if appointment_update.dignitary_ids:
         for dignitary_id in appointment_update.dignitary_ids:
             appointment_dignitary = models.AppointmentDignitary(
@@ -436,23 +424,17 @@ async def update_appointment(
                 updated_by=current_user.id
             )
             db.add(appointment_dignitary)
-            
-        db.commit()
 
-    # Send email notifications about the update
-    try:
-        notify_appointment_update(db, appointment, old_data, update_data)
-        if calendar_event_updated:
-            logger.info(f"Calendar event operations completed for appointment {appointment.id}")
-    except Exception as e:
-        logger.error(f"Error sending email notifications: {str(e)}")
-    
-    # Handle calendar sync based on appointment status changes
-    try:
-        await check_and_sync_updated_appointment(appointment, old_data, update_data, db)
-        logger.debug(f"Appointment status changes processed for calendar sync")
-    except Exception as e:
-        logger.error(f"Error handling appointment calendar sync based on status changes: {str(e)}")
+    if calendar_event_updated:
+        logger.info(f"Calendar event operations completed for appointment {appointment.id}")
+
+    # Email notifications and calendar sync run in the background after commit
+    record_appointment_change(
+        db, appointment.id, AppointmentChangeType.UPDATED, created_by=current_user.id,
+        old_data=old_data, new_data=update_data
+    )
+    db.commit()
+    db.refresh(appointment)
     
     return appointment
 
@@ -461,7 +443,7 @@ async def update_appointment(
 async def bulk_update_appointments(
     bulk_update: schemas.BulkAppointmentUpdate,
     current_user: models.User = Depends(get_current_user_for_write),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_batch_db)
 ):
     """Update multiple appointments with the same status"""
     logger.info(f"Bulk updating {len(bulk_update.appointment_ids)} appointments to status {bulk_update.status}")
@@ -500,13 +482,12 @@ async def bulk_update_appointments(
                 
                 updated_count += 1
                 
-                # Send email notification for this appointment
-                try:
-                    old_data = {'status': old_status}
-                    update_data = {'status': appointment.status}
-                    notify_appointment_update(db, appointment, old_data, update_data)
-                except Exception as e:
-                    logger.error(f"Error sending email notification for appointment {appointment_id}: {str(e)}")
+                # Queue the email notification for this appointment; sent after commit
+                record_appointment_change(
+                    db, appointment.id, AppointmentChangeType.UPDATED, created_by=current_user.id,
+                    old_data={'status': old_status}, new_data={'status': appointment.status},
+                    effects=[AppointmentSideEffect.EMAIL]
+                )
                 
             except Exception as e:
                 logger.error(f"Error updating appointment {appointment_id}: {str(e)}")
@@ -532,7 +513,7 @@ async def bulk_update_appointments(
 async def bulk_approve_and_schedule_appointments(
     bulk_approve: schemas.BulkAppointmentApproveSchedule,
     current_user: models.User = Depends(get_current_user_for_write),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_batch_db)
 ):
     """Approve and schedule multiple appointments to a specific calendar event"""
     logger.info(f"Bulk approving and scheduling {len(bulk_approve.appointment_ids)} appointments to calendar event {bulk_approve.calendar_event_id}")
@@ -595,20 +576,20 @@ async def bulk_approve_and_schedule_appointments(
                 
                 updated_count += 1
                 
-                # Send email notification for this appointment
-                try:
-                    old_data = {
+                # Queue the email notification for this appointment; sent after commit
+                record_appointment_change(
+                    db, appointment.id, AppointmentChangeType.UPDATED, created_by=current_user.id,
+                    old_data={
                         'status': old_status,
                         'sub_status': old_sub_status
-                    }
-                    update_data = {
+                    },
+                    new_data={
                         'status': appointment.status,
                         'sub_status': appointment.sub_status,
                         'calendar_event_id': appointment.calendar_event_id
-                    }
-                    notify_appointment_update(db, appointment, old_data, update_data)
-                except Exception as e:
-                    logger.error(f"Error sending email notification for appointment {appointment_id}: {str(e)}")
+                    },
+                    effects=[AppointmentSideEffect.EMAIL]
+                )
                 
             except Exception as e:
                 logger.error(f"Error updating appointment {appointment_id}: {str(e)}")
@@ -730,13 +711,8 @@ async def get_all_appointments(
         query = query.join(models.Location)
         query = query.filter(or_(*access_filters))
     
-    # Add options to eagerly load appointment_dignitaries and their associated dignitaries
-    query = query.options(
-        joinedload(models.Appointment.appointment_dignitaries).joinedload(models.AppointmentDignitary.dignitary),
-        joinedload(models.Appointment.requester),
-        joinedload(models.Appointment.appointment_contacts).joinedload(models.AppointmentContact.contact),
-        joinedload(models.Appointment.calendar_event)
-    )
+    # Eagerly load attendees, requester and calendar event
+    query = query.options(*appointment_list_options())
 
     appointments = query.all()
     logger.debug(f"Appointments: {appointments}")
@@ -745,111 +721,40 @@ async def get_all_appointments(
 @router.get("/upcoming", response_model=List[schemas.AdminAppointment])
 @requires_any_role([models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
 async def get_upcoming_appointments(
+    response: Response,
     db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
     status: Optional[str] = None,
-    request_type: Optional[str] = None
+    request_type: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size (default: all upcoming appointments)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
 ):
-    """Get all upcoming appointments (future calendar event date or preferred date/range) with access control restrictions and optional filters"""
-    # Start with the filter for upcoming appointments - use calendar events and preferred dates/ranges
-    upcoming_filter = and_(
-        or_(
-            # Calendar event dates (confirmed appointments)
-            and_(
-                models.Appointment.calendar_event_id.isnot(None),
-                models.CalendarEvent.start_date >= date.today()-timedelta(days=1)
-            ),
-            # Pending appointments with single preferred dates (dignitary appointments)
-            and_(
-                models.Appointment.calendar_event_id.is_(None),
-                models.Appointment.preferred_date.isnot(None),
-                models.Appointment.preferred_date >= date.today()-timedelta(days=1)
-            ),
-            # Pending appointments with preferred date ranges (non-dignitary appointments)
-            and_(
-                models.Appointment.calendar_event_id.is_(None),
-                models.Appointment.preferred_start_date.isnot(None),
-                models.Appointment.preferred_end_date >= date.today()-timedelta(days=1)
-            )
-        ),
-        models.Appointment.status.notin_([
-            models.AppointmentStatus.CANCELLED, 
-            models.AppointmentStatus.REJECTED, 
-            models.AppointmentStatus.COMPLETED,
-        ])
-    )
-    
-    # Base query with upcoming filter - add join for calendar events
-    query = db.query(models.Appointment).outerjoin(
-        models.CalendarEvent, 
-        models.Appointment.calendar_event_id == models.CalendarEvent.id
-    ).filter(upcoming_filter)
-    
-    # Apply status filter if provided
-    if status:
-        query = query.filter(models.Appointment.status == status)
-    
-    # Apply request type filter if provided
-    if request_type:
-        query = query.filter(models.Appointment.request_type.in_(request_type.split(',')))
+    """
+    Get upcoming appointments (future calendar event date or preferred date/range) with access control
+    restrictions and optional filters, scheduled ones first. With a limit, the response carries an
+    X-Next-Cursor header while more pages remain; pass it back as cursor to get the next page.
+    """
+    # None for ADMIN users, who have access to all appointments
+    scope = get_appointment_access_scope(db, current_user)
+    if scope is not None and not scope:
+        # If no valid access records exist, return empty list
+        return []
 
-    # ADMIN role has full access to all appointments
-    if current_user.role != models.UserRole.ADMIN:
-        # For non-ADMIN users, apply access control restrictions
-        # Get all active access records for the current user
-        user_access = db.query(models.UserAccess).filter(
-            models.UserAccess.user_id == current_user.id,
-            models.UserAccess.is_active == True,
-            # Only consider records that grant access to appointments
-            or_(
-                models.UserAccess.entity_type == models.EntityType.APPOINTMENT,
-                models.UserAccess.entity_type == models.EntityType.APPOINTMENT_AND_DIGNITARY
-            )
-        ).all()
-        
-        if not user_access:
-            # If no valid access records exist, return empty list
-            return []
-        
-        # Create access filters based on country and location
-        access_filters = []
-        # Start with a "false" condition that ensures no records are returned if no access is configured
-        access_filters.append(false())
-        for access in user_access:
-            # If a specific location is specified in the access record
-            if access.location_id:
-                access_filters.append(
-                    and_(
-                        models.Appointment.location_id == access.location_id,
-                        models.Location.country_code == access.country_code
-                    )
-                )
-            else:
-                # Access to all locations in the country
-                access_filters.append(
-                    models.Location.country_code == access.country_code
-                )
-        
-        # Join to locations table and apply the country and location filters
-        query = query.join(models.Location)
-        query = query.filter(or_(*access_filters))
-
-    # Add sorting - prioritize calendar event dates, then preferred dates/ranges
-    query = query.order_by(
-        models.CalendarEvent.start_date.asc().nulls_last(),
-        models.Appointment.preferred_date.asc().nulls_last(),
-        models.Appointment.preferred_start_date.asc().nulls_last()
-    )
+    try:
+        appointments, next_cursor = fetch_upcoming_appointments(
+            db,
+            cutoff=date.today() - timedelta(days=1),
+            status=status,
+            request_types=request_type.split(',') if request_type else None,
+            scope=scope,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    # Add options to eagerly load appointment_dignitaries and their associated dignitaries
-    query = query.options(
-        joinedload(models.Appointment.appointment_dignitaries).joinedload(models.AppointmentDignitary.dignitary),
-        joinedload(models.Appointment.requester),
-        joinedload(models.Appointment.appointment_contacts).joinedload(models.AppointmentContact.contact),
-        joinedload(models.Appointment.calendar_event)
-    )
-    
-    appointments = query.all()
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     logger.debug(f"Upcoming appointments with access control: {len(appointments)}")
     return appointments
 
@@ -870,6 +775,55 @@ async def get_appointment(
     )
     return appointment
 
+@router.post("/{appointment_id}/check-in-qr", response_model=schemas.CheckinQRCodeResponse)
+@requires_any_role([models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
+async def generate_check_in_qr_code(
+    appointment_id: int,
+    appointment_contact_id: Optional[int] = None,
+    appointment_dignitary_id: Optional[int] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Issue a signed check-in QR code for a scheduled appointment, scanned by ushers with
+    /usher/check-in/batch. Without attendee ids the code checks in everyone on the appointment;
+    with one it is a personal badge. Codes expire the day after the appointment.
+    """
+    if appointment_contact_id is not None and appointment_dignitary_id is not None:
+        raise HTTPException(status_code=400, detail="Specify at most one attendee")
+
+    appointment = admin_get_appointment(
+        current_user=current_user,
+        db=db,
+        appointment_id=appointment_id,
+        required_access_level=models.AccessLevel.READ_WRITE
+    )
+    if appointment.status != models.AppointmentStatus.APPROVED \
+            or appointment.sub_status != models.AppointmentSubStatus.SCHEDULED \
+            or not appointment.calendar_event:
+        raise HTTPException(status_code=400, detail="QR codes are only available for scheduled appointments")
+
+    if appointment_contact_id is not None and not any(
+        contact.id == appointment_contact_id for contact in appointment.appointment_contacts
+    ):
+        raise HTTPException(status_code=404, detail="Attendee not found in this appointment")
+    if appointment_dignitary_id is not None and not any(
+        dignitary.id == appointment_dignitary_id for dignitary in appointment.appointment_dignitaries
+    ):
+        raise HTTPException(status_code=404, detail="Attendee not found in this appointment")
+
+    expires_at = get_checkin_qr_expiry(appointment.calendar_event.start_date)
+    qr_code = create_checkin_qr_code(appointment.id, expires_at, appointment_contact_id, appointment_dignitary_id)
+    return schemas.CheckinQRCodeResponse(
+        appointment_id=appointment.id,
+        appointment_contact_id=appointment_contact_id,
+        appointment_dignitary_id=appointment_dignitary_id,
+        uuid=qr_code["uuid"],
+        token=qr_code["token"],
+        qr_text=json.dumps(qr_code),
+        expires_at=expires_at,
+    )
+
 def create_calendar_event_for_approved_appointment(
     appointment: models.Appointment,
     current_user: models.User,
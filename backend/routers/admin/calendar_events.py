@@ -11,6 +11,7 @@ from dependencies.database import get_db, get_read_db
 from dependencies.auth import get_current_user_for_write, get_current_user, requires_any_role
 from models.calendarEvent import EventType, EventStatus
 from utils.utils import convert_to_datetime_with_tz
+from utils.loader_options import eager_load
 
 logger = logging.getLogger(__name__)
 
@@ -234,15 +235,13 @@ async def get_calendar_events_schedule(
         ])
     ).options(
         # Eager load all related entities
-        joinedload(models.Appointment.appointment_dignitaries).joinedload(
-            models.AppointmentDignitary.dignitary
-        ),
-        joinedload(models.Appointment.appointment_contacts).joinedload(
-            models.AppointmentContact.contact
-        ),
-        joinedload(models.Appointment.requester),
-        joinedload(models.Appointment.location),
-        joinedload(models.Appointment.meeting_place)
+        *eager_load(
+            (models.Appointment.appointment_dignitaries, models.AppointmentDignitary.dignitary),
+            (models.Appointment.appointment_contacts, models.AppointmentContact.contact),
+            models.Appointment.requester,
+            models.Appointment.location,
+            models.Appointment.meeting_place,
+        )
     )
     
     linked_appointments = appointments_query.all()
@@ -548,13 +547,13 @@ async def get_event_appointments(
     appointments = db.query(models.Appointment).filter(
         models.Appointment.calendar_event_id == event_id
     ).options(
-        joinedload(models.Appointment.appointment_dignitaries).joinedload(
-            models.AppointmentDignitary.dignitary
-        ),
-        joinedload(models.Appointment.requester),
-        joinedload(models.Appointment.location),
-        joinedload(models.Appointment.meeting_place),
-        joinedload(models.Appointment.appointment_contacts).joinedload(models.AppointmentContact.contact)
+        *eager_load(
+            (models.Appointment.appointment_dignitaries, models.AppointmentDignitary.dignitary),
+            models.Appointment.requester,
+            models.Appointment.location,
+            models.Appointment.meeting_place,
+            (models.Appointment.appointment_contacts, models.AppointmentContact.contact),
+        )
     ).all()
     
     return appointments
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, false
+from sqlalchemy import or_, and_, false, true, func, desc, select, tuple_
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 import logging
+import math
+import re
 import tempfile
 import os
 import uuid
@@ -13,6 +15,8 @@ import schemas
 from dependencies.database import get_db, get_read_db
 from dependencies.auth import get_current_user_for_write, get_current_user, requires_any_role
 from dependencies.access_control import admin_get_dignitary
+from utils.dignitary_visibility import visible_dignitary_filter
+from utils.dignitary_matching import find_duplicate_candidates, describe_duplicate_candidates, possible_duplicates_of
 from utils.s3 import upload_file
 from utils.business_card import extract_business_card_info, BusinessCardExtractionError
 
@@ -20,7 +24,7 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/new", response_model=schemas.AdminDignitary)
+@router.post("/new", response_model=schemas.AdminDignitaryCreateResponse)
 async def new_dignitary(
     dignitary: schemas.AdminDignitaryCreate,
     current_user: models.User = Depends(get_current_user_for_write),
@@ -35,22 +39,40 @@ async def new_dignitary(
     db.commit()
     db.refresh(new_dignitary)
 
+    new_dignitary.possible_duplicates = possible_duplicates_of(db, new_dignitary)
+
     return new_dignitary
 
 
-@router.get("/all", response_model=List[schemas.AdminDignitary])
+@router.post("/duplicates/check", response_model=List[schemas.DignitaryDuplicateCandidate])
 @requires_any_role([models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
-async def get_all_dignitaries(
+async def check_dignitary_duplicates(
+    check: schemas.DignitaryDuplicateCheck,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_read_db)
 ):
-    logger.debug(f"Getting all dignitaries for user {current_user.email}")
-    """Get all dignitaries with access control restrictions based on user permissions"""
+    """Existing dignitaries that are probably the same person, for warning before create or update"""
+    candidates = find_duplicate_candidates(
+        db,
+        check.first_name,
+        check.last_name,
+        email=check.email,
+        phone=check.phone,
+        exclude_id=check.exclude_id,
+    )
+    return describe_duplicate_candidates(db, candidates)
+
+
+def apply_dignitary_access_filter(query, db: Session, current_user: models.User):
+    """
+    Restrict a Dignitary query to what the user may see, or return None if they can see nothing.
+    SECRETARIAT users see dignitaries from countries they have access to and dignitaries with
+    appointments in the last 30 days at locations they have access to.
+    """
     # ADMIN role has full access to all dignitaries
     if current_user.role == models.UserRole.ADMIN:
-        dignitaries = db.query(models.Dignitary).all()
-        return dignitaries
-    
+        return query
+
     # For SECRETARIAT and other roles, apply access control restrictions
     # Get all active access records for the current user
     user_access = db.query(models.UserAccess).filter(
@@ -59,83 +81,177 @@ async def get_all_dignitaries(
         # Only consider records that grant access to dignitaries
         models.UserAccess.entity_type == models.EntityType.APPOINTMENT_AND_DIGNITARY,
     ).all()
-    
+
     if not user_access:
-        # If no valid access records exist, return empty list
-        return []
-    
-    # Create country filters based on user's access permissions
-    country_filters = []
-    # Start with a "false" condition that ensures no records are returned if no access is configured
-    country_filters.append(false())
-    
-    # Create location filters based on user's access permissions
-    location_filters = []
-    
-    for access in user_access:
-        # If location-specific access exists, add to location filters
-        if access.location_id is not None:
-            location_filters.append(
-                and_(
-                    models.Appointment.location_id == access.location_id,
-                )
-            )
-        else:
-            # Add country filters for querying dignitaries
-            country_filters.append(
-                models.Dignitary.country_code == access.country_code
-            )
+        return None
 
-            # Country-level access for appointments
-            location_filters.append(
-                models.Location.country_code == access.country_code
-            )
-    
+    # Dignitaries from countries the user has access to
+    country_codes = [access.country_code for access in user_access if access.location_id is None]
     # Calculate date threshold for recent appointments (30 days ago)
     thirty_days_ago = datetime.now().date() - timedelta(days=30)
-    
-    # Find dignitaries associated with recent appointments the user has access to
-    appointment_dignitary_query = db.query(
-        models.AppointmentDignitary.dignitary_id
-    ).join(
-        models.Appointment, 
-        models.AppointmentDignitary.appointment_id == models.Appointment.id,
-    ).join(
-        models.Location,
-        models.Appointment.location_id == models.Location.id
-    ).outerjoin(
-        models.CalendarEvent,
-        models.Appointment.calendar_event_id == models.CalendarEvent.id
-    ).filter(
-        or_(*location_filters),
+
+    return query.filter(
         or_(
-            models.Appointment.preferred_date >= thirty_days_ago,
-            and_(
-                models.Appointment.calendar_event_id.isnot(None),
-                models.CalendarEvent.start_date >= thirty_days_ago
-            )
+            models.Dignitary.country_code.in_(country_codes) if country_codes else false(),
+            # Dignitaries with recent appointments at locations the user has access to
+            visible_dignitary_filter(user_access, since=thirty_days_ago)
         )
-    ).distinct()
-    
-    # Get dignitary IDs from the subquery
-    dignitary_ids_from_appointments = [row[0] for row in appointment_dignitary_query.all()]
-    logger.debug(f"Dignitary IDs from appointments: {dignitary_ids_from_appointments}")
-    
-    if not dignitary_ids_from_appointments or len(dignitary_ids_from_appointments) == 0:
-        # If there are no appointment-related dignitaries, get and combine all dignitaries from countries the user has access to
-        dignitaries = db.query(models.Dignitary).filter(or_(*country_filters)).all()
+    )
+
+
+def build_dignitary_search_query(search: str):
+    """Turn free text into a prefix-matching tsquery ("ram sha" -> ram:* & sha:*), or None."""
+    terms = re.findall(r"\w+", search.lower())
+    if not terms:
+        return None
+    return func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+
+
+@router.get("/all", response_model=List[schemas.AdminDignitary])
+@requires_any_role([models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
+async def get_all_dignitaries(
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    page: Optional[int] = Query(None, ge=1, description="Page number; omit to return all dignitaries"),
+    per_page: int = Query(100, ge=1, le=500, description="Items per page")
+):
+    """Get all dignitaries with access control restrictions based on user permissions"""
+    logger.debug(f"Getting all dignitaries for user {current_user.email}")
+    query = apply_dignitary_access_filter(db.query(models.Dignitary), db, current_user)
+    if query is None:
+        # If no valid access records exist, return empty list
+        return []
+
+    if page is not None:
+        query = query.order_by(models.Dignitary.id).offset((page - 1) * per_page).limit(per_page)
+
+    return query.all()
+
+
+DIRECTORY_SORT_COLUMNS = {
+    "name": (models.Dignitary.last_name, models.Dignitary.first_name),
+    "created": (models.Dignitary.created_at,),
+    "organization": (models.Dignitary.organization,),
+    "country": (models.Dignitary.country_code,),
+}
+
+
+@router.get("/directory", response_model=schemas.AdminDignitaryDirectoryResponse)
+@requires_any_role([models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
+async def get_dignitary_directory(
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    page: int = Query(1, ge=1, description="Page number"),
+    per_page: int = Query(50, ge=1, le=200, description="Items per page"),
+    search: Optional[str] = Query(None, description="Search name, organization, title and domain"),
+    country_code: Optional[str] = Query(None, description="Filter by country code"),
+    primary_domain: Optional[str] = Query(None, description="Filter by primary domain"),
+    sort_by: str = Query("relevance", description="Sort by: relevance, name, created, organization, country"),
+    sort_order: str = Query("asc", description="Sort order: asc or desc")
+):
+    """
+    Paginated dignitary directory with full-text search and facet counts.
+    Facet counts by country_code and primary_domain cover the search results before the
+    country/domain filters are applied, so the UI can show every option with its count.
+    The page, the total and the facets come from one statement over a CTE of the search results.
+    """
+    base_query = apply_dignitary_access_filter(db.query(models.Dignitary), db, current_user)
+    if base_query is None:
+        return schemas.AdminDignitaryDirectoryResponse(
+            dignitaries=[], total=0, page=page, per_page=per_page, total_pages=0,
+            facets={"country_code": [], "primary_domain": []}
+        )
+
+    ts_query = build_dignitary_search_query(search) if search else None
+    if ts_query is not None:
+        base_query = base_query.filter(models.Dignitary.search_vector.op("@@")(ts_query))
+
+    # Sorting
+    if sort_order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid sort order. Use asc or desc")
+    if sort_by == "relevance" and ts_query is not None:
+        sort_columns = [func.ts_rank(models.Dignitary.search_vector, ts_query)]
+        sort_descending = True
     else:
-        # If there are appointment-related dignitaries, get and combine them
-        dignitaries = db.query(models.Dignitary).filter(
-            or_(
-                # Combine with appointment-related dignitaries
-                models.Dignitary.id.in_(dignitary_ids_from_appointments),
-                # Apply country filters to get dignitaries from countries the user has access to
-                or_(*country_filters)
-            )
-        ).all()
-    
-    return dignitaries
+        sort_columns = list(DIRECTORY_SORT_COLUMNS.get(sort_by, DIRECTORY_SORT_COLUMNS["name"]))
+        sort_descending = sort_order == "desc"
+
+    # The search results are scanned once into a CTE that the facets, the total and the page all read
+    matched = base_query.with_entities(
+        models.Dignitary.id,
+        models.Dignitary.country_code,
+        models.Dignitary.primary_domain,
+        *(column.label(f"sort_{index}") for index, column in enumerate(sort_columns))
+    ).order_by(None).cte("matched")
+
+    # Facet filters
+    facet_filters = []
+    if country_code:
+        facet_filters.append(matched.c.country_code == country_code)
+    if primary_domain:
+        try:
+            facet_filters.append(matched.c.primary_domain == models.PrimaryDomain(primary_domain))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid primary domain: {primary_domain}")
+
+    # Both facets in one GROUPING SETS aggregate, folded into a single JSON value
+    facet_counts = select(
+        matched.c.country_code,
+        matched.c.primary_domain,
+        func.grouping(matched.c.country_code).label("country_grouped"),
+        func.count().label("count")
+    ).group_by(
+        func.grouping_sets(tuple_(matched.c.country_code), tuple_(matched.c.primary_domain))
+    ).subquery("facet_counts")
+    summary = select(
+        select(func.json_agg(func.json_build_array(
+            facet_counts.c.country_grouped,
+            facet_counts.c.country_code,
+            facet_counts.c.primary_domain,
+            facet_counts.c.count,
+        ))).scalar_subquery().label("facets"),
+        select(func.count()).select_from(matched).where(*facet_filters).scalar_subquery().label("total"),
+    ).subquery("summary")
+
+    order_columns = [
+        desc(matched.c[f"sort_{index}"]) if sort_descending else matched.c[f"sort_{index}"]
+        for index in range(len(sort_columns))
+    ]
+    page_ids = select(
+        matched.c.id,
+        func.row_number().over(order_by=[*order_columns, matched.c.id]).label("position")
+    ).where(*facet_filters).order_by(
+        *order_columns, matched.c.id
+    ).offset((page - 1) * per_page).limit(per_page).subquery("page_ids")
+
+    # One row per dignitary on the page, or a single row without one when the page is empty
+    rows = db.query(summary.c.facets, summary.c.total, models.Dignitary).select_from(summary).outerjoin(
+        page_ids, true()
+    ).outerjoin(
+        models.Dignitary, models.Dignitary.id == page_ids.c.id
+    ).order_by(page_ids.c.position).all()
+
+    total = rows[0].total
+    facets = {"country_code": [], "primary_domain": []}
+    for country_grouped, facet_country_code, facet_primary_domain, count in rows[0].facets or []:
+        if country_grouped == 0:
+            facets["country_code"].append(schemas.DignitaryFacetCount(value=facet_country_code, count=count))
+        else:
+            # JSON carries the stored enum name
+            facets["primary_domain"].append(schemas.DignitaryFacetCount(
+                value=models.PrimaryDomain[facet_primary_domain].value if facet_primary_domain else None, count=count
+            ))
+    for facet_list in facets.values():
+        facet_list.sort(key=lambda facet: -facet.count)
+
+    return schemas.AdminDignitaryDirectoryResponse(
+        dignitaries=[row.Dignitary for row in rows if row.Dignitary is not None],
+        total=total,
+        page=page,
+        per_page=per_page,
+        total_pages=math.ceil(total / per_page),
+        facets=facets
+    )
 
 
 @router.get("/{id}", response_model=schemas.AdminDignitaryWithAppointments)
@@ -335,7 +451,7 @@ async def upload_business_card_admin(
         logger.error(f"Error uploading business card: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error uploading business card: {str(e)}")
 
-@router.post("/business-card/create-dignitary", response_model=schemas.Dignitary)
+@router.post("/business-card/create-dignitary", response_model=schemas.AdminDignitaryCreateResponse)
 @requires_any_role([models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
 async def create_dignitary_from_business_card_admin(
     extraction: schemas.BusinessCardExtraction,
@@ -408,6 +524,8 @@ async def create_dignitary_from_business_card_admin(
         db.add(dignitary)
         db.commit()
         db.refresh(dignitary)
+
+        dignitary.possible_duplicates = possible_duplicates_of(db, dignitary)
         
         return dignitary
     except Exception as e:
@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from datetime import datetime
+from typing import List, Optional
+import logging
+import math
+
+import models
+import schemas
+from dependencies.database import get_db, get_read_db
+from dependencies.auth import get_current_user_for_write, get_current_user, requires_any_role
+from utils.jobs import QUEUES, wake_queue_on_commit
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+JOB_STATUSES = ("pending", "running", "done", "dead")
+
+@router.get("", response_model=schemas.BackgroundJobListResponse)
+@requires_any_role([models.UserRole.ADMIN])
+async def list_jobs(
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    page: int = Query(1, ge=1, description="Page number"),
+    per_page: int = Query(50, ge=1, le=200, description="Items per page"),
+    queue: Optional[str] = Query(None, description="Filter by queue"),
+    task: Optional[str] = Query(None, description="Filter by task name"),
+    status: Optional[str] = Query(None, description="Filter by status: pending, running, done or dead"),
+):
+    """List background jobs, newest first. Use status=dead to inspect failed jobs."""
+    if status and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Use one of: {', '.join(JOB_STATUSES)}")
+
+    query = db.query(models.BackgroundJob)
+    if queue:
+        query = query.filter(models.BackgroundJob.queue == queue)
+    if task:
+        query = query.filter(models.BackgroundJob.task == task)
+    if status:
+        query = query.filter(models.BackgroundJob.status == status)
+
+    # The page and the total count in one query
+    rows = query.add_columns(
+        func.count().over().label("total")
+    ).order_by(
+        models.BackgroundJob.id.desc()
+    ).offset((page - 1) * per_page).limit(per_page).all()
+
+    if rows:
+        total = rows[0].total
+    elif page == 1:
+        total = 0
+    else:
+        total = query.order_by(None).count()
+
+    return schemas.BackgroundJobListResponse(
+        jobs=[row[0] for row in rows],
+        total=total,
+        page=page,
+        per_page=per_page,
+        total_pages=math.ceil(total / per_page),
+    )
+
+@router.get("/stats", response_model=List[schemas.BackgroundJobQueueStats])
+@requires_any_role([models.UserRole.ADMIN])
+async def get_job_stats(
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Job counts per queue and status, and how long the oldest runnable job of each queue has waited."""
+    stats = {name: schemas.BackgroundJobQueueStats(queue=name, counts={}) for name in QUEUES}
+
+    rows = db.query(
+        models.BackgroundJob.queue,
+        models.BackgroundJob.status,
+        func.count().label("count"),
+        func.min(models.BackgroundJob.run_at).label("oldest_run_at"),
+    ).group_by(models.BackgroundJob.queue, models.BackgroundJob.status).all()
+
+    now = datetime.utcnow()
+    for row in rows:
+        queue_stats = stats.setdefault(row.queue, schemas.BackgroundJobQueueStats(queue=row.queue, counts={}))
+        queue_stats.counts[row.status] = row.count
+        if row.status == "pending" and row.oldest_run_at and row.oldest_run_at <= now:
+            queue_stats.oldest_pending_seconds = (now - row.oldest_run_at).total_seconds()
+
+    return list(stats.values())
+
+@router.get("/{job_id}", response_model=schemas.BackgroundJob)
+@requires_any_role([models.UserRole.ADMIN])
+async def get_job(
+    job_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Get a background job, including its payload and last error."""
+    job = db.query(models.BackgroundJob).filter(models.BackgroundJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/{job_id}/retry", response_model=schemas.BackgroundJob)
+@requires_any_role([models.UserRole.ADMIN])
+async def retry_job(
+    job_id: int,
+    current_user: models.User = Depends(get_current_user_for_write),
+    db: Session = Depends(get_db),
+):
+    """Run a dead job again now, with a fresh set of attempts."""
+    job = db.query(models.BackgroundJob).filter(models.BackgroundJob.id == job_id).with_for_update().first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "dead":
+        raise HTTPException(status_code=400, detail=f"Only dead jobs can be retried, this job is {job.status}")
+
+    job.status = "pending"
+    job.attempts = 0
+    job.run_at = datetime.utcnow()
+    job.finished_at = None
+    wake_queue_on_commit(db, job.queue)
+    db.commit()
+    db.refresh(job)
+
+    logger.info(f"Job {job_id} ({job.task}) requeued by user {current_user.id}")
+    return job
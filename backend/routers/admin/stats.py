@@ -7,6 +7,8 @@ from sqlalchemy import or_, and_
 # Import our dependencies
 from dependencies.database import get_read_db
 from dependencies.auth import requires_any_role, get_current_user
+from utils.read_routing import read_routing_stats
+from utils.audit_log import audit_log_stats
 
 # Import models and schemas
 import models
@@ -195,4 +197,41 @@ async def get_appointment_time_slots_combined(
 
     return {
         "dates": result
-    } 
\ No newline at end of file
+    } 
+@router.get("/database/pool", response_model=List[schemas.DatabasePoolStats])
+@requires_any_role([models.UserRole.ADMIN])
+async def get_database_pool_stats(
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Connection pool metrics of the worker process that serves the request:
+    checkout wait times, overflow use, timeouts and invalidations since it started.
+    Use them to size DB_POOL_SIZE / DB_MAX_OVERFLOW per engine.
+    """
+    from database import get_pool_stats
+
+    return get_pool_stats()
+
+@router.get("/database/read-routing", response_model=schemas.ReadRoutingStats)
+@requires_any_role([models.UserRole.ADMIN])
+async def get_read_routing_stats(
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Read-your-writes routing of the worker process that serves the request: how many
+    reads followed a write, and how often the reader had not caught up yet so the
+    writer served them instead.
+    """
+    return read_routing_stats()
+
+@router.get("/audit-log/writer", response_model=schemas.AuditLogWriterStats)
+@requires_any_role([models.UserRole.ADMIN])
+async def get_audit_log_writer_stats(
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Audit log writer of the worker process that serves the request: entries waiting
+    in its buffer, written in batches, and dropped because the buffer overflowed
+    while the database could not keep up.
+    """
+    return audit_log_stats()
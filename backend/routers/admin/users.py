@@ -8,6 +8,7 @@ import json
 from dependencies.database import get_db, get_read_db
 from dependencies.auth import requires_any_role, get_current_user, get_current_user_for_write
 from dependencies.access_control import admin_check_access_to_country, admin_get_country_list_for_access_level
+from utils.audit_log import audit
 
 # Import models and schemas
 import models
@@ -256,8 +257,8 @@ async def delete_user_access(
         raise HTTPException(status_code=404, detail="User access record not found")
     
     # Log access deletion in audit trail
-    audit_log = models.AuditLog(
-        user_id=current_user.id,
+    audit(
+        db,
         entity_type="user_access",
         entity_id=access_id,
         action="delete",
@@ -271,9 +272,8 @@ async def delete_user_access(
             "reason": access.reason,
             "is_active": access.is_active
         },
-        new_state=None
+        user_id=current_user.id,
     )
-    db.add(audit_log)
     
     db.delete(access)
     db.commit()
@@ -1,8 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from datetime import datetime
-from google.oauth2 import id_token
-from google.auth.transport import requests
 import logging
 
 # Import our dependencies
@@ -98,7 +96,10 @@ async def verify_google_token(
         logger.debug(f"Received token for verification: {token.token[:20]}...{token.token[-10:] if len(token.token) > 30 else ''}")
         logger.debug(f"Using Google Client ID: {GOOGLE_CLIENT_ID[:10]}...")
         
-        # Verify the token with Google
+        # Verify the token with Google (google-auth is imported on the first login)
+        from google.oauth2 import id_token
+        from google.auth.transport import requests
+
         logger.debug("Sending token to Google for verification")
         idinfo = id_token.verify_oauth2_token(
             token.token,
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
 from typing import List
 import logging
@@ -7,6 +8,14 @@ import logging
 from dependencies.database import get_read_db
 from dependencies.auth import requires_any_role, get_current_user
 from dependencies.access_control import admin_get_country_list_for_access_level
+from utils.metadata_cache import (
+    IMMUTABLE,
+    cached_response,
+    geo_countries,
+    geo_subdivisions,
+    get_bootstrap_payload,
+    precomputed,
+)
 
 # Import models and schemas
 import models
@@ -28,12 +37,12 @@ async def get_enabled_countries(
 
 @router.get("/countries/all", response_model=List[schemas.GeoCountryResponse])
 async def get_all_countries(
+    request: Request,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_read_db)
 ):
-    """Get all countries for dropdowns and selectors"""
-    countries = db.query(models.GeoCountry).order_by(models.GeoCountry.name).all()
-    return countries
+    """Get all countries for dropdowns and selectors (cached; send If-None-Match to revalidate)"""
+    return cached_response(request, geo_countries.get(db))
 
 @router.get("/admin/countries/enabled", response_model=List[schemas.GeoCountryResponse])
 @requires_any_role([models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
@@ -86,16 +95,17 @@ async def get_subdivisions_by_country(
 
 @router.get("/subdivisions/all", response_model=List[schemas.GeoSubdivisionResponse])
 async def get_all_subdivisions(
+    request: Request,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_read_db)
 ):
-    """Get all subdivisions (including disabled) for admin purposes"""
-    subdivisions = db.query(models.GeoSubdivision).order_by(models.GeoSubdivision.country_code, models.GeoSubdivision.name).all()
-    return subdivisions
+    """Get all subdivisions (including disabled) for admin purposes (cached; send If-None-Match to revalidate)"""
+    return cached_response(request, geo_subdivisions.get(db))
 
 
 # Request Type Configuration endpoints  
 @router.get("/request-types/configurations", response_model=List[schemas.RequestTypeConfigResponse])
+@precomputed
 async def get_request_type_configurations(
     current_user: models.User = Depends(get_current_user)
 ):
@@ -122,6 +132,7 @@ async def get_request_type_configurations(
 
 # Event Type Configuration endpoints  
 @router.get("/event-types/configurations")
+@precomputed
 async def get_event_type_configurations(
     current_user: models.User = Depends(get_current_user)
 ):
@@ -134,3 +145,36 @@ async def get_event_type_configurations(
         configurations.append(vars(config))
     
     return configurations
+
+
+# Bundled metadata
+@router.get("/metadata/bootstrap")
+async def get_metadata_bootstrap(
+    request: Request,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Every enum and metadata response in one payload, keyed by endpoint path, for app start.
+    The ETag is the payload's content hash; send it back in If-None-Match to get a 304.
+    The same payload is available at Content-Location, a URL that is cached for good.
+    """
+    payload = await get_bootstrap_payload(request, db)
+    response = cached_response(request, payload)
+    response.headers["Content-Location"] = f"/metadata/bootstrap/{payload.version}"
+    return response
+
+@router.get("/metadata/bootstrap/{version}")
+async def get_metadata_bootstrap_version(
+    version: str,
+    request: Request,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """The bootstrap payload of a given version; an outdated version redirects to the current one."""
+    payload = await get_bootstrap_payload(request, db)
+    if version != payload.version:
+        return RedirectResponse(
+            f"/metadata/bootstrap/{payload.version}", status_code=307, headers={"Cache-Control": "no-cache"}
+        )
+    return cached_response(request, payload, cache_control=IMMUTABLE)
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, or_
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, and_, or_, insert
 from typing import List, Optional
 from datetime import datetime, time, date
 import logging
@@ -15,8 +16,10 @@ import models
 import schemas
 
 # Import utilities
-from utils.email_notifications import notify_appointment_creation
-from utils.calendar_sync import check_and_sync_appointment
+from utils.appointment_side_effects import record_appointment_change, AppointmentChangeType
+from utils.dignitary_visibility import refresh_dignitary_visibility
+from utils.audit_log import audit_created
+from utils.loader_options import eager_load
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -68,114 +71,130 @@ async def create_appointment(
         )
         db.add(db_appointment)
         db.flush()
-        
-        # Handle dignitary appointments if dignitary_ids are provided
+        now = datetime.utcnow()
+
+        # Load dignitaries and contacts with one IN query each; they are also needed for the response
+        dignitaries = {}
         if appointment.dignitary_ids:
+            dignitaries = {
+                dignitary.id: dignitary
+                for dignitary in db.query(models.Dignitary).filter(
+                    models.Dignitary.id.in_(set(appointment.dignitary_ids))
+                ).all()
+            }
             for dignitary_id in appointment.dignitary_ids:
-                appointment_dignitary = models.AppointmentDignitary(
-                    appointment_id=db_appointment.id,
-                    dignitary_id=dignitary_id,
-                    created_by=current_user.id,
-                    updated_by=current_user.id
-                )
-                db.add(appointment_dignitary)
-        
-        # Handle contact attendees if contact_ids are provided
+                if dignitary_id not in dignitaries:
+                    raise HTTPException(status_code=404, detail=f"Dignitary with ID {dignitary_id} not found")
+
         if appointment.contact_ids:
-            for contact_id in appointment.contact_ids:
-                # Verify the contact exists and belongs to the current user
-                contact = db.query(models.UserContact).filter(
-                    models.UserContact.id == contact_id,
-                    models.UserContact.owner_user_id == current_user.id
-                ).first()
-                
-                if not contact:
-                    raise HTTPException(
-                        status_code=404, 
-                        detail=f"Contact with ID {contact_id} not found or not owned by current user"
-                    )
-                
-                # Update contact usage statistics
-                contact.appointment_usage_count += 1
-                contact.last_used_at = datetime.utcnow()
-                contact.updated_by = current_user.id
-                
-                # Create AppointmentContact link
-                appointment_contact = models.AppointmentContact(
-                    appointment_id=db_appointment.id,
-                    contact_id=contact_id,
-                    created_by=current_user.id,
-                    updated_by=current_user.id
-                )
-                db.add(appointment_contact)
-        
-        # Handle contact attendees with engagement fields if provided
+            contact_rows = [{"contact_id": contact_id} for contact_id in appointment.contact_ids]
         elif appointment.contacts_with_engagement:
-            for contact_data in appointment.contacts_with_engagement:
-                # Verify the contact exists and belongs to the current user
-                contact = db.query(models.UserContact).filter(
-                    models.UserContact.id == contact_data.contact_id,
+            contact_rows = [
+                {
+                    "contact_id": contact_data.contact_id,
+                    "role_in_team_project": contact_data.role_in_team_project,
+                    "role_in_team_project_other": contact_data.role_in_team_project_other,
+                    "comments": contact_data.comments,
+                    "has_met_gurudev_recently": contact_data.has_met_gurudev_recently,
+                    "is_attending_course": contact_data.is_attending_course,
+                    "course_attending": contact_data.course_attending,
+                    "is_doing_seva": contact_data.is_doing_seva,
+                    "seva_type": contact_data.seva_type,
+                }
+                for contact_data in appointment.contacts_with_engagement
+            ]
+        else:
+            contact_rows = []
+
+        contact_ids = {row["contact_id"] for row in contact_rows}
+        contacts = {}
+        if contact_ids:
+            # Verify the contacts exist and belong to the current user
+            contacts = {
+                contact.id: contact
+                for contact in db.query(models.UserContact).filter(
+                    models.UserContact.id.in_(contact_ids),
                     models.UserContact.owner_user_id == current_user.id
-                ).first()
-                
-                if not contact:
+                ).all()
+            }
+            for row in contact_rows:
+                if row["contact_id"] not in contacts:
                     raise HTTPException(
-                        status_code=404, 
-                        detail=f"Contact with ID {contact_data.contact_id} not found or not owned by current user"
+                        status_code=404,
+                        detail=f"Contact with ID {row['contact_id']} not found or not owned by current user"
                     )
-                
-                # Update contact usage statistics
-                contact.appointment_usage_count += 1
-                contact.last_used_at = datetime.utcnow()
-                contact.updated_by = current_user.id
-                
-                # Create AppointmentContact link with engagement fields
-                appointment_contact = models.AppointmentContact(
-                    appointment_id=db_appointment.id,
-                    contact_id=contact_data.contact_id,
-                    role_in_team_project=contact_data.role_in_team_project,
-                    role_in_team_project_other=contact_data.role_in_team_project_other,
-                    comments=contact_data.comments,
-                    has_met_gurudev_recently=contact_data.has_met_gurudev_recently,
-                    is_attending_course=contact_data.is_attending_course,
-                    course_attending=contact_data.course_attending,
-                    is_doing_seva=contact_data.is_doing_seva,
-                    seva_type=contact_data.seva_type,
-                    created_by=current_user.id,
-                    updated_by=current_user.id
-                )
-                db.add(appointment_contact)
-        
+
+            # Update contact usage statistics
+            db.query(models.UserContact).filter(
+                models.UserContact.id.in_(contact_ids)
+            ).update(
+                {
+                    models.UserContact.appointment_usage_count: models.UserContact.appointment_usage_count + 1,
+                    models.UserContact.last_used_at: now,
+                    models.UserContact.updated_by: current_user.id,
+                    models.UserContact.updated_at: now,
+                },
+                synchronize_session="evaluate"
+            )
+
+        # Insert the link rows with one multi-row INSERT per table; RETURNING gives back ORM objects
+        appointment_dignitaries = []
+        if appointment.dignitary_ids:
+            appointment_dignitaries = db.scalars(
+                insert(models.AppointmentDignitary).values([
+                    {
+                        "appointment_id": db_appointment.id,
+                        "dignitary_id": dignitary_id,
+                        "created_by": current_user.id,
+                        "updated_by": current_user.id,
+                    }
+                    for dignitary_id in appointment.dignitary_ids
+                ]).returning(models.AppointmentDignitary)
+            ).all()
+            # Bulk inserts bypass the flush hook that maintains dignitary visibility
+            refresh_dignitary_visibility(db.connection(), appointment.dignitary_ids)
+
+        appointment_contacts = []
+        if contact_rows:
+            appointment_contacts = db.scalars(
+                insert(models.AppointmentContact).values([
+                    {
+                        **row,
+                        "appointment_id": db_appointment.id,
+                        "created_by": current_user.id,
+                        "updated_by": current_user.id,
+                    }
+                    for row in contact_rows
+                ]).returning(models.AppointmentContact)
+            ).all()
+
+        # Bulk inserts bypass the flush that captures audit entries
+        audit_created(db, appointment_dignitaries)
+        audit_created(db, appointment_contacts)
+
+        # Populate the relationships from memory so building the response issues no further queries
+        set_committed_value(db_appointment, "appointment_dignitaries", list(appointment_dignitaries))
+        set_committed_value(db_appointment, "appointment_contacts", list(appointment_contacts))
+        set_committed_value(db_appointment, "calendar_event", None)
+        for appointment_dignitary in appointment_dignitaries:
+            set_committed_value(appointment_dignitary, "dignitary", dignitaries[appointment_dignitary.dignitary_id])
+        for appointment_contact in appointment_contacts:
+            set_committed_value(appointment_contact, "contact", contacts[appointment_contact.contact_id])
+
+        # Build the response before commit expires the objects
+        response = schemas.Appointment.model_validate(db_appointment, from_attributes=True)
+
+        # Email notifications and calendar sync run in the background after commit
+        record_appointment_change(
+            db, db_appointment.id, AppointmentChangeType.CREATED, created_by=current_user.id
+        )
         db.commit()
-        db.refresh(db_appointment)
-        
-        # Send email notifications
-        try:
-            notify_appointment_creation(db, db_appointment)
-        except Exception as e:
-            logger.error(f"Error sending email notifications: {str(e)}", exc_info=True)
-
-        # Sync appointment to Google Calendar if it meets criteria
-        try:
-            await check_and_sync_appointment(db_appointment, db)
-        except Exception as e:
-            logger.error(f"Error processing appointment for Google Calendar sync: {str(e)}", exc_info=True)
 
         # Calculate total operation time
         total_time = (datetime.utcnow() - start_time).total_seconds() * 1000
-        logger.info(f"Appointment created successfully (ID: {db_appointment.id}) in {total_time:.2f}ms")
-        
-        # Return the created appointment with relationships loaded
-        db_appointment = db.query(models.Appointment).options(
-            joinedload(models.Appointment.appointment_dignitaries).joinedload(models.AppointmentDignitary.dignitary),
-            joinedload(models.Appointment.requester),
-            joinedload(models.Appointment.calendar_event),
-            joinedload(models.Appointment.location),
-            joinedload(models.Appointment.meeting_place),
-            joinedload(models.Appointment.appointment_contacts)
-        ).filter(models.Appointment.id == db_appointment.id).first()
+        logger.info(f"Appointment created successfully (ID: {response.id}) in {total_time:.2f}ms")
         
-        return db_appointment
+        return response
         
     except Exception as e:
         logger.error(f"Error creating appointment: {str(e)}", exc_info=True)
@@ -197,14 +216,14 @@ async def get_my_appointments(
         query = query.filter(models.Appointment.request_type.in_(request_type.split(',')))
     
     # Add options to eagerly load appointment_dignitaries and their associated dignitaries
-    query = query.options(
-        joinedload(models.Appointment.appointment_dignitaries).joinedload(models.AppointmentDignitary.dignitary),
-        joinedload(models.Appointment.requester),
-        joinedload(models.Appointment.calendar_event),
-        joinedload(models.Appointment.location),
-        joinedload(models.Appointment.meeting_place),
-        joinedload(models.Appointment.appointment_contacts)
-    ).order_by(models.Appointment.id.desc())
+    query = query.options(*eager_load(
+        (models.Appointment.appointment_dignitaries, models.AppointmentDignitary.dignitary),
+        models.Appointment.requester,
+        models.Appointment.calendar_event,
+        models.Appointment.location,
+        models.Appointment.meeting_place,
+        models.Appointment.appointment_contacts,
+    )).order_by(models.Appointment.id.desc())
 
     appointments = query.all()
     logger.debug(f"Appointments: {appointments}")
@@ -224,9 +243,9 @@ async def get_my_appointments_for_dignitary(
             models.AppointmentDignitary.dignitary_id == dignitary_id,
             models.Appointment.requester_id == current_user.id
         )
-        .options(
-            joinedload(models.Appointment.appointment_dignitaries).joinedload(models.AppointmentDignitary.dignitary)
-        )
+        .options(*eager_load(
+            (models.Appointment.appointment_dignitaries, models.AppointmentDignitary.dignitary)
+        ))
         .all()
     )
     logger.debug(f"Appointments: {appointments}")
@@ -337,86 +356,63 @@ async def get_business_card_extraction_status(
 @router.get("/appointments/summary", response_model=dict)
 async def get_appointments_summary(
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_read_db)
+    db: Session = Depends(get_read_db),
+    limit: int = Query(10, ge=1, le=100, description="Appointments listed per request type (counts cover all of them)")
 ):
     """Get summary of existing open appointments by request type for the current user"""
     try:
-        # Get today's date for comparison
-        today = date.today()
-        
-        # Query for open appointments (not CANCELLED or COMPLETED) with future dates
-        query = db.query(models.Appointment).filter(
-            and_(
-                models.Appointment.requester_id == current_user.id,
-                ~models.Appointment.status.in_([
-                    models.AppointmentStatus.CANCELLED,
-                    models.AppointmentStatus.COMPLETED
-                ])
-            )
+        # Scheduled appointments use their calendar event's date, others their preferred dates
+        appointment_date = func.coalesce(
+            models.CalendarEvent.start_date,
+            models.Appointment.preferred_date,
+            models.Appointment.preferred_end_date,
         )
-        
-        # Filter by future dates - use confirmed dates if available, otherwise preferred dates
-        date_conditions = []
-        
-        # For confirmed appointments, check appointment_date
-        date_conditions.append(
-            and_(
-                models.Appointment.appointment_date.isnot(None),
-                models.Appointment.appointment_date >= today
-            )
-        )
-        
-        # For non-confirmed appointments with single preferred_date
-        date_conditions.append(
-            and_(
-                models.Appointment.appointment_date.is_(None),
-                models.Appointment.preferred_date.isnot(None),
-                models.Appointment.preferred_date >= today
-            )
-        )
-        
-        # For non-confirmed appointments with date range (preferred_end_date)
-        date_conditions.append(
-            and_(
-                models.Appointment.appointment_date.is_(None),
-                models.Appointment.preferred_date.is_(None),
-                models.Appointment.preferred_end_date.isnot(None),
-                models.Appointment.preferred_end_date >= today
-            )
-        )
-        
-        # Apply date filtering with OR conditions
-        query = query.filter(or_(*date_conditions))
-        
-        appointments = query.all()
-        
-        # Group by request type and count
+
+        # Open appointments (not CANCELLED or COMPLETED) with a future date, each with
+        # its request type's total and its position in that type, soonest first
+        open_appointments = db.query(
+            models.Appointment.id,
+            models.Appointment.request_type,
+            models.Appointment.status,
+            models.Appointment.purpose,
+            appointment_date.label("date"),
+            func.count().over(partition_by=models.Appointment.request_type).label("type_count"),
+            func.row_number().over(
+                partition_by=models.Appointment.request_type,
+                order_by=(appointment_date, models.Appointment.id)
+            ).label("position"),
+        ).outerjoin(
+            models.CalendarEvent, models.Appointment.calendar_event_id == models.CalendarEvent.id
+        ).filter(
+            models.Appointment.requester_id == current_user.id,
+            ~models.Appointment.status.in_([
+                models.AppointmentStatus.CANCELLED,
+                models.AppointmentStatus.COMPLETED
+            ]),
+            appointment_date >= date.today()
+        ).subquery()
+
+        rows = db.query(open_appointments).filter(
+            open_appointments.c.position <= limit
+        ).order_by(
+            open_appointments.c.request_type, open_appointments.c.position
+        ).all()
+
+        # Group by request type
         summary = {}
-        for appointment in appointments:
-            request_type = appointment.request_type.value if appointment.request_type else 'Unknown'
-            if request_type not in summary:
-                summary[request_type] = {
-                    'count': 0,
-                    'appointments': []
-                }
-            
-            summary[request_type]['count'] += 1
-            
+        for row in rows:
+            request_type = row.request_type.value if row.request_type else 'Unknown'
+            type_summary = summary.setdefault(request_type, {'count': row.type_count, 'appointments': []})
             # Add basic appointment info for frontend use
-            appointment_info = {
-                'id': appointment.id,
-                'status': appointment.status.value if appointment.status else 'Unknown',
-                'purpose': appointment.purpose,
-                'date': (
-                    appointment.appointment_date.isoformat() if appointment.appointment_date
-                    else appointment.preferred_date.isoformat() if appointment.preferred_date
-                    else appointment.preferred_end_date.isoformat() if appointment.preferred_end_date
-                    else None
-                )
-            }
-            summary[request_type]['appointments'].append(appointment_info)
-        
-        logger.info(f"Fetched appointments summary for user {current_user.email}: {len(appointments)} open appointments")
+            type_summary['appointments'].append({
+                'id': row.id,
+                'status': row.status.value if row.status else 'Unknown',
+                'purpose': row.purpose,
+                'date': row.date.isoformat() if row.date else None
+            })
+
+        total = sum(type_summary['count'] for type_summary in summary.values())
+        logger.info(f"Fetched appointments summary for user {current_user.email}: {total} open appointments")
         return summary
         
     except Exception as e:
@@ -11,7 +11,7 @@ import logging
 # Import our dependencies
 from dependencies.database import get_db, get_read_db
 from dependencies.auth import get_current_user, get_current_user_for_write
-from dependencies.access_control import admin_check_appointment_for_access_level
+from dependencies.access_control import require_appointment_access
 
 # Import models and schemas
 import models
@@ -20,6 +20,7 @@ import schemas
 # Import utilities
 from utils.s3 import upload_file, get_file
 from utils.business_card import extract_business_card_info, BusinessCardExtractionError
+from utils.dignitary_matching import possible_own_duplicates_of
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -36,19 +37,13 @@ async def upload_appointment_attachment(
 ):
     """Upload an attachment for an appointment"""
     # Check if appointment exists and user has access
-    appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
-    if not appointment:
-        raise HTTPException(status_code=404, detail="Appointment not found")
-    
-    if appointment.requester_id != current_user.id:
-        admin_access_check = admin_check_appointment_for_access_level(
-            current_user=current_user,
-            db=db,
-            appointment_id=appointment_id,
-            required_access_level=models.AccessLevel.READ_WRITE
-        )
-        if not admin_access_check:
-            raise HTTPException(status_code=403, detail="Not authorized to upload attachments for this appointment")
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=appointment_id,
+        required_access_level=models.AccessLevel.READ_WRITE,
+        detail="Not authorized to upload attachments for this appointment"
+    )
 
     # Upload file to S3
     file_content = await file.read()
@@ -85,19 +80,13 @@ async def upload_business_card_attachment(
 ):
     """Upload a business card attachment and extract information from it"""
     # Check if appointment exists and user has access
-    appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
-    if not appointment:
-        raise HTTPException(status_code=404, detail="Appointment not found")
-    
-    if appointment.requester_id != current_user.id:
-        admin_access_check = admin_check_appointment_for_access_level(
-            current_user=current_user,
-            db=db,
-            appointment_id=appointment_id,
-            required_access_level=models.AccessLevel.READ_WRITE
-        )
-        if not admin_access_check:
-            raise HTTPException(status_code=403, detail="Not authorized to upload attachments for this appointment")
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=appointment_id,
+        required_access_level=models.AccessLevel.READ_WRITE,
+        detail="Not authorized to upload attachments for this appointment"
+    )
 
     # Upload file to S3
     file_content = await file.read()
@@ -172,7 +161,7 @@ async def upload_business_card_attachment(
         # For any other error, return a 500 error
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
-@router.post("/appointments/{appointment_id}/business-card/create-dignitary", response_model=schemas.Dignitary)
+@router.post("/appointments/{appointment_id}/business-card/create-dignitary", response_model=schemas.DignitaryCreateResponse)
 async def create_dignitary_from_business_card(
     appointment_id: int,
     extraction: schemas.BusinessCardExtraction,
@@ -181,19 +170,14 @@ async def create_dignitary_from_business_card(
 ):
     """Create a dignitary record from business card extraction"""
     # Check if appointment exists and user has access
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=appointment_id,
+        required_access_level=models.AccessLevel.READ_WRITE,
+        detail="Not authorized to create dignitaries for this appointment"
+    )
     appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
-    if not appointment:
-        raise HTTPException(status_code=404, detail="Appointment not found")
-    
-    if appointment.requester_id != current_user.id:
-        admin_access_check = admin_check_appointment_for_access_level(
-            current_user=current_user,
-            db=db,
-            appointment_id=appointment_id,
-            required_access_level=models.AccessLevel.READ_WRITE
-        )
-        if not admin_access_check:
-            raise HTTPException(status_code=403, detail="Not authorized to create dignitaries for this appointment")
 
     # Get the attachment if provided
     attachment = None
@@ -279,6 +263,8 @@ async def create_dignitary_from_business_card(
         db.add(dignitary)
         db.commit()
         db.refresh(dignitary)
+
+        dignitary.possible_duplicates = possible_own_duplicates_of(db, dignitary, current_user.id)
         
         return dignitary
     except Exception as e:
@@ -295,19 +281,13 @@ async def get_appointment_attachments(
     db: Session = Depends(get_read_db)
 ):
     """Get all attachments for an appointment"""
-    appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
-    if not appointment:
-        raise HTTPException(status_code=404, detail="Appointment not found")
-    
-    if appointment.requester_id != current_user.id:
-        admin_access_check = admin_check_appointment_for_access_level(
-            current_user=current_user,
-            db=db,
-            appointment_id=appointment_id,
-            required_access_level=models.AccessLevel.READ
-        )
-        if not admin_access_check:
-            raise HTTPException(status_code=403, detail="Not authorized to view attachments for this appointment")
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=appointment_id,
+        required_access_level=models.AccessLevel.READ,
+        detail="Not authorized to view attachments for this appointment"
+    )
 
     # Base query
     query = db.query(models.AppointmentAttachment).filter(
@@ -341,20 +321,14 @@ async def get_attachment_file(
     if not attachment:
         raise HTTPException(status_code=404, detail="Attachment not found")
 
-    appointment = db.query(models.Appointment).filter(
-        models.Appointment.id == attachment.appointment_id
-    ).first()
-    
-    if appointment.requester_id != current_user.id:
-        # Do admin check only if 1st level check fails
-        admin_access_check = admin_check_appointment_for_access_level(
-            current_user=current_user,
-            db=db,
-            appointment_id=attachment.appointment_id,
-            required_access_level=models.AccessLevel.READ
-        )
-        if not admin_access_check:
-            raise HTTPException(status_code=403, detail="Not authorized to access this attachment")
+    # Requesters and users with access to the appointment's location may proceed
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=attachment.appointment_id,
+        required_access_level=models.AccessLevel.READ,
+        detail="Not authorized to access this attachment"
+    )
 
     file_data = get_file(attachment.file_path)
     
@@ -373,20 +347,13 @@ async def get_appointment_attachment_thumbnails(
 ):
     """Get all thumbnails for an appointment's attachments in a single request."""
     # First verify the appointment exists and user has access
-    appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
-    if not appointment:
-        raise HTTPException(status_code=404, detail="Appointment not found")
-
-    # Check user access (add check similar to get_attachment_thumbnail)
-    if appointment.requester_id != current_user.id:
-        admin_access_check = admin_check_appointment_for_access_level(
-            current_user=current_user,
-            db=db,
-            appointment_id=appointment_id,
-            required_access_level=models.AccessLevel.READ
-        )
-        if not admin_access_check:
-            raise HTTPException(status_code=403, detail="Not authorized to view attachments for this appointment")
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=appointment_id,
+        required_access_level=models.AccessLevel.READ,
+        detail="Not authorized to view attachments for this appointment"
+    )
 
     # Get all image attachments for this appointment
     query = db.query(models.AppointmentAttachment).filter(
@@ -449,19 +416,14 @@ async def get_attachment_thumbnail(
     if not attachment.thumbnail_path:
         raise HTTPException(status_code=404, detail="Thumbnail not available")
 
-    appointment = db.query(models.Appointment).filter(
-        models.Appointment.id == attachment.appointment_id
-    ).first()
-    
-    if appointment.requester_id != current_user.id:
-        admin_access_check = admin_check_appointment_for_access_level(
-            current_user=current_user,
-            db=db,
-            appointment_id=attachment.appointment_id,
-            required_access_level=models.AccessLevel.READ
-        )
-        if not admin_access_check:
-            raise HTTPException(status_code=403, detail="Not authorized to access this attachment")
+    # Requesters and users with access to the appointment's location may proceed
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=attachment.appointment_id,
+        required_access_level=models.AccessLevel.READ,
+        detail="Not authorized to access this attachment"
+    )
 
     file_data = get_file(attachment.thumbnail_path)
     
@@ -483,20 +445,14 @@ async def delete_attachment(
     if not attachment:
         raise HTTPException(status_code=404, detail="Attachment not found")
     
-    # Check if user has permission to delete
-    appointment = db.query(models.Appointment).filter(models.Appointment.id == attachment.appointment_id).first()
-    if not appointment:
-        raise HTTPException(status_code=404, detail="Appointment not found")
-    
-    if appointment.requester_id != current_user.id:
-        admin_access_check = admin_check_appointment_for_access_level(
-            current_user=current_user,
-            db=db,
-            appointment_id=attachment.appointment_id,
-            required_access_level=models.AccessLevel.READ_WRITE
-        )
-        if not admin_access_check:
-            raise HTTPException(status_code=403, detail="Not authorized to delete this attachment")
+    # Requesters and users with access to the appointment's location may proceed
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=attachment.appointment_id,
+        required_access_level=models.AccessLevel.READ_WRITE,
+        detail="Not authorized to delete this attachment"
+    )
     
     # Delete the attachment
     db.delete(attachment)
@@ -20,6 +20,50 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Below this length trigrams are too short to match well, so autocomplete uses the prefix index
+CONTACT_PREFIX_SEARCH_MAX_LENGTH = 2
+# Weight of log(1 + appointment_usage_count) relative to similarity (0..1) in the ranking
+CONTACT_USAGE_RANK_WEIGHT = 0.1
+
+
+def apply_contact_search(query, search: str):
+    """
+    Filter a UserContact query by name or email and return (query, rank).
+    Short queries use a per-owner prefix match on the btree text_pattern_ops indexes, against
+    the start of the full name (i.e. the first name), the last name or the email; longer ones use substring and trigram similarity matches on the GIN trigram indexes.
+    The rank blends similarity with how often the contact has been used.
+    """
+    term = search.strip()
+    full_name = models.UserContact.full_name
+    email = models.UserContact.email
+
+    if len(term) <= CONTACT_PREFIX_SEARCH_MAX_LENGTH:
+        query = query.filter(
+            or_(
+                func.lower(full_name).startswith(term.lower(), autoescape=True),
+                func.lower(models.UserContact.last_name).startswith(term.lower(), autoescape=True),
+                func.lower(email).startswith(term.lower(), autoescape=True)
+            )
+        )
+        rank = func.ln(1 + models.UserContact.appointment_usage_count)
+        return query, rank
+
+    query = query.filter(
+        or_(
+            full_name.icontains(term, autoescape=True),
+            email.icontains(term, autoescape=True),
+            full_name.op("%")(term)
+        )
+    )
+    rank = (
+        func.greatest(
+            func.similarity(full_name, term),
+            func.coalesce(func.similarity(email, term), 0)
+        )
+        + CONTACT_USAGE_RANK_WEIGHT * func.ln(1 + models.UserContact.appointment_usage_count)
+    )
+    return query, rank
+
 
 def generate_contact_warnings(contact_email: str, relationship: PersonRelationshipType, user_email: str) -> List[SystemWarningCode]:
     """Generate warning codes for contact creation based on email and relationship"""
@@ -148,7 +192,7 @@ async def list_contacts(
     db: Session = Depends(get_read_db),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
-    sort_by: str = Query("usage", description="Sort by: usage, recent, name, created"),
+    sort_by: str = Query("usage", description="Sort by: usage, recent, name, created (usage ranks by relevance when searching)"),
     search: Optional[str] = Query(None, description="Search by name or email"),
     relationship: Optional[str] = Query(None, description="Filter by relationship type")
 ):
@@ -165,14 +209,9 @@ async def list_contacts(
         )
         
         # Apply search filter
-        if search:
-            search_term = f"%{search.strip()}%"
-            query = query.filter(
-                or_(
-                    func.concat(models.UserContact.first_name, ' ', models.UserContact.last_name).ilike(search_term),
-                    models.UserContact.email.ilike(search_term)
-                )
-            )
+        search_rank = None
+        if search and search.strip():
+            query, search_rank = apply_contact_search(query, search)
         
         # Apply relationship filter
         if relationship:
@@ -183,7 +222,14 @@ async def list_contacts(
                 raise HTTPException(status_code=400, detail=f"Invalid relationship type: {relationship}")
         
         # Apply sorting
-        if sort_by == "usage":
+        if search_rank is not None and sort_by in ("usage", "relevance"):
+            # Best matches first, with frequently used contacts boosted
+            query = query.order_by(
+                desc(search_rank),
+                desc(models.UserContact.appointment_usage_count),
+                models.UserContact.first_name
+            )
+        elif sort_by == "usage":
             # Sort by appointment usage count (descending), then by last_used_at (descending)
             query = query.order_by(
                 desc(models.UserContact.appointment_usage_count),
@@ -411,19 +457,17 @@ async def search_contacts(
     logger.info(f"Searching contacts for user {current_user.email} with query: '{q}'")
     
     try:
-        search_term = f"%{q.strip()}%"
-        
-        contacts = db.query(models.UserContact).filter(
+        query = db.query(models.UserContact).filter(
             models.UserContact.owner_user_id == current_user.id,
-            models.UserContact.is_deleted == False,
-            or_(
-                func.concat(models.UserContact.first_name, ' ', models.UserContact.last_name).ilike(search_term),
-                models.UserContact.email.ilike(search_term)
-            )
-        ).options(
+            models.UserContact.is_deleted == False
+        )
+        query, search_rank = apply_contact_search(query, q)
+
+        contacts = query.options(
             joinedload(models.UserContact.contact_user)
         ).order_by(
-            # Sort by usage count first, then alphabetically
+            # Best matches first, boosted by usage, then alphabetically
+            desc(search_rank),
             desc(models.UserContact.appointment_usage_count),
             models.UserContact.first_name
         ).limit(limit).all()
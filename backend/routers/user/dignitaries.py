@@ -10,13 +10,14 @@ from dependencies.auth import get_current_user, get_current_user_for_write
 # Import models and schemas
 import models
 import schemas
+from utils.dignitary_matching import possible_own_duplicates_of
 
 # Get logger
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/dignitaries/new", response_model=schemas.Dignitary)
+@router.post("/dignitaries/new", response_model=schemas.DignitaryCreateResponse)
 async def new_dignitary(
     dignitary: schemas.DignitaryCreate,
     current_user: models.User = Depends(get_current_user_for_write),
@@ -46,8 +47,9 @@ async def new_dignitary(
     db.commit()
     db.refresh(poc)
 
-    # Add the poc_relationship_type to the response
+    # Add the poc_relationship_type and likely duplicates to the response
     new_dignitary.poc_relationship_type = poc_relationship_type
+    new_dignitary.possible_duplicates = possible_own_duplicates_of(db, new_dignitary, current_user.id)
 
     return new_dignitary
 
@@ -1,14 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_, false
-from typing import List, Optional
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, or_, update
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel
 import logging
 
 # Import our dependencies
 from dependencies.database import get_db, get_read_db
 from dependencies.auth import requires_any_role, get_current_user, get_current_user_for_write
+from dependencies.access_control import require_appointment_access, get_appointment_access_scope, scope_allows
+from utils.usher_day_sheet import (
+    get_usher_day_sheet,
+    get_changed_attendees,
+    get_changes_cursor,
+    get_usher_window,
+    is_open_for_check_in,
+    mark_usher_day_sheet_dirty,
+)
+from utils.attendance_events import (
+    AttendanceChange,
+    subscribe,
+    stream_attendance_events,
+    start_attendance_listener,
+    publish_attendance_changes,
+)
+from utils.qr_codes import decode_checkin_qr_token, QRTokenError
+from utils.utils import etag_matches
+from utils.audit_log import audit
 
 # Import models and schemas
 import models
@@ -19,178 +39,121 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def get_usher_date_range(date: Optional[str]):
+    """
+    Resolve the usher date window.
+    By default, returns today and the next two days.
+    If date parameter is provided, returns that specific date.
+    """
+    # If specific date is provided, use that
+    if date:
+        try:
+            target_date = datetime.strptime(date, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+        
+        # USHER can only view appointments for the previous 3 days and the next 3 days
+        window_start, window_end = get_usher_window()
+        if target_date < window_start or target_date > window_end:
+            raise HTTPException(status_code=400, detail="Date beyond allowed range")
+
+        return target_date, target_date
+
+    # Default: today and next two days
+    today = datetime.now().date()
+    return today, today + timedelta(days=2)
+
 @router.get("/appointments", response_model=List[schemas.AppointmentUsherView])
 @requires_any_role([models.UserRole.USHER, models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
 async def get_usher_appointments(
     db: Session = Depends(get_read_db),
     current_user: models.User = Depends(get_current_user),
     date: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     Get appointments for USHER role with access control restrictions.
     By default, returns appointments for today and the next two days.
     If date parameter is provided, returns appointments for that specific date.
+
+    The day-sheet is served from a cache shared by users with the same access scope and
+    carries a strong ETag; send it back in If-None-Match to get a 304 when nothing changed.
     """
-    # If specific date is provided, use that
-    if date:
-        try:
-            target_date = datetime.strptime(date, "%Y-%m-%d").date()
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-        
-        # USHER can only view appointments for the previous 3 days and the next 3 days
-        if target_date < datetime.now().date()-timedelta(days=3) or target_date > datetime.now().date()+timedelta(days=3):
-            raise HTTPException(status_code=400, detail="Date beyond allowed range")
+    start_date, end_date = get_usher_date_range(date)
+    scope = get_appointment_access_scope(db, current_user)
+    day_sheet = get_usher_day_sheet(db, start_date, end_date, scope)
+    # Writes in other workers reach this worker's cache through the attendance listener
+    start_attendance_listener()
 
-        start_date = target_date
-        end_date = target_date
-    else:
-        # Default: today and next two days
-        today = datetime.now().date()
-        start_date = today
-        end_date = today + timedelta(days=2)
-   
-    # Start building the query with date range filter using calendar_event data
-    query = db.query(models.Appointment).join(models.CalendarEvent).filter(
-        models.CalendarEvent.start_date >= start_date,
-        models.CalendarEvent.start_date <= end_date
-    )
-    
-    # USHER specific filters - apply to all roles using this endpoint
-    # Only show confirmed appointments for the usher view
-    query = query.filter(
-        models.Appointment.status == models.AppointmentStatus.APPROVED,
-        models.Appointment.sub_status == models.AppointmentSubStatus.SCHEDULED,
+    headers = {"ETag": day_sheet.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, day_sheet.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=day_sheet.body, media_type="application/json", headers=headers)
+
+@router.get("/appointments/changes", response_model=schemas.UsherAttendanceDelta)
+@requires_any_role([models.UserRole.USHER, models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
+async def get_usher_attendance_changes(
+    since: datetime,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user),
+    date: Optional[str] = None,
+):
+    """
+    Delta refresh for the usher day-sheet.
+    Returns only the attendees whose attendance status or check-in time changed after `since`
+    (use `server_time` from the previous response). `server_time` trails the read so that
+    writes committed or replicated late are not missed; consecutive responses overlap, so
+    de-duplicate attendees by id and keep the latest `updated_at`. Newly scheduled appointments
+    or attendees are not included; re-fetch /usher/appointments with If-None-Match to pick those up.
+    """
+    start_date, end_date = get_usher_date_range(date)
+    # Stored timestamps are naive UTC
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    server_time = get_changes_cursor()
+    scope = get_appointment_access_scope(db, current_user)
+    contact_rows, dignitary_rows = get_changed_attendees(
+        db, start_date, end_date, scope, since
     )
-    
-    # ADMIN role has full access to all appointments within the date range
-    if current_user.role != models.UserRole.ADMIN:
-        # Non-ADMIN roles need access control checks
-        # Get active access records for the SECRETARIAT user
-        user_access = db.query(models.UserAccess).filter(
-            models.UserAccess.user_id == current_user.id,
-            models.UserAccess.is_active == True,
-            # Only consider records that grant access to appointments
-            or_(
-                models.UserAccess.entity_type == models.EntityType.APPOINTMENT,
-                models.UserAccess.entity_type == models.EntityType.APPOINTMENT_AND_DIGNITARY
-            )
-        ).all()
-        
-        if not user_access:
-            # If no valid access records exist, return empty list
-            return []
-        
-        # Create access filters based on country and location
-        access_filters = []
-        # Start with a "false" condition
-        access_filters.append(false())
-        
-        for access in user_access:
-            # If a specific location is specified in the access record
-            if access.location_id:
-                access_filters.append(
-                    and_(
-                        models.Appointment.location_id == access.location_id,
-                        models.Location.country_code == access.country_code
-                    )
-                )
-            else:
-                # Access to all locations in the country
-                access_filters.append(
-                    models.Location.country_code == access.country_code
-                )
-        
-        # Join to locations table and apply the country and location filters
-        query = query.join(models.Location)
-        query = query.filter(or_(*access_filters))
-    
-    # Add eager loading and ordering
-    query = query.options(
-        joinedload(models.Appointment.appointment_dignitaries).joinedload(models.AppointmentDignitary.dignitary),
-        joinedload(models.Appointment.appointment_contacts).joinedload(models.AppointmentContact.contact),
-        joinedload(models.Appointment.calendar_event),
-        joinedload(models.Appointment.requester),
-        joinedload(models.Appointment.location)
-    ).order_by(
-        models.CalendarEvent.start_date,
-        models.CalendarEvent.start_time
+
+    return schemas.UsherAttendanceDelta(
+        since=since,
+        server_time=server_time,
+        appointment_contacts=[schemas.UsherAttendanceChange(**row._asdict()) for row in contact_rows],
+        appointment_dignitaries=[schemas.UsherAttendanceChange(**row._asdict()) for row in dignitary_rows],
     )
-    
-    appointments = query.all()
-    
-    # Transform appointments to use calendar event data only
-    usher_appointments = []
-    for appointment in appointments:
-        # All appointments in usher view must have calendar events (since we filter by approved+scheduled)
-        if not appointment.calendar_event:
-            logger.warning(f"Approved+scheduled appointment {appointment.id} missing calendar event - skipping")
-            continue
-            
-        # Use calendar event data exclusively
-        appointment_date = appointment.calendar_event.start_date
-        appointment_time = appointment.calendar_event.start_time
-        location = appointment.calendar_event.location or appointment.location  # Calendar event location takes precedence
-        
-        # Convert appointment_contacts to proper usher view format
-        appointment_contacts_usher = []
-        if appointment.appointment_contacts:
-            for ac in appointment.appointment_contacts:
-                # Merge AppointmentContact and UserContact data for usher view (limited fields only)
-                contact_usher_data = {
-                    'id': ac.id,
-                    'created_at': ac.created_at,
-                    'attendance_status': ac.attendance_status,
-                    'checked_in_at': ac.checked_in_at,
-                    **{k: v for k, v in ac.contact.__dict__.items() if k in ['first_name', 'last_name']}  # Ushers only get names
-                }
-                appointment_contacts_usher.append(schemas.AppointmentContactUsherView(**contact_usher_data))
-
-        # Convert appointment_dignitaries to proper usher view format
-        appointment_dignitaries_usher = []
-        if appointment.appointment_dignitaries:
-            for ad in appointment.appointment_dignitaries:
-                # Create DignitaryUsherView object from the dignitary
-                dignitary_usher_view = schemas.DignitaryUsherView(
-                    id=ad.dignitary.id,
-                    honorific_title=ad.dignitary.honorific_title,
-                    first_name=ad.dignitary.first_name,
-                    last_name=ad.dignitary.last_name
-                )
-                
-                # Create AppointmentDignitaryUsherView object
-                dignitary_usher_data = {
-                    'id': ad.id,
-                    'appointment_id': ad.appointment_id,
-                    'dignitary_id': ad.dignitary_id,
-                    'created_at': ad.created_at,
-                    'attendance_status': ad.attendance_status,
-                    'dignitary': dignitary_usher_view
-                }
-                appointment_dignitaries_usher.append(schemas.AppointmentDignitaryUsherView(**dignitary_usher_data))
-
-        # Create usher view with calendar event data
-        # Convert requester to RequesterUsherView if present
-        requester_usher_view = None
-        if appointment.requester:
-            requester_usher_view = schemas.RequesterUsherView(
-                first_name=appointment.requester.first_name,
-                last_name=appointment.requester.last_name,
-                phone_number=appointment.requester.phone_number
-            )
 
-        usher_appointment = schemas.AppointmentUsherView(
-            id=appointment.id,
-            appointment_date=appointment_date,
-            appointment_time=appointment_time,
-            requester=requester_usher_view,
-            location=location,
-            appointment_dignitaries=appointment_dignitaries_usher,
-            appointment_contacts=appointment_contacts_usher
-        )
-        usher_appointments.append(usher_appointment)
-    
-    return usher_appointments
+@router.get("/stream")
+@requires_any_role([models.UserRole.USHER, models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
+async def stream_usher_attendance(
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user),
+    date: Optional[str] = None,
+):
+    """
+    Server-sent events for live check-in status.
+    Emits `attendance` events for attendees in the usher date window that the user can access,
+    `day_sheet` events when appointments or attendee lists change, and `resync` events when
+    events may have been missed. Clients should re-fetch /usher/appointments (with If-None-Match)
+    on `day_sheet` and `resync`.
+    """
+    start_date, end_date = get_usher_date_range(date)
+    scope = get_appointment_access_scope(db, current_user)
+    # Release the pooled connection; the stream can stay open for hours
+    db.close()
+
+    subscriber = subscribe(start_date, end_date, scope)
+    return StreamingResponse(
+        stream_attendance_events(subscriber),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable proxy buffering (nginx on Elastic Beanstalk)
+            "X-Accel-Buffering": "no",
+        },
+    )
 
 @router.patch("/dignitaries/checkin", response_model=schemas.AppointmentDignitary)
 @requires_any_role([models.UserRole.USHER, models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
@@ -215,24 +178,24 @@ async def update_dignitary_checkin(
     if not appointment_dignitary:
         raise HTTPException(status_code=404, detail="Appointment dignitary not found")
     
-    # Import access control function
-    from dependencies.access_control import admin_get_appointment
-    
     # Verify user has access to update this appointment's dignitary
-    if current_user.role != models.UserRole.ADMIN:
-        # For non-admin roles, check location-based access
-        appointment = admin_get_appointment(
-            db=db,
-            appointment_id=appointment_dignitary.appointment_id,
-            current_user=current_user,
-            required_access_level=models.AccessLevel.READ_WRITE
-        )
-
-        if not appointment:
-            raise HTTPException(status_code=404, detail="Unauthorized to update this appointment")
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=appointment_dignitary.appointment_id,
+        required_access_level=models.AccessLevel.READ_WRITE,
+        allow_requester=False,
+        detail="Unauthorized to update this appointment"
+    )
 
     # Update the attendance status
     appointment_dignitary.attendance_status = data.attendance_status
+    if data.attendance_status == models.AttendanceStatus.CHECKED_IN:
+        appointment_dignitary.checked_in_at = datetime.utcnow()
+        appointment_dignitary.checked_in_by = current_user.id
+    else:
+        appointment_dignitary.checked_in_at = None
+        appointment_dignitary.checked_in_by = None
     appointment_dignitary.updated_by = current_user.id
     db.commit()
     db.refresh(appointment_dignitary)
@@ -266,21 +229,15 @@ async def update_contact_checkin(
     if not appointment_contact:
         raise HTTPException(status_code=404, detail="Appointment contact not found")
     
-    # Import access control function
-    from dependencies.access_control import admin_get_appointment
-    
     # Verify user has access to update this appointment's contact
-    if current_user.role != models.UserRole.ADMIN:
-        # For non-admin roles, check location-based access
-        appointment = admin_get_appointment(
-            db=db,
-            appointment_id=appointment_contact.appointment_id,
-            current_user=current_user,
-            required_access_level=models.AccessLevel.READ_WRITE
-        )
-
-        if not appointment:
-            raise HTTPException(status_code=404, detail="Unauthorized to update this appointment")
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=appointment_contact.appointment_id,
+        required_access_level=models.AccessLevel.READ_WRITE,
+        allow_requester=False,
+        detail="Unauthorized to update this appointment"
+    )
 
     # Update the attendance status
     appointment_contact.attendance_status = data.attendance_status
@@ -323,21 +280,15 @@ async def check_in_appointment_contact(
     if not appointment_contact:
         raise HTTPException(status_code=404, detail="Appointment contact not found")
     
-    # Import access control function
-    from dependencies.access_control import admin_get_appointment
-    
     # Verify user has access to update this appointment's user
-    if current_user.role != models.UserRole.ADMIN:
-        # For non-admin roles, check location-based access
-        appointment = admin_get_appointment(
-            db=db,
-            appointment_id=appointment_contact.appointment_id,
-            current_user=current_user,
-            required_access_level=models.AccessLevel.READ_WRITE
-        )
-
-        if not appointment:
-            raise HTTPException(status_code=404, detail="Unauthorized to update this appointment")
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=appointment_contact.appointment_id,
+        required_access_level=models.AccessLevel.READ_WRITE,
+        allow_requester=False,
+        detail="Unauthorized to update this appointment"
+    )
 
     # Update the attendance status
     appointment_contact.attendance_status = models.AttendanceStatus.CHECKED_IN
@@ -367,19 +318,15 @@ async def check_in_all_attendees(
     """
     Check in all attendees (dignitaries and users) for an appointment.
     """
-    # Import access control function
-    from dependencies.access_control import admin_get_appointment
-    
     # Verify user has access to this appointment
-    if current_user.role != models.UserRole.ADMIN:
-        appointment = admin_get_appointment(
-            db=db,
-            appointment_id=appointment_id,
-            current_user=current_user,
-            required_access_level=models.AccessLevel.READ_WRITE
-        )
-        if not appointment:
-            raise HTTPException(status_code=404, detail="Unauthorized to update this appointment")
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=appointment_id,
+        required_access_level=models.AccessLevel.READ_WRITE,
+        allow_requester=False,
+        detail="Unauthorized to update this appointment"
+    )
     
     total_checked_in = 0
     already_checked_in = 0
@@ -394,6 +341,8 @@ async def check_in_all_attendees(
             already_checked_in += 1
         else:
             dignitary.attendance_status = models.AttendanceStatus.CHECKED_IN
+            dignitary.checked_in_at = datetime.utcnow()
+            dignitary.checked_in_by = current_user.id
             dignitary.updated_by = current_user.id
             total_checked_in += 1
     
@@ -408,6 +357,7 @@ async def check_in_all_attendees(
         else:
             contact.attendance_status = models.AttendanceStatus.CHECKED_IN
             contact.checked_in_at = datetime.utcnow()
+            contact.checked_in_by = current_user.id
             contact.updated_by = current_user.id
             total_checked_in += 1
     
@@ -428,19 +378,15 @@ async def check_in_all_contacts(
     """
     Check in all darshan attendees (contacts) for an appointment.
     """
-    # Import access control function
-    from dependencies.access_control import admin_get_appointment
-    
     # Verify user has access to this appointment
-    if current_user.role != models.UserRole.ADMIN:
-        appointment = admin_get_appointment(
-            db=db,
-            appointment_id=appointment_id,
-            current_user=current_user,
-            required_access_level=models.AccessLevel.READ_WRITE
-        )
-        if not appointment:
-            raise HTTPException(status_code=404, detail="Unauthorized to update this appointment")
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=appointment_id,
+        required_access_level=models.AccessLevel.READ_WRITE,
+        allow_requester=False,
+        detail="Unauthorized to update this appointment"
+    )
     
     total_checked_in = 0
     already_checked_in = 0
@@ -456,6 +402,7 @@ async def check_in_all_contacts(
         else:
             contact.attendance_status = models.AttendanceStatus.CHECKED_IN
             contact.checked_in_at = datetime.utcnow()
+            contact.checked_in_by = current_user.id
             contact.updated_by = current_user.id
             total_checked_in += 1
     
@@ -476,19 +423,15 @@ async def check_in_all_dignitaries(
     """
     Check in all dignitaries for an appointment.
     """
-    # Import access control function
-    from dependencies.access_control import admin_get_appointment
-    
     # Verify user has access to this appointment
-    if current_user.role != models.UserRole.ADMIN:
-        appointment = admin_get_appointment(
-            db=db,
-            appointment_id=appointment_id,
-            current_user=current_user,
-            required_access_level=models.AccessLevel.READ_WRITE
-        )
-        if not appointment:
-            raise HTTPException(status_code=404, detail="Unauthorized to update this appointment")
+    require_appointment_access(
+        current_user=current_user,
+        db=db,
+        appointment_id=appointment_id,
+        required_access_level=models.AccessLevel.READ_WRITE,
+        allow_requester=False,
+        detail="Unauthorized to update this appointment"
+    )
     
     total_checked_in = 0
     already_checked_in = 0
@@ -503,6 +446,8 @@ async def check_in_all_dignitaries(
             already_checked_in += 1
         else:
             dignitary.attendance_status = models.AttendanceStatus.CHECKED_IN
+            dignitary.checked_in_at = datetime.utcnow()
+            dignitary.checked_in_by = current_user.id
             dignitary.updated_by = current_user.id
             total_checked_in += 1
     
@@ -511,4 +456,231 @@ async def check_in_all_dignitaries(
     return schemas.BulkCheckinResponse(
         total_checked_in=total_checked_in,
         already_checked_in=already_checked_in
-    ) 
\ No newline at end of file
+    ) 
+
+BATCH_ATTENDEE_MODELS = {
+    "contact": models.AppointmentContact,
+    "dignitary": models.AppointmentDignitary,
+}
+BATCH_AUDIT_ENTITY_TYPES = {
+    "contact": "appointment_contact",
+    "dignitary": "appointment_dignitary",
+}
+
+def _normalize_scan_time(client_timestamp: Optional[datetime], now: datetime) -> datetime:
+    """Convert a device scan time to naive UTC, never later than the server clock."""
+    if client_timestamp is None:
+        return now
+    if client_timestamp.tzinfo is not None:
+        client_timestamp = client_timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(client_timestamp, now)
+
+@router.post("/check-in/batch", response_model=schemas.BatchCheckinResponse)
+@requires_any_role([models.UserRole.USHER, models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
+async def batch_check_in(
+    data: schemas.BatchCheckinRequest,
+    current_user: models.User = Depends(get_current_user_for_write),
+    db: Session = Depends(get_db)
+):
+    """
+    Check in a burst of scanned attendees in one transaction.
+    Each item is an appointment contact id, an appointment dignitary id or a scanned QR code;
+    a QR code for a whole appointment checks in all of its attendees. Attendees of appointments
+    that are not approved and scheduled within the usher window are rejected. Items are resolved with a
+    fixed number of queries regardless of batch size, attendees already checked in are left
+    untouched (so retried batches are safe), and every item gets its own result.
+    """
+    now = datetime.utcnow()
+    ItemStatus = schemas.BatchCheckinItemStatus
+    results = [schemas.BatchCheckinItemResult(index=index, status=ItemStatus.CHECKED_IN) for index in range(len(data.items))]
+
+    # Resolve each item to attendee ids or a whole appointment
+    # target: (kind, attendee_id, appointment_id claimed by a QR code) or ("appointment", appointment_id, None)
+    targets: Dict[int, Tuple[str, int, Optional[int]]] = {}
+    for index, item in enumerate(data.items):
+        if item.appointment_contact_id is not None:
+            targets[index] = ("contact", item.appointment_contact_id, None)
+        elif item.appointment_dignitary_id is not None:
+            targets[index] = ("dignitary", item.appointment_dignitary_id, None)
+        else:
+            try:
+                payload = decode_checkin_qr_token(item.qr_token)
+            except QRTokenError as e:
+                results[index].status = ItemStatus.INVALID
+                results[index].detail = str(e)
+                continue
+            if payload.get("appointment_contact_id") is not None:
+                targets[index] = ("contact", payload["appointment_contact_id"], payload["appointment_id"])
+            elif payload.get("appointment_dignitary_id") is not None:
+                targets[index] = ("dignitary", payload["appointment_dignitary_id"], payload["appointment_id"])
+            else:
+                targets[index] = ("appointment", payload["appointment_id"], None)
+
+    attendee_ids = {kind: set() for kind in BATCH_ATTENDEE_MODELS}
+    whole_appointment_ids = set()
+    for kind, target_id, _ in targets.values():
+        if kind == "appointment":
+            whole_appointment_ids.add(target_id)
+        else:
+            attendee_ids[kind].add(target_id)
+
+    # One query per attendee table covers both individual and whole-appointment items
+    attendees = {}
+    attendees_by_appointment: Dict[int, List[Tuple[str, int]]] = {}
+    for kind, model in BATCH_ATTENDEE_MODELS.items():
+        if not attendee_ids[kind] and not whole_appointment_ids:
+            continue
+        rows = db.query(model.id, model.appointment_id, model.attendance_status).filter(
+            or_(model.id.in_(attendee_ids[kind]), model.appointment_id.in_(whole_appointment_ids))
+        ).all()
+        for row in rows:
+            attendees[(kind, row.id)] = row
+            if row.appointment_id in whole_appointment_ids:
+                attendees_by_appointment.setdefault(row.appointment_id, []).append((kind, row.id))
+
+    # Access and scheduling are checked once per appointment, not once per scan
+    appointment_ids = whole_appointment_ids | {row.appointment_id for row in attendees.values()}
+    appointment_rows = {
+        row.id: row
+        for row in db.query(
+            models.Appointment.id,
+            models.Appointment.location_id,
+            models.Location.country_code,
+            models.Appointment.status,
+            models.Appointment.sub_status,
+            models.CalendarEvent.start_date,
+        ).outerjoin(
+            models.Location, models.Appointment.location_id == models.Location.id
+        ).outerjoin(
+            models.CalendarEvent, models.Appointment.calendar_event_id == models.CalendarEvent.id
+        ).filter(models.Appointment.id.in_(appointment_ids)).all()
+    } if appointment_ids else {}
+    scope = get_appointment_access_scope(db, current_user, models.AccessLevel.READ_WRITE)
+
+    # Pick the attendees to check in; the earliest scan wins for duplicates
+    item_attendees: Dict[int, List[Tuple[str, int]]] = {}
+    scan_times: Dict[str, Dict[int, datetime]] = {kind: {} for kind in BATCH_ATTENDEE_MODELS}
+    for index, (kind, target_id, claimed_appointment_id) in targets.items():
+        if kind == "appointment":
+            appointment_id = target_id
+            keys = attendees_by_appointment.get(appointment_id, [])
+        else:
+            attendee = attendees.get((kind, target_id))
+            if not attendee:
+                results[index].status = ItemStatus.NOT_FOUND
+                results[index].detail = "Attendee not found"
+                continue
+            appointment_id = attendee.appointment_id
+            if claimed_appointment_id is not None and claimed_appointment_id != appointment_id:
+                results[index].status = ItemStatus.INVALID
+                results[index].detail = "QR code does not match this appointment"
+                continue
+            keys = [(kind, target_id)]
+
+        appointment = appointment_rows.get(appointment_id)
+        if not appointment:
+            results[index].status = ItemStatus.NOT_FOUND
+            results[index].detail = "Appointment not found"
+            continue
+        if not scope_allows(scope, appointment.country_code, appointment.location_id):
+            results[index].status = ItemStatus.FORBIDDEN
+            results[index].detail = "Unauthorized to update this appointment"
+            continue
+        if not is_open_for_check_in(appointment.status, appointment.sub_status, appointment.start_date):
+            results[index].status = ItemStatus.REJECTED
+            results[index].detail = "Appointment is not scheduled within the check-in window"
+            continue
+        if not keys:
+            results[index].status = ItemStatus.NOT_FOUND
+            results[index].detail = "Appointment has no attendees"
+            continue
+
+        item_attendees[index] = keys
+        scanned_at = _normalize_scan_time(data.items[index].client_timestamp, now)
+        for attendee_kind, attendee_id in keys:
+            if attendees[(attendee_kind, attendee_id)].attendance_status == models.AttendanceStatus.CHECKED_IN:
+                continue
+            previous = scan_times[attendee_kind].get(attendee_id)
+            scan_times[attendee_kind][attendee_id] = min(previous, scanned_at) if previous else scanned_at
+
+    # One UPDATE per attendee table; the status guard keeps concurrent scans idempotent
+    checked_in: Dict[str, set] = {kind: set() for kind in BATCH_ATTENDEE_MODELS}
+    attendance_changes = []
+    for kind, model in BATCH_ATTENDEE_MODELS.items():
+        if not scan_times[kind]:
+            continue
+        updated_ids = db.execute(
+            update(model)
+            .where(
+                model.id.in_(scan_times[kind].keys()),
+                model.attendance_status != models.AttendanceStatus.CHECKED_IN,
+            )
+            .values(
+                attendance_status=models.AttendanceStatus.CHECKED_IN,
+                checked_in_at=case(scan_times[kind], value=model.id),
+                checked_in_by=current_user.id,
+                updated_by=current_user.id,
+                updated_at=now,
+            )
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        checked_in[kind].update(updated_ids)
+        attendance_changes.extend(
+            AttendanceChange(
+                kind=kind,
+                id=attendee_id,
+                appointment_id=attendees[(kind, attendee_id)].appointment_id,
+                attendance_status=models.AttendanceStatus.CHECKED_IN,
+                checked_in_at=scan_times[kind][attendee_id],
+            )
+            for attendee_id in updated_ids
+        )
+
+    if attendance_changes:
+        mark_usher_day_sheet_dirty(db)
+        publish_attendance_changes(db, attendance_changes)
+    # Bulk updates bypass the ORM flush, so their audit entries are recorded here
+    for change in attendance_changes:
+        previous_status = attendees[(change.kind, change.id)].attendance_status
+        audit(
+            db,
+            entity_type=BATCH_AUDIT_ENTITY_TYPES[change.kind],
+            entity_id=change.id,
+            action="check_in",
+            previous_state={"attendance_status": previous_status.value if previous_status else None},
+            new_state={
+                "attendance_status": change.attendance_status.value,
+                "checked_in_at": change.checked_in_at.isoformat(),
+            },
+            user_id=current_user.id,
+        )
+    db.commit()
+
+    already_checked_in = set()
+    for index, keys in item_attendees.items():
+        result = results[index]
+        for kind, attendee_id in keys:
+            id_field = "appointment_contact_id" if kind == "contact" else "appointment_dignitary_id"
+            if attendee_id in checked_in[kind]:
+                status, checked_in_at = ItemStatus.CHECKED_IN, scan_times[kind][attendee_id]
+            else:
+                already_checked_in.add((kind, attendee_id))
+                status, checked_in_at = ItemStatus.ALREADY_CHECKED_IN, None
+            result.attendees.append(schemas.BatchCheckinAttendeeResult(
+                appointment_id=attendees[(kind, attendee_id)].appointment_id,
+                status=status,
+                checked_in_at=checked_in_at,
+                **{id_field: attendee_id},
+            ))
+        if all(attendee.status == ItemStatus.ALREADY_CHECKED_IN for attendee in result.attendees):
+            result.status = ItemStatus.ALREADY_CHECKED_IN
+
+    logger.info(f"Batch check-in by user {current_user.id}: {len(data.items)} items, {len(attendance_changes)} checked in")
+
+    return schemas.BatchCheckinResponse(
+        results=results,
+        total_checked_in=sum(len(ids) for ids in checked_in.values()),
+        already_checked_in=len(already_checked_in),
+        failed=sum(1 for result in results if result.status in (ItemStatus.NOT_FOUND, ItemStatus.FORBIDDEN, ItemStatus.INVALID, ItemStatus.REJECTED)),
+    )
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+import logging
+
+# Import our dependencies
+from dependencies.database import get_db, get_read_db
+from dependencies.auth import requires_any_role, get_current_user, get_current_user_for_write
+from routers.usher import get_usher_date_range
+from dependencies.access_control import get_appointment_access_scope
+from utils.usher_sync import build_sync_snapshot, merge_offline_operations
+
+# Import models and schemas
+import models
+import schemas
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/snapshot", response_model=schemas.UsherSyncSnapshot)
+@requires_any_role([models.UserRole.USHER, models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
+async def get_usher_sync_snapshot(
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user),
+    date: Optional[str] = None,
+):
+    """
+    Download a compact copy of the usher day-sheet for offline use.
+    Covers the same date window as /usher/appointments. Each attendee carries a `version`
+    (send it back as `base_version` when uploading), and `versions` holds the latest version
+    per attendee kind so devices can tell whether their copy is current.
+    """
+    start_date, end_date = get_usher_date_range(date)
+    scope = get_appointment_access_scope(db, current_user)
+    return build_sync_snapshot(db, start_date, end_date, scope)
+
+@router.post("/upload", response_model=schemas.UsherSyncUploadResponse)
+@requires_any_role([models.UserRole.USHER, models.UserRole.SECRETARIAT, models.UserRole.ADMIN])
+async def upload_usher_sync_operations(
+    upload: schemas.UsherSyncUpload,
+    request: Request,
+    current_user: models.User = Depends(get_current_user_for_write),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload check-ins and resets queued on a device while offline.
+    Operations are merged with last-writer-wins on the time the usher acted, recorded in the
+    audit log with the device id, and committed in one transaction. Each result includes the
+    attendee's merged server state for the device to store.
+    """
+    scope = get_appointment_access_scope(db, current_user, models.AccessLevel.READ_WRITE)
+    results = merge_offline_operations(
+        db,
+        current_user,
+        upload,
+        scope,
+        client_ip=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    )
+    db.commit()
+
+    logger.info(f"Offline sync from device {upload.device_id} by user {current_user.id}: {len(upload.operations)} operations")
+    return schemas.UsherSyncUploadResponse(server_time=datetime.utcnow(), results=results)
@@ -304,6 +304,54 @@ class AdminDignitary(DignitaryBase):
     class Config:
         orm_mode = True
 
+class DignitaryFacetCount(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+class AdminDignitaryDirectoryResponse(BaseModel):
+    """Schema for the paginated admin dignitary directory"""
+    dignitaries: List[AdminDignitary]
+    total: int
+    page: int
+    per_page: int
+    total_pages: int
+    # Counts per country_code and primary_domain over the search results, before facet filters
+    facets: Dict[str, List[DignitaryFacetCount]]
+
+class DignitaryDuplicateCheck(BaseModel):
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    exclude_id: Optional[int] = None
+
+class DignitaryDuplicateCandidate(BaseModel):
+    """An existing dignitary that probably is the same person"""
+    id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    organization: Optional[str] = None
+    title_in_organization: Optional[str] = None
+    country_code: Optional[str] = None
+    score: float
+    # Which keys matched: email, phone, name
+    reasons: List[str]
+
+class DignitaryOwnDuplicate(BaseModel):
+    """A dignitary the requester already added that probably is the same person"""
+    id: int
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+class DignitaryCreateResponse(Dignitary):
+    # Only among the dignitaries the requester is a point of contact for
+    possible_duplicates: List[DignitaryOwnDuplicate] = []
+
+class AdminDignitaryCreateResponse(AdminDignitary):
+    possible_duplicates: List[DignitaryDuplicateCandidate] = []
+
 class AdminDignitaryCreate(DignitaryBase):
     country_code: str
     honorific_title: Optional[str] = None
@@ -841,6 +889,160 @@ class BulkCheckinResponse(BaseModel):
     already_checked_in: int
     failed: int = 0
 
+class BatchCheckinItem(BaseModel):
+    """One scan in a batch check-in; exactly one of the identifiers must be set"""
+    appointment_contact_id: Optional[int] = None
+    appointment_dignitary_id: Optional[int] = None
+    qr_token: Optional[str] = None  # Bare JWT or the full QR JSON envelope
+    client_timestamp: Optional[datetime] = None  # When the badge was scanned on the device
+
+    @root_validator(skip_on_failure=True)
+    def validate_single_identifier(cls, values):
+        identifiers = [values.get('appointment_contact_id'), values.get('appointment_dignitary_id'), values.get('qr_token')]
+        if sum(1 for identifier in identifiers if identifier is not None) != 1:
+            raise ValueError('Provide exactly one of appointment_contact_id, appointment_dignitary_id or qr_token')
+        return values
+
+class BatchCheckinRequest(BaseModel):
+    items: List[BatchCheckinItem]
+
+    @validator('items')
+    def validate_items(cls, v):
+        if not v:
+            raise ValueError('At least one item is required')
+        if len(v) > 500:
+            raise ValueError('A batch can contain at most 500 items')
+        return v
+
+class BatchCheckinItemStatus(str, Enum):
+    CHECKED_IN = "checked_in"
+    ALREADY_CHECKED_IN = "already_checked_in"
+    NOT_FOUND = "not_found"
+    FORBIDDEN = "forbidden"
+    INVALID = "invalid"
+    REJECTED = "rejected"  # Appointment is not scheduled within the usher window
+
+class BatchCheckinAttendeeResult(BaseModel):
+    appointment_contact_id: Optional[int] = None
+    appointment_dignitary_id: Optional[int] = None
+    appointment_id: int
+    status: BatchCheckinItemStatus
+    checked_in_at: Optional[datetime] = None
+
+class BatchCheckinItemResult(BaseModel):
+    """Result for one request item; a QR code for a whole appointment yields several attendees"""
+    index: int
+    status: BatchCheckinItemStatus
+    detail: Optional[str] = None
+    attendees: List[BatchCheckinAttendeeResult] = []
+
+class BatchCheckinResponse(BaseModel):
+    results: List[BatchCheckinItemResult]
+    total_checked_in: int
+    already_checked_in: int
+    failed: int
+
+class CheckinQRCodeResponse(BaseModel):
+    """A signed check-in code; encode `qr_text` in the QR image (or scan the bare `token`)"""
+    appointment_id: int
+    appointment_contact_id: Optional[int] = None
+    appointment_dignitary_id: Optional[int] = None
+    uuid: str
+    token: str
+    qr_text: str  # JSON envelope {"uuid", "token", "aid", "type"}
+    expires_at: datetime
+
+class UsherAttendanceChange(BaseModel):
+    """Check-in state of a single attendee, as returned by the usher delta refresh"""
+    id: int
+    appointment_id: int
+    attendance_status: Optional[AttendanceStatus] = None
+    checked_in_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class UsherAttendanceDelta(BaseModel):
+    """Attendees whose check-in state changed since the client's last refresh"""
+    since: datetime
+    server_time: datetime  # Pass back as `since` on the next refresh; trails the read, so responses overlap
+    appointment_contacts: List[UsherAttendanceChange] = []
+    appointment_dignitaries: List[UsherAttendanceChange] = []
+
+class UsherSyncAttendeeKind(str, Enum):
+    CONTACT = "contact"
+    DIGNITARY = "dignitary"
+
+class UsherSyncAppointment(BaseModel):
+    id: int
+    appointment_date: date
+    appointment_time: Optional[str] = None
+    location_id: Optional[int] = None
+
+class UsherSyncAttendee(BaseModel):
+    kind: UsherSyncAttendeeKind
+    id: int
+    appointment_id: int
+    honorific_title: Optional[HonorificTitle] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    attendance_status: Optional[AttendanceStatus] = None
+    checked_in_at: Optional[datetime] = None
+    version: Optional[datetime] = None  # Row updated_at; echo back as base_version when uploading
+
+class UsherSyncSnapshot(BaseModel):
+    """Compact offline copy of the usher day-sheet"""
+    start_date: date
+    end_date: date
+    server_time: datetime
+    versions: Dict[str, Optional[datetime]]  # Latest attendee version per kind
+    appointments: List[UsherSyncAppointment] = []
+    attendees: List[UsherSyncAttendee] = []
+
+class UsherSyncOperation(BaseModel):
+    """A check-in or check-in reset queued on a device while offline"""
+    op_id: str  # Unique per device, used to match results
+    kind: UsherSyncAttendeeKind
+    id: int
+    attendance_status: AttendanceStatus
+    client_timestamp: datetime  # When the usher performed the action on the device
+    base_version: Optional[datetime] = None  # Attendee version the device last saw
+
+    @validator('attendance_status')
+    def validate_attendance_status(cls, v):
+        if v not in (AttendanceStatus.CHECKED_IN, AttendanceStatus.PENDING):
+            raise ValueError('Usher can only check in or mark attendees as pending')
+        return v
+
+class UsherSyncUpload(BaseModel):
+    device_id: str
+    operations: List[UsherSyncOperation]
+
+    @validator('operations')
+    def validate_operations(cls, v):
+        if len(v) > 1000:
+            raise ValueError('An upload can contain at most 1000 operations')
+        return v
+
+class UsherSyncOperationStatus(str, Enum):
+    APPLIED = "applied"
+    UNCHANGED = "unchanged"  # Server already had this state
+    CONFLICT = "conflict"    # A later write on the server won
+    NOT_FOUND = "not_found"
+    FORBIDDEN = "forbidden"
+    REJECTED = "rejected"    # Appointment is not scheduled within the usher window
+
+class UsherSyncOperationResult(BaseModel):
+    """Outcome of one operation plus the server's current state of the attendee"""
+    op_id: str
+    status: UsherSyncOperationStatus
+    attendee: Optional[UsherSyncAttendee] = None
+
+class UsherSyncUploadResponse(BaseModel):
+    server_time: datetime
+    results: List[UsherSyncOperationResult]
+
 class AppointmentDignitary(AppointmentDignitaryBase):
     id: int
     created_at: datetime
@@ -1581,3 +1783,78 @@ class BulkAppointmentApproveSchedule(BaseModel):
 
 # NOTE: Removed duplicate schemas - using UserContact and AdminUserContact directly
 
+
+class BackgroundJob(BaseModel):
+    """Schema for a background job as shown to admins"""
+    id: int
+    queue: str
+    task: str
+    payload: Dict[str, Any]
+    status: str
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    locked_at: Optional[datetime] = None
+    locked_by: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+class BackgroundJobListResponse(BaseModel):
+    """Schema for the paginated background job list"""
+    jobs: List[BackgroundJob]
+    total: int
+    page: int
+    per_page: int
+    total_pages: int
+
+class BackgroundJobQueueStats(BaseModel):
+    """Job counts of one queue by status, plus the age of its oldest runnable job"""
+    queue: str
+    counts: Dict[str, int]
+    oldest_pending_seconds: Optional[float] = None
+
+class DatabasePoolStats(BaseModel):
+    """State and checkout metrics of one database connection pool in this process"""
+    name: str
+    pool_size: Optional[int] = None
+    checked_out: Optional[int] = None
+    overflow: Optional[int] = None
+    checkouts: int
+    overflow_checkouts: int
+    checkout_timeouts: int
+    checkout_wait_avg_ms: float
+    checkout_wait_max_ms: float
+    checkout_wait_histogram: Dict[str, int]
+    peak_checked_out: int
+    connects: int
+    invalidations: int
+    since: datetime
+    pgbouncer: bool
+
+class ReadRoutingStats(BaseModel):
+    """How read sessions were routed between the reader and the writer in this process"""
+    reads: int
+    reads_after_write: int
+    reader_caught_up: int
+    writer_fallbacks: int
+    fallback_rate: float
+    lag_checks: int
+    lag_check_errors: int
+    last_lag_ms: Optional[float] = None
+    since: datetime
+
+class AuditLogWriterStats(BaseModel):
+    """Audit log entries buffered and written in batches by this process"""
+    waiting: int
+    buffered: int
+    written: int
+    dropped: int
+    batches: int
+    write_failures: int
+    last_write_ms: Optional[float] = None
+    since: datetime
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark email rendering for a darshan update sent to many recipients.
+
+Builds an in-memory appointment (nothing is read from or written to the
+database) with N contacts, then times:
+
+- loading all templates cold, with and without the bytecode cache
+- rendering the update for every recipient the old way (a full render per
+  recipient, with templates checked for changes on each lookup) and through a
+  NotificationRenderCache, and checks that both produce identical emails
+
+Usage:
+    python scripts/benchmark_email_rendering.py [--recipients 50] [--rounds 20]
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+# Add the backend directory to sys.path to import backend modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+
+import models
+from utils import email_notifications
+from utils.email_notifications import (
+    EMAIL_TEMPLATES_DIR, EmailTemplate, NotificationRenderCache, render_template, template_env,
+)
+from utils.utils import appointment_to_dict
+
+TEMPLATES = [
+    EmailTemplate.APPOINTMENT_RESCHEDULED.value,
+    EmailTemplate.APPOINTMENT_CONFIRMED.value,
+    EmailTemplate.APPOINTMENT_UPDATED_SECRETARIAT.value,
+]
+
+
+def build_appointment(recipients: int) -> models.Appointment:
+    location = models.Location(
+        id=1, name="Ashram", city="Boone", state="NC", street_address="1 Ashram Rd", zip_code="28607",
+        parking_info="Lot B", driving_directions="Follow the signs",
+    )
+    requester = models.User(id=1, first_name="Asha", last_name="Rao", email="asha@example.org", role=models.UserRole.USHER)
+    appointment = models.Appointment(
+        id=4242, purpose="Darshan", preferred_date=date(2026, 11, 1), status=models.AppointmentStatus.APPROVED,
+        sub_status=models.AppointmentSubStatus.SCHEDULED, secretariat_notes_to_requester="Please arrive early.\nBring ID.",
+        location=location, requester=requester, updated_at=datetime(2026, 10, 19, 9, 30),
+    )
+    appointment.appointment_dignitaries = [
+        models.AppointmentDignitary(dignitary=models.Dignitary(
+            id=i, honorific_title=models.HonorificTitle.NA, first_name=f"Guest{i}", last_name="Lee"
+        ))
+        for i in range(1, 4)
+    ]
+    appointment.appointment_contacts = [
+        models.AppointmentContact(contact=models.UserContact(
+            id=i, first_name=f"Contact{i}", last_name="O'Neil", email=f"contact{i}@example.org",
+            relationship_to_owner=models.PersonRelationshipType.FAMILY,
+        ))
+        for i in range(1, recipients + 1)
+    ]
+    return appointment
+
+
+def contexts_for(appointment_data: dict, recipients: int):
+    base = {
+        'appointment': appointment_data,
+        'recipient_type': 'contact',
+        'requester_name': "Asha Rao",
+        'old_data': {'status': 'Pending'},
+        'new_data': {'status': 'Approved'},
+    }
+    for i in range(1, recipients + 1):
+        yield {
+            **base,
+            'user_name': f"Contact{i} <&>",
+            'user_email': f"contact{i}@example.org",
+            'user_role': 'GENERAL',
+            'is_consolidated_email': False,
+            'contact_names': [f"Contact{i} O'Neil"],
+        }
+
+
+def time_cold_load(bytecode_cache) -> float:
+    env = Environment(
+        loader=FileSystemLoader(EMAIL_TEMPLATES_DIR),
+        autoescape=select_autoescape(['html', 'xml']),
+        extensions=template_env.extensions.keys(),
+        bytecode_cache=bytecode_cache,
+    )
+    env.filters.update(template_env.filters)
+    env.globals.update(template_env.globals)
+    started = time.perf_counter()
+    for name in env.list_templates(filter_func=lambda name: name.endswith('.html')):
+        env.get_template(name)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="email_bytecode_")
+    try:
+        no_cache = min(time_cold_load(None) for _ in range(5))
+        time_cold_load(FileSystemBytecodeCache(cache_dir))  # populate
+        with_cache = min(time_cold_load(FileSystemBytecodeCache(cache_dir)) for _ in range(5))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    print(f"Cold template load: {no_cache * 1000:.1f} ms compiled, {with_cache * 1000:.1f} ms from bytecode cache")
+
+    appointment = build_appointment(args.recipients)
+    started = time.perf_counter()
+    appointment_data = appointment_to_dict(appointment)
+    print(f"appointment_to_dict: {(time.perf_counter() - started) * 1000:.2f} ms (now once per notification)")
+
+    for template_name in TEMPLATES:
+        contexts = list(contexts_for(appointment_data, args.recipients))
+
+        template_env.auto_reload = True
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            baseline = [render_template(template_name, **context) for context in contexts]
+        baseline_time = (time.perf_counter() - started) / args.rounds
+        template_env.auto_reload = email_notifications.EMAIL_TEMPLATES_AUTO_RELOAD
+
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            render_cache = NotificationRenderCache()
+            cached = [render_cache.render(template_name, context) for context in contexts]
+        cached_time = (time.perf_counter() - started) / args.rounds
+
+        assert cached == baseline, f"{template_name}: cached render differs from a full render"
+        print(
+            f"{template_name}: {args.recipients} recipients in {baseline_time * 1000:.1f} ms per recipient render, "
+            f"{cached_time * 1000:.1f} ms shared ({baseline_time / cached_time:.1f}x), identical output"
+        )
+
+
+if __name__ == "__main__":
+    main()
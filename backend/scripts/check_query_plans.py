@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for the appointment hot paths.
+
+Creates a scratch schema in the configured Postgres database (the same POSTGRES_*
+settings as the app), fills it with synthetic appointments, runs
+EXPLAIN (FORMAT JSON) for each hot query and fails when a plan reads one of the
+large tables with a sequential scan, i.e. when a query stopped using its index.
+
+It also loads the appointment list views with their eager-loading options and
+fails when a statement fetched more rows than it loaded entities, i.e. when a
+one-to-many collection was joined into the parent query (row explosion).
+
+The scratch schema is dropped afterwards unless --keep is given; nothing outside
+it is touched.
+
+Usage:
+    python scripts/check_query_plans.py [--appointments 20000] [--schema query_plan_check] [--keep] [--verbose]
+
+Exits with status 1 if any plan or list view regressed, so it can run in CI against a throwaway Postgres.
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add the backend directory to sys.path to import backend modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, event, insert, select, text
+from sqlalchemy.orm import Session
+
+from database import WRITE_DB_URL
+import models
+from utils.loader_options import appointment_list_options, eager_load
+from utils.upcoming_appointments import get_upcoming_appointments, upcoming_appointments_union
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger("check_query_plans")
+
+# Tables that are large in production; a sequential scan over them in a hot query is a regression
+WATCHED_TABLES = {"appointments", "calendar_events", "appointment_dignitaries"}
+
+
+@dataclass
+class Sample:
+    """Parameters for the checked queries, picked from the seeded data."""
+    today: date
+    requester_id: int
+    dignitary_id: int
+
+
+# --- Seed data --------------------------------------------------------------
+
+def _appointment_day(rng: random.Random, today: date) -> date:
+    # Mostly history, a few weeks of upcoming requests, like production
+    if rng.random() < 0.06:
+        return today + timedelta(days=rng.randint(0, 60))
+    return today - timedelta(days=min(int(rng.expovariate(1 / 300)), 1500) + 1)
+
+
+def _appointment_status(rng: random.Random, day: date, today: date):
+    roll = rng.random()
+    if day >= today:
+        if roll < 0.4:
+            return models.AppointmentStatus.PENDING, models.AppointmentSubStatus.NOT_REVIEWED
+        if roll < 0.5:
+            return models.AppointmentStatus.NEED_MORE_INFO, models.AppointmentSubStatus.NEED_MORE_INFO
+        if roll < 0.9:
+            return models.AppointmentStatus.APPROVED, models.AppointmentSubStatus.SCHEDULED
+        return models.AppointmentStatus.CANCELLED, models.AppointmentSubStatus.CANCELLED
+    if roll < 0.6:
+        return models.AppointmentStatus.COMPLETED, models.AppointmentSubStatus.NO_FURTHER_ACTION
+    if roll < 0.75:
+        return models.AppointmentStatus.CANCELLED, models.AppointmentSubStatus.CANCELLED
+    if roll < 0.95:
+        return models.AppointmentStatus.REJECTED, models.AppointmentSubStatus.LOW_PRIORITY
+    return models.AppointmentStatus.PENDING, models.AppointmentSubStatus.NOT_REVIEWED
+
+
+def _insert(conn, model, rows: List[dict], batch_size: int = 5000) -> List[int]:
+    table = model.__table__
+    ids = []
+    for start in range(0, len(rows), batch_size):
+        result = conn.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows[start:start + batch_size])
+        ids.extend(result.scalars().all())
+    return ids
+
+
+def seed(conn, appointment_count: int, today: date, rng: random.Random) -> Sample:
+    """Fill the scratch schema with synthetic users, locations, dignitaries and appointments."""
+    user_ids = _insert(conn, models.User, [
+        {"email": f"user{i}@example.org", "first_name": f"User{i}", "last_name": "Test",
+         "role": models.UserRole.GENERAL, "email_notification_preferences": {}}
+        for i in range(max(100, appointment_count // 10))
+    ])
+    location_ids = _insert(conn, models.Location, [
+        {"name": f"Location {i}", "street_address": "1 Main St", "city": "Boone", "state": "NC",
+         "country": "United States", "country_code": "US", "zip_code": "28607", "created_by": user_ids[0]}
+        for i in range(20)
+    ])
+    dignitary_ids = _insert(conn, models.Dignitary, [
+        {"first_name": f"Dignitary{i}", "last_name": "Test", "created_by": user_ids[0]}
+        for i in range(max(50, appointment_count // 4))
+    ])
+
+    appointments = []
+    events = []
+    for _ in range(appointment_count):
+        day = _appointment_day(rng, today)
+        status, sub_status = _appointment_status(rng, day, today)
+        request_type = rng.choice(list(models.RequestType))
+        appointment = {
+            "requester_id": rng.choice(user_ids),
+            "location_id": rng.choice(location_ids),
+            "status": status,
+            "sub_status": sub_status,
+            "request_type": request_type,
+            "purpose": "Synthetic appointment",
+            "created_by": user_ids[0],
+            # Every row needs the same keys for a multi-row insert
+            "preferred_date": None,
+            "preferred_start_date": None,
+            "preferred_end_date": None,
+        }
+        if request_type == models.RequestType.DIGNITARY:
+            appointment["preferred_date"] = day
+        else:
+            appointment["preferred_start_date"] = day
+            appointment["preferred_end_date"] = day + timedelta(days=rng.randint(0, 7))
+        if status in (models.AppointmentStatus.APPROVED, models.AppointmentStatus.COMPLETED):
+            start_time = time(rng.randint(8, 18), rng.choice([0, 15, 30, 45]))
+            events.append({
+                "event_type": models.EventType.DIGNITARY_APPOINTMENT,
+                "title": "Synthetic appointment",
+                "start_datetime": datetime.combine(day, start_time),
+                "start_date": day,
+                "start_time": start_time.strftime("%H:%M"),
+                "duration": 15,
+                "location_id": appointment["location_id"],
+            })
+            appointment["calendar_event_index"] = len(events) - 1
+        appointments.append(appointment)
+
+    event_ids = _insert(conn, models.CalendarEvent, events)
+    for appointment in appointments:
+        index = appointment.pop("calendar_event_index", None)
+        appointment["calendar_event_id"] = event_ids[index] if index is not None else None
+    appointment_ids = _insert(conn, models.Appointment, appointments)
+
+    links = [
+        {"appointment_id": appointment_id, "dignitary_id": dignitary_id}
+        for appointment_id, appointment in zip(appointment_ids, appointments)
+        if appointment["request_type"] == models.RequestType.DIGNITARY
+        for dignitary_id in rng.sample(dignitary_ids, rng.randint(1, 2))
+    ]
+    _insert(conn, models.AppointmentDignitary, links)
+
+    contact_ids = _insert(conn, models.UserContact, [
+        {"owner_user_id": rng.choice(user_ids), "first_name": f"Contact{i}", "last_name": "Test"}
+        for i in range(max(100, appointment_count // 2))
+    ])
+    # Darshan requests bring whole families; a joined contacts collection multiplies their rows
+    attendees = [
+        {"appointment_id": appointment_id, "contact_id": contact_id}
+        for appointment_id, appointment in zip(appointment_ids, appointments)
+        for contact_id in rng.sample(
+            contact_ids, rng.randint(3, 12) if appointment["request_type"] == models.RequestType.DARSHAN else rng.randint(0, 3)
+        )
+    ]
+    _insert(conn, models.AppointmentContact, attendees)
+
+    logger.info(
+        f"Seeded {len(appointments)} appointments, {len(events)} calendar events, "
+        f"{len(links)} appointment dignitaries, {len(attendees)} appointment contacts"
+    )
+    linked_appointment = appointments[appointment_ids.index(links[0]["appointment_id"])]
+    return Sample(today=today, requester_id=linked_appointment["requester_id"], dignitary_id=links[0]["dignitary_id"])
+
+
+# --- Hot queries (mirroring the endpoints) ---------------------------------
+
+def my_appointments(db: Session, sample: Sample):
+    """GET /appointments/my"""
+    return db.query(models.Appointment).filter(
+        models.Appointment.requester_id == sample.requester_id
+    ).options(*eager_load(
+        (models.Appointment.appointment_dignitaries, models.AppointmentDignitary.dignitary),
+        models.Appointment.requester,
+        models.Appointment.calendar_event,
+        models.Appointment.location,
+        models.Appointment.meeting_place,
+        models.Appointment.appointment_contacts,
+    )).order_by(models.Appointment.id.desc())
+
+
+def my_appointments_for_dignitary(db: Session, sample: Sample):
+    """GET /appointments/my/{dignitary_id}"""
+    return db.query(models.Appointment).join(models.AppointmentDignitary).filter(
+        models.AppointmentDignitary.dignitary_id == sample.dignitary_id,
+        models.Appointment.requester_id == sample.requester_id,
+    )
+
+
+def requester_summary(db: Session, sample: Sample):
+    """GET /appointments/summary (the open appointments it aggregates)"""
+    return db.query(models.Appointment.id, models.Appointment.request_type).filter(
+        models.Appointment.requester_id == sample.requester_id,
+        ~models.Appointment.status.in_([models.AppointmentStatus.CANCELLED, models.AppointmentStatus.COMPLETED]),
+    )
+
+
+def usher_day_sheet(db: Session, sample: Sample):
+    """GET /usher/appointments"""
+    return db.query(models.Appointment).join(models.CalendarEvent).filter(
+        models.CalendarEvent.start_date >= sample.today,
+        models.CalendarEvent.start_date <= sample.today + timedelta(days=2),
+        models.Appointment.status == models.AppointmentStatus.APPROVED,
+        models.Appointment.sub_status == models.AppointmentSubStatus.SCHEDULED,
+    ).options(
+        *appointment_list_options(models.Appointment.location)
+    ).order_by(models.CalendarEvent.start_date, models.CalendarEvent.start_time)
+
+
+def stats_time_slots(db: Session, sample: Sample):
+    """GET /admin/stats/appointments/summary"""
+    return db.query(models.Appointment).join(
+        models.CalendarEvent, models.Appointment.calendar_event_id == models.CalendarEvent.id
+    ).filter(
+        models.CalendarEvent.start_date.between(sample.today, sample.today + timedelta(days=30)),
+        models.Appointment.status.in_([models.AppointmentStatus.APPROVED, models.AppointmentStatus.COMPLETED]),
+    )
+
+
+def upcoming_inbox(db: Session, sample: Sample):
+    """GET /admin/appointments/upcoming?limit=50 (ids of the page; the rows are then loaded by id)"""
+    upcoming = upcoming_appointments_union(sample.today - timedelta(days=1))
+    return select(upcoming.c.id).order_by(upcoming.c.rank, upcoming.c.sort_date, upcoming.c.id).limit(50)
+
+
+def upcoming_inbox_scoped(db: Session, sample: Sample):
+    """GET /admin/appointments/upcoming?limit=50 for a secretariat user with country access"""
+    upcoming = upcoming_appointments_union(sample.today - timedelta(days=1), scope=[("US", None)])
+    return select(upcoming.c.id).order_by(upcoming.c.rank, upcoming.c.sort_date, upcoming.c.id).limit(50)
+
+
+def recent_appointments(db: Session, sample: Sample):
+    """GET /admin/appointments/all (the newest page)"""
+    return db.query(models.Appointment).options(
+        *appointment_list_options()
+    ).order_by(models.Appointment.id.desc()).limit(200)
+
+
+HOT_QUERIES: List[Callable] = [
+    my_appointments,
+    my_appointments_for_dignitary,
+    requester_summary,
+    usher_day_sheet,
+    stats_time_slots,
+    upcoming_inbox,
+    upcoming_inbox_scoped,
+]
+
+
+# List views whose eager loads are checked for row explosion; each loads its appointments
+LIST_VIEWS: Dict[str, Callable] = {
+    "my_appointments": lambda db, sample: my_appointments(db, sample).all(),
+    "usher_day_sheet": lambda db, sample: usher_day_sheet(db, sample).all(),
+    "recent_appointments": lambda db, sample: recent_appointments(db, sample).all(),
+    "upcoming_inbox": lambda db, sample: get_upcoming_appointments(db, sample.today - timedelta(days=1), limit=50)[0],
+}
+
+
+# --- Plan checks -----------------------------------------------------------
+
+def find_seq_scans(plan: dict) -> List[str]:
+    """Watched tables read with a sequential scan anywhere in an EXPLAIN (FORMAT JSON) plan node."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in WATCHED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child))
+    return found
+
+
+def explain(db: Session, query) -> dict:
+    # Inline the parameters, as psycopg2 does, so the planner can match partial index predicates
+    statement = getattr(query, "statement", query)
+    compiled = statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    result = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}").scalar()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]["Plan"]
+
+
+# --- Row explosion checks --------------------------------------------------
+
+def count_rows(engine, load: Callable, sample: Sample):
+    """
+    Run a list view in a fresh session; return the rows each entity's statements
+    fetched and the distinct entities of each kind that were loaded.
+    """
+    rows = Counter()
+    with Session(engine) as db:
+        @event.listens_for(db, "do_orm_execute")
+        def count(state):
+            # Only statements that load entities; id lists and aggregates cannot explode
+            entities = [
+                column["type"] for column in (state.statement.column_descriptions if state.is_select else [])
+                if isinstance(column["type"], type) and hasattr(column["type"], "__mapper__")
+            ]
+            if not entities:
+                return None
+            entity = entities[0]
+            # Freezing keeps every fetched row, before the ORM de-duplicates joined collections
+            frozen = state.invoke_statement().freeze()
+            rows[entity.__name__] += len(frozen.data)
+            return frozen()
+
+        # Keep the result referenced: the identity map only holds loaded objects weakly
+        result = load(db, sample)
+        loaded = Counter(type(instance).__name__ for instance in db.identity_map.values())
+        del result
+    return rows, loaded
+
+
+def find_row_explosions(rows: Counter, loaded: Counter) -> List[str]:
+    """Entities whose statements fetched more rows than there are entities, e.g. 'Appointment (60 rows, 3 loaded)'."""
+    return [
+        f"{name} ({fetched} rows, {loaded[name]} loaded)"
+        for name, fetched in sorted(rows.items())
+        if fetched > loaded[name]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--appointments", type=int, default=20000, help="Synthetic appointments to seed")
+    parser.add_argument("--schema", default="query_plan_check", help="Scratch schema (dropped and recreated)")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema for inspection")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic data")
+    args = parser.parse_args()
+
+    engine = create_engine(WRITE_DB_URL, connect_args={"options": f"-csearch_path={args.schema}"})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {args.schema} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {args.schema}"))
+
+    failures = []
+    try:
+        models.Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            sample = seed(conn, args.appointments, date.today(), random.Random(args.seed))
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE"))
+
+        with Session(engine) as db:
+            for build_query in HOT_QUERIES:
+                plan = explain(db, build_query(db, sample))
+                seq_scans = find_seq_scans(plan)
+                status = "FAIL" if seq_scans else "ok"
+                detail = f" (sequential scan on {', '.join(sorted(set(seq_scans)))})" if seq_scans else ""
+                logger.info(f"{status:4} {build_query.__name__}: cost {plan['Total Cost']:.0f}{detail}")
+                if args.verbose or seq_scans:
+                    print(json.dumps(plan, indent=2))
+                if seq_scans:
+                    failures.append(build_query.__name__)
+
+        for name, load in LIST_VIEWS.items():
+            rows, loaded = count_rows(engine, load, sample)
+            explosions = find_row_explosions(rows, loaded)
+            status = "FAIL" if explosions else "ok"
+            detail = f" (row explosion: {'; '.join(explosions)})" if explosions else ""
+            logger.info(f"{status:4} {name}: {sum(rows.values())} rows for {sum(loaded.values())} entities{detail}")
+            if explosions:
+                failures.append(name)
+    finally:
+        if not args.keep:
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {args.schema} CASCADE"))
+        engine.dispose()
+
+    if failures:
+        logger.error(f"{len(failures)} checks regressed (sequential scan or row explosion): {', '.join(failures)}")
+        sys.exit(1)
+    logger.info(f"All {len(HOT_QUERIES)} hot queries use indexes and all {len(LIST_VIEWS)} list views load without row explosion")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Startup regression check: how long `import app` takes and what it imports.
+
+Imports the app in fresh interpreters with `python -X importtime`, pointed at
+a database that does not exist (importing must not need one), and fails when
+
+- the median import time exceeds the budget, or
+- a heavy SDK that should load on first use (DEFERRED_MODULES) is imported at startup.
+
+Prints the packages that took the most import time, to see where a regression came from.
+
+Usage:
+    python scripts/check_startup_time.py [--runs 3] [--budget-ms 5000] [--top 15]
+
+Exits with status 1 on a regression, so it can run in CI.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Imported by the code paths that use them, never by `import app`
+DEFERRED_MODULES = ["boto3", "botocore", "openai", "sendgrid", "googleapiclient", "google.oauth2", "google.auth", "PIL"]
+
+# Enough configuration for the app to import, unless the environment provides it
+DEFAULT_ENV = {
+    "JWT_SECRET_KEY": "startup-check",
+    "GOOGLE_CLIENT_ID": "startup-check",
+    "S3_BUCKET_NAME": "startup-check",
+    "ENABLE_EMAIL": "false",
+}
+# Importing must not connect, so the database is unreachable on purpose
+UNREACHABLE_DATABASE = {
+    "POSTGRES_HOST": "127.0.0.1",
+    "POSTGRES_PORT": "1",
+    "POSTGRES_READ_HOST": "",
+    "POSTGRES_WRITE_HOST": "",
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_app() -> List[Tuple[int, int, str]]:
+    """Import the app in a new interpreter; return (self µs, cumulative µs, module) per imported module."""
+    env = {**DEFAULT_ENV, **os.environ, **UNREACHABLE_DATABASE}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=300,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-3000:])
+        raise SystemExit("Importing the app failed")
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules.append((int(match[1]), int(match[2]), match[4]))
+    return modules
+
+
+def app_import_ms(modules: List[Tuple[int, int, str]]) -> float:
+    return next(cumulative for _, cumulative, name in modules if name == "app") / 1000
+
+
+def slowest_packages(modules: List[Tuple[int, int, str]], top: int) -> List[Tuple[str, float]]:
+    """Self import time summed per top-level package, slowest first."""
+    totals: Dict[str, int] = Counter()
+    for self_us, _, name in modules:
+        totals[name.split(".")[0]] += self_us
+    return [(package, us / 1000) for package, us in totals.most_common(top)]
+
+
+def deferred_imports(modules: List[Tuple[int, int, str]]) -> List[str]:
+    names = {name for _, _, name in modules}
+    return [module for module in DEFERRED_MODULES if module in names]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Imports to take the median of")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", 5000)),
+                        help="Maximum median import time")
+    parser.add_argument("--top", type=int, default=15, help="Slowest packages to list")
+    args = parser.parse_args()
+
+    runs = [import_app() for _ in range(args.runs)]
+    timings = [app_import_ms(modules) for modules in runs]
+    median = statistics.median(timings)
+
+    print(f"import app: median {median:.0f} ms over {args.runs} runs ({', '.join(f'{t:.0f}' for t in timings)})")
+    print("Slowest packages (self time, last run):")
+    for package, ms in slowest_packages(runs[-1], args.top):
+        print(f"  {ms:8.1f} ms  {package}")
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"median import time {median:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    eager = deferred_imports(runs[-1])
+    if eager:
+        failures.append(f"imported at startup instead of on first use: {', '.join(eager)}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL {failure}")
+        sys.exit(1)
+    print(f"ok   within {args.budget_ms:.0f} ms and no deferred SDKs imported")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Find clusters of duplicate dignitaries for review and merge.
+
+Usage:
+    python scripts/cluster_dignitary_duplicates.py [--output clusters.csv] [--threshold 0.6]
+
+Each output row is one dignitary in a cluster; rows of the same cluster share cluster_id.
+"""
+import argparse
+import csv
+import os
+import sys
+import logging
+import time
+from pathlib import Path
+
+# Add the backend directory to sys.path to import backend modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database import SessionLocal
+import models
+from utils.dignitary_matching import find_duplicate_clusters, set_match_keys, NAME_SIMILARITY_THRESHOLD
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger("cluster_dignitary_duplicates")
+
+
+def backfill_missing_keys(db, batch_size=1000):
+    """Compute match keys for rows written outside the application (e.g. bulk SQL loads)."""
+    total = 0
+    last_id = 0
+    while True:
+        dignitaries = db.query(models.Dignitary).filter(
+            models.Dignitary.name_key.is_(None),
+            models.Dignitary.id > last_id,
+        ).order_by(models.Dignitary.id).limit(batch_size).all()
+        if not dignitaries:
+            break
+        for dignitary in dignitaries:
+            set_match_keys(dignitary)
+        last_id = dignitaries[-1].id
+        db.commit()
+        total += len(dignitaries)
+    if total:
+        logger.info(f"Computed match keys for {total} dignitaries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster duplicate dignitaries")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "dignitary_duplicate_clusters.csv"))
+    parser.add_argument("--threshold", type=float, default=NAME_SIMILARITY_THRESHOLD,
+                        help="Minimum name trigram similarity inside a block")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        backfill_missing_keys(db)
+
+        started = time.perf_counter()
+        clusters = find_duplicate_clusters(db, threshold=args.threshold)
+        logger.info(f"Found {len(clusters)} clusters in {time.perf_counter() - started:.2f}s")
+
+        details = {}
+        ids = [dignitary_id for cluster in clusters for dignitary_id in cluster]
+        for start in range(0, len(ids), 1000):
+            for row in db.query(
+                models.Dignitary.id,
+                models.Dignitary.first_name,
+                models.Dignitary.last_name,
+                models.Dignitary.email,
+                models.Dignitary.phone,
+                models.Dignitary.organization,
+                models.Dignitary.created_at,
+            ).filter(models.Dignitary.id.in_(ids[start:start + 1000])):
+                details[row.id] = row
+
+        with open(args.output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["cluster_id", "dignitary_id", "first_name", "last_name", "email", "phone", "organization", "created_at"])
+            for cluster_id, cluster in enumerate(clusters, start=1):
+                for dignitary_id in cluster:
+                    row = details.get(dignitary_id)
+                    if row:
+                        writer.writerow([cluster_id, row.id, row.first_name, row.last_name, row.email,
+                                         row.phone, row.organization, row.created_at])
+        logger.info(f"Wrote {sum(len(cluster) for cluster in clusters)} rows to {args.output}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Post-commit side effects for appointment writes.
+
+Handlers call record_appointment_change() before committing. That enqueues one
+background job per side effect (notification emails with the contact profile
+check, calendar sync) in the same transaction, so the jobs exist if and only if
+the write does. Each effect is retried on its own, so a calendar failure never
+re-sends the emails of the same change.
+"""
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import logging
+
+from pydantic import BaseModel
+from sqlalchemy import Enum as SqlEnum, Date, DateTime
+from sqlalchemy.orm import Session
+
+import models
+from utils.jobs import job_task, build_job, add_jobs
+from utils.email_notifications import notify_appointment_creation, notify_appointment_update
+from utils.calendar_sync import check_and_sync_appointment, check_and_sync_updated_appointment
+
+logger = logging.getLogger(__name__)
+
+
+class AppointmentChangeType(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+
+    def __str__(self):
+        return self.value
+
+
+class AppointmentSideEffect(str, Enum):
+    EMAIL = "email"
+    CALENDAR = "calendar"
+
+    def __str__(self):
+        return self.value
+
+
+ALL_SIDE_EFFECTS = (AppointmentSideEffect.EMAIL, AppointmentSideEffect.CALENDAR)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return [_encode_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _encode_value(item) for key, item in value.items()}
+    return value
+
+
+def encode_change_data(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Make a change-set JSON serializable."""
+    if data is None:
+        return None
+    return {key: _encode_value(value) for key, value in data.items()}
+
+
+def decode_change_data(data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Restore enum and date values of Appointment columns, so comparisons behave as before encoding."""
+    decoded = {}
+    columns = models.Appointment.__table__.columns
+    for key, value in (data or {}).items():
+        column = columns.get(key)
+        if column is not None and isinstance(value, str):
+            if isinstance(column.type, SqlEnum) and column.type.enum_class:
+                value = column.type.enum_class(value)
+            elif isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Date):
+                value = date.fromisoformat(value)
+        decoded[key] = value
+    return decoded
+
+
+class AppointmentChangePayload(BaseModel):
+    appointment_id: int
+    change_type: AppointmentChangeType
+    created_by: Optional[int] = None
+    old_data: Optional[Dict[str, Any]] = None
+    new_data: Optional[Dict[str, Any]] = None
+
+
+_EFFECT_TASKS = {
+    AppointmentSideEffect.EMAIL: "appointment_email",
+    AppointmentSideEffect.CALENDAR: "appointment_calendar",
+}
+
+
+def record_appointment_change(
+    db: Session,
+    appointment_id: int,
+    change_type: AppointmentChangeType,
+    created_by: Optional[int] = None,
+    old_data: Optional[Dict[str, Any]] = None,
+    new_data: Optional[Dict[str, Any]] = None,
+    effects: Iterable[AppointmentSideEffect] = ALL_SIDE_EFFECTS,
+) -> List[models.BackgroundJob]:
+    """
+    Queue the side effects of an appointment write, one job per effect. Call before commit;
+    the jobs run in the background once the transaction commits, and are discarded with it on rollback.
+    """
+    payload = {
+        'appointment_id': appointment_id,
+        'change_type': change_type,
+        'created_by': created_by,
+        'old_data': encode_change_data(old_data),
+        'new_data': encode_change_data(new_data),
+    }
+    jobs = [build_job(_EFFECT_TASKS[AppointmentSideEffect(effect)], payload) for effect in effects]
+    add_jobs(db, jobs)
+    return jobs
+
+
+def _load_appointment(db: Session, appointment_id: int) -> Optional[models.Appointment]:
+    appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
+    if not appointment:
+        logger.info(f"Appointment {appointment_id} no longer exists, skipping side effects")
+    return appointment
+
+
+@job_task("appointment_email", payload=AppointmentChangePayload)
+def appointment_email_task(db: Session, payload: AppointmentChangePayload) -> None:
+    appointment = _load_appointment(db, payload.appointment_id)
+    if not appointment:
+        return
+    # Also queues the contact profile check for new appointments
+    if payload.change_type == AppointmentChangeType.CREATED:
+        notify_appointment_creation(db, appointment)
+    else:
+        notify_appointment_update(db, appointment, decode_change_data(payload.old_data), decode_change_data(payload.new_data))
+
+
+@job_task("appointment_calendar", payload=AppointmentChangePayload)
+def appointment_calendar_task(db: Session, payload: AppointmentChangePayload) -> None:
+    appointment = _load_appointment(db, payload.appointment_id)
+    if not appointment:
+        return
+    if payload.change_type == AppointmentChangeType.CREATED:
+        asyncio.run(check_and_sync_appointment(appointment, db))
+    else:
+        asyncio.run(check_and_sync_updated_appointment(appointment, decode_change_data(payload.old_data), decode_change_data(payload.new_data), db))
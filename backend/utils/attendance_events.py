@@ -0,0 +1,330 @@
+"""
+Live attendance-change events for usher devices.
+
+Check-in writes publish a Postgres NOTIFY from inside their transaction, so the
+event is delivered only if the write commits. Every worker process runs one
+LISTEN thread that fans the events out to the SSE streams connected to that
+worker, and drops its cached usher day-sheets when anything changes.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import atexit
+import json
+import logging
+import os
+import select
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy import event, inspect, select as sa_select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+import models
+from database import WRITE_DB_URL, POSTGRES_SCHEMA
+from dependencies.access_control import AccessScope
+from utils.usher_day_sheet import DAY_SHEET_MODELS, invalidate_usher_day_sheets
+
+logger = logging.getLogger(__name__)
+
+# One channel per schema so environments sharing a database don't see each other's events
+ATTENDANCE_CHANNEL = os.getenv(
+    "USHER_ATTENDANCE_CHANNEL",
+    "usher_attendance" if POSTGRES_SCHEMA == "public" else f"usher_attendance_{POSTGRES_SCHEMA}"
+)
+SSE_HEARTBEAT_SECONDS = int(os.getenv("USHER_SSE_HEARTBEAT_SECONDS", 15))
+SUBSCRIBER_QUEUE_SIZE = 1000
+# NOTIFY payloads must stay below 8000 bytes
+MAX_NOTIFY_PAYLOAD = 7500
+
+class AttendanceEventType:
+    ATTENDANCE = "attendance"  # An attendee was checked in or reset
+    DAY_SHEET = "day_sheet"    # Appointments or attendees changed; re-fetch the day-sheet
+    RESYNC = "resync"          # Events may have been missed; re-fetch the day-sheet
+
+listener_running = False
+listener_thread = None
+_subscribers: Set["AttendanceSubscriber"] = set()
+_subscribers_lock = threading.Lock()
+
+
+@dataclass(eq=False)
+class AttendanceSubscriber:
+    """An SSE stream waiting for events within a date range and access scope."""
+    loop: asyncio.AbstractEventLoop
+    start_date: date
+    end_date: date
+    scope: AccessScope
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+
+    def matches(self, attendance_event: Dict[str, Any]) -> bool:
+        if attendance_event.get("type") != AttendanceEventType.ATTENDANCE:
+            return True
+
+        event_date = attendance_event.get("date")
+        if not event_date or not (self.start_date.isoformat() <= event_date <= self.end_date.isoformat()):
+            return False
+
+        if self.scope is None:
+            return True
+        return any(
+            country_code == attendance_event.get("country_code")
+            and (location_id is None or location_id == attendance_event.get("location_id"))
+            for country_code, location_id in self.scope
+        )
+
+    def offer(self, attendance_event: Dict[str, Any]) -> None:
+        """Queue an event; must run on the subscriber's event loop."""
+        try:
+            self.queue.put_nowait(attendance_event)
+        except asyncio.QueueFull:
+            # The client is too slow; tell it to reload instead of replaying the backlog
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": AttendanceEventType.RESYNC})
+
+
+def subscribe(start_date: date, end_date: date, scope: AccessScope) -> AttendanceSubscriber:
+    """Register an SSE stream on the running event loop."""
+    subscriber = AttendanceSubscriber(
+        loop=asyncio.get_running_loop(),
+        start_date=start_date,
+        end_date=end_date,
+        scope=scope,
+    )
+    with _subscribers_lock:
+        _subscribers.add(subscriber)
+    start_attendance_listener()
+    return subscriber
+
+
+def unsubscribe(subscriber: AttendanceSubscriber) -> None:
+    with _subscribers_lock:
+        _subscribers.discard(subscriber)
+
+
+def dispatch_attendance_event(attendance_event: Dict[str, Any]) -> None:
+    """Fan an event out to every matching subscriber in this process."""
+    with _subscribers_lock:
+        subscribers = [s for s in _subscribers if s.matches(attendance_event)]
+    for subscriber in subscribers:
+        try:
+            subscriber.loop.call_soon_threadsafe(subscriber.offer, attendance_event)
+        except RuntimeError:
+            # Event loop already closed
+            unsubscribe(subscriber)
+
+
+async def stream_attendance_events(subscriber: AttendanceSubscriber):
+    """Yield server-sent events for a subscriber until the client disconnects."""
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                attendance_event = await asyncio.wait_for(subscriber.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keep proxies and load balancers from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            data = {k: v for k, v in attendance_event.items() if k not in ("type", "country_code", "location_id")}
+            yield f"event: {attendance_event['type']}\ndata: {json.dumps(data)}\n\n"
+    finally:
+        unsubscribe(subscriber)
+
+
+# ---------------------------------------------------------------------------
+# Publishing
+# ---------------------------------------------------------------------------
+
+ATTENDEE_MODELS = {
+    models.AppointmentContact: "contact",
+    models.AppointmentDignitary: "dignitary",
+}
+
+
+def _attendance_changed(instance) -> bool:
+    attrs = inspect(instance).attrs
+    return attrs.attendance_status.history.has_changes() or attrs.checked_in_at.history.has_changes()
+
+
+def _publish(connection, payloads: List[Dict[str, Any]]) -> None:
+    """Send payloads as as few NOTIFYs as the size limit allows."""
+    batch: List[str] = []
+    size = 0
+    for payload in payloads:
+        encoded = json.dumps(payload, default=str)
+        if batch and size + len(encoded) + 2 > MAX_NOTIFY_PAYLOAD:
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"),
+                               {"channel": ATTENDANCE_CHANNEL, "payload": f"[{','.join(batch)}]"})
+            batch, size = [], 0
+        batch.append(encoded)
+        size += len(encoded) + 1
+    if batch:
+        connection.execute(text("SELECT pg_notify(:channel, :payload)"),
+                           {"channel": ATTENDANCE_CHANNEL, "payload": f"[{','.join(batch)}]"})
+
+
+@dataclass
+class AttendanceChange:
+    """Check-in state of one attendee after a write."""
+    kind: str  # "contact" or "dignitary"
+    id: int
+    appointment_id: int
+    attendance_status: Optional[models.AttendanceStatus]
+    checked_in_at: Optional[datetime]
+
+
+def _attendance_payloads(connection, attendance_changes: List[AttendanceChange]) -> List[Dict[str, Any]]:
+    """Attach each change's date and location so listeners can filter by scope."""
+    appointment_ids = {change.appointment_id for change in attendance_changes}
+    scope_rows = connection.execute(
+        sa_select(
+            models.Appointment.id,
+            models.Appointment.location_id,
+            models.Location.country_code,
+            models.CalendarEvent.start_date,
+        )
+        .outerjoin(models.Location, models.Appointment.location_id == models.Location.id)
+        .outerjoin(models.CalendarEvent, models.Appointment.calendar_event_id == models.CalendarEvent.id)
+        .where(models.Appointment.id.in_(appointment_ids))
+    ).all()
+    scope_by_appointment = {row.id: row for row in scope_rows}
+
+    payloads = []
+    for change in attendance_changes:
+        scope_row = scope_by_appointment.get(change.appointment_id)
+        payloads.append({
+            "type": AttendanceEventType.ATTENDANCE,
+            "kind": change.kind,
+            "id": change.id,
+            "appointment_id": change.appointment_id,
+            "attendance_status": change.attendance_status.value if change.attendance_status else None,
+            "checked_in_at": change.checked_in_at.isoformat() if change.checked_in_at else None,
+            "date": scope_row.start_date.isoformat() if scope_row and scope_row.start_date else None,
+            "country_code": scope_row.country_code if scope_row else None,
+            "location_id": scope_row.location_id if scope_row else None,
+        })
+    return payloads
+
+
+def publish_attendance_changes(session: Session, attendance_changes: List[AttendanceChange]) -> None:
+    """
+    Publish changes written with bulk statements, which the ORM flush hook cannot see.
+    Call before commit; the NOTIFY is delivered only if the transaction commits.
+    """
+    connection = session.connection()
+    if connection.dialect.name != "postgresql" or not attendance_changes:
+        return
+    _publish(connection, _attendance_payloads(connection, attendance_changes))
+
+
+@event.listens_for(Session, "after_flush")
+def _notify_attendance_changes(session, flush_context):
+    """Queue NOTIFYs for this flush; Postgres delivers them only if the transaction commits."""
+    connection = session.connection()
+    if connection.dialect.name != "postgresql":
+        return
+
+    attendance_changes = []
+    day_sheet_changed = False
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        kind = ATTENDEE_MODELS.get(type(instance))
+        if kind and instance not in session.new and instance not in session.deleted:
+            if _attendance_changed(instance):
+                attendance_changes.append(AttendanceChange(
+                    kind=kind,
+                    id=instance.id,
+                    appointment_id=instance.appointment_id,
+                    attendance_status=instance.attendance_status,
+                    checked_in_at=instance.checked_in_at,
+                ))
+        elif isinstance(instance, DAY_SHEET_MODELS):
+            day_sheet_changed = True
+
+    payloads = _attendance_payloads(connection, attendance_changes) if attendance_changes else []
+    if day_sheet_changed:
+        payloads.append({"type": AttendanceEventType.DAY_SHEET})
+
+    if payloads:
+        _publish(connection, payloads)
+
+
+# ---------------------------------------------------------------------------
+# Listening
+# ---------------------------------------------------------------------------
+
+def start_attendance_listener():
+    """Start the background LISTEN thread if not already running."""
+    global listener_running, listener_thread
+
+    if listener_running:
+        return
+
+    listener_running = True
+    listener_thread = threading.Thread(target=attendance_listener, daemon=True)
+    listener_thread.start()
+    logger.info("Attendance listener thread started")
+
+
+def stop_attendance_listener():
+    """Stop the background LISTEN thread."""
+    global listener_running
+    listener_running = False
+    logger.info("Attendance listener thread stop requested")
+
+
+def _handle_notification(payload: str) -> None:
+    try:
+        attendance_events = json.loads(payload)
+    except ValueError:
+        logger.error(f"Ignoring malformed attendance notification: {payload[:200]}")
+        return
+
+    # Any change may be on a cached day-sheet in this worker
+    invalidate_usher_day_sheets()
+    for attendance_event in attendance_events:
+        dispatch_attendance_event(attendance_event)
+
+
+def attendance_listener():
+    """Background worker that holds a dedicated LISTEN connection and dispatches notifications."""
+    global listener_running
+
+    logger.info(f"Attendance listener started on channel {ATTENDANCE_CHANNEL}")
+    while listener_running:
+        conn = None
+        try:
+            conn = psycopg2.connect(WRITE_DB_URL)
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{ATTENDANCE_CHANNEL}"')
+
+            # Anything committed while we were disconnected is lost; have clients reload
+            invalidate_usher_day_sheets()
+            dispatch_attendance_event({"type": AttendanceEventType.RESYNC})
+
+            while listener_running:
+                if select.select([conn], [], [], 5.0) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notification = conn.notifies.pop(0)
+                    _handle_notification(notification.payload)
+        except Exception as e:
+            logger.error(f"Error in attendance listener: {str(e)}")
+            time.sleep(5)  # Back off before reconnecting
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    logger.info("Attendance listener stopped")
+
+
+atexit.register(stop_attendance_listener)
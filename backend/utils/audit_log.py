@@ -0,0 +1,451 @@
+"""
+Audit log of appointment, dignitary and check-in changes.
+
+Changes are captured from the ORM flush: creates and deletes with the row's
+values, updates with the old and new values of the changed columns. Changes the
+ORM does not see (bulk check-ins, bulk inserts) or that need more context (offline sync,
+access changes) are recorded with audit(); an explicit entry replaces the
+captured ones for the same row in that transaction. The acting user, client IP
+and user agent come from the request (middleware/audit_context.py), falling
+back to the row's updated_by / created_by outside requests.
+
+Entries wait in session.info until the transaction commits (they are dropped on
+rollback), then go to an in-process buffer, so requests never wait on audit
+writes. A background thread writes the buffer every AUDIT_LOG_FLUSH_SECONDS, or
+as soon as AUDIT_LOG_BATCH_SIZE entries are waiting, with COPY on Postgres (a
+multi-row INSERT elsewhere). A failed batch stays buffered and is retried on
+the next flush; beyond AUDIT_LOG_MAX_BUFFER entries the oldest are dropped and
+counted. Entries still buffered when the process is killed are lost.
+
+audit_logs is range-partitioned by month on created_at, with a BRIN index on
+created_at. The writer creates the partitions of the current month and the next
+AUDIT_LOG_PARTITIONS_AHEAD months; rows outside them land in audit_logs_default.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+import atexit
+import contextvars
+import csv
+import enum
+import io
+import json
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event, insert, inspect, text
+from sqlalchemy.orm import Session
+
+import models
+from database import POSTGRES_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+AUDIT_LOG_FLUSH_SECONDS = float(os.getenv('AUDIT_LOG_FLUSH_SECONDS', 2))
+AUDIT_LOG_BATCH_SIZE = int(os.getenv('AUDIT_LOG_BATCH_SIZE', 1000))
+AUDIT_LOG_MAX_BUFFER = int(os.getenv('AUDIT_LOG_MAX_BUFFER', 100000))
+AUDIT_LOG_PARTITIONS_AHEAD = int(os.getenv('AUDIT_LOG_PARTITIONS_AHEAD', 2))
+
+AUDITED_MODELS = {
+    models.Appointment: "appointment",
+    models.Dignitary: "dignitary",
+    models.AppointmentContact: "appointment_contact",
+    models.AppointmentDignitary: "appointment_dignitary",
+}
+# Bookkeeping and derived columns that would only add noise
+IGNORED_COLUMNS = {"updated_at", "search_vector", "name_key", "email_key", "phone_key"}
+# Row attributes naming the user who made the change, most specific first
+ACTOR_ATTRIBUTES = ("updated_by", "last_updated_by", "created_by")
+
+COLUMNS = [
+    "user_id", "entity_type", "entity_id", "action", "previous_state", "new_state",
+    "client_ip", "user_agent", "notes", "created_at",
+]
+NULL = r"\N"
+
+_CAPTURED_KEY = "audit_log_captured"
+_EXPLICIT_KEY = "audit_log_explicit"
+
+schema_prefix = f"{POSTGRES_SCHEMA}." if POSTGRES_SCHEMA != 'public' else ''
+TABLE_NAME = f"{schema_prefix}audit_logs"
+
+
+@dataclass
+class AuditContext:
+    """Who is making the changes of the current request."""
+    user_id: Optional[int] = None
+    client_ip: Optional[str] = None
+    user_agent: Optional[str] = None
+
+
+# Set per request by the audit context middleware; the auth dependencies fill in the user
+audit_context_var: contextvars.ContextVar[Optional[AuditContext]] = contextvars.ContextVar("audit_context", default=None)
+
+
+def set_audit_user(user_id: int) -> None:
+    """Record the authenticated user of the current request as the actor of its changes."""
+    context = audit_context_var.get()
+    if context is not None:
+        context.user_id = user_id
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _entry(
+    entity_type: str,
+    entity_id: int,
+    action: str,
+    previous_state: Optional[Dict[str, Any]] = None,
+    new_state: Optional[Dict[str, Any]] = None,
+    user_id: Optional[int] = None,
+    notes: Optional[str] = None,
+    client_ip: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> Dict[str, Any]:
+    context = audit_context_var.get() or AuditContext()
+    return {
+        "user_id": user_id if user_id is not None else context.user_id,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "action": action,
+        "previous_state": previous_state,
+        "new_state": new_state,
+        "client_ip": client_ip or context.client_ip,
+        "user_agent": user_agent or context.user_agent,
+        "notes": notes,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def audit(
+    db: Session,
+    entity_type: str,
+    entity_id: int,
+    action: str,
+    previous_state: Optional[Dict[str, Any]] = None,
+    new_state: Optional[Dict[str, Any]] = None,
+    user_id: Optional[int] = None,
+    notes: Optional[str] = None,
+    client_ip: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> None:
+    """
+    Add an audit entry to the session's transaction; it is written only if the transaction commits.
+    Replaces the entries captured from the flush for the same row in this transaction.
+    """
+    db.info.setdefault(_EXPLICIT_KEY, []).append(_entry(
+        entity_type, entity_id, action, previous_state, new_state, user_id, notes, client_ip, user_agent
+    ))
+
+
+# ---------------------------------------------------------------------------
+# Capture
+# ---------------------------------------------------------------------------
+
+def _snapshot(state) -> Dict[str, Any]:
+    # Loaded values only; reading an unloaded (e.g. deferred) column would query the database
+    return {
+        column.key: _json_value(state.dict[column.key])
+        for column in state.mapper.column_attrs
+        if column.key not in IGNORED_COLUMNS and column.key in state.dict
+    }
+
+
+def _changes(state):
+    previous_state, new_state = {}, {}
+    for column in state.mapper.column_attrs:
+        if column.key in IGNORED_COLUMNS:
+            continue
+        history = state.attrs[column.key].history
+        if not history.has_changes():
+            continue
+        previous = history.deleted[0] if history.deleted else None
+        new = history.added[0] if history.added else None
+        if previous == new and history.deleted:
+            continue
+        previous_state[column.key] = _json_value(previous)
+        new_state[column.key] = _json_value(new)
+    return previous_state, new_state
+
+
+def _actor(state) -> Optional[int]:
+    context = audit_context_var.get()
+    if context is not None and context.user_id is not None:
+        return context.user_id
+    for attribute in ACTOR_ATTRIBUTES:
+        user_id = state.dict.get(attribute)
+        if user_id is not None:
+            return user_id
+    return None
+
+
+def audit_created(db: Session, instances: Iterable[Any]) -> None:
+    """
+    Add create entries for audited rows inserted without a flush (ORM bulk INSERT ... RETURNING),
+    with the same values a flush would have captured.
+    """
+    for instance in instances:
+        state = inspect(instance)
+        audit(db, AUDITED_MODELS[type(instance)], instance.id, "create", new_state=_snapshot(state), user_id=_actor(state))
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_changes(session, flush_context):
+    """Queue audit entries for the audited rows this flush created, changed or deleted."""
+    entries = []
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        entity_type = AUDITED_MODELS.get(type(instance))
+        if not entity_type:
+            continue
+        state = inspect(instance)
+        if instance in session.new:
+            action, previous_state, new_state = "create", None, _snapshot(state)
+        elif instance in session.deleted:
+            action, previous_state, new_state = "delete", _snapshot(state), None
+        else:
+            previous_state, new_state = _changes(state)
+            if not new_state:
+                continue
+            checked_in = new_state.get("attendance_status") == models.AttendanceStatus.CHECKED_IN.value
+            action = "check_in" if checked_in else "update"
+        entries.append(_entry(entity_type, instance.id, action, previous_state, new_state, user_id=_actor(state)))
+
+    if entries:
+        session.info.setdefault(_CAPTURED_KEY, []).extend(entries)
+
+
+@event.listens_for(Session, "after_commit")
+def _buffer_on_commit(session):
+    captured = session.info.pop(_CAPTURED_KEY, [])
+    explicit = session.info.pop(_EXPLICIT_KEY, [])
+    if explicit:
+        # An explicit entry replaces what the flush captured for the same row
+        replaced = {(entry["entity_type"], entry["entity_id"]) for entry in explicit}
+        captured = [entry for entry in captured if (entry["entity_type"], entry["entity_id"]) not in replaced]
+    if captured or explicit:
+        buffer_entries(captured + explicit)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_CAPTURED_KEY, None)
+    session.info.pop(_EXPLICIT_KEY, None)
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+@dataclass
+class AuditLogMetrics:
+    """Audit entries buffered and written by this process, since it started."""
+    buffered: int = 0
+    written: int = 0
+    dropped: int = 0
+    batches: int = 0
+    write_failures: int = 0
+    last_write_ms: Optional[float] = None
+    since: datetime = field(default_factory=datetime.utcnow)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def count(self, **increments) -> None:
+        with self.lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+
+metrics = AuditLogMetrics()
+
+_buffer: deque = deque()
+_buffer_lock = threading.Lock()
+# Serializes writes, so the writer thread and a final flush never write the same batch
+_write_lock = threading.Lock()
+_wakeup = threading.Event()
+_stop = threading.Event()
+_start_lock = threading.Lock()
+# Months whose partition this process has already created
+_partitions = set()
+
+audit_log_writer_running = False
+audit_log_writer_thread = None
+
+
+def buffer_entries(entries: List[Dict[str, Any]]) -> None:
+    """Queue committed entries for the writer thread."""
+    with _buffer_lock:
+        _buffer.extend(entries)
+        overflow = len(_buffer) - AUDIT_LOG_MAX_BUFFER
+        for _ in range(max(overflow, 0)):
+            _buffer.popleft()
+        waiting = len(_buffer)
+    metrics.count(buffered=len(entries), dropped=max(overflow, 0))
+    if overflow > 0:
+        logger.error(f"Audit log buffer full, dropped the {overflow} oldest entries")
+
+    if not audit_log_writer_running:
+        start_audit_log_writer()
+    if waiting >= AUDIT_LOG_BATCH_SIZE:
+        _wakeup.set()
+
+
+def _month_start(day: date, months_ahead: int = 0) -> date:
+    month_index = day.year * 12 + day.month - 1 + months_ahead
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def ensure_partitions(conn, months: Iterable[date]) -> set:
+    """
+    Create the monthly partitions of audit_logs that this process has not seen yet.
+    Returns the months created; the caller records them once the transaction commits.
+    """
+    created = set()
+    for month in sorted(set(months) - _partitions):
+        name = f"{schema_prefix}audit_logs_y{month.year}m{month.month:02d}"
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE_NAME} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_month_start(month, 1).isoformat()}')"
+        ))
+        created.add(month)
+    return created
+
+
+def _copy(conn, rows: List[Dict[str, Any]]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        values = []
+        for name in COLUMNS:
+            value = row[name]
+            if value is not None and name in ("previous_state", "new_state"):
+                value = json.dumps(value, default=str)
+            elif isinstance(value, datetime):
+                value = value.isoformat()
+            values.append(NULL if value is None else value)
+        writer.writerow(values)
+    buffer.seek(0)
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {TABLE_NAME} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def write_entries(rows: List[Dict[str, Any]]) -> None:
+    """Write a batch of entries in one transaction: COPY on Postgres, a multi-row INSERT elsewhere."""
+    from database import write_engine
+
+    if write_engine.dialect.name == 'postgresql':
+        today = datetime.utcnow().date()
+        months = {_month_start(row["created_at"].date()) for row in rows}
+        months.update(_month_start(today, ahead) for ahead in range(AUDIT_LOG_PARTITIONS_AHEAD + 1))
+        if months - _partitions:
+            try:
+                with write_engine.begin() as conn:
+                    created = ensure_partitions(conn, months)
+                # Only once committed; months of a rolled-back batch are retried on the next write
+                _partitions.update(created)
+            except Exception as e:
+                # Another process may be creating the same partition; the default partition takes the rows meanwhile
+                logger.warning(f"Could not create audit log partitions: {str(e)}")
+        with write_engine.begin() as conn:
+            _copy(conn, rows)
+    else:
+        with write_engine.begin() as conn:
+            conn.execute(insert(models.AuditLog.__table__), rows)
+
+
+def flush_audit_log() -> int:
+    """Write everything buffered so far, in batches of AUDIT_LOG_BATCH_SIZE. Returns the number of entries written."""
+    written = 0
+    with _write_lock:
+        while True:
+            with _buffer_lock:
+                batch = [_buffer.popleft() for _ in range(min(len(_buffer), AUDIT_LOG_BATCH_SIZE))]
+            if not batch:
+                return written
+
+            started = time.perf_counter()
+            try:
+                write_entries(batch)
+            except Exception as e:
+                # Keep the batch, in order, for the next flush
+                with _buffer_lock:
+                    _buffer.extendleft(reversed(batch))
+                metrics.count(write_failures=1)
+                logger.error(f"Error writing {len(batch)} audit log entries: {str(e)}")
+                return written
+
+            written += len(batch)
+            metrics.count(written=len(batch), batches=1)
+            with metrics.lock:
+                metrics.last_write_ms = (time.perf_counter() - started) * 1000
+
+
+def audit_log_writer():
+    """Write the buffer every AUDIT_LOG_FLUSH_SECONDS, or as soon as a full batch is waiting."""
+    while not _stop.is_set():
+        _wakeup.wait(AUDIT_LOG_FLUSH_SECONDS)
+        _wakeup.clear()
+        flush_audit_log()
+
+
+def start_audit_log_writer():
+    """Start the writer thread if not already running."""
+    global audit_log_writer_running, audit_log_writer_thread
+
+    with _start_lock:
+        if audit_log_writer_running:
+            return
+        audit_log_writer_running = True
+        _stop.clear()
+        audit_log_writer_thread = threading.Thread(target=audit_log_writer, name="audit-log-writer", daemon=True)
+        audit_log_writer_thread.start()
+        logger.info("Audit log writer thread started")
+
+
+def stop_audit_log_writer(timeout: float = 5):
+    """Stop the writer thread and write what is still buffered."""
+    global audit_log_writer_running
+
+    _stop.set()
+    _wakeup.set()
+    if audit_log_writer_thread is not None:
+        audit_log_writer_thread.join(timeout)
+    audit_log_writer_running = False
+    flush_audit_log()
+    logger.info("Audit log writer thread stopped")
+
+
+# Entries committed just before the process exits would otherwise be lost
+atexit.register(flush_audit_log)
+
+
+def audit_log_stats() -> dict:
+    with _buffer_lock:
+        waiting = len(_buffer)
+    with metrics.lock:
+        return {
+            "waiting": waiting,
+            "buffered": metrics.buffered,
+            "written": metrics.written,
+            "dropped": metrics.dropped,
+            "batches": metrics.batches,
+            "write_failures": metrics.write_failures,
+            "last_write_ms": metrics.last_write_ms,
+            "since": metrics.since,
+        }
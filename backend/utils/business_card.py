@@ -3,7 +3,6 @@ import os
 import json
 from typing import Optional, Dict, Any
 from pydantic import BaseModel
-from openai import OpenAI
 import logging
 
 from schemas import BusinessCardExtraction
@@ -50,6 +49,9 @@ def extract_business_card_info(image_path: str) -> BusinessCardExtraction:
         if not api_key:
             raise BusinessCardExtractionError("OpenAI API key not found in environment variables")
         
+        # Imported here: the OpenAI SDK takes about half a second to import
+        from openai import OpenAI
+
         client = OpenAI(api_key=api_key)
         
         # Encode the image to base64
@@ -1,18 +1,11 @@
 from typing import List, Dict, Any, Optional, Union
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 import os
 import json
-import queue
-import threading
-import time
 import logging
-import atexit
 from datetime import datetime, timedelta
 from pathlib import Path
 import asyncio
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 from models.appointment import Appointment, AppointmentStatus, AppointmentSubStatus
 from models.calendarEvent import CalendarEvent, EventStatus
 from models.dignitary import Dignitary, HonorificTitle
@@ -22,6 +15,9 @@ from utils.utils import str_to_bool, convert_to_datetime_with_tz
 from zoneinfo import ZoneInfo
 from functools import lru_cache
 import hashlib
+from pydantic import BaseModel
+from utils.jobs import job_task, enqueue
+from utils.loader_options import eager_load
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,13 +30,13 @@ CALENDAR_ID = os.getenv('GOOGLE_CALENDAR_ID')
 ENABLE_CALENDAR_SYNC = str_to_bool(os.getenv('ENABLE_CALENDAR_SYNC', 'True'))
 APP_BASE_URL = os.getenv('APP_BASE_URL', 'https://meetgurudev.aolf.app')
 
-# Queue for asynchronous processing
-calendar_queue = queue.Queue()
-calendar_worker_running = False
-calendar_worker_thread = None
+class CalendarJobPayload(BaseModel):
+    appointment_id: int
 
 def get_credentials():
     """Get Google API credentials from service account file."""
+    from google.oauth2 import service_account
+
     try:
         credentials_path = Path(GOOGLE_CREDENTIALS_FILE)
         if not credentials_path.exists():
@@ -63,83 +59,22 @@ def get_calendar_service():
         return None
     
     try:
+        # The Google API client is imported on first use; it is slow to import
+        from googleapiclient.discovery import build
+
         service = build('calendar', 'v3', credentials=credentials)
         return service
     except Exception as e:
         logger.error(f"Error building Google Calendar service: {str(e)}")
         return None
 
-def start_calendar_worker():
-    """Start the background calendar worker thread if not already running."""
-    global calendar_worker_running, calendar_worker_thread
-    
-    if calendar_worker_running:
-        return
-    
-    calendar_worker_running = True
-    calendar_worker_thread = threading.Thread(target=calendar_worker, daemon=True)
-    calendar_worker_thread.start()
-    logger.info("Calendar worker thread started")
+@job_task("calendar_sync", payload=CalendarJobPayload, queue="calendar")
+def calendar_sync_task(db: Session, payload: CalendarJobPayload) -> None:
+    _sync_appointment_with_calendar_event_to_google(payload.appointment_id, db, raise_errors=True)
 
-def stop_calendar_worker():
-    """Stop the background calendar worker thread."""
-    global calendar_worker_running
-    calendar_worker_running = False
-    logger.info("Calendar worker thread stop requested")
-
-def calendar_worker():
-    """Background worker that processes the calendar sync queue."""
-    global calendar_worker_running
-    
-    logger.info("Calendar worker started")
-    while calendar_worker_running:
-        try:
-            # Try to get a task from the queue with a timeout
-            try:
-                task_data = calendar_queue.get(timeout=1.0)
-            except queue.Empty:
-                continue
-            
-            # Get a database session for timezone lookups
-            db = None
-            try:
-                # Import here to avoid circular imports
-                from dependencies.database import get_db
-                from database import SessionLocal
-                db = SessionLocal()
-                
-                # Process the calendar task
-                task_type = task_data.get('type')
-                appointment_id = task_data.get('appointment_id')
-                
-                if task_type == 'create_or_update':
-                    if appointment_id:
-                        _sync_appointment_with_calendar_event_to_google(appointment_id, db)
-                    else:
-                        logger.error(f"Invalid calendar task data: {task_data}")
-                elif task_type == 'delete':
-                    if appointment_id:
-                        _delete_appointment_from_calendar(appointment_id)
-                    else:
-                        logger.error(f"Invalid calendar delete task data: {task_data}")
-                else:
-                    logger.error(f"Unknown calendar task type: {task_type}")
-                    
-            except Exception as e:
-                logger.error(f"Error processing calendar task: {str(e)}")
-            finally:
-                # Close the database session
-                if db:
-                    db.close()
-            
-            # Mark task as done
-            calendar_queue.task_done()
-            
-        except Exception as e:
-            logger.error(f"Error in calendar worker: {str(e)}")
-            time.sleep(1)  # Prevent CPU spinning on repeated errors
-    
-    logger.info("Calendar worker stopped")
+@job_task("calendar_delete", payload=CalendarJobPayload, queue="calendar")
+def calendar_delete_task(db: Session, payload: CalendarJobPayload) -> None:
+    _delete_appointment_from_calendar(payload.appointment_id, raise_errors=True)
 
 def _get_calendar_event_id(appointment_id):
     """Generate a consistent calendar event ID for an appointment."""
@@ -343,8 +278,11 @@ def _format_calendar_event_for_google(appointment_id: int, appointment_data: dic
     
     return event
 
-def _sync_appointment_with_calendar_event_to_google(appointment_id: int, db: Session):
-    """Sync an appointment with its linked calendar event to Google Calendar."""
+def _sync_appointment_with_calendar_event_to_google(appointment_id: int, db: Session, raise_errors: bool = False):
+    """Sync an appointment with its linked calendar event to Google Calendar.
+
+    Errors are logged; with raise_errors they are also re-raised so the calendar job is retried.
+    """
     if not ENABLE_CALENDAR_SYNC:
         logger.info(f"Calendar sync is disabled. Appointment {appointment_id} not synced.")
         return
@@ -353,13 +291,16 @@ def _sync_appointment_with_calendar_event_to_google(appointment_id: int, db: Ses
     if not service:
         logger.error(f"Could not get Google Calendar service, appointment {appointment_id} not synced")
         return
+    from googleapiclient.errors import HttpError
     
     try:
         # Query appointment with joined calendar event
         appointment = db.query(Appointment).options(
-            joinedload(Appointment.calendar_event).joinedload(CalendarEvent.location),
-            joinedload(Appointment.appointment_dignitaries).joinedload(models.AppointmentDignitary.dignitary),
-            joinedload(Appointment.location)
+            *eager_load(
+                (Appointment.calendar_event, CalendarEvent.location),
+                (Appointment.appointment_dignitaries, models.AppointmentDignitary.dignitary),
+                Appointment.location,
+            )
         ).filter(Appointment.id == appointment_id).first()
         
         if not appointment:
@@ -415,8 +356,10 @@ def _sync_appointment_with_calendar_event_to_google(appointment_id: int, db: Ses
             
     except Exception as e:
         logger.error(f"Error syncing appointment {appointment_id} to Google Calendar: {str(e)}")
+        if raise_errors:
+            raise
 
-def _delete_appointment_from_calendar(appointment_id):
+def _delete_appointment_from_calendar(appointment_id, raise_errors: bool = False):
     """Delete an appointment from Google Calendar."""
     if not ENABLE_CALENDAR_SYNC:
         logger.info(f"Calendar sync is disabled. Appointment {appointment_id} not deleted from calendar.")
@@ -426,6 +369,7 @@ def _delete_appointment_from_calendar(appointment_id):
     if not service:
         logger.error(f"Could not get Google Calendar service, appointment {appointment_id} not deleted from calendar")
         return
+    from googleapiclient.errors import HttpError
     
     event_id = _get_calendar_event_id(appointment_id)
     
@@ -451,31 +395,17 @@ def _delete_appointment_from_calendar(appointment_id):
         logger.info(f"Deleted Google Calendar event for appointment {appointment_id}")
     except Exception as e:
         logger.error(f"Error deleting appointment {appointment_id} from Google Calendar: {str(e)}")
+        if raise_errors:
+            raise
 
 def queue_appointment_sync(appointment_id: int):
     """Queue an appointment to be synced to Google Calendar using its linked calendar event."""
-    # Ensure the calendar worker is running
-    if not calendar_worker_running:
-        start_calendar_worker()
-    
-    # Add the task to the queue
-    calendar_queue.put({
-        'type': 'create_or_update',
-        'appointment_id': appointment_id
-    })
+    enqueue("calendar_sync", {'appointment_id': appointment_id})
     logger.info(f"Appointment {appointment_id} queued for calendar sync")
 
 def queue_appointment_delete(appointment_id: int):
     """Queue an appointment to be deleted from Google Calendar."""
-    # Ensure the calendar worker is running
-    if not calendar_worker_running:
-        start_calendar_worker()
-    
-    # Add the task to the queue
-    calendar_queue.put({
-        'type': 'delete',
-        'appointment_id': appointment_id
-    })
+    enqueue("calendar_delete", {'appointment_id': appointment_id})
     logger.info(f"Appointment {appointment_id} queued for deletion from calendar")
 
 def appointment_to_dict(appointment):
@@ -569,9 +499,11 @@ def sync_all_appointments(db: Session):
     
     # Get all approved and scheduled appointments with linked calendar events
     appointments = db.query(Appointment).options(
-        joinedload(Appointment.calendar_event).joinedload(CalendarEvent.location),
-        joinedload(Appointment.appointment_dignitaries).joinedload(models.AppointmentDignitary.dignitary),
-        joinedload(Appointment.location)
+        *eager_load(
+            (Appointment.calendar_event, CalendarEvent.location),
+            (Appointment.appointment_dignitaries, models.AppointmentDignitary.dignitary),
+            Appointment.location,
+        )
     ).filter(
         Appointment.status == AppointmentStatus.APPROVED,
         Appointment.sub_status == AppointmentSubStatus.SCHEDULED,
@@ -715,9 +647,3 @@ async def check_and_sync_updated_appointment(appointment, old_data: Dict[str, An
             # Appointment meets criteria, sync to calendar and update status if db provided
             await check_and_sync_appointment(appointment, db)
 
-
-# Initialize the calendar worker when module is imported
-start_calendar_worker()
-
-# Make sure the worker is stopped properly when the application exits
-atexit.register(stop_calendar_worker) 
@@ -0,0 +1,242 @@
+"""
+Connection pool settings, statement timeouts and pool metrics.
+
+Pool parameters are read per engine from the environment: DB_<SETTING> applies
+to both engines and DB_READ_<SETTING> / DB_WRITE_<SETTING> override it for one
+of them (e.g. DB_POOL_SIZE=5, DB_READ_POOL_SIZE=10 for a busier Aurora reader).
+
+Statement timeouts depend on the kind of work rather than the engine: each
+engine's connections start with a default, and sessions that need another limit
+(short for API reads, long for batch jobs) set it per transaction with
+SET LOCAL, only when it differs from the connection's default.
+
+With DB_PGBOUNCER=true the engines are compatible with PgBouncer in transaction
+pooling mode: no startup options and no session-level SET (both would leak to or
+be dropped for other clients); statement_timeout and search_path are applied
+with SET LOCAL in every transaction instead. psycopg2 never creates server-side
+prepared statements, so nothing else depends on the server session.
+
+Engines built with MeteredQueuePool record checkout latency, overflow usage,
+checkout timeouts and invalidations per process; pool_stats() returns them for
+GET /admin/stats/database/pool.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from utils.utils import str_to_bool
+
+logger = logging.getLogger(__name__)
+
+PGBOUNCER = str_to_bool(os.getenv("DB_PGBOUNCER", "false"))
+
+READ_STATEMENT_TIMEOUT_SECONDS = int(os.getenv("DB_READ_STATEMENT_TIMEOUT_SECONDS", 30))
+WRITE_STATEMENT_TIMEOUT_SECONDS = int(os.getenv("DB_WRITE_STATEMENT_TIMEOUT_SECONDS", 120))
+# Background jobs and bulk endpoints
+BATCH_STATEMENT_TIMEOUT_SECONDS = int(os.getenv("DB_BATCH_STATEMENT_TIMEOUT_SECONDS", 600))
+
+# Upper bounds (ms) of the checkout wait histogram; waits above the last go in "inf"
+CHECKOUT_WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+# Connection record info: the statement timeout each transaction on the connection starts with
+_STATEMENT_TIMEOUT_KEY = "statement_timeout_ms"
+
+
+def _setting(name: str, role: str, default: str) -> str:
+    return os.getenv(f"DB_{role.upper()}_{name}", os.getenv(f"DB_{name}", default))
+
+
+@dataclass
+class PoolSettings:
+    """QueuePool parameters of one engine."""
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float
+    pool_recycle: int
+    pool_pre_ping: bool
+    connect_timeout: int
+    statement_timeout_seconds: int
+
+    @classmethod
+    def from_env(cls, role: str) -> "PoolSettings":
+        """Settings for the 'read' or 'write' engine."""
+        return cls(
+            pool_size=int(_setting("POOL_SIZE", role, "5")),
+            max_overflow=int(_setting("MAX_OVERFLOW", role, "10")),
+            pool_timeout=float(_setting("POOL_TIMEOUT", role, "30")),
+            pool_recycle=int(_setting("POOL_RECYCLE", role, "1800")),
+            pool_pre_ping=str_to_bool(_setting("POOL_PRE_PING", role, "true")),
+            # Cross-region/cross-VPC connections can take long to establish
+            connect_timeout=int(_setting("CONNECT_TIMEOUT", role, "120")),
+            statement_timeout_seconds=READ_STATEMENT_TIMEOUT_SECONDS if role == "read" else WRITE_STATEMENT_TIMEOUT_SECONDS,
+        )
+
+    def engine_kwargs(self, role: str) -> dict:
+        """Keyword arguments for create_engine."""
+        connect_args = {"connect_timeout": self.connect_timeout}
+        if not PGBOUNCER:
+            connect_args["options"] = f"-c statement_timeout={self.statement_timeout_seconds * 1000}"
+        return {
+            "connect_args": connect_args,
+            "poolclass": MeteredQueuePool,
+            "pool_logging_name": role,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+
+
+@dataclass
+class PoolMetrics:
+    """Counters for one pool, since process start."""
+    name: str
+    checkouts: int = 0
+    overflow_checkouts: int = 0
+    checkout_timeouts: int = 0
+    checkout_wait_total_ms: float = 0.0
+    checkout_wait_max_ms: float = 0.0
+    checkout_wait_histogram: Dict[str, int] = field(
+        default_factory=lambda: {**{str(bound): 0 for bound in CHECKOUT_WAIT_BUCKETS_MS}, "inf": 0}
+    )
+    peak_checked_out: int = 0
+    connects: int = 0
+    invalidations: int = 0
+    since: datetime = field(default_factory=datetime.utcnow)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_checkout(self, wait_ms: float, checked_out: int, size: int) -> None:
+        bucket = next((str(bound) for bound in CHECKOUT_WAIT_BUCKETS_MS if wait_ms <= bound), "inf")
+        with self.lock:
+            self.checkouts += 1
+            self.checkout_wait_total_ms += wait_ms
+            self.checkout_wait_max_ms = max(self.checkout_wait_max_ms, wait_ms)
+            self.checkout_wait_histogram[bucket] += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            if checked_out > size:
+                self.overflow_checkouts += 1
+
+    def record_timeout(self) -> None:
+        with self.lock:
+            self.checkout_timeouts += 1
+
+
+_metrics: Dict[str, PoolMetrics] = {}
+_metrics_lock = threading.Lock()
+
+
+def get_pool_metrics(name: str) -> PoolMetrics:
+    with _metrics_lock:
+        if name not in _metrics:
+            _metrics[name] = PoolMetrics(name=name)
+        return _metrics[name]
+
+
+class MeteredQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout. Metrics are kept per pool_logging_name,
+    which survives engine.dispose() recreating the pool.
+    """
+
+    def connect(self):
+        metrics = get_pool_metrics(self.logging_name or "default")
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            metrics.record_timeout()
+            logger.warning(
+                f"Database pool '{metrics.name}' checkout timed out: "
+                f"{self.checkedout()} connections checked out (pool size {self.size()}, overflow {self.overflow()})"
+            )
+            raise
+        metrics.record_checkout((time.perf_counter() - started) * 1000, self.checkedout(), self.size())
+        return connection
+
+
+def instrument_engine(engine, settings: PoolSettings, role: str, schema: Optional[str] = None) -> None:
+    """
+    Count new connections and invalidations of the engine's pool, record each
+    connection's statement timeout and, behind PgBouncer, apply the per-session
+    settings in every transaction.
+    """
+    metrics = get_pool_metrics(role)
+    timeout_ms = settings.statement_timeout_seconds * 1000
+
+    @event.listens_for(engine, "connect")
+    def count_connect(dbapi_connection, connection_record):
+        connection_record.info[_STATEMENT_TIMEOUT_KEY] = timeout_ms
+        with metrics.lock:
+            metrics.connects += 1
+
+    @event.listens_for(engine, "invalidate")
+    def count_invalidate(dbapi_connection, connection_record, exception):
+        with metrics.lock:
+            metrics.invalidations += 1
+        logger.warning(f"Database pool '{role}' invalidated a connection: {exception}")
+
+    if PGBOUNCER:
+        statements = [f"SET LOCAL statement_timeout = {timeout_ms}"]
+        if schema and schema != "public":
+            statements.insert(0, f"SET LOCAL search_path TO {schema}, public")
+
+        @event.listens_for(engine, "begin")
+        def set_transaction_settings(connection):
+            connection.exec_driver_sql("; ".join(statements))
+
+
+def apply_statement_timeout(connection, seconds: int) -> None:
+    """Limit the statements of the connection's current transaction to seconds."""
+    if connection.dialect.name != "postgresql":
+        return
+    timeout_ms = seconds * 1000
+    # SET LOCAL ends with the transaction, so the connection default stays as recorded
+    if connection.connection.info.get(_STATEMENT_TIMEOUT_KEY) != timeout_ms:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+
+
+def set_statement_timeout(db, seconds: int) -> None:
+    """Apply a statement timeout to every transaction of a session."""
+    @event.listens_for(db, "after_begin")
+    def apply(session, transaction, connection):
+        apply_statement_timeout(connection, seconds)
+
+
+def pool_stats(engines: Dict[str, object]) -> List[dict]:
+    """Current state and metrics of each distinct engine's pool, keyed by role."""
+    stats = []
+    seen = set()
+    for role, engine in engines.items():
+        if id(engine) in seen:
+            continue
+        seen.add(id(engine))
+        pool = engine.pool
+        metrics = get_pool_metrics(pool.logging_name or role)
+        with metrics.lock:
+            stats.append({
+                "name": metrics.name,
+                "pool_size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+                "checkouts": metrics.checkouts,
+                "overflow_checkouts": metrics.overflow_checkouts,
+                "checkout_timeouts": metrics.checkout_timeouts,
+                "checkout_wait_avg_ms": metrics.checkout_wait_total_ms / metrics.checkouts if metrics.checkouts else 0.0,
+                "checkout_wait_max_ms": metrics.checkout_wait_max_ms,
+                "checkout_wait_histogram": dict(metrics.checkout_wait_histogram),
+                "peak_checked_out": metrics.peak_checked_out,
+                "connects": metrics.connects,
+                "invalidations": metrics.invalidations,
+                "since": metrics.since,
+                "pgbouncer": PGBOUNCER,
+            })
+    return stats
@@ -0,0 +1,383 @@
+"""
+Duplicate detection for dignitaries.
+
+Every dignitary carries normalized match keys (name, email, phone) maintained
+on insert/update. Candidate lookup at creation time uses exact key matches and
+pg_trgm similarity on name_key, all index-backed. The batch clusterer groups
+existing records by blocking keys and only compares pairs inside a block, so
+it scales with block size rather than with the square of the table.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import re
+import unicodedata
+
+from sqlalchemy import event, exists, func, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+
+logger = logging.getLogger(__name__)
+
+# Minimum pg_trgm similarity between name keys to consider two dignitaries the same person
+NAME_SIMILARITY_THRESHOLD = 0.6
+MAX_DUPLICATE_CANDIDATES = 5
+
+_HONORIFICS = {
+    "mr", "mrs", "ms", "miss", "dr", "prof", "sir", "hon", "honorable", "honourable",
+    "shri", "smt", "sri", "hh", "his", "her", "excellency", "rev", "jr", "sr",
+}
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+
+
+def _fold(value: str) -> str:
+    """Lowercase and strip accents."""
+    value = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in value if not unicodedata.combining(ch)).lower()
+
+
+def normalize_name(first_name: Optional[str], last_name: Optional[str]) -> Optional[str]:
+    """'Dr. José  García-Pérez' -> 'jose garcia perez'; honorifics and punctuation removed."""
+    raw = f"{first_name or ''} {last_name or ''}"
+    words = _NON_ALNUM.sub(" ", _fold(raw)).split()
+    words = [word for word in words if word not in _HONORIFICS]
+    return " ".join(words) or None
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """Lowercase, drop +tags, and ignore dots in Gmail local parts."""
+    if not email or "@" not in email:
+        return None
+    local, _, domain = email.strip().lower().rpartition("@")
+    local = local.split("+", 1)[0]
+    if domain in ("gmail.com", "googlemail.com"):
+        local = local.replace(".", "")
+        domain = "gmail.com"
+    return f"{local}@{domain}" if local else None
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Digits only, keeping the last 10 so country-code and trunk-prefix variants match."""
+    if not phone:
+        return None
+    digits = re.sub(r"\D", "", phone)
+    if len(digits) < 7:
+        return None
+    return digits[-10:]
+
+
+def name_blocking_key(name_key: Optional[str]) -> Optional[str]:
+    """Coarse key for batch clustering: first initial + first four letters of the last word."""
+    if not name_key:
+        return None
+    words = name_key.split()
+    return f"{words[0][0]}:{words[-1][:4]}"
+
+
+def trigrams(value: str) -> Set[str]:
+    """Trigrams the way pg_trgm builds them: each word padded with two leading and one trailing space."""
+    result = set()
+    for word in value.split():
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def trigram_similarity(a: Optional[str], b: Optional[str]) -> float:
+    """Python equivalent of pg_trgm similarity()."""
+    if not a or not b:
+        return 0.0
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def set_match_keys(dignitary: models.Dignitary) -> None:
+    """Recompute the match keys of a dignitary from its fields."""
+    dignitary.name_key = normalize_name(dignitary.first_name, dignitary.last_name)
+    dignitary.email_key = normalize_email(dignitary.email)
+    dignitary.phone_key = normalize_phone(dignitary.phone)
+
+
+@event.listens_for(models.Dignitary, "before_insert")
+@event.listens_for(models.Dignitary, "before_update")
+def _maintain_match_keys(mapper, connection, target):
+    set_match_keys(target)
+
+
+@dataclass
+class DuplicateCandidate:
+    dignitary_id: int
+    score: float
+    reasons: List[str] = field(default_factory=list)
+
+
+def find_duplicate_candidates(
+    db: Session,
+    first_name: Optional[str],
+    last_name: Optional[str],
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    exclude_id: Optional[int] = None,
+    limit: int = MAX_DUPLICATE_CANDIDATES,
+    poc_user_id: Optional[int] = None,
+) -> List[DuplicateCandidate]:
+    """
+    Return likely existing duplicates, best first. One query: exact email/phone key matches
+    via btree indexes and name similarity via the trigram GIN index on name_key.
+    With poc_user_id, only dignitaries that user is a point of contact for are considered.
+    """
+    name_key = normalize_name(first_name, last_name)
+    email_key = normalize_email(email)
+    phone_key = normalize_phone(phone)
+
+    key_filters = []
+    if email_key:
+        key_filters.append(models.Dignitary.email_key == email_key)
+    if phone_key:
+        key_filters.append(models.Dignitary.phone_key == phone_key)
+    match_filters = list(key_filters)
+    if name_key:
+        # `%` uses pg_trgm.similarity_threshold (0.3); the score below applies the real threshold
+        match_filters.append(models.Dignitary.name_key.op("%")(name_key))
+    if not match_filters:
+        return []
+
+    name_similarity = func.similarity(models.Dignitary.name_key, name_key) if name_key else None
+    columns = [
+        models.Dignitary.id,
+        models.Dignitary.email_key,
+        models.Dignitary.phone_key,
+    ]
+    if name_similarity is not None:
+        columns.append(name_similarity.label("name_similarity"))
+
+    query = db.query(*columns).filter(or_(*match_filters))
+    if exclude_id is not None:
+        query = query.filter(models.Dignitary.id != exclude_id)
+    if poc_user_id is not None:
+        query = query.filter(exists().where(
+            models.DignitaryPointOfContact.dignitary_id == models.Dignitary.id,
+            models.DignitaryPointOfContact.poc_id == poc_user_id,
+        ))
+    # Exact key matches first, so a common name cannot push them past the limit
+    if key_filters:
+        query = query.order_by(or_(*key_filters).desc())
+    if name_similarity is not None:
+        query = query.order_by(name_similarity.desc())
+    rows = query.limit(limit * 4).all()
+
+    candidates = []
+    for row in rows:
+        similarity = getattr(row, "name_similarity", 0.0) or 0.0
+        reasons = []
+        score = 0.0
+        if email_key and row.email_key == email_key:
+            reasons.append("email")
+            score = max(score, 0.95)
+        if phone_key and row.phone_key == phone_key:
+            reasons.append("phone")
+            score = max(score, 0.85)
+        if similarity >= NAME_SIMILARITY_THRESHOLD:
+            reasons.append("name")
+            # A matching name makes an email/phone match near-certain
+            score = min(1.0, score + similarity * 0.5) if score else similarity * 0.8
+        if reasons:
+            candidates.append(DuplicateCandidate(dignitary_id=row.id, score=round(score, 3), reasons=reasons))
+
+    candidates.sort(key=lambda candidate: -candidate.score)
+    return candidates[:limit]
+
+
+def describe_duplicate_candidates(db: Session, candidates: List[DuplicateCandidate]) -> List[schemas.DignitaryDuplicateCandidate]:
+    """Load display fields for candidates in one query, keeping their order."""
+    if not candidates:
+        return []
+    rows = {
+        row.id: row
+        for row in db.query(
+            models.Dignitary.id,
+            models.Dignitary.first_name,
+            models.Dignitary.last_name,
+            models.Dignitary.email,
+            models.Dignitary.phone,
+            models.Dignitary.organization,
+            models.Dignitary.title_in_organization,
+            models.Dignitary.country_code,
+        ).filter(models.Dignitary.id.in_([candidate.dignitary_id for candidate in candidates])).all()
+    }
+    return [
+        schemas.DignitaryDuplicateCandidate(
+            id=candidate.dignitary_id,
+            first_name=rows[candidate.dignitary_id].first_name,
+            last_name=rows[candidate.dignitary_id].last_name,
+            email=rows[candidate.dignitary_id].email,
+            phone=rows[candidate.dignitary_id].phone,
+            organization=rows[candidate.dignitary_id].organization,
+            title_in_organization=rows[candidate.dignitary_id].title_in_organization,
+            country_code=rows[candidate.dignitary_id].country_code,
+            score=candidate.score,
+            reasons=candidate.reasons,
+        )
+        for candidate in candidates
+        if candidate.dignitary_id in rows
+    ]
+
+
+def _search_duplicates_of(db: Session, dignitary: models.Dignitary, poc_user_id: Optional[int] = None) -> List[DuplicateCandidate]:
+    """Candidates for a dignitary that was just created; a failed search yields none rather than failing the create."""
+    try:
+        # A savepoint keeps the session usable for the response if the search fails
+        with db.begin_nested():
+            return find_duplicate_candidates(
+                db,
+                dignitary.first_name,
+                dignitary.last_name,
+                email=dignitary.email,
+                phone=dignitary.phone,
+                exclude_id=dignitary.id,
+                poc_user_id=poc_user_id,
+            )
+    except SQLAlchemyError:
+        logger.exception(f"Error finding duplicates for dignitary {dignitary.id}")
+        return []
+
+
+def possible_duplicates_of(db: Session, dignitary: models.Dignitary) -> List[schemas.DignitaryDuplicateCandidate]:
+    """Candidates among all dignitaries, with contact details; for the admin create responses only."""
+    return describe_duplicate_candidates(db, _search_duplicates_of(db, dignitary))
+
+
+def possible_own_duplicates_of(db: Session, dignitary: models.Dignitary, user_id: int) -> List[schemas.DignitaryOwnDuplicate]:
+    """Candidates among the dignitaries the user is already a point of contact for, by name only."""
+    candidates = _search_duplicates_of(db, dignitary, poc_user_id=user_id)
+    if not candidates:
+        return []
+    names = {
+        row.id: row
+        for row in db.query(
+            models.Dignitary.id,
+            models.Dignitary.first_name,
+            models.Dignitary.last_name,
+        ).filter(models.Dignitary.id.in_([candidate.dignitary_id for candidate in candidates])).all()
+    }
+    return [
+        schemas.DignitaryOwnDuplicate(
+            id=candidate.dignitary_id,
+            first_name=names[candidate.dignitary_id].first_name,
+            last_name=names[candidate.dignitary_id].last_name,
+        )
+        for candidate in candidates
+        if candidate.dignitary_id in names
+    ]
+
+
+class _DuplicateClusters:
+    """Union-find over dignitary ids that remembers the email and phone keys of each cluster."""
+
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+        self.emails: Dict[int, Set[str]] = {}
+        self.phones: Dict[int, Set[str]] = {}
+
+    def add(self, item: int, email_key: Optional[str], phone_key: Optional[str]) -> None:
+        self.parent[item] = item
+        self.emails[item] = {email_key} if email_key else set()
+        self.phones[item] = {phone_key} if phone_key else set()
+
+    def find(self, item: int) -> int:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def conflicts(self, root_a: int, root_b: int) -> bool:
+        """Both clusters have emails (or phones) and none are shared: different people with the same name."""
+        for keys in (self.emails, self.phones):
+            if keys[root_a] and keys[root_b] and not keys[root_a] & keys[root_b]:
+                return True
+        return False
+
+    def union(self, root_a: int, root_b: int) -> None:
+        root, child = min(root_a, root_b), max(root_a, root_b)
+        self.parent[child] = root
+        self.emails[root] |= self.emails.pop(child)
+        self.phones[root] |= self.phones.pop(child)
+
+
+def cluster_duplicates(
+    records: Iterable[Tuple[int, Optional[str], Optional[str], Optional[str]]],
+    threshold: float = NAME_SIMILARITY_THRESHOLD,
+) -> List[List[int]]:
+    """
+    Group (id, name_key, email_key, phone_key) records into duplicate clusters.
+    Records sharing an email or phone key are linked directly. Records sharing a name
+    blocking key are linked when their name similarity reaches the threshold, unless that
+    would join clusters whose emails or phones disagree.
+    Returns clusters of two or more ids, largest first.
+    """
+    clusters = _DuplicateClusters()
+    contact_blocks: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    name_blocks: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+    for dignitary_id, name_key, email_key, phone_key in records:
+        clusters.add(dignitary_id, email_key, phone_key)
+        if email_key:
+            contact_blocks[("email", email_key)].append(dignitary_id)
+        if phone_key:
+            contact_blocks[("phone", phone_key)].append(dignitary_id)
+        blocking_key = name_blocking_key(name_key)
+        if blocking_key:
+            name_blocks[blocking_key].append((dignitary_id, name_key))
+
+    # Exact contact matches first, so the name pass knows each cluster's keys
+    for members in contact_blocks.values():
+        for dignitary_id in members[1:]:
+            root_a, root_b = clusters.find(members[0]), clusters.find(dignitary_id)
+            if root_a != root_b:
+                clusters.union(root_a, root_b)
+
+    trigram_cache: Dict[int, Set[str]] = {}
+    for members in name_blocks.values():
+        if len(members) < 2:
+            continue
+        for i, (id_a, name_a) in enumerate(members):
+            grams_a = trigram_cache.setdefault(id_a, trigrams(name_a))
+            for id_b, name_b in members[i + 1:]:
+                root_a, root_b = clusters.find(id_a), clusters.find(id_b)
+                if root_a == root_b or clusters.conflicts(root_a, root_b):
+                    continue
+                grams_b = trigram_cache.setdefault(id_b, trigrams(name_b))
+                if grams_a and grams_b and len(grams_a & grams_b) / len(grams_a | grams_b) >= threshold:
+                    clusters.union(root_a, root_b)
+
+    grouped: Dict[int, List[int]] = defaultdict(list)
+    for dignitary_id in clusters.parent:
+        grouped[clusters.find(dignitary_id)].append(dignitary_id)
+    result = [sorted(ids) for ids in grouped.values() if len(ids) > 1]
+    result.sort(key=lambda ids: (-len(ids), ids[0]))
+    return result
+
+
+def find_duplicate_clusters(
+    db: Session,
+    threshold: float = NAME_SIMILARITY_THRESHOLD,
+    batch_size: int = 10000,
+) -> List[List[int]]:
+    """Cluster every dignitary in the database, streaming only the match key columns."""
+    query = db.query(
+        models.Dignitary.id,
+        models.Dignitary.name_key,
+        models.Dignitary.email_key,
+        models.Dignitary.phone_key,
+    ).yield_per(batch_size)
+    return cluster_duplicates(
+        ((row.id, row.name_key, row.email_key, row.phone_key) for row in query),
+        threshold=threshold,
+    )
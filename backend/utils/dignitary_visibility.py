@@ -0,0 +1,222 @@
+"""
+Maintenance of the dignitary_visibility table.
+
+SECRETARIAT users can see a dignitary when it had a recent appointment at a
+location they have access to. Instead of joining appointments, locations and
+calendar events on every request, dignitary_visibility keeps one row per
+(dignitary, location) with the latest appointment date there. Rows for the
+affected dignitaries are recomputed inside the same transaction whenever an
+appointment write is flushed, so readers never see a half-applied change.
+
+Concurrent transactions can touch the same dignitary (e.g. two appointments
+created for it at once). On Postgres, each refresh first takes a
+transaction-level advisory lock per dignitary, in id order, so refreshes of a
+dignitary run one after the other and each sees the previous one's commit.
+Rows are upserted and only rows that no longer apply are deleted, so a refresh
+never inserts a row another transaction has just written.
+"""
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Set, Tuple
+import logging
+
+from sqlalchemy import event, inspect, select, delete, insert, func, literal, or_, exists, false, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+import models
+
+logger = logging.getLogger(__name__)
+
+# First key of the two-key advisory locks taken per dignitary, so they cannot collide with other advisory locks
+VISIBILITY_LOCK_CLASS = 7301
+
+# Appointment attributes that decide where and when a dignitary was seen
+APPOINTMENT_VISIBILITY_ATTRIBUTES = (
+    "location_id", "location", "preferred_date", "appointment_date", "calendar_event_id", "calendar_event",
+)
+
+
+def _visibility_rows(dignitary_ids: Optional[Iterable[int]] = None):
+    """SELECT producing dignitary_visibility rows, optionally for some dignitaries only."""
+    last_appointment_date = func.max(
+        func.greatest(
+            models.Appointment.preferred_date,
+            models.Appointment.appointment_date,
+            models.CalendarEvent.start_date,
+        )
+    )
+    query = select(
+        models.AppointmentDignitary.dignitary_id,
+        models.Location.id,
+        models.Location.country_code,
+        last_appointment_date,
+        literal(datetime.utcnow()),
+    ).join(
+        models.Appointment, models.AppointmentDignitary.appointment_id == models.Appointment.id
+    ).join(
+        models.Location, models.Appointment.location_id == models.Location.id
+    ).outerjoin(
+        models.CalendarEvent, models.Appointment.calendar_event_id == models.CalendarEvent.id
+    ).group_by(
+        models.AppointmentDignitary.dignitary_id,
+        models.Location.id,
+        models.Location.country_code,
+    )
+    if dignitary_ids is not None:
+        query = query.where(models.AppointmentDignitary.dignitary_id.in_(dignitary_ids))
+    return query
+
+
+def _insert_visibility_rows(connection, dignitary_ids: Optional[Iterable[int]] = None) -> None:
+    connection.execute(
+        insert(models.DignitaryVisibility).from_select(
+            ["dignitary_id", "location_id", "country_code", "last_appointment_date", "updated_at"],
+            _visibility_rows(dignitary_ids),
+        )
+    )
+
+
+def _upsert_visibility_rows(connection, dignitary_ids: List[int]) -> None:
+    # Rows in key order, so concurrent upserts lock them in the same order
+    rows = _visibility_rows(dignitary_ids).order_by(
+        models.AppointmentDignitary.dignitary_id, models.Location.id
+    )
+    statement = postgresql.insert(models.DignitaryVisibility).from_select(
+        ["dignitary_id", "location_id", "country_code", "last_appointment_date", "updated_at"], rows
+    )
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=["dignitary_id", "location_id"],
+        set_={
+            "country_code": statement.excluded.country_code,
+            "last_appointment_date": statement.excluded.last_appointment_date,
+            "updated_at": statement.excluded.updated_at,
+        },
+    ))
+
+
+def _delete_stale_visibility_rows(connection, dignitary_ids: List[int]) -> None:
+    """Delete the rows of the given dignitaries that no appointment supports any more."""
+    visibility = models.DignitaryVisibility
+    connection.execute(
+        delete(visibility).where(
+            visibility.dignitary_id.in_(dignitary_ids),
+            ~exists().where(
+                models.AppointmentDignitary.dignitary_id == visibility.dignitary_id,
+                models.AppointmentDignitary.appointment_id == models.Appointment.id,
+                models.Appointment.location_id == visibility.location_id,
+            ),
+        )
+    )
+
+
+def refresh_dignitary_visibility(connection, dignitary_ids: Iterable[int]) -> None:
+    """Recompute the visibility rows of the given dignitaries."""
+    dignitary_ids = sorted(set(dignitary_id for dignitary_id in dignitary_ids if dignitary_id is not None))
+    if not dignitary_ids:
+        return
+
+    if connection.dialect.name != "postgresql":
+        connection.execute(
+            delete(models.DignitaryVisibility).where(models.DignitaryVisibility.dignitary_id.in_(dignitary_ids))
+        )
+        _insert_visibility_rows(connection, dignitary_ids)
+        return
+
+    # Held until the transaction ends; sorted ids keep concurrent refreshes from deadlocking
+    for dignitary_id in dignitary_ids:
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_class, :dignitary_id)"),
+            {"lock_class": VISIBILITY_LOCK_CLASS, "dignitary_id": dignitary_id},
+        )
+    _upsert_visibility_rows(connection, dignitary_ids)
+    _delete_stale_visibility_rows(connection, dignitary_ids)
+    logger.debug(f"Refreshed dignitary visibility for {len(dignitary_ids)} dignitaries")
+
+
+def rebuild_dignitary_visibility(db: Session) -> None:
+    """Rebuild the whole table, e.g. after bulk data fixes that bypass the ORM. The caller commits."""
+    connection = db.connection()
+    connection.execute(delete(models.DignitaryVisibility))
+    _insert_visibility_rows(connection)
+    logger.info("Rebuilt dignitary visibility")
+
+
+def visible_dignitary_filter(
+    user_access: List[models.UserAccess],
+    since: date,
+):
+    """
+    Filter on Dignitary that is true when the dignitary had an appointment on or after `since`
+    at a location covered by the access records (location-level or country-level).
+    """
+    location_ids = [access.location_id for access in user_access if access.location_id is not None]
+    country_codes = [access.country_code for access in user_access if access.location_id is None]
+    if not location_ids and not country_codes:
+        return false()
+
+    scope_filters = []
+    if location_ids:
+        scope_filters.append(models.DignitaryVisibility.location_id.in_(location_ids))
+    if country_codes:
+        scope_filters.append(models.DignitaryVisibility.country_code.in_(country_codes))
+
+    return exists().where(
+        models.DignitaryVisibility.dignitary_id == models.Dignitary.id,
+        models.DignitaryVisibility.last_appointment_date >= since,
+        or_(*scope_filters),
+    )
+
+
+def _has_changes(instance, attributes: Tuple[str, ...]) -> bool:
+    state = inspect(instance)
+    return any(
+        name in state.attrs.keys() and state.attrs[name].history.has_changes()
+        for name in attributes
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_on_flush(session, flush_context):
+    """Recompute visibility for dignitaries whose appointments changed in this flush."""
+    dignitary_ids: Set[int] = set()
+    appointment_ids: Set[int] = set()
+    calendar_event_ids: Set[int] = set()
+    location_ids: Set[int] = set()
+
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(instance, models.AppointmentDignitary):
+            # Check-in updates don't affect visibility
+            if instance in session.new or instance in session.deleted \
+                    or _has_changes(instance, ("dignitary_id", "appointment_id", "appointment")):
+                dignitary_ids.add(instance.dignitary_id)
+                # A row moved to another dignitary changes the old one too
+                dignitary_ids.update(inspect(instance).attrs.dignitary_id.history.deleted or [])
+        elif instance in session.new or instance in session.deleted:
+            # New parents have no dignitaries yet; deleted ones cascade to their appointment dignitaries
+            continue
+        elif isinstance(instance, models.Appointment):
+            if _has_changes(instance, APPOINTMENT_VISIBILITY_ATTRIBUTES):
+                appointment_ids.add(instance.id)
+        elif isinstance(instance, models.CalendarEvent):
+            if _has_changes(instance, ("start_date",)):
+                calendar_event_ids.add(instance.id)
+        elif isinstance(instance, models.Location):
+            if _has_changes(instance, ("country_code",)):
+                location_ids.add(instance.id)
+
+    if appointment_ids or calendar_event_ids or location_ids:
+        dignitary_ids.update(session.connection().execute(
+            select(models.AppointmentDignitary.dignitary_id).join(
+                models.Appointment, models.AppointmentDignitary.appointment_id == models.Appointment.id
+            ).where(
+                or_(
+                    models.Appointment.id.in_(appointment_ids),
+                    models.Appointment.calendar_event_id.in_(calendar_event_ids),
+                    models.Appointment.location_id.in_(location_ids),
+                )
+            )
+        ).scalars().all())
+
+    dignitary_ids.discard(None)
+    if dignitary_ids:
+        refresh_dignitary_visibility(session.connection(), dignitary_ids)
@@ -1,12 +1,12 @@
 from typing import List, Dict, Any, Optional, Union, Callable, Type, TypeVar
 from models.enums import PersonRelationshipType
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To, Content, Bcc
 from datetime import datetime
 import os
 import json
 import asyncio
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape, meta
+from markupsafe import escape
+import tempfile
 from sqlalchemy.orm import Session
 from models.user import User, UserRole
 from models.appointment import Appointment, AppointmentStatus, AppointmentSubStatus
@@ -17,14 +17,14 @@ from enum import Enum, auto
 import logging
 from contextlib import contextmanager
 from pathlib import Path
-import threading
-import queue
-import time
-import atexit
 import re
 from dataclasses import dataclass, field
 from typing import Callable
 from sqlalchemy import or_, func
+from pydantic import BaseModel
+from utils.jobs import job_task, enqueue
+from utils.loader_options import eager_load
+from utils.notification_digest import uses_digest, record_digest_entry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -36,6 +36,10 @@ FROM_EMAIL = os.getenv('FROM_EMAIL', 'noreply@meetgurudev.aolf.app')
 ENABLE_EMAIL = str_to_bool(os.getenv('ENABLE_EMAIL'))
 EMAIL_TEMPLATES_DIR = os.getenv('EMAIL_TEMPLATES_DIR', os.path.join(os.path.dirname(__file__), '../email_templates'))
 APP_BASE_URL = os.getenv('APP_BASE_URL', 'https://meetgurudev.aolf.app')
+# Compiled templates are cached here so new processes skip parsing and compiling them
+EMAIL_TEMPLATE_CACHE_DIR = os.getenv('EMAIL_TEMPLATE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'aolf_gsec_email_templates'))
+# Check template files for changes on every render (development only)
+EMAIL_TEMPLATES_AUTO_RELOAD = str_to_bool(os.getenv('EMAIL_TEMPLATES_AUTO_RELOAD', 'false'))
 
 # Contact notification configuration
 ENABLE_CONTACT_NOTIFICATIONS = str_to_bool(os.getenv('ENABLE_CONTACT_NOTIFICATIONS', 'true'))
@@ -55,9 +59,21 @@ Path(EMAIL_TEMPLATES_DIR).mkdir(parents=True, exist_ok=True)
 
 # Initialize Jinja2 environment
 try:
+    bytecode_cache = None
+    try:
+        Path(EMAIL_TEMPLATE_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(EMAIL_TEMPLATE_CACHE_DIR)
+    except OSError as e:
+        logger.warning(f"Email template bytecode cache disabled, {EMAIL_TEMPLATE_CACHE_DIR} is not writable: {str(e)}")
+
     template_env = Environment(
         loader=FileSystemLoader(EMAIL_TEMPLATES_DIR),
-        autoescape=select_autoescape(['html', 'xml'])
+        autoescape=select_autoescape(['html', 'xml']),
+        # The appointment update templates collect ids with {% do %}
+        extensions=['jinja2.ext.do'],
+        bytecode_cache=bytecode_cache,
+        auto_reload=EMAIL_TEMPLATES_AUTO_RELOAD,
+        cache_size=-1  # Never evict compiled templates
     )
     # Add custom filters to Jinja2 environment
     template_env.filters['format_honorific_title'] = HonorificTitle.format_honorific_title
@@ -69,21 +85,14 @@ except Exception as e:
     logger.error(f"Failed to initialize Jinja2 environment: {str(e)}")
     template_env = None
 
-# Email queue for async processing
-email_queue = queue.Queue()
-# Generic DB task queue for async processing
-db_task_queue = queue.Queue()
-email_worker_running = False
-db_worker_running = False
-email_worker_thread = None
-db_worker_thread = None
+class SendEmailPayload(BaseModel):
+    to_email: str
+    subject: str
+    content: str
+    bcc_emails: Optional[List[str]] = None
 
-@dataclass
-class DBTask:
-    """Generic database task for async processing."""
-    task_type: str
-    parameters: dict
-    created_at: float = field(default_factory=time.time)
+class AppointmentJobPayload(BaseModel):
+    appointment_id: int
 
 class EmailTemplate(str, Enum):
     """Enum for available email templates."""
@@ -101,6 +110,7 @@ class EmailTemplate(str, Enum):
     PROFILE_COMPLETION_EXISTING_USER = "profile_completion_existing_user.html"
     PROFILE_COMPLETION_NEW_USER = "profile_completion_new_user.html"
     GENERIC_NOTIFICATION = "generic_notification.html"
+    NOTIFICATION_DIGEST = "notification_digest.html"
 
     def __str__(self):
         return self.value
@@ -238,6 +248,120 @@ def render_template(template_name: str, **context) -> str:
         logger.error(f"Error rendering template {template_name}: {str(e)}")
         return fallback_render_template(template_name, **context)
 
+def precompile_email_templates() -> int:
+    """Load and compile every email template so the first emails don't pay for it. Returns the template count."""
+    if not template_env:
+        return 0
+
+    count = 0
+    for template_name in template_env.list_templates(filter_func=lambda name: name.endswith('.html')):
+        try:
+            template_env.get_template(template_name)
+            count += 1
+        except Exception as e:
+            logger.error(f"Error compiling email template {template_name}: {str(e)}")
+    logger.info(f"Precompiled {count} email templates")
+    return count
+
+# Context keys that differ between the recipients of one notification
+RECIPIENT_CONTEXT_KEYS = frozenset({'user_name', 'user_email', 'user_role', 'is_consolidated_email', 'contact_names'})
+# Rendered in place of user_name, then replaced with each recipient's escaped name
+RECIPIENT_NAME_PLACEHOLDER = "\x00recipient_name\x00"
+
+# Template name -> whether its output depends on the recipient only through {{ user_name }}
+_recipient_independent_templates: Dict[str, bool] = {}
+# Templates whose placeholder substitution has been checked against a full render
+_verified_templates: set = set()
+
+def _template_variables(template_name: str, seen: Optional[set] = None) -> set:
+    """Variables used by a template and the templates it extends, includes or imports."""
+    seen = seen if seen is not None else set()
+    if template_name in seen:
+        return set()
+    seen.add(template_name)
+
+    source = template_env.loader.get_source(template_env, template_name)[0]
+    ast = template_env.parse(source)
+    variables = set(meta.find_undeclared_variables(ast))
+    for referenced in meta.find_referenced_templates(ast):
+        if referenced:
+            variables |= _template_variables(referenced, seen)
+    return variables
+
+def _is_recipient_independent(template_name: str) -> bool:
+    if template_name not in _recipient_independent_templates:
+        try:
+            used = _template_variables(template_name) & RECIPIENT_CONTEXT_KEYS
+            _recipient_independent_templates[template_name] = used <= {'user_name'}
+        except Exception as e:
+            logger.warning(f"Could not inspect email template {template_name}, rendering it per recipient: {str(e)}")
+            _recipient_independent_templates[template_name] = False
+    return _recipient_independent_templates[template_name]
+
+class NotificationRenderCache:
+    """State shared by the emails of one notification.
+
+    Recipients of the same template and shared context (appointment, recipient type,
+    requester, changes) get the same email apart from their name. The body is rendered
+    once with a placeholder name and the escaped name of each recipient is substituted
+    in. The first substitution of each template in the process is checked against a
+    full render, and templates whose output uses recipient fields any other way are
+    rendered per recipient. The secretariat BCC list is also looked up once.
+    """
+
+    def __init__(self):
+        self._bodies: Dict[tuple, tuple] = {}
+        self._secretariat_bcc_users: Optional[List[User]] = None
+
+    @staticmethod
+    def _shared_key(template_name: str, context: Dict[str, Any]) -> tuple:
+        items = []
+        for key in sorted(context):
+            if key in RECIPIENT_CONTEXT_KEYS:
+                continue
+            value = context[key]
+            try:
+                hash(value)
+                items.append((key, value))
+            except TypeError:
+                # Dicts and lists (the appointment, change sets) are shared by identity
+                items.append((key, id(value)))
+        return (template_name, tuple(items))
+
+    def render(self, template_name: str, context: Dict[str, Any]) -> str:
+        user_name = context.get('user_name')
+        if not template_env or not user_name or not _is_recipient_independent(template_name):
+            return render_template(template_name, **context)
+
+        key = self._shared_key(template_name, context)
+        if key not in self._bodies:
+            body = render_template(template_name, **{**context, 'user_name': RECIPIENT_NAME_PLACEHOLDER})
+            # Keep the context alive so the ids in the key stay unique
+            self._bodies[key] = (body, context)
+        body = self._bodies[key][0]
+
+        content = body.replace(RECIPIENT_NAME_PLACEHOLDER, str(escape(user_name)))
+        if template_name not in _verified_templates:
+            full = render_template(template_name, **context)
+            if full != content:
+                logger.warning(f"Email template {template_name} uses the recipient name in a way that can't be shared, rendering it per recipient")
+                _recipient_independent_templates[template_name] = False
+                return full
+            _verified_templates.add(template_name)
+        return content
+
+    def secretariat_bcc_users(self, db: Session) -> List[User]:
+        """Secretariat and admin users who are BCC'd on all emails."""
+        if self._secretariat_bcc_users is None:
+            self._secretariat_bcc_users = db.query(User).filter(
+                or_(
+                    User.role == UserRole.SECRETARIAT,
+                    User.role == UserRole.ADMIN
+                ),
+                User.email_notification_preferences['bcc_on_all_emails'].as_boolean() == True
+            ).all()
+        return self._secretariat_bcc_users
+
 def fallback_render_template(template_name: str, **context) -> str:
     """Fallback template rendering when Jinja2 is not available or fails."""
     logger.warning(f"Using fallback template rendering for {template_name}")
@@ -277,144 +401,17 @@ def fallback_render_template(template_name: str, **context) -> str:
         <p>Best regards,<br>Office of Gurudev Sri Sri Ravi Shankar, USA</p>
     """
 
-def start_email_worker():
-    """Start the background email worker thread if not already running."""
-    global email_worker_running, email_worker_thread
-    
-    if email_worker_running:
-        return
-    
-    email_worker_running = True
-    email_worker_thread = threading.Thread(target=email_worker, daemon=True)
-    email_worker_thread.start()
-    logger.info("Email worker thread started")
-
-def start_db_worker():
-    """Start the background DB worker thread if not already running."""
-    global db_worker_running, db_worker_thread
-    
-    if db_worker_running:
-        return
-    
-    db_worker_running = True
-    db_worker_thread = threading.Thread(target=db_worker, daemon=True)
-    db_worker_thread.start()
-    logger.info("DB worker thread started")
-
-def stop_email_worker():
-    """Stop the background email worker thread."""
-    global email_worker_running
-    email_worker_running = False
-    logger.info("Email worker thread stop requested")
-
-def stop_db_worker():
-    """Stop the background DB worker thread."""
-    global db_worker_running
-    db_worker_running = False
-    logger.info("DB worker thread stop requested")
-
-def email_worker():
-    """Background worker that processes the email queue."""
-    global email_worker_running
-    
-    logger.info("Email worker started")
-    while email_worker_running:
-        try:
-            # Try to get an email from the queue with a timeout
-            try:
-                email_data = email_queue.get(timeout=1.0)
-            except queue.Empty:
-                continue
-            
-            # Process the email
-            try:
-                to_email = email_data.get('to_email')
-                subject = email_data.get('subject')
-                content = email_data.get('content')
-                bcc_emails = email_data.get('bcc_emails')
-                
-                if all([to_email, subject, content]):
-                    _send_email_sync(to_email, subject, content, bcc_emails)
-                else:
-                    logger.error(f"Invalid email data: {email_data}")
-            except Exception as e:
-                logger.error(f"Error processing email: {str(e)}")
-            
-            # Mark task as done
-            email_queue.task_done()
-            
-        except Exception as e:
-            logger.error(f"Error in email worker: {str(e)}")
-            time.sleep(1)  # Prevent CPU spinning on repeated errors
-    
-    logger.info("Email worker stopped")
+@job_task("contact_profile_check", payload=AppointmentJobPayload)
+def contact_profile_check_task(db: Session, payload: AppointmentJobPayload) -> None:
+    """Send profile completion emails to the contacts of a new appointment."""
+    appointment = db.query(Appointment).options(
+        *eager_load(Appointment.appointment_contacts, Appointment.requester, Appointment.location)
+    ).filter(Appointment.id == payload.appointment_id).first()
 
-def db_worker():
-    """Background worker that processes the generic DB task queue."""
-    global db_worker_running
-    
-    logger.info("DB worker started")
-    while db_worker_running:
-        try:
-            # Try to get a DB task from the queue with a timeout
-            try:
-                db_task = db_task_queue.get(timeout=1.0)
-            except queue.Empty:
-                continue
-            
-            # Process the DB task
-            try:
-                if isinstance(db_task, DBTask):
-                    task_age = time.time() - db_task.created_at
-                    logger.info(f"Processing DB task: {db_task.task_type} (age: {task_age:.2f}s)")
-                    _process_db_task(db_task)
-                else:
-                    logger.error(f"Invalid DB task type: {type(db_task)}")
-            except Exception as e:
-                logger.error(f"Error processing DB task: {str(e)}", exc_info=True)
-            
-            # Mark task as done
-            db_task_queue.task_done()
-            
-        except Exception as e:
-            logger.error(f"Error in DB worker: {str(e)}", exc_info=True)
-            time.sleep(1)  # Prevent CPU spinning on repeated errors
-    
-    logger.info("DB worker stopped")
-
-def _process_db_task(task: DBTask) -> None:
-    """Process a specific DB task based on its type."""
-    from database import get_db
-    
-    with get_db() as db:
-        if task.task_type == "contact_profile_check":
-            appointment_id = task.parameters.get('appointment_id')
-            if appointment_id:
-                # Get appointment with relationships loaded
-                from models.appointment import Appointment
-                from sqlalchemy.orm import joinedload
-                
-                appointment = db.query(Appointment).options(
-                    joinedload(Appointment.appointment_contacts),
-                    joinedload(Appointment.requester),
-                    joinedload(Appointment.location)
-                ).filter(Appointment.id == appointment_id).first()
-                
-                if appointment:
-                    _check_and_notify_contact_profiles_sync(db, appointment)
-                else:
-                    logger.error(f"Appointment {appointment_id} not found for profile checking")
-            else:
-                logger.error("Missing appointment_id parameter for contact_profile_check task")
-        
-        # Add more task types here in the future:
-        # elif task.task_type == "bulk_data_cleanup":
-        #     _process_bulk_data_cleanup(db, task.parameters)
-        # elif task.task_type == "generate_report":
-        #     _process_report_generation(db, task.parameters)
-        
-        else:
-            logger.error(f"Unknown DB task type: {task.task_type}")
+    if appointment:
+        _check_and_notify_contact_profiles_sync(db, appointment)
+    else:
+        logger.error(f"Appointment {payload.appointment_id} not found for profile checking")
 
 def _send_email_sync(to_email: str, subject: str, content: str, bcc_emails: List[str] = None):
     """Internal synchronous function to send an email using SendGrid."""
@@ -428,6 +425,10 @@ def _send_email_sync(to_email: str, subject: str, content: str, bcc_emails: List
     else:
         logger.info("SENDGRID_API_KEY is set. Email will be sent.")
 
+    # The SendGrid SDK is imported when the first email is sent
+    from sendgrid import SendGridAPIClient
+    from sendgrid.helpers.mail import Mail, Bcc
+
     # Create the message
     message = Mail(
         from_email=FROM_EMAIL,
@@ -459,15 +460,20 @@ def _send_email_sync(to_email: str, subject: str, content: str, bcc_emails: List
                 logger.error(f"SendGrid Error Body: {e.body}")
         if hasattr(e, 'headers') and e.headers:
             logger.error(f"SendGrid Error Headers: {e.headers}")
+        # Let the job runner retry the send
+        raise
+
+@job_task("send_email", payload=SendEmailPayload, queue="email")
+def send_email_task(db: Session, payload: SendEmailPayload) -> None:
+    _send_email_sync(payload.to_email, payload.subject, payload.content, payload.bcc_emails)
 
 def send_email(to_email: str, subject: str, content: str, bcc_emails: List[str] = None):
     """Queue an email to be sent asynchronously."""
-    # Ensure the email worker is running
-    if not email_worker_running:
-        start_email_worker()
-    
-    # Add the email to the queue
-    email_queue.put({
+    if not all([to_email, subject, content]):
+        logger.error(f"Invalid email data: to={to_email}, subject={subject}")
+        return
+
+    enqueue("send_email", {
         'to_email': to_email,
         'subject': subject,
         'content': content,
@@ -480,10 +486,14 @@ def send_email_from_template(
     template_name: str, 
     subject: str, 
     context: Dict[str, Any],
-    bcc_emails: List[str] = None
+    bcc_emails: List[str] = None,
+    render_cache: Optional[NotificationRenderCache] = None
 ):
     """Send an email using a template."""
-    content = render_template(template_name, **context)
+    if render_cache is not None:
+        content = render_cache.render(template_name, context)
+    else:
+        content = render_template(template_name, **context)
     send_email(to_email, subject, content, bcc_emails)
 
 def send_notification_email(
@@ -492,6 +502,7 @@ def send_notification_email(
     recipient: User,
     subject: Optional[str] = None,
     context: Dict[str, Any] = None,
+    render_cache: Optional[NotificationRenderCache] = None,
     **kwargs
 ):
     """Universal function to send a notification email based on trigger type.
@@ -502,6 +513,7 @@ def send_notification_email(
         recipient: User to send the notification to
         subject: Optional custom subject (overrides the template)
         context: Optional context dict for email rendering
+        render_cache: Optional cache shared by the recipients of one notification
         **kwargs: Additional parameters to format the subject template
     """
     if context is None:
@@ -522,12 +534,13 @@ def send_notification_email(
     # Get the appropriate template based on user role
     template_name = config.get_template_for_role(recipient.role)
     
-    # Add recipient info to context
-    context.update({
+    # Add recipient info to a copy of the context, which may be shared with other recipients
+    context = {
+        **context,
         'user_name': recipient.first_name,
         'user_email': recipient.email,
         'user_role': recipient.role.value
-    })
+    }
     
     # Set default recipient_type if not provided
     if 'recipient_type' not in context:
@@ -542,6 +555,13 @@ def send_notification_email(
             format_kwargs.setdefault('appointment_id', context['appointment']['id'])
         subject = config.format_subject(**format_kwargs)
     
+    # Appointment notifications for users in digest mode wait for their next digest
+    appointment = context.get('appointment')
+    is_appointment_notification = isinstance(appointment, dict) and 'id' in appointment
+    if is_appointment_notification and uses_digest(recipient):
+        record_digest_entry(db, recipient, trigger_type, subject, appointment)
+        return
+    
     # Collect BCC emails
     bcc_emails = []
     
@@ -552,20 +572,26 @@ def send_notification_email(
     # If this is not an email to a secretariat user, find secretariat users to BCC
     if recipient.role != UserRole.SECRETARIAT and recipient.role != UserRole.ADMIN:
         # Find all secretariat users who have opted into BCC for all emails
-        secretariat_bccs = db.query(User).filter(
-            or_(
-                User.role == UserRole.SECRETARIAT,
-                User.role == UserRole.ADMIN
-            ),
-            User.email_notification_preferences['bcc_on_all_emails'].as_boolean() == True
-        ).all()
+        if render_cache is not None:
+            secretariat_bccs = render_cache.secretariat_bcc_users(db)
+        else:
+            secretariat_bccs = db.query(User).filter(
+                or_(
+                    User.role == UserRole.SECRETARIAT,
+                    User.role == UserRole.ADMIN
+                ),
+                User.email_notification_preferences['bcc_on_all_emails'].as_boolean() == True
+            ).all()
         
         for secretariat_user in secretariat_bccs:
             if secretariat_user.email and secretariat_user.email not in bcc_emails and secretariat_user.email != recipient.email:
+                if is_appointment_notification and uses_digest(secretariat_user):
+                    record_digest_entry(db, secretariat_user, trigger_type, subject, appointment, delivered_to=recipient.email)
+                    continue
                 bcc_emails.append(secretariat_user.email)
     
     # Send email using template
-    send_email_from_template(recipient.email, template_name.value, subject, context, bcc_emails)
+    send_email_from_template(recipient.email, template_name.value, subject, context, bcc_emails, render_cache)
     logger.info(f"Notification email ({trigger_type.value}) queued for {recipient.email}")
 
 def get_appointment_contacts_with_emails(db: Session, appointment: Appointment) -> List[UserContact]:
@@ -677,9 +703,15 @@ def notify_appointment_contacts(
     appointment: Appointment, 
     trigger_type: EmailTrigger,
     old_data: Dict[str, Any] = None,
-    new_data: Dict[str, Any] = None
+    new_data: Dict[str, Any] = None,
+    render_cache: Optional[NotificationRenderCache] = None,
+    appointment_data: Optional[Dict[str, Any]] = None
 ):
-    """Send consolidated notifications to appointment contacts for specific trigger types."""
+    """Send consolidated notifications to appointment contacts for specific trigger types.
+
+    Pass the appointment_data and render_cache already built for the other recipients of
+    the notification to reuse them.
+    """
     
     # Check if notifications are enabled for this trigger type
     if not should_notify_contacts_for_trigger(trigger_type):
@@ -693,9 +725,12 @@ def notify_appointment_contacts(
         logger.debug(f"No valid email recipients found for appointment {appointment.id}")
         return
     
+    if render_cache is None:
+        render_cache = NotificationRenderCache()
+
     # Prepare base context
     context = {
-        'appointment': appointment_to_dict(appointment),
+        'appointment': appointment_data if appointment_data is not None else appointment_to_dict(appointment),
         'recipient_type': 'contact',
         'requester_name': f"{appointment.requester.first_name} {appointment.requester.last_name}".strip() if appointment.requester else "Unknown"
     }
@@ -754,6 +789,7 @@ def notify_appointment_contacts(
                 trigger_type=trigger_type,
                 recipient=recipient,
                 context=contact_context,
+                render_cache=render_cache,
                 appointment_id=appointment.id
             )
             
@@ -912,9 +948,11 @@ def get_appointment_changes_summary(old_data: Dict[str, Any], new_data: Dict[str
 def notify_appointment_creation(db: Session, appointment: Appointment):
     """Send notifications when a new appointment is created."""
     
+    # Built once and shared by all recipients
     context = {
         'appointment': appointment_to_dict(appointment)
     }
+    render_cache = NotificationRenderCache()
     
     # Notify the requesting user
     requester = appointment.requester
@@ -924,6 +962,7 @@ def notify_appointment_creation(db: Session, appointment: Appointment):
             trigger_type=EmailTrigger.APPOINTMENT_CREATED,
             recipient=requester,
             context=context,
+            render_cache=render_cache,
             appointment_id=appointment.id
         )
 
@@ -931,7 +970,9 @@ def notify_appointment_creation(db: Session, appointment: Appointment):
     notify_appointment_contacts(
         db=db,
         appointment=appointment,
-        trigger_type=EmailTrigger.APPOINTMENT_CREATED
+        trigger_type=EmailTrigger.APPOINTMENT_CREATED,
+        render_cache=render_cache,
+        appointment_data=context['appointment']
     )
 
     # Notify all SECRETARIAT users who have enabled new appointment notifications
@@ -949,6 +990,7 @@ def notify_appointment_creation(db: Session, appointment: Appointment):
             trigger_type=EmailTrigger.APPOINTMENT_CREATED,
             recipient=user,
             context=context,
+            render_cache=render_cache,
             appointment_id=appointment.id
         )
     
@@ -1087,10 +1129,11 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
     # Notify the requester
     requester = appointment.requester
     
-    # Prepare base context
+    # Prepare base context, built once and shared by all recipients
     context = {
         'appointment': appointment_to_dict(appointment)
     }
+    render_cache = NotificationRenderCache()
     
     if requester:
         if need_more_info:
@@ -1100,6 +1143,7 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
                 trigger_type=EmailTrigger.APPOINTMENT_MORE_INFO_NEEDED,
                 recipient=requester,
                 context=context,
+                render_cache=render_cache,
                 appointment_id=appointment.id
             )
             # Notify contacts for "Need more info" case
@@ -1108,7 +1152,9 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
                 appointment=appointment,
                 trigger_type=EmailTrigger.APPOINTMENT_MORE_INFO_NEEDED,
                 old_data=old_data,
-                new_data=new_data
+                new_data=new_data,
+                render_cache=render_cache,
+                appointment_data=context['appointment']
             )
         elif is_cancelled:
             # Special handling for "Cancelled" case
@@ -1117,6 +1163,7 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
                 trigger_type=EmailTrigger.APPOINTMENT_CANCELLED,
                 recipient=requester,
                 context=context,
+                render_cache=render_cache,
                 appointment_id=appointment.id
             )
             # Notify contacts for "Cancelled" case
@@ -1125,7 +1172,9 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
                 appointment=appointment,
                 trigger_type=EmailTrigger.APPOINTMENT_CANCELLED,
                 old_data=old_data,
-                new_data=new_data
+                new_data=new_data,
+                render_cache=render_cache,
+                appointment_data=context['appointment']
             )
         elif is_rescheduled:
             # Special handling for "Rescheduled" case
@@ -1135,6 +1184,7 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
                 trigger_type=EmailTrigger.APPOINTMENT_RESCHEDULED,
                 recipient=requester,
                 context=context,
+                render_cache=render_cache,
                 appointment_id=appointment.id
             )
             # Notify contacts for "Rescheduled" case
@@ -1143,7 +1193,9 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
                 appointment=appointment,
                 trigger_type=EmailTrigger.APPOINTMENT_RESCHEDULED,
                 old_data=old_data,
-                new_data=new_data
+                new_data=new_data,
+                render_cache=render_cache,
+                appointment_data=context['appointment']
             )
         elif is_confirmed:
             # Special handling for "Confirmed" case
@@ -1152,6 +1204,7 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
                 trigger_type=EmailTrigger.APPOINTMENT_CONFIRMED,
                 recipient=requester,
                 context=context,
+                render_cache=render_cache,
                 appointment_id=appointment.id
             )
             # Notify contacts for "Confirmed" case
@@ -1160,7 +1213,9 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
                 appointment=appointment,
                 trigger_type=EmailTrigger.APPOINTMENT_CONFIRMED,
                 old_data=old_data,
-                new_data=new_data
+                new_data=new_data,
+                render_cache=render_cache,
+                appointment_data=context['appointment']
             )
         elif is_rejected_low_priority:
             # Special handling for "Rejected - Low priority" case
@@ -1169,6 +1224,7 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
                 trigger_type=EmailTrigger.APPOINTMENT_REJECTED_LOW_PRIORITY,
                 recipient=requester,
                 context=context,
+                render_cache=render_cache,
                 appointment_id=appointment.id
             )
             # Notify contacts for "Rejected - Low priority" case
@@ -1177,7 +1233,9 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
                 appointment=appointment,
                 trigger_type=EmailTrigger.APPOINTMENT_REJECTED_LOW_PRIORITY,
                 old_data=old_data,
-                new_data=new_data
+                new_data=new_data,
+                render_cache=render_cache,
+                appointment_data=context['appointment']
             )
         elif is_rejected_met_already:
             # Special handling for "Rejected - Met Gurudev already" case
@@ -1186,6 +1244,7 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
                 trigger_type=EmailTrigger.APPOINTMENT_REJECTED_MET_ALREADY,
                 recipient=requester,
                 context=context,
+                render_cache=render_cache,
                 appointment_id=appointment.id
             )
             # Notify contacts for "Rejected - Met Gurudev already" case
@@ -1194,30 +1253,27 @@ def notify_appointment_update(db: Session, appointment: Appointment, old_data: D
                 appointment=appointment,
                 trigger_type=EmailTrigger.APPOINTMENT_REJECTED_MET_ALREADY,
                 old_data=old_data,
-                new_data=new_data
+                new_data=new_data,
+                render_cache=render_cache,
+                appointment_data=context['appointment']
             )
         else:
             logger.info(f"Skipped sending email for appointment update (ID: {appointment.id})")
 
 def queue_contact_profile_check(appointment_id: int) -> None:
     """Queue a contact profile check task for async processing."""
-    task = DBTask(
-        task_type="contact_profile_check",
-        parameters={'appointment_id': appointment_id}
-    )
-    db_task_queue.put(task)
+    enqueue("contact_profile_check", {'appointment_id': appointment_id})
     logger.info(f"Queued contact profile check for appointment {appointment_id}")
 
 def queue_db_task(task_type: str, parameters: dict) -> None:
-    """Queue a generic DB task for async processing."""
-    task = DBTask(task_type=task_type, parameters=parameters)
-    db_task_queue.put(task)
+    """Queue a registered background job task for async processing."""
+    enqueue(task_type, parameters)
     logger.info(f"Queued DB task: {task_type}")
 
 def _check_and_notify_contact_profiles_sync(db: Session, appointment: Appointment) -> None:
     """Check contact emails for existing users and send profile completion notifications.
     
-    This function runs synchronously in the profile worker thread.
+    This function runs synchronously in the contact_profile_check background job.
     
     Steps:
     1. Gets contact email addresses from the appointment
@@ -1412,14 +1468,6 @@ def send_profile_completion_email(
     except Exception as e:
         logger.error(f"Error sending profile completion email to {email}: {str(e)}", exc_info=True)
 
-# Initialize the workers when module is imported
-start_email_worker()
-start_db_worker()
-
-# Make sure the workers are stopped properly when the application exits
-atexit.register(stop_email_worker)
-atexit.register(stop_db_worker)
-
 def test_sendgrid_connection():
     """Test the SendGrid API connection and permissions.
     
@@ -1432,6 +1480,7 @@ def test_sendgrid_connection():
     """
     if not SENDGRID_API_KEY:
         return False, "SENDGRID_API_KEY not set"
+    from sendgrid import SendGridAPIClient
     
     try:
         # First, try a simple API call to verify the API key is valid
@@ -0,0 +1,507 @@
+"""
+Durable background jobs.
+
+Work that should not run inside a request (emails, calendar sync, appointment
+side effects, ...) is stored as a BackgroundJob row and run by worker threads.
+
+- Tasks are registered with @job_task(name, payload=SomeModel, queue=...). The
+  handler receives a write session and the validated pydantic payload.
+- enqueue() adds a job. Given a session, the job is part of that transaction and
+  is discarded with it on rollback. Jobs enqueued while another job runs join the
+  running job's transaction, so a retried job never leaves duplicates behind.
+- Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+  threads and processes can share the table. They are woken by NOTIFY on Postgres
+  (and by a local event for jobs committed in the same process), with a periodic
+  poll as fallback.
+- Each queue has its own concurrency and rate limit. Failed jobs are retried with
+  exponential backoff; jobs that run out of attempts are kept with status 'dead'
+  for inspection and manual retry (routers/admin/jobs.py).
+- A running job's locked_at is refreshed every JOB_HEARTBEAT_SECONDS. Only jobs
+  whose heartbeat stopped for JOB_LOCK_TIMEOUT (their worker died) are reclaimed,
+  so long jobs are never run twice.
+
+Workers run in a separate process, `python -m worker` (the `worker` entry of the
+Procfile). Setting RUN_JOBS_IN_PROCESS=true runs them in the web app instead,
+e.g. for local development; every gunicorn worker then starts the full set of
+queue threads (one per unit of queue concurrency, plus the listener).
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Type
+import logging
+import os
+import random
+import select
+import socket
+import threading
+import time
+import traceback
+
+from pydantic import BaseModel
+from sqlalchemy import event, or_, and_, text, update
+from sqlalchemy.orm import Session
+
+import models
+from utils.db_pool import BATCH_STATEMENT_TIMEOUT_SECONDS, set_statement_timeout
+from utils.utils import str_to_bool
+
+logger = logging.getLogger(__name__)
+
+RUN_JOBS_IN_PROCESS = str_to_bool(os.getenv('RUN_JOBS_IN_PROCESS', 'false'))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', 15))
+JOB_DEFAULT_MAX_ATTEMPTS = int(os.getenv('JOB_DEFAULT_MAX_ATTEMPTS', 5))
+JOB_RETRY_BASE_SECONDS = float(os.getenv('JOB_RETRY_BASE_SECONDS', 10))
+JOB_RETRY_MAX_SECONDS = float(os.getenv('JOB_RETRY_MAX_SECONDS', 3600))
+JOB_HEARTBEAT_SECONDS = float(os.getenv('JOB_HEARTBEAT_SECONDS', 60))
+# A 'running' job without a heartbeat for this long belongs to a worker that died; kept well above
+# the batch statement timeout so a heartbeat delayed by a slow database never looks like a dead worker
+JOB_LOCK_TIMEOUT = timedelta(seconds=int(os.getenv('JOB_LOCK_TIMEOUT_SECONDS', 2 * BATCH_STATEMENT_TIMEOUT_SECONDS)))
+
+NOTIFY_CHANNEL = "background_jobs"
+_QUEUED_KEY = "background_jobs_queued"
+
+
+@dataclass
+class QueueConfig:
+    """Worker threads per process and the maximum jobs per second (None for no limit)."""
+    concurrency: int = 1
+    rate_per_second: Optional[float] = None
+
+
+QUEUES: Dict[str, QueueConfig] = {
+    # SendGrid accepts far more, but bursts of notification emails should not starve the API
+    'email': QueueConfig(
+        concurrency=int(os.getenv('JOB_EMAIL_CONCURRENCY', 4)),
+        rate_per_second=float(os.getenv('JOB_EMAIL_RATE_PER_SECOND', 10)),
+    ),
+    # Google Calendar enforces per-user quotas; one thread keeps updates of an event ordered
+    'calendar': QueueConfig(
+        concurrency=int(os.getenv('JOB_CALENDAR_CONCURRENCY', 1)),
+        rate_per_second=float(os.getenv('JOB_CALENDAR_RATE_PER_SECOND', 5)),
+    ),
+    'default': QueueConfig(
+        concurrency=int(os.getenv('JOB_DEFAULT_CONCURRENCY', 2)),
+    ),
+}
+
+
+@dataclass
+class JobTask:
+    name: str
+    queue: str
+    handler: Callable[[Session, BaseModel], None]
+    payload_model: Type[BaseModel]
+    max_attempts: int
+
+
+_tasks: Dict[str, JobTask] = {}
+
+
+def job_task(name: str, payload: Type[BaseModel], queue: str = 'default', max_attempts: int = JOB_DEFAULT_MAX_ATTEMPTS):
+    """
+    Register a function as the handler of a job task.
+
+    The handler is called as handler(db, payload) and should leave committing to
+    the runner: the job is marked done in the same transaction as the handler's
+    writes, and everything is rolled back if it raises.
+    """
+    if queue not in QUEUES:
+        raise ValueError(f"Unknown job queue '{queue}'")
+
+    def decorator(func):
+        _tasks[name] = JobTask(name=name, queue=queue, handler=func, payload_model=payload, max_attempts=max_attempts)
+        return func
+    return decorator
+
+
+def get_task(name: str) -> Optional[JobTask]:
+    return _tasks.get(name)
+
+
+# The session of the job running on this thread, if any
+_job_context = threading.local()
+
+
+def build_job(task_name: str, payload: Optional[dict] = None, run_at: Optional[datetime] = None) -> models.BackgroundJob:
+    """Validate a payload against its task and return the (unsaved) job."""
+    task = _tasks.get(task_name)
+    if not task:
+        raise ValueError(f"Unknown job task '{task_name}'")
+
+    data = task.payload_model.model_validate(payload or {}).model_dump(mode='json')
+    return models.BackgroundJob(
+        queue=task.queue,
+        task=task.name,
+        payload=data,
+        status="pending",
+        attempts=0,
+        max_attempts=task.max_attempts,
+        run_at=run_at or datetime.utcnow(),
+    )
+
+
+def add_jobs(db: Session, jobs: List[models.BackgroundJob]) -> None:
+    """Add built jobs to the session's transaction; they are inserted together on the next flush."""
+    db.add_all(jobs)
+    for queue_name in {job.queue for job in jobs}:
+        wake_queue_on_commit(db, queue_name)
+
+
+def enqueue(task_name: str, payload: Optional[dict] = None, db: Optional[Session] = None, run_at: Optional[datetime] = None) -> int:
+    """
+    Queue a job and return its id.
+
+    With a session, the job is added to the caller's transaction and only becomes
+    runnable once the caller commits. Without one, it joins the transaction of the
+    job running on this thread, or is committed right away in its own session.
+    """
+    job = build_job(task_name, payload, run_at)
+
+    db = db or getattr(_job_context, 'db', None)
+    if db is not None:
+        add_jobs(db, [job])
+        db.flush([job])
+        return job.id
+
+    from database import WriteSessionLocal
+
+    own_db = WriteSessionLocal()
+    try:
+        add_jobs(own_db, [job])
+        own_db.flush()
+        job_id = job.id
+        own_db.commit()
+        return job_id
+    finally:
+        own_db.close()
+
+
+def wake_queue_on_commit(db: Session, queue_name: str) -> None:
+    """Wake the workers of a queue, in every process, once the session commits."""
+    db.info.setdefault(_QUEUED_KEY, set()).add(queue_name)
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_queues_before_commit(session):
+    # NOTIFY is transactional: listeners in other processes hear it only if the jobs commit
+    queues = session.info.get(_QUEUED_KEY)
+    if queues and session.get_bind().dialect.name == 'postgresql':
+        for queue_name in sorted(queues):
+            session.execute(text("SELECT pg_notify(:channel, :queue)"), {"channel": NOTIFY_CHANNEL, "queue": queue_name})
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers_after_commit(session):
+    for queue_name in session.info.pop(_QUEUED_KEY, ()):
+        _wake(queue_name)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_queued_on_rollback(session):
+    session.info.pop(_QUEUED_KEY, None)
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: ~base, 2x base, 4x base, ... capped at JOB_RETRY_MAX_SECONDS."""
+    delay = min(JOB_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.75, 1.25)
+
+
+def _claim_job(db: Session, queue_name: str, worker_id: str) -> Optional[int]:
+    """Lock the next runnable job of a queue; SKIP LOCKED lets several workers share the table."""
+    task_names = [task.name for task in _tasks.values() if task.queue == queue_name]
+    if not task_names:
+        return None
+
+    now = datetime.utcnow()
+    job = db.query(models.BackgroundJob).filter(
+        models.BackgroundJob.queue == queue_name,
+        # Only claim tasks this process can run
+        models.BackgroundJob.task.in_(task_names),
+        or_(
+            and_(
+                models.BackgroundJob.status == "pending",
+                models.BackgroundJob.run_at <= now,
+            ),
+            and_(
+                models.BackgroundJob.status == "running",
+                models.BackgroundJob.locked_at < now - JOB_LOCK_TIMEOUT,
+            ),
+        ),
+    ).order_by(models.BackgroundJob.run_at, models.BackgroundJob.id).limit(1).with_for_update(skip_locked=True).first()
+
+    if not job:
+        db.rollback()
+        return None
+
+    job.status = "running"
+    job.locked_at = now
+    job.locked_by = worker_id
+    job.attempts += 1
+    job_id = job.id
+    db.commit()
+    return job_id
+
+
+def _fail_job(db: Session, job: models.BackgroundJob, error: str) -> None:
+    now = datetime.utcnow()
+    job.last_error = error
+    job.locked_at = None
+    job.locked_by = None
+    if job.attempts >= job.max_attempts:
+        job.status = "dead"
+        job.finished_at = now
+        logger.error(f"Job {job.id} ({job.task}) failed permanently after {job.attempts} attempts: {error.splitlines()[0] if error else ''}")
+    else:
+        job.status = "pending"
+        job.run_at = now + timedelta(seconds=retry_delay(job.attempts))
+        logger.warning(f"Job {job.id} ({job.task}) failed on attempt {job.attempts}/{job.max_attempts}, retrying at {job.run_at}: {error.splitlines()[0] if error else ''}")
+    db.commit()
+
+
+class _Heartbeat:
+    """Refreshes a running job's locked_at from its own session until stopped."""
+
+    def __init__(self, job_id: int, worker_id: str):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"job-heartbeat-{job_id}", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self) -> None:
+        from database import WriteSessionLocal
+
+        while not self.stopped.wait(JOB_HEARTBEAT_SECONDS):
+            db = WriteSessionLocal()
+            try:
+                db.execute(
+                    update(models.BackgroundJob)
+                    .where(
+                        models.BackgroundJob.id == self.job_id,
+                        models.BackgroundJob.status == "running",
+                        models.BackgroundJob.locked_by == self.worker_id,
+                    )
+                    .values(locked_at=datetime.utcnow())
+                )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Heartbeat of job {self.job_id} failed: {str(e)}")
+            finally:
+                db.close()
+
+
+def _run_job(db: Session, job_id: int) -> None:
+    job = db.get(models.BackgroundJob, job_id)
+    if not job:
+        return
+
+    task = _tasks.get(job.task)
+    if job.attempts > job.max_attempts:
+        # Reclaimed from a worker that died on its last attempt
+        job.attempts = job.max_attempts
+        _fail_job(db, job, job.last_error or "Worker stopped while running the job")
+        return
+
+    started = time.monotonic()
+    try:
+        payload = task.payload_model.model_validate(job.payload)
+        _job_context.db = db
+        try:
+            with _Heartbeat(job_id, job.locked_by):
+                task.handler(db, payload)
+        finally:
+            _job_context.db = None
+
+        job = db.get(models.BackgroundJob, job_id)
+        job.status = "done"
+        job.finished_at = datetime.utcnow()
+        job.locked_at = None
+        job.locked_by = None
+        job.last_error = None
+        db.commit()
+        logger.info(f"Job {job_id} ({task.name}) done in {time.monotonic() - started:.2f}s")
+    except Exception as e:
+        db.rollback()
+        job = db.get(models.BackgroundJob, job_id)
+        _fail_job(db, job, f"{str(e)}\n{traceback.format_exc()}")
+
+
+def run_next_job(queue_name: str, worker_id: Optional[str] = None) -> Optional[int]:
+    """Claim and run one job of a queue. Returns the job id, or None if nothing was runnable."""
+    from database import WriteSessionLocal
+
+    db = WriteSessionLocal()
+    set_statement_timeout(db, BATCH_STATEMENT_TIMEOUT_SECONDS)
+    try:
+        job_id = _claim_job(db, queue_name, worker_id or _worker_prefix())
+        if job_id is not None:
+            _run_job(db, job_id)
+        return job_id
+    finally:
+        db.close()
+
+
+def run_pending_jobs(queues: Optional[Iterable[str]] = None, limit: int = 100) -> int:
+    """Run runnable jobs synchronously until the queues are empty or limit is reached (scripts, tests)."""
+    count = 0
+    for queue_name in queues or QUEUES:
+        while count < limit and run_next_job(queue_name) is not None:
+            count += 1
+    return count
+
+
+class _RateLimiter:
+    """Token bucket shared by the worker threads of one queue."""
+
+    def __init__(self, rate_per_second: float):
+        self.rate = rate_per_second
+        self.capacity = max(1.0, rate_per_second)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, stop: threading.Event) -> bool:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if stop.wait(wait):
+                return False
+
+    def refund(self) -> None:
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+
+_limiters: Dict[str, _RateLimiter] = {
+    name: _RateLimiter(config.rate_per_second) for name, config in QUEUES.items() if config.rate_per_second
+}
+
+
+_stop = threading.Event()
+_wakeups: Dict[str, threading.Event] = {name: threading.Event() for name in QUEUES}
+_start_lock = threading.Lock()
+job_worker_running = False
+job_worker_threads: List[threading.Thread] = []
+
+
+def _wake(queue_name: str) -> None:
+    wakeup = _wakeups.get(queue_name)
+    if wakeup:
+        wakeup.set()
+
+
+def _worker_prefix() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def queue_worker(queue_name: str, worker_id: str):
+    """Worker thread: run jobs of one queue, sleeping until notified when it is empty."""
+    limiter = _limiters.get(queue_name)
+    wakeup = _wakeups[queue_name]
+
+    logger.info(f"Job worker {worker_id} started")
+    while not _stop.is_set():
+        try:
+            if limiter and not limiter.acquire(_stop):
+                break
+            if run_next_job(queue_name, worker_id) is None:
+                if limiter:
+                    limiter.refund()
+                wakeup.wait(timeout=JOB_POLL_SECONDS)
+                wakeup.clear()
+        except Exception as e:
+            logger.error(f"Error in job worker {worker_id}: {str(e)}", exc_info=True)
+            _stop.wait(1)  # Prevent CPU spinning on repeated errors
+
+    logger.info(f"Job worker {worker_id} stopped")
+
+
+def notification_listener():
+    """LISTEN for jobs committed by other processes and wake the matching queue's workers."""
+    from database import write_engine
+
+    while not _stop.is_set():
+        connection = None
+        try:
+            connection = write_engine.raw_connection()
+            dbapi_connection = connection.dbapi_connection
+            dbapi_connection.autocommit = True
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            cursor.close()
+            logger.info(f"Listening for job notifications on '{NOTIFY_CHANNEL}'")
+
+            while not _stop.is_set():
+                if select.select([dbapi_connection], [], [], JOB_POLL_SECONDS) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    _wake(dbapi_connection.notifies.pop(0).payload)
+        except Exception as e:
+            logger.warning(f"Job notification listener error, falling back to polling: {str(e)}")
+            _stop.wait(5)
+        finally:
+            if connection is not None:
+                # Don't hand a LISTENing autocommit connection back to the pool
+                connection.invalidate()
+
+
+def start_job_worker(queues: Optional[Iterable[str]] = None):
+    """Start the worker threads for the given queues (all by default) if not already running."""
+    global job_worker_running
+
+    with _start_lock:
+        if job_worker_running:
+            return
+        job_worker_running = True
+        _stop.clear()
+
+        from database import write_engine
+
+        prefix = _worker_prefix()
+        for queue_name in queues or QUEUES:
+            for index in range(QUEUES[queue_name].concurrency):
+                worker_id = f"{prefix}:{queue_name}-{index}"
+                thread = threading.Thread(target=queue_worker, args=(queue_name, worker_id), name=f"job-{queue_name}-{index}", daemon=True)
+                thread.start()
+                job_worker_threads.append(thread)
+
+        if write_engine.dialect.name == 'postgresql':
+            thread = threading.Thread(target=notification_listener, name="job-listener", daemon=True)
+            thread.start()
+            job_worker_threads.append(thread)
+
+        logger.info(f"Job worker threads started: {', '.join(thread.name for thread in job_worker_threads)}")
+
+
+def stop_job_worker(timeout: float = 0):
+    """Stop the worker threads, waiting up to timeout seconds for running jobs to finish."""
+    global job_worker_running
+
+    _stop.set()
+    for wakeup in _wakeups.values():
+        wakeup.set()
+    deadline = time.monotonic() + timeout
+    for thread in job_worker_threads:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        thread.join(remaining)
+    job_worker_threads.clear()
+    job_worker_running = False
+    logger.info("Job worker threads stop requested")
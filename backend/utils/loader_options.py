@@ -0,0 +1,58 @@
+"""
+Eager-loading options that do not multiply rows.
+
+joinedload of a one-to-many collection repeats the parent row once per child,
+and two collections joined on the same query multiply: an appointment with 3
+dignitaries and 20 contacts comes back as 60 rows that SQLAlchemy then
+de-duplicates in Python. eager_load() picks the loader per relationship
+instead: selectinload for collections (one extra "WHERE id IN (...)" query per
+collection, one row per child) and joinedload for many-to-one (still one row
+per parent).
+
+    query.options(*eager_load(
+        (models.Appointment.appointment_dignitaries, models.AppointmentDignitary.dignitary),
+        models.Appointment.requester,
+    ))
+"""
+from typing import List, Sequence, Union
+
+from sqlalchemy.orm import Load, joinedload, selectinload
+from sqlalchemy.orm.attributes import QueryableAttribute
+
+import models
+
+RelationshipPath = Union[QueryableAttribute, Sequence[QueryableAttribute]]
+
+
+def eager_load(*paths: RelationshipPath) -> List[Load]:
+    """
+    Loader options for relationship paths (an attribute, or a tuple of attributes
+    from the parent down), choosing selectinload or joinedload for each step.
+    """
+    options = []
+    for path in paths:
+        if isinstance(path, QueryableAttribute):
+            path = (path,)
+        loader = None
+        for attribute in path:
+            strategy = "selectinload" if attribute.property.uselist else "joinedload"
+            if loader is None:
+                loader = selectinload(attribute) if strategy == "selectinload" else joinedload(attribute)
+            else:
+                loader = getattr(loader, strategy)(attribute)
+        options.append(loader)
+    return options
+
+
+# What appointment list views show: attendees, requester and the calendar slot
+APPOINTMENT_LIST_RELATIONS = (
+    (models.Appointment.appointment_dignitaries, models.AppointmentDignitary.dignitary),
+    (models.Appointment.appointment_contacts, models.AppointmentContact.contact),
+    models.Appointment.requester,
+    models.Appointment.calendar_event,
+)
+
+
+def appointment_list_options(*extra: RelationshipPath) -> List[Load]:
+    """Loader options for appointment lists, plus any extra relationships the view needs."""
+    return eager_load(*APPOINTMENT_LIST_RELATIONS, *extra)
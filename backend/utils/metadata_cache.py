@@ -0,0 +1,240 @@
+"""
+Cached responses of the enum and metadata endpoints.
+
+Every client fetches dozens of these on each app start, and their data rarely
+changes:
+
+- Enum options and request/event type configurations only change with a
+  deploy. Endpoints decorated with @precomputed are serialized once, at startup
+  (precompute_static_responses), and served as ready-made bytes.
+- The geo tables are loaded by scripts outside the app. Their serialized lists
+  are cached per process under a version stamp (row counts and last update),
+  which is checked against the database at most every
+  METADATA_VERSION_CHECK_SECONDS. The lists are also rebuilt every
+  METADATA_MAX_AGE_SECONDS, to pick up edits the stamp cannot see.
+
+Cached responses carry a strong ETag (a hash of the body) and
+Cache-Control: no-cache, so clients revalidate with If-None-Match and get a 304
+when nothing changed. Bodies over GZIP_MIN_SIZE are compressed once and served
+gzipped to clients that accept it.
+
+/metadata/bootstrap bundles all of them, keyed by path, into one payload whose
+version is its content hash. /metadata/bootstrap/{version} serves the same
+bytes with Cache-Control: immutable, since what that URL returns never changes.
+"""
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import gzip
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+from utils.utils import etag_matches
+
+logger = logging.getLogger(__name__)
+
+METADATA_VERSION_CHECK_SECONDS = float(os.getenv("METADATA_VERSION_CHECK_SECONDS", 60))
+METADATA_MAX_AGE_SECONDS = float(os.getenv("METADATA_MAX_AGE_SECONDS", 3600))
+GZIP_MIN_SIZE = 1000
+
+REVALIDATE = "private, no-cache"
+IMMUTABLE = "private, max-age=31536000, immutable"
+
+
+class CachedPayload:
+    """A serialized response, its strong ETag and, for larger bodies, its gzipped form."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.version = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{self.version}"'
+        self.gzipped = gzip.compress(body, mtime=0) if len(body) >= GZIP_MIN_SIZE else None
+
+    @classmethod
+    def from_content(cls, content: Any) -> "CachedPayload":
+        # Encoded like FastAPI's JSONResponse
+        return cls(json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8"))
+
+
+def cached_response(request: Request, payload: CachedPayload, cache_control: str = REVALIDATE) -> Response:
+    """Serve a cached payload: 304 if the client has it, gzipped if the client accepts it."""
+    use_gzip = payload.gzipped is not None and "gzip" in request.headers.get("accept-encoding", "")
+    # Each encoding is a different representation, so it needs its own strong ETag
+    etag = f'"{payload.version}-gzip"' if use_gzip else payload.etag
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if payload.gzipped is not None:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzipped, media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+# ---------------------------------------------------------------------------
+# Static responses
+# ---------------------------------------------------------------------------
+
+_static_payloads: Dict[Callable, CachedPayload] = {}
+# Path -> payload of every @precomputed route, for the bootstrap bundle
+_static_routes: Dict[str, CachedPayload] = {}
+
+
+def precomputed(endpoint):
+    """
+    Serve an endpoint's response from bytes built once, at startup.
+
+    Only for endpoints whose response never changes while the app runs. Their
+    parameters may be dependencies (e.g. authentication), which still run on
+    every request, but the response must not depend on them: it is built by
+    calling the endpoint without arguments.
+    """
+    signature = inspect.signature(endpoint)
+    request_parameter = inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+
+    @wraps(endpoint)
+    async def wrapper(request: Request, **kwargs):
+        payload = _static_payloads.get(wrapper)
+        if payload is None:
+            payload = _static_payloads[wrapper] = CachedPayload.from_content(await endpoint())
+        return cached_response(request, payload)
+
+    wrapper.build = endpoint
+    wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), request_parameter])
+    return wrapper
+
+
+async def precompute_static_responses(routes: List) -> None:
+    """Build the responses of every @precomputed route."""
+    started = time.perf_counter()
+    for route in routes:
+        build = getattr(route.endpoint, "build", None) if isinstance(route, APIRoute) else None
+        if build is None:
+            continue
+        payload = _static_payloads.get(route.endpoint)
+        if payload is None:
+            payload = _static_payloads[route.endpoint] = CachedPayload.from_content(await build())
+        _static_routes[route.path] = payload
+    logger.info(f"Precomputed {len(_static_routes)} metadata responses in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+# ---------------------------------------------------------------------------
+# Geo tables
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _GeoEntry:
+    payload: CachedPayload
+    stamp: Tuple
+    built_at: float
+    checked_at: float
+
+
+class GeoTableCache:
+    """A geo table's serialized list, rebuilt when its version stamp changes."""
+
+    def __init__(self, name: str, stamp: Callable[[Session], Tuple], load: Callable[[Session], Any]):
+        self.name = name
+        self.stamp = stamp
+        self.load = load
+        self.lock = threading.Lock()
+        self.entry: Optional[_GeoEntry] = None
+
+    def get(self, db: Session) -> CachedPayload:
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entry
+        if entry and now - entry.checked_at < METADATA_VERSION_CHECK_SECONDS:
+            return entry.payload
+
+        stamp = tuple(self.stamp(db))
+        if entry and stamp == entry.stamp and now - entry.built_at < METADATA_MAX_AGE_SECONDS:
+            entry.checked_at = now
+            return entry.payload
+
+        payload = CachedPayload.from_content(self.load(db))
+        if entry is None or payload.version != entry.payload.version:
+            logger.info(f"Cached {self.name} (version {payload.version})")
+        with self.lock:
+            self.entry = _GeoEntry(payload=payload, stamp=stamp, built_at=now, checked_at=now)
+        return payload
+
+
+def _enabled_count(column):
+    return func.sum(case((column == True, 1), else_=0))
+
+
+geo_countries = GeoTableCache(
+    "countries",
+    stamp=lambda db: db.query(func.count(), _enabled_count(models.GeoCountry.is_enabled)).select_from(models.GeoCountry).one(),
+    load=lambda db: [
+        schemas.GeoCountryResponse.model_validate(country, from_attributes=True)
+        for country in db.query(models.GeoCountry).order_by(models.GeoCountry.name).all()
+    ],
+)
+
+geo_subdivisions = GeoTableCache(
+    "subdivisions",
+    stamp=lambda db: db.query(
+        func.count(), _enabled_count(models.GeoSubdivision.is_enabled), func.max(models.GeoSubdivision.updated_at)
+    ).select_from(models.GeoSubdivision).one(),
+    load=lambda db: [
+        schemas.GeoSubdivisionResponse.model_validate(subdivision, from_attributes=True)
+        for subdivision in db.query(models.GeoSubdivision).order_by(
+            models.GeoSubdivision.country_code, models.GeoSubdivision.name
+        ).all()
+    ],
+)
+
+# Path -> cache of the geo endpoints included in the bootstrap bundle
+GEO_ROUTES = {
+    "/countries/all": geo_countries,
+    "/subdivisions/all": geo_subdivisions,
+}
+
+
+# ---------------------------------------------------------------------------
+# Bootstrap bundle
+# ---------------------------------------------------------------------------
+
+_bootstrap: Optional[Tuple[Tuple[str, ...], CachedPayload]] = None
+_bootstrap_lock = threading.Lock()
+
+
+async def get_bootstrap_payload(request: Request, db: Session) -> CachedPayload:
+    """Every cached response in one payload, keyed by path; rebuilt only when a geo table changes."""
+    global _bootstrap
+
+    if not _static_routes:
+        await precompute_static_responses(request.app.routes)
+    parts = {**_static_routes, **{path: cache.get(db) for path, cache in GEO_ROUTES.items()}}
+    key = tuple(payload.version for payload in parts.values())
+
+    with _bootstrap_lock:
+        if _bootstrap is not None and _bootstrap[0] == key:
+            return _bootstrap[1]
+
+    # Splice the already-encoded bodies instead of serializing everything again
+    body = b"{" + b",".join(
+        json.dumps(path).encode("utf-8") + b":" + payload.body for path, payload in sorted(parts.items())
+    ) + b"}"
+    payload = CachedPayload(body)
+    with _bootstrap_lock:
+        _bootstrap = (key, payload)
+    return payload
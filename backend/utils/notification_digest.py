@@ -0,0 +1,161 @@
+"""
+Digest mode for secretariat notification emails.
+
+Secretariat and admin users who turn on the `notification_digest` preference
+no longer get one email per appointment notification (or BCC copy). Each one
+is stored as a NotificationDigestEntry instead, and a `send_notification_digest`
+job sends everything collected for the user as a single summary email at the
+next digest boundary (every NOTIFICATION_DIGEST_INTERVAL_MINUTES, aligned to
+the clock, so hourly digests go out on the hour).
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+import logging
+import os
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from models.backgroundJob import BackgroundJob
+from models.enums import UserRole
+from models.notificationDigestEntry import NotificationDigestEntry
+from models.user import User
+from utils.jobs import job_task, enqueue
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_DIGEST_INTERVAL_MINUTES = max(1, int(os.getenv('NOTIFICATION_DIGEST_INTERVAL_MINUTES', '60')))
+
+DIGEST_PREFERENCE_KEY = "notification_digest"
+DIGEST_TASK = "send_notification_digest"
+
+
+class NotificationDigestPayload(BaseModel):
+    user_id: int
+
+
+def uses_digest(recipient) -> bool:
+    """Whether notifications to this recipient should be collected into a digest."""
+    return (
+        isinstance(recipient, User)
+        and recipient.id is not None
+        and recipient.role in (UserRole.SECRETARIAT, UserRole.ADMIN)
+        and bool((recipient.email_notification_preferences or {}).get(DIGEST_PREFERENCE_KEY, False))
+    )
+
+
+def next_digest_time(now: Optional[datetime] = None) -> datetime:
+    """The next digest boundary after now (UTC), e.g. the top of the next hour for hourly digests."""
+    now = now or datetime.utcnow()
+    interval = timedelta(minutes=NOTIFICATION_DIGEST_INTERVAL_MINUTES)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight + ((now - midnight) // interval + 1) * interval
+
+
+def _value(value) -> Optional[str]:
+    if value is None:
+        return None
+    return str(getattr(value, 'value', value))
+
+
+def summarize_appointment(appointment: Dict[str, Any]) -> Dict[str, Any]:
+    """The few appointment fields a digest shows, as JSON-safe values."""
+    requester = appointment.get('requester') or {}
+    location = appointment.get('location') or {}
+    dignitaries = [
+        " ".join(filter(None, [ad['dignitary'].get('first_name'), ad['dignitary'].get('last_name')]))
+        for ad in appointment.get('appointment_dignitaries') or []
+        if ad.get('dignitary')
+    ]
+    date = appointment.get('appointment_date') or appointment.get('preferred_date')
+    return {
+        'status': _value(appointment.get('status')),
+        'sub_status': _value(appointment.get('sub_status')),
+        'requester': " ".join(filter(None, [requester.get('first_name'), requester.get('last_name')])) or None,
+        'dignitaries': dignitaries,
+        'location': location.get('name'),
+        'date': date.isoformat() if hasattr(date, 'isoformat') else _value(date),
+        'time': _value(appointment.get('appointment_time')),
+        'purpose': appointment.get('purpose'),
+    }
+
+
+def record_digest_entry(
+    db: Session,
+    user: User,
+    trigger_type: str,
+    subject: str,
+    appointment: Dict[str, Any],
+    delivered_to: Optional[str] = None,
+) -> NotificationDigestEntry:
+    """
+    Hold a notification back for the user's next digest.
+
+    delivered_to is set for BCC copies: the email still goes to its recipient,
+    the digest just records that it was sent. Schedules the digest job if the
+    user does not have one waiting yet.
+    """
+    details = summarize_appointment(appointment)
+    if delivered_to:
+        details['delivered_to'] = delivered_to
+
+    entry = NotificationDigestEntry(
+        user_id=user.id,
+        appointment_id=appointment.get('id'),
+        trigger_type=_value(trigger_type),
+        subject=subject,
+        details=details,
+    )
+    db.add(entry)
+
+    # A running digest has already picked its entries, so only a pending one covers this entry
+    scheduled = db.query(BackgroundJob.id).filter(
+        BackgroundJob.task == DIGEST_TASK,
+        BackgroundJob.status == "pending",
+        BackgroundJob.payload['user_id'].as_integer() == user.id,
+    ).first()
+    if not scheduled:
+        enqueue(DIGEST_TASK, {"user_id": user.id}, db=db, run_at=next_digest_time())
+
+    logger.info(f"Notification '{subject}' added to the digest of {user.email}")
+    return entry
+
+
+@job_task(DIGEST_TASK, payload=NotificationDigestPayload, queue="email")
+def send_notification_digest(db: Session, payload: NotificationDigestPayload) -> None:
+    """Send everything collected for one user as a single email and mark it sent."""
+    from utils.email_notifications import EmailTemplate, render_template, send_email
+
+    entries = db.query(NotificationDigestEntry).filter(
+        NotificationDigestEntry.user_id == payload.user_id,
+        NotificationDigestEntry.sent_at.is_(None),
+    ).order_by(
+        NotificationDigestEntry.created_at, NotificationDigestEntry.id
+    ).with_for_update(skip_locked=True).all()
+    if not entries:
+        return
+
+    user = db.get(User, payload.user_id)
+    if user and user.email:
+        # One section per appointment, showing its latest state and every event since the last digest
+        appointments = OrderedDict()
+        for entry in entries:
+            group = appointments.setdefault(entry.appointment_id, {'id': entry.appointment_id, 'events': []})
+            group['details'] = entry.details
+            group['events'].append(entry)
+
+        subject = f"Appointment digest: {len(entries)} update{'s' if len(entries) != 1 else ''} on {len(appointments)} appointment{'s' if len(appointments) != 1 else ''}"
+        content = render_template(
+            EmailTemplate.NOTIFICATION_DIGEST.value,
+            user_name=user.first_name,
+            appointments=list(appointments.values()),
+            entry_count=len(entries),
+            since=entries[0].created_at,
+        )
+        send_email(user.email, subject, content)
+        logger.info(f"Digest of {len(entries)} notifications queued for {user.email}")
+
+    sent_at = datetime.utcnow()
+    for entry in entries:
+        entry.sent_at = sent_at
@@ -0,0 +1,111 @@
+"""
+Signed QR check-in tokens.
+
+Follows plans/20250121-qr-code-checkin-implementation-plan.md: the QR code holds
+either a bare JWT or the JSON envelope {"uuid", "token", "aid", "type"}, and the
+JWT carries the appointment id (plus an attendee id for per-person badges).
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Optional
+import json
+import os
+import uuid
+
+import jwt
+from jwt.exceptions import InvalidTokenError
+
+QR_SECRET_KEY = os.getenv("QR_SECRET_KEY") or os.getenv("JWT_SECRET_KEY")
+QR_ALGORITHM = "HS256"
+QR_ISSUER = "aolf-gsec"
+QR_ENVELOPE_TYPE = "appointment_checkin"
+# Codes stay valid until this many days after the appointment date (UTC), whatever the location's timezone
+QR_VALID_DAYS_AFTER_APPOINTMENT = 1
+
+
+class QRTokenError(Exception):
+    """Raised when a scanned QR code cannot be trusted."""
+
+
+def get_checkin_qr_expiry(appointment_date: date) -> datetime:
+    """Return when check-in codes for an appointment on the given date expire."""
+    return datetime.combine(appointment_date + timedelta(days=QR_VALID_DAYS_AFTER_APPOINTMENT + 1), time.min)
+
+
+def create_checkin_qr_token(
+    appointment_id: int,
+    expires_at: datetime,
+    appointment_contact_id: Optional[int] = None,
+    appointment_dignitary_id: Optional[int] = None,
+    qr_uuid: Optional[str] = None,
+) -> str:
+    """Create a signed check-in token for an appointment or a single attendee."""
+    payload = {
+        "uuid": qr_uuid or str(uuid.uuid4()),
+        "appointment_id": appointment_id,
+        "generated_at": datetime.utcnow().isoformat(),
+        "expires_at": expires_at.isoformat(),
+        "iss": QR_ISSUER,
+    }
+    if appointment_contact_id is not None:
+        payload["appointment_contact_id"] = appointment_contact_id
+    if appointment_dignitary_id is not None:
+        payload["appointment_dignitary_id"] = appointment_dignitary_id
+    return jwt.encode(payload, QR_SECRET_KEY, algorithm=QR_ALGORITHM)
+
+
+def create_checkin_qr_code(
+    appointment_id: int,
+    expires_at: datetime,
+    appointment_contact_id: Optional[int] = None,
+    appointment_dignitary_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Create the JSON envelope encoded in a check-in QR code."""
+    qr_uuid = str(uuid.uuid4())
+    return {
+        "uuid": qr_uuid,
+        "token": create_checkin_qr_token(
+            appointment_id, expires_at, appointment_contact_id, appointment_dignitary_id, qr_uuid=qr_uuid
+        ),
+        "aid": appointment_id,
+        "type": QR_ENVELOPE_TYPE,
+    }
+
+
+def decode_checkin_qr_token(qr_text: str) -> Dict[str, Any]:
+    """
+    Verify a scanned QR code and return its JWT payload.
+    Raises QRTokenError if the signature, issuer, UUID or expiry does not check out.
+    """
+    qr_text = (qr_text or "").strip()
+    envelope_uuid = None
+    token = qr_text
+    if qr_text.startswith("{"):
+        try:
+            envelope = json.loads(qr_text)
+        except ValueError:
+            raise QRTokenError("Unreadable QR code")
+        token = envelope.get("token") or ""
+        envelope_uuid = envelope.get("uuid")
+
+    try:
+        payload = jwt.decode(token, QR_SECRET_KEY, algorithms=[QR_ALGORITHM], issuer=QR_ISSUER)
+    except InvalidTokenError:
+        raise QRTokenError("Invalid QR code")
+
+    if envelope_uuid and payload.get("uuid") != envelope_uuid:
+        raise QRTokenError("Invalid QR code")
+
+    try:
+        expires_at = datetime.fromisoformat(payload["expires_at"])
+    except (KeyError, TypeError, ValueError):
+        raise QRTokenError("Invalid QR code")
+    if expires_at.tzinfo is not None:
+        expires_at = expires_at.replace(tzinfo=None) - expires_at.utcoffset()
+    if datetime.utcnow() > expires_at:
+        raise QRTokenError("QR code expired")
+
+    if not isinstance(payload.get("appointment_id"), int):
+        raise QRTokenError("Invalid QR code")
+
+    return payload
+
@@ -0,0 +1,186 @@
+"""
+Read-your-writes routing between the Aurora writer and reader.
+
+Responses to requests that committed a write carry an X-Read-After header (the
+commit time, epoch milliseconds). The frontend sends it back on its requests for
+DB_READ_YOUR_WRITES_SECONDS. A read session for such a request goes to the
+reader only if the reader's replication lag shows it has replayed that commit;
+otherwise, or when the lag cannot be measured, it goes to the writer. Requests
+without the header always read from the reader.
+
+The lag is measured on the reader at most every DB_REPLICA_LAG_CHECK_SECONDS,
+and only when a request carries a recent write. DB_REPLICA_LAG_SOURCE selects
+the query: "aurora" (aurora_replica_status) or "postgres" (streaming replication
+replay timestamp).
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+import contextvars
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+READ_AFTER_HEADER = "X-Read-After"
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", 30))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DB_REPLICA_LAG_CHECK_SECONDS", 1))
+REPLICA_LAG_SOURCE = os.getenv("DB_REPLICA_LAG_SOURCE", "aurora")
+
+REPLICA_LAG_QUERIES = {
+    "aurora": (
+        "SELECT replica_lag_in_msec FROM aurora_replica_status() "
+        "WHERE server_id = aurora_db_instance_identifier()"
+    ),
+    "postgres": (
+        "SELECT CASE WHEN pg_is_in_recovery() "
+        "THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) * 1000 ELSE 0 END"
+    ),
+}
+
+
+class RequestWrites:
+    """When the current request last committed a write (epoch seconds)."""
+
+    def __init__(self):
+        self.committed_at: Optional[float] = None
+
+
+# Set per request by the read-your-writes middleware; shared with the endpoint and its dependencies
+request_writes_var: contextvars.ContextVar[Optional[RequestWrites]] = contextvars.ContextVar("request_writes", default=None)
+
+
+def track_writes(db: Session) -> None:
+    """Record the commit time of the session's writes on the current request."""
+    writes = request_writes_var.get()
+    if writes is None:
+        return
+
+    @event.listens_for(db, "after_flush")
+    def flushed(session, flush_context):
+        session.info["wrote"] = True
+
+    @event.listens_for(db, "do_orm_execute")
+    def executed(orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            orm_execute_state.session.info["wrote"] = True
+
+    @event.listens_for(db, "after_commit")
+    def committed(session):
+        if session.info.pop("wrote", False):
+            writes.committed_at = time.time()
+
+    @event.listens_for(db, "after_rollback")
+    def rolled_back(session):
+        session.info.pop("wrote", None)
+
+
+def format_read_after(committed_at: float) -> str:
+    return str(int(committed_at * 1000) + 1)
+
+
+def parse_read_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """The write time from an X-Read-After header, or None if absent, malformed or too old to matter."""
+    if not value:
+        return None
+    try:
+        read_after = int(value) / 1000
+    except ValueError:
+        return None
+    now = now or time.time()
+    if read_after < now - READ_YOUR_WRITES_SECONDS:
+        return None
+    return min(read_after, now)
+
+
+@dataclass
+class ReadRoutingMetrics:
+    """Read session routing counts, since process start."""
+    reads: int = 0
+    reads_after_write: int = 0
+    reader_caught_up: int = 0
+    writer_fallbacks: int = 0
+    lag_checks: int = 0
+    lag_check_errors: int = 0
+    last_lag_ms: Optional[float] = None
+    since: datetime = field(default_factory=datetime.utcnow)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def count(self, **increments) -> None:
+        with self.lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+
+metrics = ReadRoutingMetrics()
+
+
+class ReplicaLag:
+    """The reader's replication lag, measured at most every REPLICA_LAG_CHECK_SECONDS."""
+
+    def __init__(self, query: str):
+        self.query = query
+        self.lock = threading.Lock()
+        self.replayed_until: Optional[float] = None
+        self.checked_at = 0.0
+
+    def _measure(self, engine) -> Optional[float]:
+        metrics.count(lag_checks=1)
+        try:
+            with engine.connect() as conn:
+                lag_ms = conn.execute(text(self.query)).scalar()
+        except Exception as e:
+            metrics.count(lag_check_errors=1)
+            logger.warning(f"Could not measure replica lag: {str(e)}")
+            return None
+        metrics.last_lag_ms = float(lag_ms) if lag_ms is not None else None
+        return metrics.last_lag_ms
+
+    def has_replayed(self, engine, committed_at: float) -> bool:
+        """Whether the reader has replayed everything committed up to committed_at."""
+        with self.lock:
+            now = time.time()
+            if self.replayed_until is not None and self.replayed_until >= committed_at:
+                return True
+            # A fresh measurement can only help if the last one is older than the write
+            if now - self.checked_at >= REPLICA_LAG_CHECK_SECONDS or self.checked_at < committed_at:
+                lag_ms = self._measure(engine)
+                self.checked_at = now
+                self.replayed_until = now - lag_ms / 1000 if lag_ms is not None else None
+            return self.replayed_until is not None and self.replayed_until >= committed_at
+
+
+replica_lag = ReplicaLag(REPLICA_LAG_QUERIES.get(REPLICA_LAG_SOURCE, REPLICA_LAG_SOURCE))
+
+
+def use_reader(read_engine, read_after: Optional[float]) -> bool:
+    """Whether a read session for a request that last wrote at read_after (or never) can use the reader."""
+    if read_after is None:
+        metrics.count(reads=1)
+        return True
+    caught_up = replica_lag.has_replayed(read_engine, read_after)
+    if caught_up:
+        metrics.count(reads=1, reads_after_write=1, reader_caught_up=1)
+    else:
+        metrics.count(reads=1, reads_after_write=1, writer_fallbacks=1)
+    return caught_up
+
+
+def read_routing_stats() -> dict:
+    with metrics.lock:
+        return {
+            "reads": metrics.reads,
+            "reads_after_write": metrics.reads_after_write,
+            "reader_caught_up": metrics.reader_caught_up,
+            "writer_fallbacks": metrics.writer_fallbacks,
+            "fallback_rate": metrics.writer_fallbacks / metrics.reads if metrics.reads else 0.0,
+            "lag_checks": metrics.lag_checks,
+            "lag_check_errors": metrics.lag_check_errors,
+            "last_lag_ms": metrics.last_lag_ms,
+            "since": metrics.since,
+        }
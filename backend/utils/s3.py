@@ -1,11 +1,9 @@
-import boto3
 import os
 import uuid
 import io
 from datetime import datetime
-from botocore.exceptions import ClientError
+from functools import lru_cache
 from fastapi import HTTPException
-from PIL import Image
 
 # Get environment variables directly
 ENV = os.getenv('ENVIRONMENT', 'dev')
@@ -14,13 +12,17 @@ AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-2')
 BUCKET_NAME = os.getenv('S3_BUCKET_NAME')
 
-# Initialize S3 client with the environment variables
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION
-)
+@lru_cache(maxsize=None)
+def get_s3_client():
+    """The S3 client, created on first use (boto3 is slow to import and set up)."""
+    import boto3
+
+    return boto3.client(
+        's3',
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        region_name=AWS_REGION
+    )
 
 if not BUCKET_NAME:
     raise HTTPException(status_code=500, detail="S3_BUCKET_NAME is not set")
@@ -81,6 +83,8 @@ def generate_thumbnail(image_data: bytes, content_type: str) -> bytes:
     - The binary content of the thumbnail or None if generation fails
     """
     try:
+        from PIL import Image
+
         # Open the image using PIL
         img = Image.open(io.BytesIO(image_data))
         
@@ -128,6 +132,8 @@ def upload_file(file_data: bytes, file_name: str, content_type: str, entity_type
     Returns:
     - Dictionary containing S3 path, unique filename, and thumbnail path if applicable
     """
+    from botocore.exceptions import ClientError
+
     try:
         # Generate a unique filename while preserving the original extension
         base_path = os.path.dirname(file_name)
@@ -139,6 +145,7 @@ def upload_file(file_data: bytes, file_name: str, content_type: str, entity_type
         s3_path = f"{ENV}/attachments/{entity_type}/{base_path}/{unique_filename}"
         
         # Upload the original file
+        s3_client = get_s3_client()
         s3_client.put_object(
             Bucket=BUCKET_NAME,
             Key=s3_path,
@@ -187,8 +194,10 @@ def upload_file(file_data: bytes, file_name: str, content_type: str, entity_type
 
 def get_file(file_path: str) -> dict:
     """Get a file from S3"""
+    from botocore.exceptions import ClientError
+
     try:
-        response = s3_client.get_object(
+        response = get_s3_client().get_object(
             Bucket=BUCKET_NAME,
             Key=file_path
         )
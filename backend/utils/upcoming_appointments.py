@@ -0,0 +1,145 @@
+"""
+Upcoming appointments for the secretariat inbox.
+
+An appointment is upcoming when it is not cancelled, rejected or completed and
+its calendar event, single preferred date or preferred date range ends no
+earlier than the cutoff. Written as one OR across appointments and
+calendar_events, Postgres can use no index for that; here it is a UNION ALL of
+three branches that each match exactly one partial/date index and never return
+the same appointment twice:
+
+- scheduled:      on the calendar, by calendar_events.start_date
+- preferred date: not on the calendar, by preferred_date
+- date range:     not on the calendar, by preferred_end_date (and not already
+                  matched by its preferred_date)
+
+Only the ids of the requested page are selected from the union; the
+appointments and their relations are loaded for those ids afterwards.
+"""
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import case, func, literal, or_, select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+import models
+from utils.loader_options import appointment_list_options
+from dependencies.access_control import AccessScope, apply_appointment_access_scope
+
+TERMINAL_STATUSES = [
+    models.AppointmentStatus.CANCELLED,
+    models.AppointmentStatus.REJECTED,
+    models.AppointmentStatus.COMPLETED,
+]
+
+
+def _branch(query, conditions, filters, scope):
+    return apply_appointment_access_scope(query.where(*conditions, *filters), scope)
+
+
+def upcoming_appointments_union(
+    cutoff: date,
+    status: Optional[str] = None,
+    request_types: Optional[List[str]] = None,
+    scope: AccessScope = None,
+):
+    """
+    The UNION ALL of the three branches, as (id, rank, sort_date) rows.
+
+    Ordering by (rank, sort_date, id) gives the inbox order: scheduled appointments by
+    event date, then requests by preferred date, then date ranges by their start.
+    """
+    appointment = models.Appointment
+    filters = [appointment.status.notin_(TERMINAL_STATUSES)]
+    if status:
+        filters.append(appointment.status == status)
+    if request_types:
+        filters.append(appointment.request_type.in_(request_types))
+
+    scheduled = _branch(
+        select(
+            appointment.id.label("id"), literal(0).label("rank"), models.CalendarEvent.start_date.label("sort_date")
+        ).join_from(appointment, models.CalendarEvent, appointment.calendar_event_id == models.CalendarEvent.id),
+        [models.CalendarEvent.start_date >= cutoff],
+        filters,
+        scope,
+    )
+
+    preferred_date = _branch(
+        select(appointment.id, literal(1), appointment.preferred_date),
+        [
+            appointment.calendar_event_id.is_(None),
+            appointment.preferred_date.isnot(None),
+            appointment.preferred_date >= cutoff,
+        ],
+        filters,
+        scope,
+    )
+
+    date_range = _branch(
+        select(
+            appointment.id,
+            case((appointment.preferred_date.isnot(None), 1), else_=2),
+            func.coalesce(appointment.preferred_date, appointment.preferred_start_date),
+        ),
+        [
+            appointment.calendar_event_id.is_(None),
+            appointment.preferred_start_date.isnot(None),
+            appointment.preferred_end_date >= cutoff,
+            # Those are in the preferred date branch already
+            or_(appointment.preferred_date.is_(None), appointment.preferred_date < cutoff),
+        ],
+        filters,
+        scope,
+    )
+
+    return union_all(scheduled, preferred_date, date_range).subquery("upcoming")
+
+
+def encode_cursor(rank: int, sort_date: date, appointment_id: int) -> str:
+    return f"{rank}:{sort_date.isoformat()}:{appointment_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, date, int]:
+    """Parse a cursor from encode_cursor; raises ValueError if it is malformed."""
+    rank, sort_date, appointment_id = cursor.split(":")
+    return int(rank), date.fromisoformat(sort_date), int(appointment_id)
+
+
+def get_upcoming_appointments(
+    db: Session,
+    cutoff: date,
+    status: Optional[str] = None,
+    request_types: Optional[List[str]] = None,
+    scope: AccessScope = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[models.Appointment], Optional[str]]:
+    """
+    Return one page of upcoming appointments, in inbox order, and the cursor for
+    the next page (None on the last page). Without a limit, all of them.
+    """
+    upcoming = upcoming_appointments_union(cutoff, status, request_types, scope)
+    query = select(upcoming.c.id, upcoming.c.rank, upcoming.c.sort_date)
+    if cursor:
+        after = decode_cursor(cursor)
+        query = query.where(tuple_(upcoming.c.rank, upcoming.c.sort_date, upcoming.c.id) > tuple_(*after))
+    query = query.order_by(upcoming.c.rank, upcoming.c.sort_date, upcoming.c.id)
+    if limit:
+        query = query.limit(limit + 1)
+
+    rows = db.execute(query).all()
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].rank, rows[-1].sort_date, rows[-1].id)
+
+    ids = [row.id for row in rows]
+    if not ids:
+        return [], None
+
+    appointments = db.query(models.Appointment).filter(
+        models.Appointment.id.in_(ids)
+    ).options(*appointment_list_options()).all()
+    by_id = {appointment.id: appointment for appointment in appointments}
+    return [by_id[appointment_id] for appointment_id in ids if appointment_id in by_id], next_cursor
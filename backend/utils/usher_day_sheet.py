@@ -0,0 +1,348 @@
+"""
+Precomputed usher day-sheets.
+
+Ushers poll the day-sheet at the door every few seconds. Building it means a
+five-way eager load and one pydantic object per attendee, so the serialized
+sheet is cached per (date range, access scope) and served with a strong ETag.
+Entries are dropped whenever a check-in, appointment or calendar event write is
+committed, and expire after a short TTL so other gunicorn workers never serve a
+stale sheet for long. A sheet whose build overlapped an invalidation is served
+to that request but not cached. Until the reader has replayed the latest
+invalidating write (utils/read_routing.ReplicaLag), sheets are built on the
+writer, so a lagging reader never gets a stale sheet cached under a new ETag.
+
+The delta refresh matches attendees on updated_at, which is stamped with the
+app clock when the row is written, not when it commits or reaches the reader.
+Its cursor therefore trails the read by USHER_CHANGES_OVERLAP_SECONDS, so rows
+committed or replicated late are returned on the next refresh; clients
+de-duplicate attendees by id, keeping the latest updated_at.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+from database import WriteSessionLocal, read_engine, write_engine
+from utils.db_pool import READ_STATEMENT_TIMEOUT_SECONDS, WRITE_STATEMENT_TIMEOUT_SECONDS, set_statement_timeout
+from utils.read_routing import replica_lag
+from utils.loader_options import appointment_list_options
+from dependencies.access_control import AccessScope, apply_appointment_access_scope
+
+logger = logging.getLogger(__name__)
+
+# Cross-worker staleness bound; local writes invalidate immediately
+USHER_DAY_SHEET_TTL_SECONDS = int(os.getenv("USHER_DAY_SHEET_TTL_SECONDS", "15"))
+
+# How far the delta cursor trails the read: the longest a write transaction can
+# run before it commits, plus the worst expected replica lag
+USHER_REPLICA_LAG_SECONDS = int(os.getenv("USHER_REPLICA_LAG_SECONDS", "30"))
+USHER_CHANGES_OVERLAP_SECONDS = int(os.getenv(
+    "USHER_CHANGES_OVERLAP_SECONDS", WRITE_STATEMENT_TIMEOUT_SECONDS + USHER_REPLICA_LAG_SECONDS
+))
+
+# Models whose committed changes can alter an usher day-sheet
+DAY_SHEET_MODELS = (
+    models.Appointment,
+    models.AppointmentContact,
+    models.AppointmentDignitary,
+    models.CalendarEvent,
+)
+
+# Scope key shared by every ADMIN user
+ADMIN_SCOPE = "admin"
+
+# Ushers can see and check in appointments this many days before and after today
+USHER_WINDOW_DAYS = 3
+
+
+class DaySheet:
+    """A serialized day-sheet and its strong ETag."""
+
+    def __init__(self, body: bytes, built_at: float):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.built_at = built_at
+
+    def is_fresh(self) -> bool:
+        return (time.monotonic() - self.built_at) < USHER_DAY_SHEET_TTL_SECONDS
+
+
+_cache: Dict[Tuple[date, date, str], DaySheet] = {}
+_cache_lock = threading.Lock()
+# Bumped by every invalidation, so a build that overlapped one is not cached
+_generation = 0
+# Wall-clock time of the latest invalidation, which is after the write it reflects committed
+_invalidated_at: Optional[float] = None
+
+
+def get_usher_window() -> Tuple[date, date]:
+    """Return the first and last day of appointments ushers can see and check in."""
+    today = datetime.now().date()
+    return today - timedelta(days=USHER_WINDOW_DAYS), today + timedelta(days=USHER_WINDOW_DAYS)
+
+
+def is_open_for_check_in(
+    status: Optional[models.AppointmentStatus],
+    sub_status: Optional[models.AppointmentSubStatus],
+    start_date: Optional[date],
+) -> bool:
+    """Check whether an appointment is scheduled (approved) on a day inside the usher window."""
+    if status != models.AppointmentStatus.APPROVED or sub_status != models.AppointmentSubStatus.SCHEDULED:
+        return False
+    window_start, window_end = get_usher_window()
+    return start_date is not None and window_start <= start_date <= window_end
+
+
+def get_scope_key(scope: AccessScope) -> str:
+    """Return a stable cache key for an access scope."""
+    if scope is None:
+        return ADMIN_SCOPE
+    return "|".join(f"{country_code}:{location_id or '*'}" for country_code, location_id in scope)
+
+
+def build_usher_appointments(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    scope: AccessScope,
+) -> List[schemas.AppointmentUsherView]:
+    """Load approved+scheduled appointments in the date range and convert them to usher views."""
+    if scope is not None and not scope:
+        return []
+
+    # Start building the query with date range filter using calendar_event data
+    query = db.query(models.Appointment).join(models.CalendarEvent).filter(
+        models.CalendarEvent.start_date >= start_date,
+        models.CalendarEvent.start_date <= end_date,
+        # Only show confirmed appointments for the usher view
+        models.Appointment.status == models.AppointmentStatus.APPROVED,
+        models.Appointment.sub_status == models.AppointmentSubStatus.SCHEDULED,
+    )
+    query = apply_appointment_access_scope(query, scope)
+
+    # Add eager loading and ordering
+    query = query.options(
+        *appointment_list_options(models.Appointment.location)
+    ).order_by(
+        models.CalendarEvent.start_date,
+        models.CalendarEvent.start_time
+    )
+
+    appointments = query.all()
+
+    # Transform appointments to use calendar event data only
+    usher_appointments = []
+    for appointment in appointments:
+        # All appointments in usher view must have calendar events (since we filter by approved+scheduled)
+        if not appointment.calendar_event:
+            logger.warning(f"Approved+scheduled appointment {appointment.id} missing calendar event - skipping")
+            continue
+
+        # Use calendar event data exclusively
+        appointment_date = appointment.calendar_event.start_date
+        appointment_time = appointment.calendar_event.start_time
+        location = appointment.calendar_event.location or appointment.location  # Calendar event location takes precedence
+
+        # Convert appointment_contacts to proper usher view format
+        appointment_contacts_usher = []
+        if appointment.appointment_contacts:
+            for ac in appointment.appointment_contacts:
+                # Merge AppointmentContact and UserContact data for usher view (limited fields only)
+                contact_usher_data = {
+                    'id': ac.id,
+                    'created_at': ac.created_at,
+                    'attendance_status': ac.attendance_status,
+                    'checked_in_at': ac.checked_in_at,
+                    **{k: v for k, v in ac.contact.__dict__.items() if k in ['first_name', 'last_name']}  # Ushers only get names
+                }
+                appointment_contacts_usher.append(schemas.AppointmentContactUsherView(**contact_usher_data))
+
+        # Convert appointment_dignitaries to proper usher view format
+        appointment_dignitaries_usher = []
+        if appointment.appointment_dignitaries:
+            for ad in appointment.appointment_dignitaries:
+                # Create DignitaryUsherView object from the dignitary
+                dignitary_usher_view = schemas.DignitaryUsherView(
+                    id=ad.dignitary.id,
+                    honorific_title=ad.dignitary.honorific_title,
+                    first_name=ad.dignitary.first_name,
+                    last_name=ad.dignitary.last_name
+                )
+
+                # Create AppointmentDignitaryUsherView object
+                dignitary_usher_data = {
+                    'id': ad.id,
+                    'appointment_id': ad.appointment_id,
+                    'dignitary_id': ad.dignitary_id,
+                    'created_at': ad.created_at,
+                    'attendance_status': ad.attendance_status,
+                    'dignitary': dignitary_usher_view
+                }
+                appointment_dignitaries_usher.append(schemas.AppointmentDignitaryUsherView(**dignitary_usher_data))
+
+        # Convert requester to RequesterUsherView if present
+        requester_usher_view = None
+        if appointment.requester:
+            requester_usher_view = schemas.RequesterUsherView(
+                first_name=appointment.requester.first_name,
+                last_name=appointment.requester.last_name,
+                phone_number=appointment.requester.phone_number
+            )
+
+        usher_appointment = schemas.AppointmentUsherView(
+            id=appointment.id,
+            appointment_date=appointment_date,
+            appointment_time=appointment_time,
+            requester=requester_usher_view,
+            location=location,
+            appointment_dignitaries=appointment_dignitaries_usher,
+            appointment_contacts=appointment_contacts_usher
+        )
+        usher_appointments.append(usher_appointment)
+
+    return usher_appointments
+
+
+def get_usher_day_sheet(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    scope: AccessScope,
+) -> DaySheet:
+    """Return the cached day-sheet for the date range and scope, building it on a miss."""
+    key = (start_date, end_date, get_scope_key(scope))
+
+    with _cache_lock:
+        day_sheet = _cache.get(key)
+        generation = _generation
+    if day_sheet and day_sheet.is_fresh():
+        return day_sheet
+
+    built_at = time.monotonic()
+    if _reader_is_behind(db):
+        # The reader may not have replayed the write that invalidated the cache yet
+        write_db = WriteSessionLocal()
+        set_statement_timeout(write_db, READ_STATEMENT_TIMEOUT_SECONDS)
+        try:
+            usher_appointments = build_usher_appointments(write_db, start_date, end_date, scope)
+        finally:
+            write_db.close()
+    else:
+        usher_appointments = build_usher_appointments(db, start_date, end_date, scope)
+    body = json.dumps(jsonable_encoder(usher_appointments), separators=(",", ":")).encode("utf-8")
+    day_sheet = DaySheet(body, built_at)
+
+    with _cache_lock:
+        # A write committed during the build may be missing from it
+        if generation == _generation:
+            _cache[key] = day_sheet
+    logger.debug(f"Built usher day-sheet {start_date}..{end_date} for scope {key[2]}: {len(usher_appointments)} appointments")
+    return day_sheet
+
+
+def _reader_is_behind(db: Session) -> bool:
+    """Whether db reads from a reader that has not replayed the latest invalidating write."""
+    invalidated_at = _invalidated_at
+    if invalidated_at is None or read_engine is write_engine or db.get_bind() is not read_engine:
+        return False
+    return not replica_lag.has_replayed(read_engine, invalidated_at)
+
+
+def invalidate_usher_day_sheets() -> None:
+    """Drop every cached day-sheet."""
+    global _generation, _invalidated_at
+    with _cache_lock:
+        _generation += 1
+        _invalidated_at = time.time()
+        if _cache:
+            logger.debug(f"Invalidating {len(_cache)} cached usher day-sheets")
+        _cache.clear()
+
+
+def get_changes_cursor() -> datetime:
+    """Return the `since` for the client's next delta refresh, trailing now by USHER_CHANGES_OVERLAP_SECONDS."""
+    return datetime.utcnow() - timedelta(seconds=USHER_CHANGES_OVERLAP_SECONDS)
+
+
+def get_changed_attendees(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    scope: AccessScope,
+    since: datetime,
+) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Return (contact rows, dignitary rows) for attendees in the day-sheet whose
+    attendance changed after `since`. Only the check-in columns are selected.
+    """
+    if scope is not None and not scope:
+        return [], []
+
+    def scoped(query, attendee):
+        query = query.join(
+            models.Appointment, attendee.appointment_id == models.Appointment.id
+        ).join(
+            models.CalendarEvent, models.Appointment.calendar_event_id == models.CalendarEvent.id
+        ).filter(
+            models.CalendarEvent.start_date >= start_date,
+            models.CalendarEvent.start_date <= end_date,
+            models.Appointment.status == models.AppointmentStatus.APPROVED,
+            models.Appointment.sub_status == models.AppointmentSubStatus.SCHEDULED,
+            attendee.updated_at > since,
+        )
+        return apply_appointment_access_scope(query, scope)
+
+    contact_rows = scoped(db.query(
+        models.AppointmentContact.id,
+        models.AppointmentContact.appointment_id,
+        models.AppointmentContact.attendance_status,
+        models.AppointmentContact.checked_in_at,
+        models.AppointmentContact.updated_at,
+    ), models.AppointmentContact).all()
+
+    dignitary_rows = scoped(db.query(
+        models.AppointmentDignitary.id,
+        models.AppointmentDignitary.appointment_id,
+        models.AppointmentDignitary.attendance_status,
+        models.AppointmentDignitary.checked_in_at,
+        models.AppointmentDignitary.updated_at,
+    ), models.AppointmentDignitary).all()
+
+    return contact_rows, dignitary_rows
+
+
+def mark_usher_day_sheet_dirty(session: Session) -> None:
+    """Flag a transaction that changes day-sheet rows through bulk statements the ORM does not track."""
+    session.info["usher_day_sheet_dirty"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_day_sheet_changes(session, flush_context):
+    """Remember whether this transaction touched anything shown on a day-sheet."""
+    if session.info.get("usher_day_sheet_dirty"):
+        return
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(instance, DAY_SHEET_MODELS):
+            session.info["usher_day_sheet_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("usher_day_sheet_dirty", False):
+        invalidate_usher_day_sheets()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_on_rollback(session):
+    session.info.pop("usher_day_sheet_dirty", None)
@@ -0,0 +1,311 @@
+"""
+Offline sync for usher devices.
+
+Devices download a compact snapshot of the day's attendees, record check-ins
+locally while the venue has no connectivity, and upload the queued operations
+in one request when they reconnect. Conflicting operations are merged with
+last-writer-wins on the time the usher acted: a check-in is stamped with its
+checked_in_at, and a reset only wins over a check-in that happened before it.
+Every applied or conflicting operation is written to the audit log. Operations
+for appointments no longer approved and scheduled within the usher window are
+rejected.
+"""
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+from utils.audit_log import audit
+from dependencies.access_control import AccessScope, apply_appointment_access_scope, scope_allows
+from utils.usher_day_sheet import is_open_for_check_in
+
+SYNC_MODELS = {
+    schemas.UsherSyncAttendeeKind.CONTACT: models.AppointmentContact,
+    schemas.UsherSyncAttendeeKind.DIGNITARY: models.AppointmentDignitary,
+}
+
+AUDIT_ENTITY_TYPES = {
+    schemas.UsherSyncAttendeeKind.CONTACT: "appointment_contact",
+    schemas.UsherSyncAttendeeKind.DIGNITARY: "appointment_dignitary",
+}
+
+
+def _scheduled_appointments(query, start_date: date, end_date: date, scope):
+    """Restrict a query joined to appointments to the usher window and access scope."""
+    query = query.join(
+        models.CalendarEvent, models.Appointment.calendar_event_id == models.CalendarEvent.id
+    ).filter(
+        models.CalendarEvent.start_date >= start_date,
+        models.CalendarEvent.start_date <= end_date,
+        models.Appointment.status == models.AppointmentStatus.APPROVED,
+        models.Appointment.sub_status == models.AppointmentSubStatus.SCHEDULED,
+    )
+    return apply_appointment_access_scope(query, scope)
+
+
+def build_sync_snapshot(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    scope: AccessScope,
+) -> schemas.UsherSyncSnapshot:
+    """Build the offline snapshot with column-only queries (no ORM entities)."""
+    server_time = datetime.utcnow()
+    appointments = []
+    attendees = []
+
+    if scope is None or scope:
+        appointment_rows = _scheduled_appointments(
+            db.query(
+                models.Appointment.id,
+                models.CalendarEvent.start_date,
+                models.CalendarEvent.start_time,
+                models.Appointment.location_id,
+            ),
+            start_date, end_date, scope,
+        ).order_by(models.CalendarEvent.start_date, models.CalendarEvent.start_time).all()
+        appointments = [
+            schemas.UsherSyncAppointment(
+                id=row.id,
+                appointment_date=row.start_date,
+                appointment_time=row.start_time,
+                location_id=row.location_id,
+            )
+            for row in appointment_rows
+        ]
+
+        contact_rows = _scheduled_appointments(
+            db.query(
+                models.AppointmentContact.id,
+                models.AppointmentContact.appointment_id,
+                models.UserContact.first_name,
+                models.UserContact.last_name,
+                models.AppointmentContact.attendance_status,
+                models.AppointmentContact.checked_in_at,
+                models.AppointmentContact.updated_at,
+            ).join(
+                models.UserContact, models.AppointmentContact.contact_id == models.UserContact.id
+            ).join(
+                models.Appointment, models.AppointmentContact.appointment_id == models.Appointment.id
+            ),
+            start_date, end_date, scope,
+        ).all()
+        attendees.extend(
+            schemas.UsherSyncAttendee(
+                kind=schemas.UsherSyncAttendeeKind.CONTACT,
+                id=row.id,
+                appointment_id=row.appointment_id,
+                first_name=row.first_name,
+                last_name=row.last_name,
+                attendance_status=row.attendance_status,
+                checked_in_at=row.checked_in_at,
+                version=row.updated_at,
+            )
+            for row in contact_rows
+        )
+
+        dignitary_rows = _scheduled_appointments(
+            db.query(
+                models.AppointmentDignitary.id,
+                models.AppointmentDignitary.appointment_id,
+                models.Dignitary.honorific_title,
+                models.Dignitary.first_name,
+                models.Dignitary.last_name,
+                models.AppointmentDignitary.attendance_status,
+                models.AppointmentDignitary.checked_in_at,
+                models.AppointmentDignitary.updated_at,
+            ).join(
+                models.Dignitary, models.AppointmentDignitary.dignitary_id == models.Dignitary.id
+            ).join(
+                models.Appointment, models.AppointmentDignitary.appointment_id == models.Appointment.id
+            ),
+            start_date, end_date, scope,
+        ).all()
+        attendees.extend(
+            schemas.UsherSyncAttendee(
+                kind=schemas.UsherSyncAttendeeKind.DIGNITARY,
+                id=row.id,
+                appointment_id=row.appointment_id,
+                honorific_title=row.honorific_title,
+                first_name=row.first_name,
+                last_name=row.last_name,
+                attendance_status=row.attendance_status,
+                checked_in_at=row.checked_in_at,
+                version=row.updated_at,
+            )
+            for row in dignitary_rows
+        )
+
+    versions = {kind.value: None for kind in SYNC_MODELS}
+    for attendee in attendees:
+        current = versions[attendee.kind.value]
+        if attendee.version and (current is None or attendee.version > current):
+            versions[attendee.kind.value] = attendee.version
+
+    return schemas.UsherSyncSnapshot(
+        start_date=start_date,
+        end_date=end_date,
+        server_time=server_time,
+        versions=versions,
+        appointments=appointments,
+        attendees=attendees,
+    )
+
+
+def _to_utc_naive(value: datetime, now: datetime) -> datetime:
+    """Convert a device timestamp to naive UTC, never later than the server clock."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(value, now)
+
+
+def _attendee_state(kind: schemas.UsherSyncAttendeeKind, attendee) -> schemas.UsherSyncAttendee:
+    return schemas.UsherSyncAttendee(
+        kind=kind,
+        id=attendee.id,
+        appointment_id=attendee.appointment_id,
+        attendance_status=attendee.attendance_status,
+        checked_in_at=attendee.checked_in_at,
+        version=attendee.updated_at,
+    )
+
+
+def _resolve(operation: schemas.UsherSyncOperation, attendee, acted_at: datetime) -> schemas.UsherSyncOperationStatus:
+    """Decide an operation against the attendee's current state (last writer wins)."""
+    Status = schemas.UsherSyncOperationStatus
+    checked_in = attendee.attendance_status == models.AttendanceStatus.CHECKED_IN
+
+    if operation.attendance_status == models.AttendanceStatus.CHECKED_IN:
+        if checked_in:
+            return Status.UNCHANGED
+        # A reset the device has not seen, recorded after this scan, is the later write
+        base_version = operation.base_version
+        if base_version is not None and base_version.tzinfo is not None:
+            base_version = base_version.astimezone(timezone.utc).replace(tzinfo=None)
+        if base_version is not None and attendee.updated_at \
+                and attendee.updated_at > base_version and attendee.updated_at > acted_at:
+            return Status.CONFLICT
+        return Status.APPLIED
+
+    if not checked_in:
+        return Status.UNCHANGED
+    # The device undid a check-in; it wins only if it acted after the recorded check-in
+    if attendee.checked_in_at and attendee.checked_in_at > acted_at:
+        return Status.CONFLICT
+    return Status.APPLIED
+
+
+def merge_offline_operations(
+    db: Session,
+    current_user: models.User,
+    upload: schemas.UsherSyncUpload,
+    scope: AccessScope,
+    client_ip: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> List[schemas.UsherSyncOperationResult]:
+    """
+    Apply queued offline operations in timestamp order and record audit log entries.
+    The caller commits. Attendee rows are locked for the rest of the transaction so
+    concurrent uploads from several devices merge deterministically.
+    """
+    Status = schemas.UsherSyncOperationStatus
+    now = datetime.utcnow()
+
+    # One locked query per attendee table
+    ids_by_kind: Dict[schemas.UsherSyncAttendeeKind, set] = {kind: set() for kind in SYNC_MODELS}
+    for operation in upload.operations:
+        ids_by_kind[operation.kind].add(operation.id)
+
+    attendees = {}
+    for kind, model in SYNC_MODELS.items():
+        if ids_by_kind[kind]:
+            for attendee in db.query(model).filter(model.id.in_(ids_by_kind[kind])).with_for_update().all():
+                attendees[(kind, attendee.id)] = attendee
+
+    appointment_ids = {attendee.appointment_id for attendee in attendees.values()}
+    appointment_rows = {
+        row.id: row
+        for row in db.query(
+            models.Appointment.id,
+            models.Appointment.location_id,
+            models.Location.country_code,
+            models.Appointment.status,
+            models.Appointment.sub_status,
+            models.CalendarEvent.start_date,
+        ).outerjoin(
+            models.Location, models.Appointment.location_id == models.Location.id
+        ).outerjoin(
+            models.CalendarEvent, models.Appointment.calendar_event_id == models.CalendarEvent.id
+        ).filter(models.Appointment.id.in_(appointment_ids)).all()
+    } if appointment_ids else {}
+
+    results: Dict[int, schemas.UsherSyncOperationResult] = {}
+    # Replay in the order the ushers acted so the last writer wins within the upload too
+    ordered = sorted(
+        enumerate(upload.operations),
+        key=lambda item: (_to_utc_naive(item[1].client_timestamp, now), item[0]),
+    )
+    for index, operation in ordered:
+        attendee = attendees.get((operation.kind, operation.id))
+        if not attendee:
+            results[index] = schemas.UsherSyncOperationResult(op_id=operation.op_id, status=Status.NOT_FOUND)
+            continue
+
+        appointment = appointment_rows.get(attendee.appointment_id)
+        if not appointment or not scope_allows(scope, appointment.country_code, appointment.location_id):
+            results[index] = schemas.UsherSyncOperationResult(op_id=operation.op_id, status=Status.FORBIDDEN)
+            continue
+        # Devices may hold snapshots of appointments since cancelled or moved out of the window
+        if not is_open_for_check_in(appointment.status, appointment.sub_status, appointment.start_date):
+            results[index] = schemas.UsherSyncOperationResult(op_id=operation.op_id, status=Status.REJECTED)
+            continue
+
+        acted_at = _to_utc_naive(operation.client_timestamp, now)
+        status = _resolve(operation, attendee, acted_at)
+        previous_state = {
+            "attendance_status": attendee.attendance_status.value if attendee.attendance_status else None,
+            "checked_in_at": attendee.checked_in_at.isoformat() if attendee.checked_in_at else None,
+        }
+
+        if status == Status.APPLIED:
+            attendee.attendance_status = operation.attendance_status
+            if operation.attendance_status == models.AttendanceStatus.CHECKED_IN:
+                attendee.checked_in_at = acted_at
+                attendee.checked_in_by = current_user.id
+            else:
+                attendee.checked_in_at = None
+                attendee.checked_in_by = None
+            attendee.updated_by = current_user.id
+            attendee.updated_at = now
+
+        if status in (Status.APPLIED, Status.CONFLICT):
+            audit(
+                db,
+                entity_type=AUDIT_ENTITY_TYPES[operation.kind],
+                entity_id=attendee.id,
+                action="offline_sync" if status == Status.APPLIED else "offline_sync_conflict",
+                previous_state=previous_state,
+                new_state={
+                    "attendance_status": operation.attendance_status.value,
+                    "client_timestamp": acted_at.isoformat(),
+                },
+                client_ip=client_ip,
+                user_agent=user_agent,
+                user_id=current_user.id,
+                notes=f"device={upload.device_id} op={operation.op_id}",
+            )
+
+        results[index] = schemas.UsherSyncOperationResult(op_id=operation.op_id, status=status)
+
+    db.flush()
+
+    # Report the merged server state so devices can overwrite their local copy
+    for index, operation in enumerate(upload.operations):
+        result = results[index]
+        attendee = attendees.get((operation.kind, operation.id))
+        if attendee and result.status not in (Status.NOT_FOUND, Status.FORBIDDEN, Status.REJECTED):
+            result.attendee = _attendee_state(operation.kind, attendee)
+
+    return [results[index] for index in range(len(upload.operations))]
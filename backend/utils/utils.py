@@ -395,3 +395,11 @@ def format_date_range(start_date: Union[str, date], end_date: Union[str, date])
     except Exception as e:
         # Fallback to simple string concatenation if parsing fails
         return f"{start_date} - {end_date}"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against a strong ETag."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
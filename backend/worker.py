@@ -0,0 +1,55 @@
+"""
+Standalone background job worker.
+
+Runs the jobs of utils/jobs.py outside the web process, so web workers only
+enqueue (the default; RUN_JOBS_IN_PROCESS=true runs them in the web app
+instead). Deployed as the `worker` process of the Procfile; locally, run:
+
+    python -m worker                      # all queues
+    python -m worker --queue email        # only some queues (repeatable)
+"""
+import argparse
+import logging
+import signal
+import threading
+
+from config import environment  # Import the centralized environment module
+
+# Importing these modules registers their job tasks
+import utils.email_notifications  # noqa: F401
+import utils.calendar_sync  # noqa: F401
+import utils.appointment_side_effects  # noqa: F401
+import utils.notification_digest  # noqa: F401
+from utils.email_notifications import precompile_email_templates
+from utils.jobs import QUEUES, start_job_worker, stop_job_worker
+from utils.audit_log import start_audit_log_writer, stop_audit_log_writer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds to let running jobs finish on shutdown; unfinished ones are reclaimed later
+SHUTDOWN_TIMEOUT = 30
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument("--queue", action="append", choices=sorted(QUEUES), help="Queue to run (default: all)")
+    args = parser.parse_args()
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    precompile_email_templates()
+    start_job_worker(args.queue)
+    start_audit_log_writer()
+    logger.info(f"Worker running queues: {', '.join(args.queue or QUEUES)}")
+    stopping.wait()
+
+    logger.info("Worker shutting down")
+    stop_job_worker(timeout=SHUTDOWN_TIMEOUT)
+    stop_audit_log_writer()
+
+
+if __name__ == "__main__":
+    main()
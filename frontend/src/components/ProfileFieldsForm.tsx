@@ -53,6 +53,7 @@ const DEFAULT_PREFERENCES: NotificationPreferences = {
   appointment_updated: true,
   new_appointment_request: false,
   bcc_on_all_emails: false,
+  notification_digest: false,
 };
 
 export const ProfileFieldsForm = forwardRef<ProfileFieldsFormRef, ProfileFieldsFormProps>(({
@@ -182,6 +183,7 @@ export const ProfileFieldsForm = forwardRef<ProfileFieldsFormRef, ProfileFieldsF
         appointment_updated: userPrefs.appointment_updated ?? DEFAULT_PREFERENCES.appointment_updated,
         new_appointment_request: userPrefs.new_appointment_request ?? DEFAULT_PREFERENCES.new_appointment_request,
         bcc_on_all_emails: userPrefs.bcc_on_all_emails ?? DEFAULT_PREFERENCES.bcc_on_all_emails,
+        notification_digest: userPrefs.notification_digest ?? DEFAULT_PREFERENCES.notification_digest,
       });
     }
   }, [initialData]);
@@ -306,6 +308,8 @@ export const ProfileFieldsForm = forwardRef<ProfileFieldsFormRef, ProfileFieldsF
         return 'When new appointment requests are created (Secretariat only)';
       case 'bcc_on_all_emails':
         return 'Receive BCC copies of all appointment-related emails sent to users (Secretariat only)';
+      case 'notification_digest':
+        return 'Send the above as a periodic digest email instead of one email each (Secretariat only)';
       default:
         return key;
     }
@@ -535,7 +539,7 @@ export const ProfileFieldsForm = forwardRef<ProfileFieldsFormRef, ProfileFieldsF
             <Grid container spacing={2}>
               {Object.keys(notificationPreferences).map((key) => {
                 // Only show secretariat-specific options to secretariat users
-                if ((key === 'new_appointment_request' || key === 'bcc_on_all_emails') && 
+                if ((key === 'new_appointment_request' || key === 'bcc_on_all_emails' || key === 'notification_digest') && 
                     initialData?.role !== 'SECRETARIAT' && initialData?.role !== 'ADMIN') {
                   return null;
                 }
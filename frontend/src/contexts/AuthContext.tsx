@@ -15,6 +15,7 @@ interface UserInfo {
     appointment_updated: boolean;
     new_appointment_request: boolean;
     bcc_on_all_emails: boolean;
+    notification_digest: boolean;
   };
   
   // Professional Information (consistent with dignitary model)
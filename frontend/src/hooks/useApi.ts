@@ -1,6 +1,12 @@
 import axios from 'axios';
 import { useMemo } from 'react';
 
+// Read-your-writes: the API returns X-Read-After on requests that saved something.
+// Sending it back for a while keeps our reads off a database replica that has not caught up yet.
+const READ_AFTER_HEADER = 'X-Read-After';
+const READ_AFTER_TTL_MS = 30000;
+let readAfter: { value: string; receivedAt: number } | null = null;
+
 export function useApi() {
   const api = useMemo(() => {
     const instance = axios.create({
@@ -16,11 +22,21 @@ export function useApi() {
         config.headers = config.headers || {};
         config.headers.Authorization = `Bearer ${token}`;
       }
+      if (readAfter && Date.now() - readAfter.receivedAt < READ_AFTER_TTL_MS) {
+        config.headers = config.headers || {};
+        config.headers[READ_AFTER_HEADER] = readAfter.value;
+      }
       return config;
     });
 
     instance.interceptors.response.use(
-      (response) => response,
+      (response) => {
+        const value = response.headers?.[READ_AFTER_HEADER.toLowerCase()];
+        if (value) {
+          readAfter = { value, receivedAt: Date.now() };
+        }
+        return response;
+      },
       (error) => {
         if (error.response?.status === 401) {
           localStorage.removeItem('accessToken');
@@ -493,6 +493,7 @@ export interface NotificationPreferences {
   appointment_updated: boolean;
   new_appointment_request: boolean;
   bcc_on_all_emails: boolean;
+  notification_digest: boolean;
 }
 
 export interface UserUpdateData {
@@ -13,7 +13,7 @@ export interface User {
   picture?: string;
   country_code?: string;
   role: UserRole;
-  // Available preferences: appointment_created, appointment_updated, new_appointment_request, bcc_on_all_emails (Secretariat only)
+  // Available preferences: appointment_created, appointment_updated, new_appointment_request, bcc_on_all_emails, notification_digest (Secretariat only)
   email_notification_preferences?: Record<string, boolean>;
   
   // Professional Information (consistent with dignitary model)